@@ -0,0 +1,157 @@
+"""
+Configuration benchmark: the time to load a configuration of thousands of inputs and build its dataflow.
+
+    python -m benchmarks.config --inputs 5000 --output config.json
+
+The configuration has one Prometheus input per customer, querying that customer only, and every input shares the
+same filters, as generated per-customer configurations do. Two customers share each slaOS key.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import structlog
+
+from benchmarks.startup import git_revision
+from src.config.manager import RatedIndexerYamlConfig
+from src.indexers.dataflow import build_dataflow, parse_config
+from src.indexers.filters import manager as filter_manager
+from src.indexers.offset_tracker.factory import get_offset_tracker
+
+
+def build_raw_config(inputs: int) -> Dict[str, Any]:
+    return {
+        "inputs": [
+            {
+                "integration": "prometheus",
+                "slaos_key": f"customer_{i // 2}",
+                "type": "metrics",
+                "prometheus": {
+                    "base_url": "http://prometheus:9090",
+                    "queries": [
+                        {
+                            "query": f'sum(rate(requests_total{{customer="{i}"}}[5m])) by (customer)',
+                            "slaos_metric_name": "requests_rate",
+                            "organization_identifier": "customer",
+                        }
+                    ],
+                },
+                "filters": {
+                    "version": 1,
+                    "fields": [
+                        {"key": "customer", "field_type": "string", "path": "customer"}
+                    ],
+                },
+                "offset": {
+                    "type": "slaos",
+                    # Starts from the configuration instead of querying the slaOS API
+                    "override_start_from": True,
+                    "start_from": 1_723_041_096_000,
+                    "start_from_type": "bigint",
+                    "slaos": {
+                        "ingestion_id": "ingestion_id",
+                        "ingestion_key": "ingestion_key",
+                        "ingestion_url": "https://api.rated.co/v1/ingest",
+                        "datastream_filter": {"key": f"customer_{i // 2}"},
+                    },
+                },
+            }
+            for i in range(inputs)
+        ],
+        "output": {"type": "null"},
+        "secrets": {"use_secrets_manager": False},
+    }
+
+
+def timed(stages: Dict[str, float], name: str, function: Callable[[], Any]) -> Any:
+    started = time.perf_counter()
+    result = function()
+    stages[name] = (time.perf_counter() - started) * 1_000
+    return result
+
+
+def run(inputs: int) -> Dict[str, Any]:
+    raw_config = build_raw_config(inputs)
+    parsers_before = len(filter_manager._shared_parsers)
+
+    stages: Dict[str, float] = {}
+    config = timed(stages, "validate", lambda: RatedIndexerYamlConfig(**raw_config))
+    dataflow_inputs, output_type, sink_builder = timed(
+        stages, "parse_config", lambda: parse_config(config)
+    )
+    timed(
+        stages,
+        "build_dataflow",
+        lambda: build_dataflow(dataflow_inputs, output_type, sink_builder),
+    )
+    # What the partitions look up when the dataflow starts
+    timed(
+        stages,
+        "offset_trackers",
+        lambda: [
+            get_offset_tracker(slaos_key, config_index, config)
+            for slaos_key, members in config.inputs_by_slaos_key().items()
+            for config_index in range(len(members))
+        ],
+    )
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "inputs": inputs,
+        "stages_ms": stages,
+        "total_ms": sum(stages.values()),
+        "parsers": len(filter_manager._shared_parsers) - parsers_before,
+        "peak_rss_mb": peak / (1024 * 1024 if sys.platform == "darwin" else 1024),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.config")
+    parser.add_argument(
+        "--inputs", type=int, default=5_000, help="Inputs of the configuration"
+    )
+    parser.add_argument("--output", help="Path of the JSON results file")
+    parser.add_argument(
+        "--log-level", default="error", help="Level of the indexer logs"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    # Building the flow logs a line per input
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(
+            logging.getLevelName(args.log_level.upper())
+        )
+    )
+
+    result = run(args.inputs)
+    for name, milliseconds in result["stages_ms"].items():
+        print(f"{name:<16} {milliseconds:>9.0f} ms")
+    print(
+        f"{'total':<16} {result['total_ms']:>9.0f} ms  {result['peak_rss_mb']:.1f} MB  "
+        f"{result['parsers']} parser(s) for {result['inputs']} inputs"
+    )
+
+    if args.output:
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "result": result,
+        }
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
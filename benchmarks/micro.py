@@ -0,0 +1,402 @@
+"""
+Micro-benchmarks of the per-event hot path, timed on fixed corpora and compared against stored baselines.
+
+    python -m benchmarks.micro                     # Fails when a case regresses beyond the threshold
+    python -m benchmarks.micro --update-baseline   # Records the current costs as the new baseline
+
+Costs are compared relative to a calibration loop timed in the same run, so that a baseline recorded on one
+machine still catches regressions on another one of a different speed.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import structlog
+from rated_parser.payloads.log_patterns import LogFormat  # type: ignore
+
+from benchmarks.pipeline import JSON_LOG_FILTER, RAW_TEXT_LOG_FILTER
+from benchmarks.upstreams import Workload, json_log, raw_text_log, sample_value
+from src.config.models.filters import LogFilterConfig
+from src.config.models.inputs.input import IdempotencyKeyAlgorithm, InputTypes
+from src.config.models.output import RatedOutputConfig
+from src.indexers.filters.manager import FilterManager
+from src.indexers.filters.router import LogPatternRouter
+from src.indexers.filters.types import (
+    FilteredEvent,
+    LogEntry,
+    MetricEntry,
+    MetricIdempotencyKeyGenerator,
+    generate_idempotency_key,
+)
+from src.indexers.sinks.rated import _HTTPSinkPartition
+from src.utils.time_conversion import from_milliseconds
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "micro.json")
+DEFAULT_THRESHOLD = 0.25
+START_MS = 1_730_376_000_000
+LABEL_COUNTS = (0, 4, 16)
+ROUTED_SUBSTRINGS = 256
+
+
+@dataclass(frozen=True)
+class MicroBenchmark:
+    name: str
+    # Builds the corpus of `size` events, and returns the function processing all of them
+    setup: Callable[[int], Callable[[], Any]]
+
+
+CASES: Dict[str, MicroBenchmark] = {}
+
+
+def case(name: str):
+    def register(setup: Callable[[int], Callable[[], Any]]):
+        CASES[name] = MicroBenchmark(name, setup)
+        return setup
+
+    return register
+
+
+def cloudwatch_logs(size: int, raw_text: bool = False) -> List[Dict[str, Any]]:
+    workload = Workload(entries=size)
+    return [
+        {
+            "eventId": f"event_{i}",
+            "timestamp": START_MS + i,
+            "logStreamName": "benchmark",
+            "message": (
+                raw_text_log(workload, i)
+                if raw_text
+                else json.dumps(json_log(workload, i))
+            ),
+        }
+        for i in range(size)
+    ]
+
+
+def datadog_logs(size: int) -> List[Dict[str, Any]]:
+    workload = Workload(entries=size)
+    return [
+        {
+            "id": f"event_{i}",
+            "attributes": {
+                "attributes": json_log(workload, i),
+                "service": "benchmark",
+                "status": "info",
+                "tags": ["env:benchmark"],
+                "timestamp": from_milliseconds(START_MS + i).replace(tzinfo=None),
+            },
+        }
+        for i in range(size)
+    ]
+
+
+def prometheus_samples(size: int, label_count: int) -> List[MetricEntry]:
+    workload = Workload(entries=size)
+    return [
+        MetricEntry.from_prometheus_metric(
+            {
+                "organization_identifier": "organization_id",
+                "organization_id": workload.organization_id(i),
+                "timestamp": from_milliseconds(START_MS + i * 1_000),
+                "value": sample_value(i),
+                "slaos_metric_name": "http_request_rate",
+                "labels": {
+                    f"label_{n}": f"value_{(i + n) % 10}" for n in range(label_count)
+                },
+            }
+        )
+        for i in range(size)
+    ]
+
+
+def filtered_events(size: int) -> List[FilteredEvent]:
+    workload = Workload(entries=size)
+    return [
+        FilteredEvent(
+            slaos_key="benchmark",
+            idempotency_key=f"event_{i}",
+            timestamp_ms=START_MS + i,
+            organization_id=workload.organization_id(i),
+            values=json_log(workload, i)["data"],
+        )
+        for i in range(size)
+    ]
+
+
+def log_filter_manager(log_filter: Dict[str, Any]) -> FilterManager:
+    return FilterManager(
+        LogFilterConfig(**log_filter), "benchmark", InputTypes.LOGS  # type: ignore[arg-type]
+    )
+
+
+@case("log_entry.from_cloudwatch_log.json")
+def from_cloudwatch_json(size: int) -> Callable[[], Any]:
+    logs = cloudwatch_logs(size)
+    return lambda: [LogEntry.from_cloudwatch_log(log) for log in logs]
+
+
+@case("log_entry.from_cloudwatch_log.raw_text")
+def from_cloudwatch_raw_text(size: int) -> Callable[[], Any]:
+    logs = cloudwatch_logs(size, raw_text=True)
+    return lambda: [
+        LogEntry.from_cloudwatch_log(log, LogFormat.RAW_TEXT) for log in logs
+    ]
+
+
+@case("log_entry.from_datadog_log")
+def from_datadog(size: int) -> Callable[[], Any]:
+    logs = datadog_logs(size)
+    return lambda: [LogEntry.from_datadog_log(log) for log in logs]
+
+
+@case("filter.parse_and_filter_log.json")
+def parse_json_logs(size: int) -> Callable[[], Any]:
+    filter_manager = log_filter_manager(JSON_LOG_FILTER)
+    entries = [LogEntry.from_cloudwatch_log(log) for log in cloudwatch_logs(size)]
+    return lambda: [filter_manager.parse_and_filter_log(entry) for entry in entries]
+
+
+@case("filter.parse_and_filter_log.raw_text")
+def parse_raw_text_logs(size: int) -> Callable[[], Any]:
+    filter_manager = log_filter_manager(RAW_TEXT_LOG_FILTER)
+    entries = [
+        LogEntry.from_cloudwatch_log(log, LogFormat.RAW_TEXT)
+        for log in cloudwatch_logs(size, raw_text=True)
+    ]
+    return lambda: [filter_manager.parse_and_filter_log(entry) for entry in entries]
+
+
+@case(f"router.route.substrings_{ROUTED_SUBSTRINGS}")
+def route_substrings(size: int) -> Callable[[], Any]:
+    router = LogPatternRouter(
+        [
+            LogFilterConfig(
+                **{  # type: ignore[arg-type]
+                    **RAW_TEXT_LOG_FILTER,
+                    "version": version,
+                    "route": {"substring": f"duration_ms={version}"},
+                }
+            )
+            for version in range(ROUTED_SUBSTRINGS)
+        ]
+    )
+    entries = [
+        LogEntry.from_cloudwatch_log(log, LogFormat.RAW_TEXT)
+        for log in cloudwatch_logs(size, raw_text=True)
+    ]
+    return lambda: [router.route(entry) for entry in entries]
+
+
+def register_metric_cases(label_count: int) -> None:
+    @case(f"filter.parse_and_filter_metrics.labels_{label_count}")
+    def parse_metrics(size: int) -> Callable[[], Any]:
+        filter_manager = FilterManager(None, "benchmark", InputTypes.METRICS)
+        samples = prometheus_samples(size, label_count)
+        return lambda: [
+            filter_manager.parse_and_filter_metrics(sample) for sample in samples
+        ]
+
+    @case(f"idempotency_key.metric.labels_{label_count}")
+    def metric_keys(size: int) -> Callable[[], Any]:
+        generator = MetricIdempotencyKeyGenerator(IdempotencyKeyAlgorithm.BLAKE2B)
+        samples = prometheus_samples(size, label_count)
+        return lambda: [
+            generator.generate(
+                sample.timestamp_ms,
+                sample.organization_id,
+                sample.metric_name,
+                sample.value,
+                sample.labels or {},
+            )
+            for sample in samples
+        ]
+
+
+for label_count in LABEL_COUNTS:
+    register_metric_cases(label_count)
+
+
+@case("idempotency_key.sha256_json")
+def sha256_json_keys(size: int) -> Callable[[], Any]:
+    events = filtered_events(size)
+    return lambda: [
+        generate_idempotency_key(
+            event.event_timestamp, event.organization_id, event.values
+        )
+        for event in events
+    ]
+
+
+@case("sink.compose_body")
+def compose_body(size: int) -> Callable[[], Any]:
+    partition = _HTTPSinkPartition(
+        RatedOutputConfig(
+            ingestion_id="benchmark",
+            ingestion_key="benchmark",
+            ingestion_url="https://ingestion.benchmark/v1/ingest",
+        ),
+        "benchmark",
+        0,
+    )
+    events = filtered_events(size)
+    return lambda: partition._compose_body(events)
+
+
+def calibrate() -> Callable[[], Any]:
+    """
+    A fixed pure Python workload, timed alongside the cases to normalize their costs for the machine speed.
+    """
+    values = [{"key": f"value_{i}", "count": i} for i in range(10_000)]
+    return lambda: sorted(
+        (json.dumps(value), hash(str(value["count"]))) for value in values
+    )
+
+
+def best_time_ns(function: Callable[[], Any], rounds: int) -> int:
+    """
+    The fastest of `rounds` timed calls, the one least disturbed by the rest of the machine.
+    """
+    function()  # Warms up caches and lazy initialization
+    elapsed = []
+    for _ in range(rounds):
+        started = time.perf_counter_ns()
+        function()
+        elapsed.append(time.perf_counter_ns() - started)
+    return min(elapsed)
+
+
+def measure(names: List[str], size: int = 2_000, rounds: int = 7) -> Dict[str, float]:
+    """
+    Returns the cost per event of each case, in nanoseconds.
+    """
+    return {
+        name: best_time_ns(CASES[name].setup(size), rounds) / size for name in names
+    }
+
+
+@dataclass
+class Comparison:
+    name: str
+    ns_per_event: float
+    baseline_ns_per_event: Optional[float]
+    change: Optional[
+        float
+    ]  # Relative change of the normalized cost, positive when slower
+
+    def regressed(self, threshold: float) -> bool:
+        return self.change is not None and self.change > threshold
+
+
+def compare(
+    costs: Dict[str, float], calibration_ns: float, baseline: Dict[str, Any]
+) -> List[Comparison]:
+    scale = baseline["calibration_ns"] / calibration_ns
+    comparisons = []
+    for name, ns_per_event in costs.items():
+        baseline_ns_per_event = baseline["cases"].get(name)
+        change = (
+            ns_per_event * scale / baseline_ns_per_event - 1
+            if baseline_ns_per_event
+            else None
+        )
+        comparisons.append(
+            Comparison(name, ns_per_event, baseline_ns_per_event, change)
+        )
+    return comparisons
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.micro")
+    parser.add_argument(
+        "--case",
+        action="append",
+        choices=sorted(CASES),
+        help="Case to run, can be repeated. Defaults to all of them.",
+    )
+    parser.add_argument("--size", type=int, default=2_000, help="Events in each corpus")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Relative slowdown of a case failing the run",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Record the costs measured as the new baseline",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    names = args.case or sorted(CASES)
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING)
+    )
+
+    # Calibrated both before and after the cases, in case the machine got busier in between
+    calibration_ns = float(best_time_ns(calibrate(), args.rounds))
+    costs = measure(names, args.size, args.rounds)
+    calibration_ns = min(calibration_ns, best_time_ns(calibrate(), args.rounds))
+
+    if args.update_baseline:
+        baseline: Dict[str, Any] = {"cases": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+            # Cases kept from the previous baseline are rescaled to the calibration of this run
+            scale = calibration_ns / baseline["calibration_ns"]
+            baseline["cases"] = {
+                name: cost * scale for name, cost in baseline["cases"].items()
+            }
+        baseline["cases"].update(costs)
+        baseline.update(
+            calibration_ns=calibration_ns,
+            created_at=datetime.now(timezone.utc).isoformat(),
+            python=platform.python_version(),
+        )
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        for name, cost in costs.items():
+            print(f"{name:<45} {cost:>10.0f} ns/event")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    regressions = 0
+    for comparison in compare(costs, calibration_ns, baseline):
+        if comparison.change is None:
+            status = "no baseline"
+        else:
+            status = f"{comparison.change:+.1%}"
+        if comparison.regressed(args.threshold):
+            regressions += 1
+            status += "  REGRESSED"
+        print(
+            f"{comparison.name:<45} {comparison.ns_per_event:>10.0f} ns/event  {status}"
+        )
+
+    if regressions:
+        print(
+            f"{regressions} case(s) regressed by more than {args.threshold:.0%} against {args.baseline}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,429 @@
+"""
+End-to-end throughput benchmarks: each scenario runs the dataflow built by `build_dataflow` for one input, fetching
+from a synthetic upstream through the real client, and writing into a null or fake slaOS sink.
+"""
+
+import resource
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from bytewax.outputs import DynamicSink, StatelessSinkPartition
+from bytewax.testing import TestingSource, run_main
+
+from benchmarks.upstreams import (
+    CloudwatchLogsUpstream,
+    CloudwatchMetricsUpstream,
+    DatadogUpstream,
+    PrometheusUpstream,
+    Workload,
+)
+from src.config.models.filters import LogFilterConfig
+from src.config.models.inputs.cloudwatch import CloudwatchConfig
+from src.config.models.inputs.datadog import DatadogConfig
+from src.config.models.inputs.input import InputTypes, IntegrationTypes
+from src.config.models.inputs.prometheus import PrometheusConfig
+from src.config.models.output import OutputTypes, RatedOutputConfig
+from src.indexers.dataflow import (
+    DataflowInput,
+    build_dataflow,
+    client_manager,
+    fetch_logs,
+    fetch_metrics,
+)
+from src.indexers.filters.manager import FilterManager
+from src.indexers.sinks.null import build_null_sink
+from src.indexers.sinks.rated import HTTPSink, _HTTPSinkPartition
+from src.indexers.sources.rated import TimeRange
+
+START_MS = 1_730_376_000_000  # 2024-10-31 12:00:00 UTC
+TIME_RANGE_MS = 60_000
+SLAOS_KEY = "benchmark"
+
+
+class SinkTypes(str, Enum):
+    NULL = "null"
+    FAKE = "fake"  # The slaOS HTTP sink, posting to an in-process transport
+
+
+JSON_LOG_FILTER = {
+    "version": 1,
+    "log_format": "json_dict",
+    "log_example": {
+        "level": "INFO",
+        "data": {
+            "organization_id": "org_a",
+            "path": "/api/items",
+            "status": 200,
+            "duration_ms": 12,
+        },
+    },
+    "fields": [
+        {"key": "level", "field_type": "string", "path": "level"},
+        {
+            "key": "organization_id",
+            "field_type": "string",
+            "path": "data.organization_id",
+        },
+        {"key": "path", "field_type": "string", "path": "data.path"},
+        {"key": "status", "field_type": "integer", "path": "data.status"},
+        {"key": "duration_ms", "field_type": "integer", "path": "data.duration_ms"},
+    ],
+}
+
+RAW_TEXT_LOG_FILTER = {
+    "version": 1,
+    "log_format": "raw_text",
+    "log_example": "level=INFO org=org_a path=/api/items status=503 duration_ms=47",
+    "fields": [
+        {"key": "level", "value": "INFO", "field_type": "string"},
+        {"key": "organization_id", "value": "org_a", "field_type": "string"},
+        {"key": "path", "value": "/api/items", "field_type": "string"},
+        {"key": "status", "value": "503", "field_type": "integer"},
+        {"key": "duration_ms", "value": "47", "field_type": "integer"},
+    ],
+}
+
+
+def cloudwatch_config(workload: Workload) -> CloudwatchConfig:
+    return CloudwatchConfig(
+        region="us-east-1",
+        aws_access_key_id="benchmark",
+        aws_secret_access_key="benchmark",
+        logs_config={"log_group_name": "benchmark"},  # type: ignore[arg-type]
+        metrics_config={  # type: ignore[arg-type]
+            "namespace": "Benchmark",
+            "metric_name": "Latency",
+            "period": 60,
+            "statistic": "AVERAGE",
+            "organization_identifier": "organization_id",
+            "metric_queries": [
+                [
+                    {"name": "organization_id", "value": organization_id},
+                    {"name": "instance", "value": instance},
+                ]
+                for organization_id, instance in workload.series_keys()
+            ],
+        },
+    )
+
+
+def datadog_config(workload: Workload) -> DatadogConfig:
+    return DatadogConfig(
+        site="datadoghq.com",
+        api_key="benchmark",
+        app_key="benchmark",
+        logs_config={},  # type: ignore[arg-type]
+        metrics_config={  # type: ignore[arg-type]
+            "metric_name": "latency",
+            "interval": 60,
+            "statistic": "AVERAGE",
+            "organization_identifier": "organization_id",
+            "metric_tag_data": [
+                {
+                    "customer_value": organization_id,
+                    "tag_string": f"organization_id:{organization_id},instance:{instance}",
+                }
+                for organization_id, instance in workload.series_keys()
+            ],
+        },
+    )
+
+
+def prometheus_config(workload: Workload) -> PrometheusConfig:
+    return PrometheusConfig(
+        base_url="http://prometheus.benchmark:9090",  # type: ignore[arg-type]
+        queries=[
+            {  # type: ignore[list-item]
+                "query": "rate(http_requests_total[1m])",
+                "step": {"value": 15, "unit": "s"},
+                "slaos_metric_name": "requests_per_second",
+                "organization_identifier": "organization_id",
+            }
+        ],
+    )
+
+
+@dataclass(frozen=True)
+class Scenario:
+    integration_type: IntegrationTypes
+    input_type: InputTypes
+    config: Callable[[Workload], Any]
+    upstream: Callable[[Workload], Any]
+    log_filter: Optional[Dict[str, Any]] = None
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "cloudwatch_json_logs": Scenario(
+        IntegrationTypes.CLOUDWATCH,
+        InputTypes.LOGS,
+        cloudwatch_config,
+        CloudwatchLogsUpstream,
+        JSON_LOG_FILTER,
+    ),
+    "cloudwatch_raw_text_logs": Scenario(
+        IntegrationTypes.CLOUDWATCH,
+        InputTypes.LOGS,
+        cloudwatch_config,
+        partial(CloudwatchLogsUpstream, raw_text=True),
+        RAW_TEXT_LOG_FILTER,
+    ),
+    "datadog_json_logs": Scenario(
+        IntegrationTypes.DATADOG,
+        InputTypes.LOGS,
+        datadog_config,
+        DatadogUpstream,
+        JSON_LOG_FILTER,
+    ),
+    "cloudwatch_metrics": Scenario(
+        IntegrationTypes.CLOUDWATCH,
+        InputTypes.METRICS,
+        cloudwatch_config,
+        CloudwatchMetricsUpstream,
+    ),
+    "datadog_metrics": Scenario(
+        IntegrationTypes.DATADOG,
+        InputTypes.METRICS,
+        datadog_config,
+        DatadogUpstream,
+    ),
+    "prometheus_metrics": Scenario(
+        IntegrationTypes.PROMETHEUS,
+        InputTypes.METRICS,
+        prometheus_config,
+        PrometheusUpstream,
+    ),
+}
+
+
+class StageTimings:
+    """
+    Wall-clock durations of each call to a pipeline stage, in seconds.
+    """
+
+    def __init__(self) -> None:
+        self.durations: Dict[str, List[float]] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.durations.setdefault(stage, []).append(seconds)
+
+    def timed_pages(self, stage: str, pages):
+        """
+        Times the production of each page of an iterator, leaving out the time spent by the consumer.
+        """
+        iterator = iter(pages)
+        while True:
+            started = time.perf_counter()
+            try:
+                page = next(iterator)
+            except StopIteration:
+                return
+            self.record(stage, time.perf_counter() - started)
+            yield page
+
+    def timed_call(self, stage: str, function: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+
+        return timed
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {
+                "calls": len(durations),
+                "p50_ms": percentile(durations, 50) * 1_000,
+                "p99_ms": percentile(durations, 99) * 1_000,
+                "total_ms": sum(durations) * 1_000,
+            }
+            for stage, durations in self.durations.items()
+        }
+
+
+def percentile(values: List[float], rank: float) -> float:
+    """
+    Nearest-rank percentile of `values`.
+    """
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(rank / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class _MeasuredSinkPartition(StatelessSinkPartition):
+    def __init__(self, partition: StatelessSinkPartition, result: "BenchmarkResult"):
+        self.partition = partition
+        self.result = result
+
+    def write_batch(self, items: List[Any]) -> None:
+        started = time.perf_counter()
+        self.partition.write_batch(items)
+        self.result.timings.record("sink", time.perf_counter() - started)
+        self.result.events += sum(
+            len(item) if isinstance(item, list) else 1 for item in items
+        )
+
+    def close(self) -> None:
+        self.partition.close()
+
+
+class MeasuredSink(DynamicSink):
+    """
+    Counts the events reaching the wrapped sink, and times its writes.
+    """
+
+    def __init__(self, sink: DynamicSink, result: "BenchmarkResult"):
+        self.sink = sink
+        self.result = result
+
+    def build(self, step_id: str, worker_index: int, worker_count: int):
+        partition = self.sink.build(step_id, worker_index, worker_count)
+        return _MeasuredSinkPartition(partition, self.result)
+
+
+class FakeIngestionSink(HTTPSink):
+    """
+    The slaOS HTTP sink, with its client posting to an in-process transport accepting every batch.
+    """
+
+    def build(self, step_id: str, worker_index: int, worker_count: int):
+        partition = _HTTPSinkPartition(self.config, self.slaos_key, worker_index)
+        partition.client.close()
+        partition.client = httpx.Client(
+            transport=httpx.MockTransport(lambda request: httpx.Response(202))
+        )
+        return partition
+
+
+def build_sink(sink_type: SinkTypes) -> DynamicSink:
+    if sink_type == SinkTypes.NULL:
+        return build_null_sink()
+    return FakeIngestionSink(
+        RatedOutputConfig(
+            ingestion_id="benchmark",
+            ingestion_key="benchmark",
+            ingestion_url="https://ingestion.benchmark/v1/ingest",
+        ),
+        SLAOS_KEY,
+    )
+
+
+@dataclass
+class BenchmarkResult:
+    scenario: str
+    sink: str
+    entries_per_time_range: int
+    time_ranges: int
+    organizations: int
+    label_values: int
+    events: int = 0
+    seconds: float = 0.0
+    events_per_second: float = 0.0
+    peak_rss_mb: float = 0.0
+    stages: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    timings: StageTimings = field(default_factory=StageTimings, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        del result["timings"]
+        return result
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_scenario(
+    name: str,
+    workload: Workload,
+    time_ranges: int = 5,
+    sink_type: SinkTypes = SinkTypes.NULL,
+) -> BenchmarkResult:
+    """
+    Runs one scenario to completion on a single worker. Peak RSS is the high-water mark of the whole process,
+    so scenarios should each run in a fresh process to be compared.
+    """
+    scenario = SCENARIOS[name]
+    result = BenchmarkResult(
+        scenario=name,
+        sink=sink_type.value,
+        entries_per_time_range=workload.entries,
+        time_ranges=time_ranges,
+        organizations=workload.organizations,
+        label_values=workload.label_values,
+    )
+    timings = result.timings
+
+    filter_manager = FilterManager(
+        (
+            LogFilterConfig(**scenario.log_filter)  # type: ignore[arg-type]
+            if scenario.log_filter
+            else None
+        ),
+        SLAOS_KEY,
+        scenario.input_type,
+    )
+    if scenario.input_type == InputTypes.LOGS:
+        assert scenario.log_filter is not None
+        fetcher: Callable = partial(
+            fetch_logs, log_format=scenario.log_filter["log_format"]
+        )
+        filter_logic: Callable = filter_manager.parse_and_filter_log_batch
+    else:
+        fetcher = fetch_metrics
+        filter_logic = filter_manager.parse_and_filter_metrics_batch
+
+    def timed_fetcher(time_range, client_id, integration_type):
+        return timings.timed_pages(
+            "fetch", fetcher(time_range, client_id, integration_type)
+        )
+
+    source = TestingSource(
+        [
+            TimeRange(
+                start_time=START_MS + i * TIME_RANGE_MS,
+                end_time=START_MS + (i + 1) * TIME_RANGE_MS,
+            )
+            for i in range(time_ranges)
+        ]
+    )
+    dataflow_input = DataflowInput(
+        scenario.integration_type,
+        scenario.input_type,
+        scenario.config(workload),
+        source,
+        timed_fetcher,
+        timings.timed_call("filter", filter_logic),
+        SLAOS_KEY,
+    )
+
+    known_clients = set(client_manager.clients)
+    flow = build_dataflow(
+        [dataflow_input],
+        OutputTypes.NULL,
+        lambda prefix: MeasuredSink(build_sink(sink_type), result),
+    )
+    upstream = scenario.upstream(workload)
+    for client_id in client_manager.clients.keys() - known_clients:
+        upstream.install(client_manager.clients[client_id])
+
+    started = time.perf_counter()
+    try:
+        run_main(flow)
+    finally:
+        for client_id in client_manager.clients.keys() - known_clients:
+            del client_manager.clients[client_id]
+    result.seconds = time.perf_counter() - started
+
+    result.events_per_second = result.events / result.seconds if result.seconds else 0
+    result.peak_rss_mb = peak_rss_mb()
+    result.stages = timings.summary()
+    return result
@@ -0,0 +1,125 @@
+"""
+Runs the end-to-end benchmarks, each scenario in a fresh process, and writes the results as JSON.
+
+    python -m benchmarks --entries 50000 --time-ranges 5 --sink fake --output results.json
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import subprocess
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import structlog
+
+from benchmarks.pipeline import SCENARIOS, SinkTypes, run_scenario
+from benchmarks.upstreams import Workload
+
+
+def run_in_process(
+    name: str,
+    workload: Workload,
+    time_ranges: int,
+    sink_type: SinkTypes,
+    log_level: str,
+) -> Dict[str, Any]:
+    warnings.filterwarnings("ignore", message="Using unstable operation")
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(
+            logging.getLevelName(log_level.upper())
+        )
+    )
+    return run_scenario(name, workload, time_ranges, sink_type).to_dict()
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Scenario to run, can be repeated. Defaults to all of them.",
+    )
+    parser.add_argument(
+        "--entries",
+        type=int,
+        default=20_000,
+        help="Log entries or metric samples served per time range",
+    )
+    parser.add_argument("--time-ranges", type=int, default=5)
+    parser.add_argument("--organizations", type=int, default=100)
+    parser.add_argument(
+        "--label-values",
+        type=int,
+        default=10,
+        help="Metric series per organization",
+    )
+    parser.add_argument(
+        "--sink", type=SinkTypes, choices=list(SinkTypes), default=SinkTypes.NULL
+    )
+    parser.add_argument("--log-level", default="warning")
+    parser.add_argument("--output", help="Path of the JSON results file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    workload = Workload(
+        entries=args.entries,
+        organizations=args.organizations,
+        label_values=args.label_values,
+    )
+
+    results = []
+    for name in args.scenario or list(SCENARIOS):
+        # A fresh process per scenario, so that peak RSS and warm caches are not carried over
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            result = executor.submit(
+                run_in_process,
+                name,
+                workload,
+                args.time_ranges,
+                args.sink,
+                args.log_level,
+            ).result()
+        results.append(result)
+
+        stages = "  ".join(
+            f"{stage} p50={timing['p50_ms']:.2f}ms p99={timing['p99_ms']:.2f}ms"
+            for stage, timing in result["stages"].items()
+        )
+        print(
+            f"{name:<26} {result['events_per_second']:>12,.0f} events/s  "
+            f"{result['peak_rss_mb']:>7.1f} MB  {stages}"
+        )
+
+    if args.output:
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
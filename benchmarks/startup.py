@@ -0,0 +1,150 @@
+"""
+Startup benchmark: the import time and memory of the indexer, for each integration, sink and offset backend.
+
+    python -m benchmarks.startup --repeat 5 --output startup.json
+
+Each scenario imports `src.main`, then loads what one deployment would configure through the registries, in a fresh
+interpreter. The other integrations must not be imported, the results report which heavy packages were loaded.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# Registry lookups of each scenario, as the `module:attribute` path of the registry and the key loaded
+SCENARIOS: Dict[str, List[Tuple[str, str]]] = {
+    "core": [],
+    "cloudwatch": [("src.clients.manager:CLIENTS", "cloudwatch")],
+    "datadog": [("src.clients.manager:CLIENTS", "datadog")],
+    "prometheus": [("src.clients.manager:CLIENTS", "prometheus")],
+    "rated_sink": [("src.indexers.sinks:SINKS", "rated")],
+    "postgres_offsets": [
+        ("src.indexers.offset_tracker.factory:OFFSET_TRACKERS", "postgres")
+    ],
+    "redis_offsets": [("src.indexers.offset_tracker.factory:OFFSET_TRACKERS", "redis")],
+    "slaos_offsets": [("src.indexers.offset_tracker.factory:OFFSET_TRACKERS", "slaos")],
+}
+
+HEAVY_PACKAGES = (
+    "boto3",
+    "datadog_api_client",
+    "rated_exporter_sdk",
+    "sqlalchemy",
+    "redis",
+    "httpx",
+    "sentry_sdk",
+    "opentelemetry.sdk",
+)
+
+
+def measure_startup(name: str) -> Dict[str, Any]:
+    """
+    Runs in the fresh interpreter of a scenario, the imports of this module are all from the standard library.
+    """
+    import resource
+    import time
+    from importlib import import_module
+
+    started = time.perf_counter()
+    import src.main  # noqa: F401
+
+    main_seconds = time.perf_counter() - started
+    for registry_path, key in SCENARIOS[name]:
+        module_name, _, attribute = registry_path.partition(":")
+        getattr(import_module(module_name), attribute).get(key)
+    total_seconds = time.perf_counter() - started
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "scenario": name,
+        "main_import_ms": main_seconds * 1_000,
+        "import_ms": total_seconds * 1_000,
+        # Linux reports kilobytes, macOS bytes
+        "peak_rss_mb": peak / (1024 * 1024 if sys.platform == "darwin" else 1024),
+        "modules": len(sys.modules),
+        "heavy_packages": [name for name in HEAVY_PACKAGES if name in sys.modules],
+    }
+
+
+def run_scenario(name: str) -> Dict[str, Any]:
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import json, sys\n"
+            "from benchmarks.startup import measure_startup\n"
+            f"json.dump(measure_startup({name!r}), sys.stdout)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout)
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    The median of each measurement over the runs of a scenario.
+    """
+    summary = dict(runs[0])
+    for key in ("main_import_ms", "import_ms", "peak_rss_mb"):
+        summary[key] = statistics.median(run[key] for run in runs)
+    summary["runs"] = len(runs)
+    return summary
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Scenario to run, can be repeated. Defaults to all of them.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Fresh interpreters per scenario"
+    )
+    parser.add_argument("--output", help="Path of the JSON results file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+
+    results = []
+    for name in args.scenario or list(SCENARIOS):
+        result = summarize([run_scenario(name) for _ in range(args.repeat)])
+        results.append(result)
+        print(
+            f"{name:<18} {result['import_ms']:>8.0f} ms  {result['peak_rss_mb']:>7.1f} MB  "
+            f"{result['modules']:>5} modules  {', '.join(result['heavy_packages']) or '-'}"
+        )
+
+    if args.output:
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""
+Synthetic upstream APIs, served through stubbed transports so that benchmarks exercise the real client code:
+request building, response deserialization and pagination, down to the HTTP layer of each SDK.
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+import urllib3
+from botocore.awsrequest import AWSResponse  # type: ignore
+
+from src.clients.cloudwatch import CloudwatchClient
+from src.clients.datadog import DatadogClient
+from src.clients.prometheus import PrometheusClientWrapper
+
+PATHS = ("/api/items", "/api/orders", "/api/users", "/health")
+STATUSES = (200, 200, 200, 201, 404, 500)
+LOG_LEVELS = ("INFO", "INFO", "WARN", "ERROR")
+
+
+@dataclass(frozen=True)
+class Workload:
+    """
+    The volume and cardinality served by an upstream for each fetched time range.
+    """
+
+    entries: int  # Log entries or metric samples per time range
+    organizations: int = 100
+    label_values: int = (
+        10  # Metrics only: series per organization, told apart by a label
+    )
+    page_size: Optional[int] = None  # Defaults to the page size of each API
+
+    def organization_id(self, i: int) -> str:
+        return f"org_{i % self.organizations}"
+
+    def timestamps_ms(self, start_ms: int, end_ms: int, count: int) -> List[int]:
+        step = (end_ms - start_ms) / max(count, 1)
+        return [start_ms + int(i * step) for i in range(count)]
+
+    def series_keys(self) -> List[Tuple[str, str]]:
+        return [
+            (f"org_{i}", f"instance_{j}")
+            for i in range(self.organizations)
+            for j in range(self.label_values)
+        ]
+
+
+def json_log(workload: Workload, i: int) -> Dict[str, Any]:
+    return {
+        "level": LOG_LEVELS[i % len(LOG_LEVELS)],
+        "data": {
+            "organization_id": workload.organization_id(i),
+            "path": PATHS[i % len(PATHS)],
+            "status": STATUSES[i % len(STATUSES)],
+            "duration_ms": i % 250,
+        },
+    }
+
+
+def raw_text_log(workload: Workload, i: int) -> str:
+    values = json_log(workload, i)
+    data = values["data"]
+    return (
+        f"level={values['level']} org={data['organization_id']} path={data['path']} "
+        f"status={data['status']} duration_ms={data['duration_ms']}"
+    )
+
+
+def sample_value(i: int) -> float:
+    return float(i % 1_000) / 10
+
+
+class _Body:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def stream(self, **kwargs) -> Iterator[bytes]:
+        yield self.content
+
+
+class CloudwatchLogsUpstream:
+    """
+    Answers `FilterLogEvents` with JSON or raw text log events, paginated with `nextToken`.
+    """
+
+    def __init__(self, workload: Workload, raw_text: bool = False):
+        self.workload = workload
+        self.raw_text = raw_text
+
+    def install(self, client: CloudwatchClient) -> None:
+        client.logs_client.meta.events.register("before-send", self.respond)
+
+    def respond(self, request, **kwargs) -> AWSResponse:
+        params = json.loads(request.body)
+        start = int(params.get("nextToken", 0))
+        stop = min(
+            start + (self.workload.page_size or params["limit"]), self.workload.entries
+        )
+        timestamps = self.workload.timestamps_ms(
+            params["startTime"], params["endTime"], self.workload.entries
+        )
+
+        events = []
+        for i in range(start, stop):
+            message = (
+                raw_text_log(self.workload, i)
+                if self.raw_text
+                else json.dumps(json_log(self.workload, i))
+            )
+            events.append(
+                {
+                    "logStreamName": "benchmark",
+                    "timestamp": timestamps[i],
+                    "ingestionTime": timestamps[i],
+                    "message": message,
+                    "eventId": f"{params['startTime']}_{i}",
+                }
+            )
+
+        body: Dict[str, Any] = {"events": events}
+        if stop < self.workload.entries:
+            body["nextToken"] = str(stop)
+        return AWSResponse(
+            request.url,
+            200,
+            {"Content-Type": "application/x-amz-json-1.1"},
+            _Body(json.dumps(body).encode()),
+        )
+
+
+class CloudwatchMetricsUpstream:
+    """
+    Answers `GetMetricData` with one series per requested query, spread evenly over the requested time range.
+    """
+
+    def __init__(self, workload: Workload):
+        self.workload = workload
+
+    def install(self, client: CloudwatchClient) -> None:
+        client.metrics_client.meta.events.register("before-send", self.respond)
+
+    def respond(self, request, **kwargs) -> AWSResponse:
+        body = (
+            request.body.decode() if isinstance(request.body, bytes) else request.body
+        )
+        params = {key: values[0] for key, values in parse_qs(body).items()}
+        query_ids = [
+            value
+            for key, value in params.items()
+            if key.startswith("MetricDataQueries.member.") and key.endswith(".Id")
+        ]
+        start_ms, end_ms = (
+            int(datetime.fromisoformat(params[key]).timestamp() * 1000)
+            for key in ("StartTime", "EndTime")
+        )
+
+        samples = max(1, self.workload.entries // max(len(query_ids), 1))
+        timestamps = [
+            datetime.fromtimestamp(timestamp_ms / 1000, timezone.utc).isoformat(
+                timespec="milliseconds"
+            )
+            for timestamp_ms in self.workload.timestamps_ms(start_ms, end_ms, samples)
+        ]
+        timestamp_members = "".join(f"<member>{t}</member>" for t in timestamps)
+
+        results = []
+        for n, query_id in enumerate(query_ids):
+            values = "".join(
+                f"<member>{sample_value(n + i)}</member>" for i in range(samples)
+            )
+            results.append(
+                f"<member><Id>{query_id}</Id><Label>{query_id}</Label>"
+                f"<Timestamps>{timestamp_members}</Timestamps><Values>{values}</Values>"
+                "<StatusCode>Complete</StatusCode></member>"
+            )
+
+        content = (
+            '<GetMetricDataResponse xmlns="http://monitoring.amazonaws.com/doc/2010-08-01/">'
+            f"<GetMetricDataResult><MetricDataResults>{''.join(results)}</MetricDataResults>"
+            "</GetMetricDataResult><ResponseMetadata><RequestId>benchmark</RequestId>"
+            "</ResponseMetadata></GetMetricDataResponse>"
+        )
+        return AWSResponse(
+            request.url, 200, {"Content-Type": "text/xml"}, _Body(content.encode())
+        )
+
+
+class _DatadogPoolManager:
+    """
+    Stands in for the urllib3 pool manager of the Datadog SDK, so the SDK still builds and deserializes
+    every request and response.
+    """
+
+    def __init__(self, upstream: "DatadogUpstream"):
+        self.upstream = upstream
+
+    def request(self, method: str, url: str, body=None, **kwargs):
+        path = urlparse(url).path
+        if path.endswith("/logs/events/search"):
+            payload = self.upstream.logs_page(json.loads(body))
+        else:
+            payload = self.upstream.metrics_response(json.loads(body))
+        return urllib3.HTTPResponse(
+            body=json.dumps(payload).encode(),
+            status=200,
+            headers={"Content-Type": "application/json"},
+            preload_content=True,
+        )
+
+    def clear(self) -> None:
+        return None
+
+
+class DatadogUpstream:
+    """
+    Answers log searches with JSON log events paginated by cursor, and timeseries queries with one series per
+    metric query.
+    """
+
+    def __init__(self, workload: Workload):
+        self.workload = workload
+
+    def install(self, client: DatadogClient) -> None:
+        client.client.rest_client.pool_manager = _DatadogPoolManager(self)
+
+    def logs_page(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        start_ms = int(request["filter"]["from"])
+        end_ms = int(request["filter"]["to"])
+        page = request.get("page", {})
+        start = int(page.get("cursor", 0))
+        stop = min(
+            start + (self.workload.page_size or page["limit"]), self.workload.entries
+        )
+        timestamps = self.workload.timestamps_ms(
+            start_ms, end_ms, self.workload.entries
+        )
+
+        data = []
+        for i in range(start, stop):
+            values = json_log(self.workload, i)
+            timestamp = datetime.fromtimestamp(timestamps[i] / 1000, timezone.utc)
+            data.append(
+                {
+                    "id": f"{start_ms}_{i}",
+                    "type": "log",
+                    "attributes": {
+                        "attributes": values,
+                        "message": json.dumps(values),
+                        "service": "benchmark",
+                        "status": values["level"].lower(),
+                        "tags": ["env:benchmark"],
+                        "timestamp": timestamp.isoformat().replace("+00:00", "Z"),
+                    },
+                }
+            )
+
+        meta: Dict[str, Any] = {"status": "done"}
+        if stop < self.workload.entries:
+            meta["page"] = {"after": str(stop)}
+        return {"data": data, "meta": meta}
+
+    def metrics_response(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        attributes = request["data"]["attributes"]
+        queries = attributes["queries"]
+        samples = max(1, self.workload.entries // max(len(queries), 1))
+        times = self.workload.timestamps_ms(
+            attributes["from"], attributes["to"], samples
+        )
+
+        return {
+            "data": {
+                "type": "timeseries_response",
+                "attributes": {
+                    "series": [
+                        {"group_tags": [], "query_index": i, "unit": None}
+                        for i in range(len(queries))
+                    ],
+                    "times": times,
+                    "values": [
+                        [sample_value(i + n) for n in range(samples)]
+                        for i in range(len(queries))
+                    ],
+                },
+            }
+        }
+
+
+class _PrometheusAdapter(requests.adapters.BaseAdapter):
+    def __init__(self, upstream: "PrometheusUpstream"):
+        super().__init__()
+        self.upstream = upstream
+
+    def send(
+        self,
+        request,
+        stream=False,
+        timeout=None,
+        verify=True,
+        cert=None,
+        proxies=None,
+    ) -> requests.Response:
+        params = {
+            key: values[0]
+            for key, values in parse_qs(urlparse(request.url).query).items()
+        }
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        response.headers["Content-Type"] = "application/json"
+        if urlparse(request.url).path.endswith("/query_range"):
+            payload = self.upstream.query_range(params)
+        else:
+            payload = {"status": "success", "data": {}}
+        response._content = json.dumps(payload).encode()
+        return response
+
+    def close(self) -> None:
+        return None
+
+
+class PrometheusUpstream:
+    """
+    Answers range queries with `label_values` series per organization.
+    """
+
+    def __init__(self, workload: Workload):
+        self.workload = workload
+
+    def install(self, client: PrometheusClientWrapper) -> None:
+        adapter = _PrometheusAdapter(self)
+        client.client.session.mount("http://", adapter)
+        client.client.session.mount("https://", adapter)
+
+    def query_range(self, params: Dict[str, str]) -> Dict[str, Any]:
+        series_keys = self.workload.series_keys()
+        samples = max(1, self.workload.entries // len(series_keys))
+        timestamps = self.workload.timestamps_ms(
+            int(float(params["start"]) * 1000),
+            int(float(params["end"]) * 1000),
+            samples,
+        )
+
+        return {
+            "status": "success",
+            "data": {
+                "resultType": "matrix",
+                "result": [
+                    {
+                        "metric": {
+                            "__name__": "http_requests_total",
+                            "organization_id": organization_id,
+                            "instance": instance,
+                            "job": "benchmark",
+                        },
+                        "values": [
+                            [timestamp_ms / 1000, str(sample_value(i + n))]
+                            for n, timestamp_ms in enumerate(timestamps)
+                        ],
+                    }
+                    for i, (organization_id, instance) in enumerate(series_keys)
+                ],
+            },
+        }
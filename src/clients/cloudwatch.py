@@ -13,6 +13,8 @@ from src.config.models.inputs.cloudwatch import (
     CloudwatchConfig,
     CloudwatchMetricsConfig,
 )
+from src.indexers.metrics import API_THROTTLES
+from src.indexers.tracing import upstream_span
 from src.utils.time_conversion import from_milliseconds
 
 logger = structlog.get_logger(__name__)
@@ -68,10 +70,12 @@ class CloudwatchClient:
     ) -> Dict[str, Any]:
         try:
             if call_type == CloudwatchSupportedInputTypes.LOGS:
-                response = self.logs_client.filter_log_events(**params)
+                with upstream_span("cloudwatch.filter_log_events"):
+                    response = self.logs_client.filter_log_events(**params)
                 return response
             elif call_type == CloudwatchSupportedInputTypes.METRICS:
-                response = self.metrics_client.get_metric_data(**params)
+                with upstream_span("cloudwatch.get_metric_data"):
+                    response = self.metrics_client.get_metric_data(**params)
                 return response
             else:
                 msg = f"Unsupported call type: {call_type}"
@@ -80,6 +84,7 @@ class CloudwatchClient:
         except ClientError as e:
             error_code = e.response.get("Error", {}).get("Code", "Unknown")
             if error_code == "ThrottlingException":
+                API_THROTTLES.labels("cloudwatch").inc()
                 msg = "Rate limit hit, retrying"
                 logger.warning(msg, exc_info=True)
                 raise CloudwatchClientError(msg) from e
@@ -207,9 +212,13 @@ class CloudwatchClient:
         ]
         return organization_id_map, chunks
 
-    def query_metrics(
+    def query_metric_series(
         self, start_time: PositiveInt, end_time: PositiveInt
     ) -> Iterator[Dict[str, Any]]:
+        """
+        Yields one series per metric data result, keeping its timestamps and values as the columns Cloudwatch
+        returns them in.
+        """
         metrics_config = self.config.metrics_config
 
         if not metrics_config:
@@ -244,7 +253,8 @@ class CloudwatchClient:
                         logger.error(msg, exc_info=True)
                         raise CloudwatchClientError(msg)
 
-                    metrics = []
+                    series = []
+                    datapoints = 0
 
                     for metric_data in metric_data_results:
                         query_id = metric_data["Id"]
@@ -257,20 +267,18 @@ class CloudwatchClient:
                             logger.error(msg)
                             raise CloudwatchClientError(msg)
 
-                        metric_values = zip(timestamps, values)
-
-                        for val in metric_values:
-                            metrics.append(
-                                {
-                                    "organization_id": organization_id,
-                                    "timestamp": val[0],
-                                    "value": val[1],
-                                    "label": metrics_config.metric_name,
-                                }
-                            )
+                        series.append(
+                            {
+                                "organization_id": organization_id,
+                                "label": metrics_config.metric_name,
+                                "timestamps": timestamps,
+                                "values": values,
+                            }
+                        )
+                        datapoints += len(timestamps)
 
                     logger.info(
-                        f"Fetched {len(metrics)} metrics from Cloudwatch",
+                        f"Fetched {datapoints} metrics from Cloudwatch",
                         namespace=metrics_config.namespace,
                         metric_name=metrics_config.metric_name,
                         start_time=from_milliseconds(start_time).strftime(
@@ -281,7 +289,7 @@ class CloudwatchClient:
                         ),
                     )
 
-                    yield from metrics
+                    yield from series
 
                     if not response.get("NextToken"):
                         break
@@ -290,3 +298,15 @@ class CloudwatchClient:
                     msg = "Failed to query Cloudwatch metrics"
                     logger.error(msg, exc_info=True)
                     raise CloudwatchClientError(msg) from e
+
+    def query_metrics(
+        self, start_time: PositiveInt, end_time: PositiveInt
+    ) -> Iterator[Dict[str, Any]]:
+        for series in self.query_metric_series(start_time, end_time):
+            for timestamp, value in zip(series["timestamps"], series["values"]):
+                yield {
+                    "organization_id": series["organization_id"],
+                    "timestamp": timestamp,
+                    "value": value,
+                    "label": series["label"],
+                }
@@ -34,6 +34,8 @@ from src.config.models.inputs.datadog import DatadogConfig
 from datadog_api_client import ApiClient, Configuration
 from datadog_api_client.v2.api.logs_api import LogsApi
 
+from src.indexers.metrics import API_THROTTLES
+from src.indexers.tracing import upstream_span
 from src.utils.time_conversion import from_milliseconds
 
 PAGE_LIMIT = 1000
@@ -83,14 +85,16 @@ class DatadogClient:
             if call_type == DatadogSupportedInputTypes.LOGS and isinstance(
                 request_body, LogsListRequest
             ):
-                response = self.logs_api.list_logs(body=request_body)
+                with upstream_span("datadog.list_logs"):
+                    response = self.logs_api.list_logs(body=request_body)
                 return response
             elif call_type == DatadogSupportedInputTypes.METRICS and isinstance(
                 request_body, TimeseriesFormulaQueryRequest
             ):
-                response = self.metrics_api.query_timeseries_data(
-                    request_body
-                ).to_dict()
+                with upstream_span("datadog.query_timeseries_data"):
+                    response = self.metrics_api.query_timeseries_data(
+                        request_body
+                    ).to_dict()
                 return response
             else:
                 msg = f"Unsupported call type: {call_type.value}"
@@ -98,6 +102,7 @@ class DatadogClient:
                 raise DatadogClientError(msg)
         except ApiException as e:
             if e.status == 429:
+                API_THROTTLES.labels("datadog").inc()
                 retry_after = int(e.headers.get("x-ratelimit-reset", 5))
                 logger.warning(
                     f"Rate limit hit, retrying after {retry_after} seconds.",
@@ -226,9 +231,12 @@ class DatadogClient:
 
         return metrics_values
 
-    def query_metrics(
+    def query_metric_series(
         self, start_time: PositiveInt, end_time: PositiveInt
     ) -> Iterator[Dict[str, Any]]:
+        """
+        Yields one series per metric query, with its timestamps and values as columns.
+        """
         metrics_config = self.config.metrics_config
 
         if not metrics_config or not metrics_config.metric_queries:
@@ -270,19 +278,18 @@ class DatadogClient:
                 logger.error(msg, exc_info=True)
                 raise DatadogClientError(msg)
 
-            flattened_data = [
+            series = [
                 {
                     "metric_name": d["metric_name"],
                     "organization_id": d["organization_id"],
-                    "timestamp": item["timestamp"],
-                    "value": item["value"],
+                    "timestamps": [item["timestamp"] for item in d["data"]],
+                    "values": [item["value"] for item in d["data"]],
                 }
                 for d in data
-                for item in d["data"]
             ]
 
             logger.info(
-                f"Fetched {len(flattened_data)} metrics from Datadog",
+                f"Fetched {sum(len(s['timestamps']) for s in series)} metrics from Datadog",
                 start_time=start_time,
                 end_time=end_time,
                 metric_name=metrics_config.metric_name,
@@ -292,8 +299,20 @@ class DatadogClient:
                 end_time_str=from_milliseconds(end_time).strftime("%Y-%m-%d %H:%M:%S"),
             )
 
-            yield from flattened_data
+            yield from series
         except Exception as e:
             msg = "Failed to query Datadog metrics"
             logger.error(msg, exc_info=True)
             raise DatadogClientError(msg) from e
+
+    def query_metrics(
+        self, start_time: PositiveInt, end_time: PositiveInt
+    ) -> Iterator[Dict[str, Any]]:
+        for series in self.query_metric_series(start_time, end_time):
+            for timestamp, value in zip(series["timestamps"], series["values"]):
+                yield {
+                    "metric_name": series["metric_name"],
+                    "organization_id": series["organization_id"],
+                    "timestamp": timestamp,
+                    "value": value,
+                }
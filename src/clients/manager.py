@@ -1,28 +1,44 @@
 import uuid
-from typing import Dict, Union, Optional, TypeAlias
+from typing import TYPE_CHECKING, Dict, Union, Optional, TypeAlias
 
 from pydantic import StrictStr
 
-from src.clients.prometheus import PrometheusClientWrapper
 from src.config.models.inputs.prometheus import PrometheusConfig
-from src.clients.cloudwatch import CloudwatchClient
-from src.clients.datadog import DatadogClient
 from src.config.models.inputs.cloudwatch import CloudwatchConfig
 from src.config.models.inputs.datadog import DatadogConfig
 from src.config.models.inputs.input import IntegrationTypes
+from src.utils.registry import LazyRegistry
+
+if TYPE_CHECKING:
+    from src.clients.cloudwatch import CloudwatchClient
+    from src.clients.datadog import DatadogClient
+    from src.clients.prometheus import PrometheusClientWrapper
 
 ClientConfigTypes: TypeAlias = Union[DatadogConfig, CloudwatchConfig, PrometheusConfig]
-ClientTypes: TypeAlias = Union[CloudwatchClient, DatadogClient, PrometheusClientWrapper]
+ClientTypes: TypeAlias = Union[
+    "CloudwatchClient", "DatadogClient", "PrometheusClientWrapper"
+]
+
+# The SDK of an integration is only imported when an input uses it
+CLIENTS: LazyRegistry[IntegrationTypes] = LazyRegistry(
+    "integration type",
+    {
+        IntegrationTypes.CLOUDWATCH: "src.clients.cloudwatch:CloudwatchClient",
+        IntegrationTypes.DATADOG: "src.clients.datadog:DatadogClient",
+        IntegrationTypes.PROMETHEUS: "src.clients.prometheus:PrometheusClientWrapper",
+    },
+)
+
+CLIENT_CONFIGS = {
+    IntegrationTypes.CLOUDWATCH: CloudwatchConfig,
+    IntegrationTypes.DATADOG: DatadogConfig,
+    IntegrationTypes.PROMETHEUS: PrometheusConfig,
+}
 
 
 class ClientManager:
     def __init__(self):
         self.clients: Dict[StrictStr, ClientTypes] = {}
-        self.client_factories = {
-            IntegrationTypes.CLOUDWATCH: (CloudwatchClient, CloudwatchConfig),
-            IntegrationTypes.DATADOG: (DatadogClient, DatadogConfig),
-            IntegrationTypes.PROMETHEUS: (PrometheusClientWrapper, PrometheusConfig),
-        }
 
     def add_client(
         self,
@@ -30,12 +46,10 @@ class ClientManager:
         config: ClientConfigTypes,
     ) -> StrictStr:
         client_id = str(uuid.uuid4())
-        client_class, config_class = self.client_factories.get(
-            integration_type, (None, None)
-        )
+        config_class = CLIENT_CONFIGS.get(integration_type)
 
-        if client_class and isinstance(config, config_class):
-            self.clients[client_id] = client_class(config)
+        if config_class and isinstance(config, config_class):
+            self.clients[client_id] = CLIENTS.get(integration_type)(config)
             return client_id
 
         raise ValueError(f"Unsupported integration type: {integration_type}")
@@ -8,6 +8,8 @@ from rated_exporter_sdk.providers.prometheus.auth import PrometheusAuth  # type:
 from rated_exporter_sdk.providers.prometheus.managed.gcloud_auth import GCPPrometheusAuth  # type: ignore
 
 from src.config.models.inputs.prometheus import PrometheusConfig
+from src.indexers.tracing import upstream_span
+from src.utils.labels import intern_labels
 from src.utils.time_conversion import from_milliseconds
 
 logger = structlog.get_logger(__name__)
@@ -56,8 +58,10 @@ class PrometheusClientWrapper:
             logger.error(f"Failed to create auth: {str(e)}")
             return None
 
-    def query_metrics(self, start_time: int, end_time: int) -> Iterator[Dict[str, Any]]:
-        """Query metrics from Prometheus according to the configuration."""
+    def query_metric_series(
+        self, start_time: int, end_time: int
+    ) -> Iterator[Dict[str, Any]]:
+        """Query metrics from Prometheus, yielding each series with its timestamps and values as columns."""
         start_datetime = from_milliseconds(start_time)
         end_datetime = from_milliseconds(end_time)
 
@@ -71,7 +75,10 @@ class PrometheusClientWrapper:
                     timeout=self.config.timeout,
                 )
 
-                result = self.client.query_range(query_config.query, options)
+                with upstream_span(
+                    "prometheus.query_range", {"rated.query": query_config.query}
+                ):
+                    result = self.client.query_range(query_config.query, options)
 
                 for metric in result.metrics:
                     org_id = metric.identifier.labels.get(
@@ -88,21 +95,23 @@ class PrometheusClientWrapper:
                         )
                         sys.exit(1)
 
-                    remaining_labels = {
-                        k: v
-                        for k, v in metric.identifier.labels.items()
-                        if k != query_config.organization_identifier
-                    }
-
-                    for sample in metric.samples:
-                        yield {
-                            "organization_identifier": query_config.organization_identifier,
-                            "organization_id": org_id,
-                            "timestamp": sample.timestamp,
-                            "value": sample.value,
-                            "slaos_metric_name": query_config.slaos_metric_name,
-                            "labels": remaining_labels,
+                    # Shared by every sample of the series, and with the same series of later windows
+                    remaining_labels = intern_labels(
+                        {
+                            k: v
+                            for k, v in metric.identifier.labels.items()
+                            if k != query_config.organization_identifier
                         }
+                    )
+
+                    yield {
+                        "organization_identifier": query_config.organization_identifier,
+                        "organization_id": org_id,
+                        "timestamps": [sample.timestamp for sample in metric.samples],
+                        "values": [sample.value for sample in metric.samples],
+                        "slaos_metric_name": query_config.slaos_metric_name,
+                        "labels": remaining_labels,
+                    }
 
             except Exception as e:
                 logger.error(
@@ -113,6 +122,19 @@ class PrometheusClientWrapper:
                 )
                 raise type(e)(str(e))
 
+    def query_metrics(self, start_time: int, end_time: int) -> Iterator[Dict[str, Any]]:
+        """Query metrics from Prometheus according to the configuration."""
+        for series in self.query_metric_series(start_time, end_time):
+            for timestamp, value in zip(series["timestamps"], series["values"]):
+                yield {
+                    "organization_identifier": series["organization_identifier"],
+                    "organization_id": series["organization_id"],
+                    "timestamp": timestamp,
+                    "value": value,
+                    "slaos_metric_name": series["slaos_metric_name"],
+                    "labels": series["labels"],
+                }
+
     def query_logs(self, start_time: int, end_time: int) -> Iterator[Dict[str, Any]]:
         raise NotImplementedError(
             "Querying logs is not supported by the Prometheus client"
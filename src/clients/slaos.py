@@ -1,4 +1,5 @@
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
 import httpx
@@ -8,10 +9,18 @@ from pydantic import BaseModel
 from src.config.models.output import RatedOutputConfig
 
 
+@lru_cache
+def get_http_client() -> httpx.Client:
+    """
+    The connection pool shared by the slaOS clients, one per input would build thousands of SSL contexts.
+    """
+    return httpx.Client()
+
+
 class SlaosClient:
     def __init__(self, config: RatedOutputConfig):
         self.config = config
-        self.client = httpx.Client()
+        self.client = get_http_client()
 
     @property
     def full_ingest_url(self) -> str:
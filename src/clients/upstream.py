@@ -0,0 +1,145 @@
+"""
+The upstream I/O of a worker: a bounded thread pool fetching the time ranges of every input of the worker at once, so
+that an input waiting on its upstream API no longer holds up the others.
+
+The Datadog, CloudWatch and Prometheus SDKs are blocking, and none of their async clients is a dependency: their pages
+are pulled one at a time on the pool, which only holds a thread while a page is being fetched, not while the worker
+has yet to take it.
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Iterator, List, Optional
+
+# Upstream calls of a worker in flight at once, across its inputs
+MAX_CONCURRENT_CALLS = 32
+# Pages fetched ahead of the worker, per time range
+MAX_BUFFERED_PAGES = 4
+
+
+class PageStream:
+    """
+    The pages of one time range, fetched on an upstream pool while the worker carries on.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor, pages: Iterator[list]) -> None:
+        self._executor = executor
+        self._source = pages
+        self._pages: Deque[list] = deque()
+        self._condition = threading.Condition()
+        self._fetching = False
+        self._fetched = False
+        self._error: Optional[BaseException] = None
+        with self._condition:
+            self._schedule()
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether every page of the time range was fetched and taken.
+        """
+        with self._condition:
+            return self._fetched and not self._pages and self._error is None
+
+    def ready(self) -> List[list]:
+        """
+        Takes the pages fetched so far without waiting, raising the error of the fetch once they are all taken.
+        """
+        with self._condition:
+            pages = list(self._pages)
+            self._pages.clear()
+            error = self._error if self._fetched and not pages else None
+            if pages:
+                self._schedule()
+        if error is not None:
+            raise error
+        return pages
+
+    def __iter__(self) -> Iterator[list]:
+        """
+        Takes the pages as they are fetched, waiting for them.
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pages or self._fetched)
+            pages = self.ready()
+            if not pages:
+                return
+            yield from pages
+
+    def _schedule(self) -> None:
+        # Called under the condition: fetches the next page unless one is in flight or the buffer is full
+        if self._fetching or self._fetched or len(self._pages) >= MAX_BUFFERED_PAGES:
+            return
+        try:
+            self._executor.submit(self._fetch_page)
+            self._fetching = True
+        except RuntimeError as e:
+            # The pool was shut down
+            self._fetched, self._error = True, e
+            self._condition.notify_all()
+
+    def _fetch_page(self) -> None:
+        page: Optional[list] = None
+        error: Optional[BaseException] = None
+        try:
+            page = next(self._source, None)
+        except BaseException as e:
+            # Raised in the worker instead, including the `sys.exit` of a client failing for good
+            error = e
+        with self._condition:
+            self._fetching = False
+            if page is None:
+                self._fetched, self._error = True, error
+            else:
+                self._pages.append(page)
+                self._schedule()
+            self._condition.notify_all()
+
+
+class UpstreamPool:
+    """
+    A bounded thread pool running the upstream calls of one worker, shared by the inputs of the worker.
+    """
+
+    def __init__(self, max_concurrent_calls: int = MAX_CONCURRENT_CALLS) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_calls, thread_name_prefix="upstream"
+        )
+        self.users = 0
+
+    def stream(self, pages: Iterator[list]) -> PageStream:
+        """
+        Starts fetching the pages of a time range, returning without waiting for them.
+        """
+        return PageStream(self._executor, pages)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_worker = threading.local()
+
+
+def acquire_upstream_pool() -> UpstreamPool:
+    """
+    The upstream pool of the calling worker thread, started on first use. Each user releases it once done.
+    """
+    upstream_pool: Optional[UpstreamPool] = getattr(_worker, "upstream_pool", None)
+    if upstream_pool is None:
+        upstream_pool = _worker.upstream_pool = UpstreamPool()
+    upstream_pool.users += 1
+    return upstream_pool
+
+
+def release_upstream_pool(upstream_pool: UpstreamPool) -> None:
+    """
+    Shuts the pool down once its last user released it.
+    """
+    upstream_pool.users -= 1
+    if upstream_pool.users > 0:
+        return
+    upstream_pool.close()
+    if getattr(_worker, "upstream_pool", None) is upstream_pool:
+        del _worker.upstream_pool
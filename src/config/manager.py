@@ -1,18 +1,23 @@
 import base64
 import sys
+from collections import Counter
 from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, cast
+from typing import Dict, Hashable, List, Optional, Tuple, cast
 import structlog
 import yaml
 import os
 
+from .models.metrics_endpoint import MetricsEndpointYamlConfig
+from .models.profiling import ProfilingYamlConfig
+from .models.reload import ReloadYamlConfig
 from .models.sentry import SentryYamlConfig
+from .models.tracing import TracingYamlConfig
 from .secrets.factory import SecretManagerFactory
 from .models.inputs.input import InputYamlConfig
 from .models.output import OutputYamlConfig
 from .models.secrets import SecretsYamlConfig
-from pydantic import BaseModel, ValidationError, model_validator
+from pydantic import BaseModel, PrivateAttr, ValidationError, model_validator
 import abc
 
 logger = structlog.get_logger(__name__)
@@ -24,15 +29,23 @@ class RatedIndexerYamlConfig(BaseModel):
     output: OutputYamlConfig
     secrets: SecretsYamlConfig
     sentry: Optional[SentryYamlConfig] = None
+    metrics_endpoint: Optional[MetricsEndpointYamlConfig] = None
+    profiling: Optional[ProfilingYamlConfig] = None
+    tracing: Optional[TracingYamlConfig] = None
+    reload: Optional[ReloadYamlConfig] = None
+
+    _inputs_by_slaos_key: Optional[
+        Tuple[List[InputYamlConfig], Dict[str, List[InputYamlConfig]]]
+    ] = PrivateAttr(default=None)
 
     @model_validator(mode="after")
     def check_slaos_keyes(cls, values):
         if not hasattr(values, "_duplicate_warning_logged"):
             values._duplicate_warning_logged = False
 
-        slaos_keyes = [input.slaos_key for input in values.inputs]
+        slaos_key_counts = Counter(input.slaos_key for input in values.inputs)
 
-        duplicates = set([x for x in slaos_keyes if slaos_keyes.count(x) > 1])
+        duplicates = [key for key, count in slaos_key_counts.items() if count > 1]
         if duplicates and not values._duplicate_warning_logged:
             values._duplicate_warning_logged = True
             logger.warning(
@@ -47,11 +60,64 @@ class RatedIndexerYamlConfig(BaseModel):
 
         return values
 
+    def inputs_by_slaos_key(self) -> Dict[str, List[InputYamlConfig]]:
+        """
+        The inputs grouped by slaos_key, in configuration order.
+        Grouped on first use, once secrets are resolved, and again only when `inputs` is replaced.
+        """
+        if (
+            self._inputs_by_slaos_key is None
+            or self._inputs_by_slaos_key[0] is not self.inputs
+        ):
+            grouped: Dict[str, List[InputYamlConfig]] = {}
+            for input_config in self.inputs:
+                grouped.setdefault(input_config.slaos_key, []).append(input_config)
+            self._inputs_by_slaos_key = (self.inputs, grouped)
+        return self._inputs_by_slaos_key[1]
+
+    def get_input(self, slaos_key: str, config_index: int = 0) -> InputYamlConfig:
+        """
+        The input at `config_index` among the inputs sharing `slaos_key`.
+        """
+        matching_configs = self.inputs_by_slaos_key().get(slaos_key, [])
+        if not matching_configs:
+            raise ValueError(f"No configuration found for slaOS key '{slaos_key}'")
+
+        if config_index >= len(matching_configs):
+            raise ValueError(
+                f"Config index {config_index} is out of range. Only {len(matching_configs)} configurations found for prefix '{slaos_key}'"
+            )
+        return matching_configs[config_index]
+
 
 class ConfigurationManager(abc.ABC):
+    # Whether the configuration source can change while the indexer runs, see `src.indexers.reload`
+    reloadable = True
+
     @abc.abstractmethod
     def _do_load_raw_config(self) -> dict: ...
 
+    def _read_raw_config(self) -> dict:
+        """
+        Reads the raw configuration, raising instead of exiting on errors.
+        """
+        return self._do_load_raw_config()
+
+    @abc.abstractmethod
+    def fingerprint(self) -> Hashable:
+        """
+        Changes whenever the configuration source does, without reading the whole configuration.
+        """
+
+    def reload_config(self) -> RatedIndexerYamlConfig:
+        """
+        Loads the configuration again, raising instead of exiting, so a running indexer keeps its current one on errors.
+        """
+        config = RatedIndexerYamlConfig(**self._read_raw_config())
+        if config.secrets.use_secrets_manager:
+            SecretManagerFactory.create(config).resolve_secrets(config)
+        return config
+
     def load_config(self) -> RatedIndexerYamlConfig:
         config_data = self._do_load_raw_config()
         try:
@@ -100,12 +166,18 @@ class ConfigurationManager(abc.ABC):
 
 
 class Base64EncodedConfig(ConfigurationManager):
+    # The environment of a running process does not change
+    reloadable = False
+
     def __init__(self, config_value: str):
         self._config_value = config_value
 
     def _do_load_raw_config(self) -> dict:
         return yaml.safe_load(base64.b64decode(self._config_value))
 
+    def fingerprint(self) -> Hashable:
+        return self._config_value
+
 
 class FileConfigurationManager(ConfigurationManager):
     def __init__(self, config_path: Path):
@@ -117,8 +189,7 @@ class FileConfigurationManager(ConfigurationManager):
                 f"Configuration file not found: {self._config_path}"
             )
         try:
-            with self._config_path.open("r") as file:
-                return yaml.safe_load(file)
+            return self._read_raw_config()
 
         except Exception as e:
             logger.error(
@@ -127,6 +198,14 @@ class FileConfigurationManager(ConfigurationManager):
             )
             sys.exit(1)
 
+    def _read_raw_config(self) -> dict:
+        with self._config_path.open("r") as file:
+            return yaml.safe_load(file)
+
+    def fingerprint(self) -> Hashable:
+        stat = self._config_path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
 
 def get_config_manager(
     env: dict[str, str] = cast(dict[str, str], os.environ)
@@ -0,0 +1,41 @@
+from enum import Enum
+from typing import List
+
+from pydantic import (
+    BaseModel,
+    NonNegativeInt,
+    PositiveInt,
+    StrictStr,
+    confloat,
+    model_validator,
+)
+
+
+class AggregationStatistic(str, Enum):
+    SUM = "sum"
+    COUNT = "count"
+    MIN = "min"
+    MAX = "max"
+    AVG = "avg"
+
+
+class AggregationConfig(BaseModel):
+    window_seconds: PositiveInt
+    allowed_lateness_seconds: NonNegativeInt = 0
+    statistics: List[AggregationStatistic] = list(AggregationStatistic)
+    percentiles: List[confloat(gt=0, lt=100)] = []  # type: ignore
+    # Log inputs only: the numeric fields to summarize, and the fields splitting the rollups of an organization
+    fields: List[StrictStr] = []
+    group_by: List[StrictStr] = []
+
+    @model_validator(mode="after")
+    def validate_config(self):
+        if not self.statistics and not self.percentiles:
+            raise ValueError(
+                "aggregation requires at least one of `statistics` or `percentiles`"
+            )
+        if len(set(self.statistics)) != len(self.statistics) or len(
+            set(self.percentiles)
+        ) != len(self.percentiles):
+            raise ValueError("aggregation statistics and percentiles must be unique")
+        return self
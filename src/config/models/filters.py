@@ -4,18 +4,82 @@ from rated_parser.payloads.log_patterns import (  # type: ignore
     LogFormat as RatedParserLogFormat,
 )
 from rated_parser.payloads.metric_patterns import MetricFieldDefinition  # type: ignore
-from pydantic import BaseModel, StrictStr, StrictInt, field_validator, model_validator
-from typing import List, Union, Dict
+from enum import Enum
+
+from pydantic import (
+    BaseModel,
+    PositiveInt,
+    StrictStr,
+    StrictInt,
+    confloat,
+    field_validator,
+    model_validator,
+)
+from typing import List, Optional, Union, Dict
 
 
 class BaseFilterConfig(BaseModel):
     version: StrictInt
 
 
+class ParserPoolConfig(BaseModel):
+    processes: PositiveInt
+    batch_size: PositiveInt = 500
+
+
+class PreFilterMatch(str, Enum):
+    ANY = "any"
+    ALL = "all"
+
+
+class LogPreFilterConfig(BaseModel):
+    required_substrings: List[StrictStr] = []
+    substring_match: PreFilterMatch = PreFilterMatch.ANY
+    required_keys: List[StrictStr] = []
+
+    @model_validator(mode="after")
+    def validate_config(self):
+        if not self.required_substrings and not self.required_keys:
+            raise ValueError(
+                "pre_filter requires at least one of `required_substrings` or `required_keys`"
+            )
+        if any(not substring for substring in self.required_substrings):
+            raise ValueError("pre_filter `required_substrings` cannot be empty strings")
+        return self
+
+
+class LogTemplateCacheConfig(BaseModel):
+    max_templates: PositiveInt = 1_000
+    similarity_threshold: confloat(gt=0, le=1) = 0.5  # type: ignore
+    min_failures: PositiveInt = 3
+    retest_every: PositiveInt = 100
+
+
+class LogRouteConfig(BaseModel):
+    json_key: Optional[StrictStr] = None
+    substring: Optional[StrictStr] = None
+    log_stream: Optional[StrictStr] = None
+
+    @model_validator(mode="after")
+    def validate_config(self):
+        predicates = [self.json_key, self.substring, self.log_stream]
+        if sum(predicate is not None for predicate in predicates) != 1:
+            raise ValueError(
+                "route requires exactly one of `json_key`, `substring` or `log_stream`"
+            )
+        if not any(predicates):
+            raise ValueError("route predicate cannot be an empty string")
+        return self
+
+
 class LogFilterConfig(BaseFilterConfig):
     log_format: RatedParserLogFormat
     fields: List[Union[JsonFieldDefinition, RawTextFieldDefinition]]
     log_example: Union[StrictStr, Dict]
+    parser_pool: Optional[ParserPoolConfig] = None
+    pre_filter: Optional[LogPreFilterConfig] = None
+    template_cache: Optional[LogTemplateCacheConfig] = None
+    route: Optional[LogRouteConfig] = None
 
     @field_validator("log_format", mode="before")
     def normalize_log_format(cls, v):
@@ -42,6 +106,26 @@ class LogFilterConfig(BaseFilterConfig):
         ):
             raise ValueError("log_example must be a dictionary when log_format is JSON")
 
+        if (
+            self.template_cache is not None
+            and self.log_format != RatedParserLogFormat.RAW_TEXT
+        ):
+            raise ValueError("template_cache is only supported for RAW_TEXT logs")
+
+        if self.route is not None:
+            if (
+                self.route.json_key is not None
+                and self.log_format != RatedParserLogFormat.JSON
+            ):
+                raise ValueError("json_key routes are only supported for JSON logs")
+            if (
+                self.route.substring is not None
+                and self.log_format != RatedParserLogFormat.RAW_TEXT
+            ):
+                raise ValueError(
+                    "substring routes are only supported for RAW_TEXT logs"
+                )
+
         # Validate field types match log_format
         expected_type = (
             RawTextFieldDefinition
@@ -67,3 +151,21 @@ class MetricFilterConfig(BaseFilterConfig):
             raise ValueError("Filter fields cannot be empty")
 
         return self
+
+
+def validate_log_filter_patterns(patterns: List[LogFilterConfig]) -> None:
+    """
+    Validates the filter patterns of an input using several of them, which are routed per log entry.
+    """
+    if not patterns:
+        raise ValueError("Filter patterns cannot be empty")
+
+    versions = [pattern.version for pattern in patterns]
+    if len(set(versions)) != len(versions):
+        raise ValueError("Filter pattern versions must be unique within an input")
+
+    for pattern in patterns:
+        if pattern.parser_pool or pattern.pre_filter or pattern.template_cache:
+            raise ValueError(
+                "parser_pool, pre_filter and template_cache are only supported for inputs with a single filter pattern"
+            )
@@ -1,11 +1,16 @@
 from enum import Enum
 
-from pydantic import BaseModel, model_validator, StrictStr
-from typing import Optional, Union
+from pydantic import BaseModel, model_validator, StrictBool, StrictStr
+from typing import List, Optional, Union
 
+from src.config.models.aggregation import AggregationConfig
 from src.config.models.inputs.prometheus import PrometheusConfig
 from src.config.models.offset import OffsetYamlConfig
-from src.config.models.filters import MetricFilterConfig, LogFilterConfig
+from src.config.models.filters import (
+    MetricFilterConfig,
+    LogFilterConfig,
+    validate_log_filter_patterns,
+)
 from src.config.models.inputs.cloudwatch import CloudwatchConfig
 from src.config.models.inputs.datadog import DatadogConfig
 
@@ -21,12 +26,23 @@ class InputTypes(str, Enum):
     METRICS = "metrics"
 
 
+class IdempotencyKeyAlgorithm(str, Enum):
+    BLAKE2B = "blake2b"
+    XXH3_128 = "xxh3_128"
+    SHA256_JSON = "sha256_json"  # Keys generated by previous releases
+
+
 class InputYamlConfig(BaseModel):
     slaos_key: StrictStr
     integration: IntegrationTypes
     type: InputTypes
-    filters: Optional[Union[MetricFilterConfig, LogFilterConfig]] = None
+    filters: Optional[
+        Union[MetricFilterConfig, LogFilterConfig, List[LogFilterConfig]]
+    ] = None
     offset: OffsetYamlConfig
+    redistribute_filtering: StrictBool = False
+    idempotency_key_algorithm: IdempotencyKeyAlgorithm = IdempotencyKeyAlgorithm.BLAKE2B
+    aggregation: Optional[AggregationConfig] = None
 
     cloudwatch: Optional[CloudwatchConfig] = None
     datadog: Optional[DatadogConfig] = None
@@ -42,6 +58,40 @@ class InputYamlConfig(BaseModel):
 
         return values
 
+    @property
+    def log_filters(self) -> List[LogFilterConfig]:
+        if isinstance(self.filters, list):
+            return self.filters
+        if isinstance(self.filters, LogFilterConfig):
+            return [self.filters]
+        return []
+
+    @model_validator(mode="after")
+    def validate_filter_patterns(self):
+        if isinstance(self.filters, list):
+            if self.type != InputTypes.LOGS:
+                raise ValueError("Multiple filter patterns are only supported for logs")
+            validate_log_filter_patterns(self.filters)
+
+        return self
+
+    @model_validator(mode="after")
+    def validate_aggregation(self):
+        if self.aggregation is None:
+            return self
+        if self.type == InputTypes.METRICS and (
+            self.aggregation.fields or self.aggregation.group_by
+        ):
+            raise ValueError(
+                "aggregation 'fields' and 'group_by' are only supported for logs inputs"
+            )
+        if self.redistribute_filtering:
+            # Every sample of a window has to reach the same aggregator
+            raise ValueError(
+                "'aggregation' cannot be combined with 'redistribute_filtering'"
+            )
+        return self
+
     @model_validator(mode="before")
     def validate_input_config(cls, values):
         integration_type = values.get("integration")
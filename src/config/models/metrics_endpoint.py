@@ -0,0 +1,6 @@
+from pydantic import BaseModel, StrictStr, conint
+
+
+class MetricsEndpointYamlConfig(BaseModel):
+    port: conint(gt=0, lt=65_536) = 9_100  # type: ignore
+    address: StrictStr = "0.0.0.0"
@@ -4,9 +4,11 @@ import re
 
 from pydantic import (
     BaseModel,
+    PositiveInt,
     StrictStr,
     model_validator,
     StrictBool,
+    confloat,
     field_validator,
 )
 
@@ -32,6 +34,24 @@ class ConsoleOutputConfig(BaseModel):
     verbose: StrictBool = True
 
 
+class DeduplicationConfig(BaseModel):
+    retention_seconds: PositiveInt = 86_400
+    partition_seconds: PositiveInt = 3_600
+    expected_keys_per_partition: PositiveInt = 100_000
+    false_positive_rate: confloat(gt=0, lt=1) = 1e-6  # type: ignore
+    shards: PositiveInt = 8
+    persist_path: Optional[StrictStr] = None
+    persist_interval_seconds: PositiveInt = 60
+
+    @model_validator(mode="after")
+    def validate_partitions(self):
+        if self.partition_seconds > self.retention_seconds:
+            raise ValueError(
+                "deduplication `partition_seconds` cannot exceed `retention_seconds`"
+            )
+        return self
+
+
 class OutputTypes(str, enum.Enum):
     CONSOLE = "console"
     RATED = "rated"
@@ -43,13 +63,15 @@ class OutputYamlConfig(BaseModel):
 
     rated: Optional[RatedOutputConfig] = None
     console: Optional[ConsoleOutputConfig] = None
+    deduplication: Optional[DeduplicationConfig] = None
 
     @model_validator(mode="before")
     def validate_output_config(cls, values):
         output_type = values.get("type")
         if output_type:
             config_attr = output_type
-            if not values.get(config_attr):
+            # The null output discards every event, it has nothing to configure
+            if output_type != OutputTypes.NULL and not values.get(config_attr):
                 raise ValueError(
                     f'Configuration for output source "{output_type}" is not found. Please add output configuration for {output_type}.'
                     # noqa
@@ -0,0 +1,17 @@
+import signal
+
+from pydantic import BaseModel, StrictBool, StrictStr, confloat, field_validator
+
+
+class ProfilingYamlConfig(BaseModel):
+    enabled: StrictBool = False
+    output_dir: StrictStr = "profiles"
+    sampling_interval_ms: confloat(gt=0) = 10  # type: ignore
+    flush_interval_seconds: confloat(gt=0) = 60  # type: ignore
+    toggle_signal: StrictStr = "SIGUSR2"
+
+    @field_validator("toggle_signal")
+    def validate_toggle_signal(cls, value: str) -> str:
+        if not isinstance(getattr(signal, value, None), signal.Signals):
+            raise ValueError(f'Unknown signal "{value}"')
+        return value
@@ -0,0 +1,7 @@
+from pydantic import BaseModel, StrictBool, confloat, conint
+
+
+class ReloadYamlConfig(BaseModel):
+    enabled: StrictBool = False
+    interval_seconds: confloat(gt=0) = 30  # type: ignore
+    spare_inputs: conint(ge=0) = 4  # type: ignore
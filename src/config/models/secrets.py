@@ -1,15 +1,19 @@
 from enum import Enum
 from typing import Optional
 
-from pydantic import BaseModel, StrictBool, model_validator
-
-from src.config.secrets.aws_secrets_manager import AwsSecretsManagerConfig
+from pydantic import BaseModel, StrictBool, StrictStr, model_validator
 
 
 class SecretProvider(str, Enum):
     AWS = "aws"
 
 
+class AwsSecretsManagerConfig(BaseModel):
+    region: StrictStr
+    aws_access_key_id: StrictStr
+    aws_secret_access_key: StrictStr
+
+
 class SecretsYamlConfig(BaseModel):
     use_secrets_manager: StrictBool
     provider: Optional[SecretProvider] = None
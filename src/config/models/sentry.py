@@ -1,4 +1,3 @@
-import sentry_sdk
 import structlog
 from pydantic import BaseModel, Field, StrictStr, confloat
 from typing import Optional
@@ -8,11 +7,12 @@ logger = structlog.get_logger(__name__)
 
 class SentryYamlConfig(BaseModel):
     dsn: StrictStr
+    # The indexer starts no Sentry transactions, the pipeline is traced with OpenTelemetry instead (see `tracing`)
     traces_sample_rate: confloat(ge=0, le=1) = Field(  # type: ignore
-        default=1.0, description="Traces sample rate (0.0 to 1.0)"
+        default=0.0, description="Traces sample rate (0.0 to 1.0)"
     )
     profiles_sample_rate: confloat(ge=0, le=1) = Field(  # type: ignore
-        default=1.0, description="Profiles sample rate (0.0 to 1.0)"
+        default=0.0, description="Profiles sample rate (0.0 to 1.0)"
     )
     environment: StrictStr
     release: StrictStr
@@ -23,6 +23,8 @@ class SentryYamlConfig(BaseModel):
 
 
 def initialize_sentry(config: SentryYamlConfig):
+    import sentry_sdk
+
     sentry_sdk.init(
         dsn=config.dsn,
         traces_sample_rate=config.traces_sample_rate,
@@ -0,0 +1,26 @@
+from typing import Dict, Optional
+
+from pydantic import BaseModel, PositiveInt, StrictStr, confloat, model_validator
+
+
+class OtlpExporterConfig(BaseModel):
+    endpoint: StrictStr
+    headers: Dict[StrictStr, StrictStr] = {}
+    timeout_seconds: PositiveInt = 10
+
+
+class FileExporterConfig(BaseModel):
+    path: StrictStr
+
+
+class TracingYamlConfig(BaseModel):
+    service_name: StrictStr = "rated-log-indexer"
+    sample_rate: confloat(ge=0, le=1) = 0.1  # type: ignore
+    otlp: Optional[OtlpExporterConfig] = None
+    file: Optional[FileExporterConfig] = None
+
+    @model_validator(mode="after")
+    def validate_exporters(self):
+        if self.otlp is None and self.file is None:
+            raise ValueError("Tracing requires an `otlp` or a `file` exporter")
+        return self
@@ -1,23 +1,23 @@
 import boto3  # type: ignore
 from botocore.exceptions import ClientError  # type: ignore
-from pydantic import BaseModel, StrictStr
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import StrictStr
 import structlog
 import json
-from typing import Union, Dict, Any
+from typing import Union, Dict, Any, List, Set, Tuple
 
-from src.config.secrets.manager import SecretManager
+from src.config.models.secrets import AwsSecretsManagerConfig
+from src.config.secrets.manager import SecretManager, SecretValue
 
 logger = structlog.get_logger(__name__)
 
-
-class AwsSecretsManagerConfig(BaseModel):
-    region: StrictStr
-    aws_access_key_id: StrictStr
-    aws_secret_access_key: StrictStr
+# Maximum number of secret IDs of a BatchGetSecretValue call
+BATCH_SIZE = 20
 
 
 class AwsSecretManager(SecretManager):
     def __init__(self, config: AwsSecretsManagerConfig):
+        super().__init__()
         self.secrets_client = boto3.client(
             "secretsmanager",
             region_name=config.region,
@@ -33,12 +33,80 @@ class AwsSecretManager(SecretManager):
         except ClientError as e:
             raise e
 
-        if "SecretString" in get_secret_value_response:
-            secret_string = get_secret_value_response["SecretString"]
-            try:
-                secret_value = json.loads(secret_string)
-                return secret_value
-            except json.JSONDecodeError:
-                return secret_string
-        else:
-            raise ValueError("Secret not found or not in string format")
+        return parse_secret_value(get_secret_value_response)
+
+    def fetch_secrets(
+        self, secret_ids: Set[str]
+    ) -> Tuple[Dict[str, SecretValue], Dict[str, Exception]]:
+        """
+        Fetches the secrets by batches of 20 with BatchGetSecretValue, the batches concurrently.
+        The secrets a batch could not return, or all of them when the credentials are not allowed to
+        `secretsmanager:BatchGetSecretValue`, are fetched one by one with GetSecretValue.
+        """
+        ids = sorted(secret_ids)
+        batches = [ids[i : i + BATCH_SIZE] for i in range(0, len(ids), BATCH_SIZE)]
+        values: Dict[str, SecretValue] = {}
+        errors: Dict[str, Exception] = {}
+
+        if batches:
+            with ThreadPoolExecutor(
+                max_workers=min(self.MAX_CONCURRENT_FETCHES, len(batches))
+            ) as executor:
+                for batch_values, batch_errors in executor.map(
+                    self._fetch_batch, batches
+                ):
+                    values.update(batch_values)
+                    errors.update(batch_errors)
+
+        remaining = secret_ids - values.keys() - errors.keys()
+        if remaining:
+            fallback_values, fallback_errors = super().fetch_secrets(remaining)
+            values.update(fallback_values)
+            errors.update(fallback_errors)
+        return values, errors
+
+    def _fetch_batch(
+        self, secret_ids: List[str]
+    ) -> Tuple[Dict[str, SecretValue], Dict[str, Exception]]:
+        values: Dict[str, SecretValue] = {}
+        errors: Dict[str, Exception] = {}
+        try:
+            response = self.secrets_client.batch_get_secret_value(
+                SecretIdList=secret_ids
+            )
+        except ClientError as e:
+            logger.warning(
+                "Batch secret retrieval failed, fetching the secrets one by one",
+                error=str(e),
+                secrets=len(secret_ids),
+            )
+            return values, errors
+
+        # Secrets may be referenced by name or by ARN, the response gives both
+        requested = set(secret_ids)
+        for secret in response.get("SecretValues", []):
+            for secret_id in {secret.get("Name"), secret.get("ARN")} & requested:
+                try:
+                    values[secret_id] = parse_secret_value(secret)
+                except ValueError as e:
+                    errors[secret_id] = e
+        for error in response.get("Errors", []):
+            if error.get("SecretId") in requested:
+                logger.warning(
+                    "Secret not returned by the batch retrieval",
+                    secret_id=error["SecretId"],
+                    error_code=error.get("ErrorCode"),
+                )
+        return values, errors
+
+
+def parse_secret_value(secret: Dict[str, Any]) -> Union[str, Dict[str, Any]]:
+    if "SecretString" in secret:
+        secret_string = secret["SecretString"]
+        try:
+            secret_value = json.loads(secret_string)
+            return secret_value
+        except json.JSONDecodeError:
+            return secret_string
+    else:
+        raise ValueError("Secret not found or not in string format")
@@ -1,21 +1,106 @@
 from abc import ABC, abstractmethod
-from typing import Any, Union, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Optional, Set, Tuple, Union, Dict
 import structlog
 from pydantic import BaseModel
 
 logger = structlog.get_logger(__name__)
 
+SecretValue = Union[str, Dict[str, Any]]
+
 
 class SecretManager(ABC):
+    """
+    Resolves the `secret:<id>` and `secret|<key>:<id>` references of a configuration in two passes:
+    the unique secret IDs are collected and fetched together first, then every reference is answered from the
+    fetched values. A secret referenced by many inputs is therefore fetched once.
+    """
+
+    MAX_CONCURRENT_FETCHES = 8
+
+    def __init__(self) -> None:
+        # Fetched values, and the errors of the secrets that could not be fetched, kept for the process lifetime
+        self._secrets: Dict[str, SecretValue] = {}
+        self._errors: Dict[str, Exception] = {}
+
     @abstractmethod
-    def resolve_secret(self, secret_id: str) -> Union[str, Dict[str, Any]]:
+    def resolve_secret(self, secret_id: str) -> SecretValue:
         pass
 
+    def fetch_secrets(
+        self, secret_ids: Set[str]
+    ) -> Tuple[Dict[str, SecretValue], Dict[str, Exception]]:
+        """
+        Fetches several secrets, returning the values and the errors by secret ID.
+        Secrets are fetched concurrently with `resolve_secret`, providers with a batch API override this.
+        """
+        values: Dict[str, SecretValue] = {}
+        errors: Dict[str, Exception] = {}
+
+        def fetch(secret_id: str) -> None:
+            try:
+                values[secret_id] = self.resolve_secret(secret_id)
+            except Exception as e:
+                errors[secret_id] = e
+
+        if secret_ids:
+            with ThreadPoolExecutor(
+                max_workers=min(self.MAX_CONCURRENT_FETCHES, len(secret_ids))
+            ) as executor:
+                list(executor.map(fetch, sorted(secret_ids)))
+        return values, errors
+
     def resolve_secrets(self, config) -> None:
         logger.info("Starting secrets resolution process")
+        secret_ids = set(self._collect_secret_ids(config))
+        missing = secret_ids - self._secrets.keys() - self._errors.keys()
+        if missing:
+            values, errors = self.fetch_secrets(missing)
+            self._secrets.update(values)
+            self._errors.update(errors)
+        logger.info(
+            "Fetched secrets",
+            secrets=len(secret_ids),
+            fetched=len(missing),
+            failed=len(self._errors.keys() & secret_ids),
+        )
         self._resolve_secrets_in_object(config)
         logger.info("Completed secrets resolution process")
 
+    def _collect_secret_ids(self, obj: Any) -> Iterable[str]:
+        if isinstance(obj, BaseModel):
+            for field in obj.model_fields:
+                yield from self._collect_secret_ids(getattr(obj, field))
+        elif isinstance(obj, dict):
+            for value in obj.values():
+                yield from self._collect_secret_ids(value)
+        elif isinstance(obj, list):
+            for value in obj:
+                yield from self._collect_secret_ids(value)
+        elif isinstance(obj, str) and obj.startswith("secret"):
+            secret_id = self._parse_reference(obj)[1]
+            if secret_id is not None:
+                yield secret_id
+
+    @staticmethod
+    def _parse_reference(value: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Splits a reference into its dictionary key, if any, and its secret ID, None when it is malformed.
+        """
+        parts = value.split(":", 1)
+        if len(parts) != 2:
+            return None, None
+        secret_info, secret_id = parts
+        dict_key = secret_info.split("|")[1] if "|" in secret_info else None
+        return dict_key, secret_id
+
+    def _get_secret(self, secret_id: str) -> SecretValue:
+        if secret_id in self._errors:
+            raise self._errors[secret_id]
+        if secret_id not in self._secrets:
+            self._secrets[secret_id] = self.resolve_secret(secret_id)
+        return self._secrets[secret_id]
+
     def _resolve_secrets_in_object(self, obj):
         if isinstance(obj, BaseModel):
             for field in obj.model_fields:
@@ -34,18 +119,16 @@ class SecretManager(ABC):
             self._resolve_secrets_in_object(value)
             return value
         elif isinstance(value, str) and value.startswith("secret"):
-            parts = value.split(":", 1)
-            if len(parts) != 2:
+            dict_key, secret_id = self._parse_reference(value)
+            if secret_id is None:
                 raise ValueError(f"Invalid secret format for {context}: {value}")
 
-            secret_info, secret_id = parts
             try:
-                resolved_value = self.resolve_secret(secret_id)
+                resolved_value = self._get_secret(secret_id)
             except Exception as e:
                 raise ValueError(f"Error resolving secret for {context}: {str(e)}")
 
-            if "|" in secret_info:
-                _, dict_key = secret_info.split("|")
+            if dict_key is not None:
                 if not isinstance(resolved_value, dict):
                     raise ValueError(
                         f"Secret {secret_id} for {context} does not resolve to a dictionary"
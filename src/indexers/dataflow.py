@@ -1,28 +1,86 @@
 from collections import defaultdict
-from typing import Callable, Iterator, Union, List, Tuple, Protocol
+from functools import partial
+from time import perf_counter
+from itertools import batched
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Union,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Protocol,
+    Sequence,
+)
 
 import structlog
-from bytewax.dataflow import Dataflow, Stream
+from prometheus_client import Counter, Histogram
+from bytewax.dataflow import Dataflow, Stream, operator
 import bytewax.operators as op
 from bytewax.inputs import FixedPartitionedSource
 from bytewax.outputs import DynamicSink
+from opentelemetry.trace import SpanContext
 from pydantic import StrictStr
+from rated_parser.payloads.log_patterns import LogFormat as RatedParserLogFormat  # type: ignore
 
 from src.clients.manager import ClientManager, ClientTypes, ClientConfigTypes
-from src.indexers.filters.types import LogEntry, MetricEntry
-from src.indexers.filters.manager import FilterManager
-from src.config.manager import RatedIndexerYamlConfig
-from src.config.models.inputs.input import IntegrationTypes, InputTypes
-from src.config.models.output import OutputTypes
-from src.indexers.sinks.console import build_console_sink
-from src.indexers.sinks.rated import build_http_sink
-from src.indexers.sources.rated import RatedSource, TimeRange
+from src.indexers.filters.types import (
+    FilteredEvent,
+    LogEntry,
+    MetricEntry,
+    MetricSeries,
+)
+from src.config.manager import RatedIndexerYamlConfig, get_config_manager
+from src.config.models.inputs.input import (
+    IntegrationTypes,
+    InputTypes,
+    InputYamlConfig,
+)
+from src.config.models.output import DeduplicationConfig, OutputTypes
+from src.indexers.deduplication import DeduplicatingSink, shard_page
+from src.indexers.metrics import (
+    ENTRIES_FETCHED,
+    EVENTS_FILTERED,
+    FETCH_SECONDS,
+    FILTER_SECONDS,
+    PAGE_SIZE,
+)
+from src.indexers.profiling import profiler
+from src.indexers.reload import (
+    ReloadableFilter,
+    SpareInput,
+    input_registry,
+    spare_input_count,
+)
+from src.indexers.tracing import (
+    filter_span,
+    in_span,
+    start_fetch,
+    traced_page,
+    window_context,
+)
+from src.indexers.sinks import SINKS
+from src.indexers.sources.fetching import FetchingPartition, FetchingSource, RangeEnd
+from src.indexers.sources.rated import (
+    RatedPartition,
+    RatedSource,
+    TimeRange,
+    resume_offset,
+)
+from src.indexers.sources.spare import SpareSource
 
 
 logger = structlog.get_logger(__name__)
 
 client_manager = ClientManager()
 
+FETCH_BATCH_SIZE = 1_000
+# Inputs built within one operator of the flow, see `build_dataflow`
+INPUTS_PER_GROUP = 64
+
 
 class DataFetcher(Protocol):
     def __call__(
@@ -30,13 +88,26 @@ class DataFetcher(Protocol):
         time_range: TimeRange,
         integration_id: StrictStr,
         integration_type: IntegrationTypes,
-    ) -> Iterator[Union[LogEntry, MetricEntry]]: ...
+    ) -> Iterator[Union[List[LogEntry], List[MetricEntry], List[MetricSeries]]]: ...
 
 
 class FilterLogic(Protocol):
     def __call__(
-        self, entry: Union[LogEntry, MetricEntry]
-    ) -> Union[LogEntry, MetricEntry, None]: ...
+        self, entries: Union[List[LogEntry], List[MetricEntry], List[MetricSeries]]
+    ) -> List[FilteredEvent]: ...
+
+
+class DataflowInput(NamedTuple):
+    integration_type: IntegrationTypes
+    input_type: InputTypes
+    client_config: ClientConfigTypes
+    input_source: FixedPartitionedSource
+    fetcher: DataFetcher
+    filter_logic: FilterLogic
+    slaos_key: str
+    redistribute_filtering: bool = False
+    # Filters of the inputs rolling their events up, whose windows are flushed at the end of each time range
+    aggregating_filters: Sequence[ReloadableFilter] = ()
 
 
 def get_client_instance(client_id: StrictStr) -> ClientTypes:
@@ -47,132 +118,366 @@ def get_client_instance(client_id: StrictStr) -> ClientTypes:
 
 
 def fetch_logs(
-    time_range: TimeRange, integration_id: StrictStr, integration_type: IntegrationTypes
-) -> Iterator[LogEntry]:
+    time_range: TimeRange,
+    integration_id: StrictStr,
+    integration_type: IntegrationTypes,
+    log_format: Optional[RatedParserLogFormat] = None,
+) -> Iterator[List[LogEntry]]:
+    """
+    Yields page-sized batches of log entries, so downstream steps pay their per-item overhead once per page.
+    """
     client = get_client_instance(integration_id)
 
     if integration_type == IntegrationTypes.CLOUDWATCH.value:
         raw_logs = client.query_logs(time_range.start_time, time_range.end_time)
-        return (LogEntry.from_cloudwatch_log(log) for log in raw_logs)
+        return (
+            [LogEntry.from_cloudwatch_log(log, log_format) for log in page]
+            for page in batched(raw_logs, FETCH_BATCH_SIZE)
+        )
     elif integration_type == IntegrationTypes.DATADOG.value:
         raw_logs = client.query_logs(time_range.start_time, time_range.end_time)
-        return (LogEntry.from_datadog_log(log) for log in raw_logs)
+        return (
+            [LogEntry.from_datadog_log(log) for log in page]
+            for page in batched(raw_logs, FETCH_BATCH_SIZE)
+        )
     else:
         raise ValueError(f"Unsupported integration type: {integration_type}")
 
 
+def batched_series(
+    series: Iterable[MetricSeries], size: int
+) -> Iterator[List[MetricSeries]]:
+    """
+    Groups series into pages of at most `size` samples, splitting the series that do not fit in a page.
+    """
+    page: List[MetricSeries] = []
+    page_size = 0
+    for metric_series in series:
+        start = 0
+        while start < len(metric_series):
+            stop = start + size - page_size
+            if start or stop < len(metric_series):
+                part = metric_series.slice(start, stop)
+            else:
+                part = metric_series
+            page.append(part)
+            page_size += len(part)
+            start = stop
+            if page_size >= size:
+                yield page
+                page, page_size = [], 0
+    if page:
+        yield page
+
+
 def fetch_metrics(
     time_range: TimeRange, integration_id: StrictStr, integration_type: IntegrationTypes
-) -> Iterator[MetricEntry]:
+) -> Iterator[List[MetricSeries]]:
+    """
+    Yields page-sized batches of metric series, so downstream steps pay their per-item overhead once per page.
+    Samples stay in the columns of their series until the filter step, which builds one event per sample: the later
+    stages and the sink work on events.
+    """
     client = get_client_instance(integration_id)
 
     if integration_type == IntegrationTypes.CLOUDWATCH.value:
-        raw_metrics = client.query_metrics(time_range.start_time, time_range.end_time)
-        return (MetricEntry.from_cloudwatch_metric(metric) for metric in raw_metrics)
+        to_series = MetricSeries.from_cloudwatch_series
     elif integration_type == IntegrationTypes.DATADOG.value:
-        raw_metrics = client.query_metrics(time_range.start_time, time_range.end_time)
-        return (MetricEntry.from_datadog_metric(metric) for metric in raw_metrics)
+        to_series = MetricSeries.from_datadog_series
     elif integration_type == IntegrationTypes.PROMETHEUS.value:
-        raw_metrics = client.query_metrics(time_range.start_time, time_range.end_time)
-        return (MetricEntry.from_prometheus_metric(metric) for metric in raw_metrics)
+        to_series = MetricSeries.from_prometheus_series
     else:
         raise ValueError(f"Unsupported integration type: {integration_type}")
 
+    raw_series = client.query_metric_series(time_range.start_time, time_range.end_time)
+    return batched_series(map(to_series, raw_series), FETCH_BATCH_SIZE)
+
+
+def page_entry_count(page: list) -> int:
+    if page and isinstance(page[0], MetricSeries):
+        return sum(map(len, page))
+    return len(page)
+
+
+def measure_pages(
+    pages: Iterable[list],
+    fetched: Counter,
+    fetch_seconds: Histogram,
+    page_size: Histogram,
+    slaos_key: str = "",
+    span_context: Optional[SpanContext] = None,
+) -> Iterator[list]:
+    """
+    Counts the entries of each fetched page, and times the fetch of a whole time range.
+    Only the time spent producing pages is measured, not the time downstream steps spend on them.
+    Pages of a window sampled for tracing carry its span context to the downstream steps.
+    """
+    elapsed = 0.0
+    total_entries = 0
+    iterator = iter(pages)
+    span = start_fetch(span_context, slaos_key)
+    try:
+        while True:
+            started = perf_counter()
+            try:
+                with profiler.stage("fetch", slaos_key), in_span(span):
+                    page = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                elapsed += perf_counter() - started
+
+            entries = page_entry_count(page)
+            total_entries += entries
+            fetched.inc(entries)
+            page_size.observe(entries)
+            yield traced_page(page, span_context)
+    finally:
+        if span is not None:
+            span.set_attribute("rated.entries", total_entries)
+            span.end()
+
+    fetch_seconds.observe(elapsed)
+
+
+def measured_fetcher(
+    fetcher: Callable,
+    client_id: StrictStr,
+    integration_type: IntegrationTypes,
+    labels: Tuple[str, str],
+) -> Callable[[TimeRange], Iterator[list]]:
+    fetched = ENTRIES_FETCHED.labels(*labels)
+    fetch_seconds = FETCH_SECONDS.labels(*labels)
+    page_size = PAGE_SIZE.labels(*labels)
+
+    def wrapped_fetcher(time_range):
+        return measure_pages(
+            fetcher(time_range, client_id, integration_type),
+            fetched,
+            fetch_seconds,
+            page_size,
+            labels[0],
+            window_context(time_range),
+        )
+
+    return wrapped_fetcher
+
+
+def measured_filter(filter_logic: Callable, labels: Tuple[str, str]) -> Callable:
+    filtered = EVENTS_FILTERED.labels(*labels)
+    filter_seconds = FILTER_SECONDS.labels(*labels)
+
+    def wrapped_filter(batch):
+        span_context = window_context(batch)
+        with filter_seconds.time(), profiler.stage("filter", labels[0]), filter_span(
+            span_context, labels[0]
+        ) as span:
+            events = filter_logic(batch)
+            if span is not None:
+                span.set_attribute("rated.entries", page_entry_count(batch))
+                span.set_attribute("rated.events", len(events))
+        filtered.inc(len(events))
+        # Drop empty pages so the sink is only woken up for actual events
+        return traced_page(events, span_context) or None
+
+    return wrapped_filter
+
+
+def range_end_filter(
+    wrapped_filter: Callable,
+    aggregating_filters: Sequence[ReloadableFilter],
+    labels: Tuple[str, str],
+) -> Callable:
+    """
+    Filters pages, and flushes the windows of the aggregating filters at each `RangeEnd` following them.
+    """
+    filtered = EVENTS_FILTERED.labels(*labels)
+
+    def aggregating_filter(item):
+        if not isinstance(item, RangeEnd):
+            return wrapped_filter(item)
+        # Every entry of the time range was filtered, so the windows ending before it can be flushed
+        events = [
+            event
+            for reloadable_filter in aggregating_filters
+            for event in reloadable_filter.flush(item.final, item.end_ms)
+        ]
+        filtered.inc(len(events))
+        return events or None
+
+    return aggregating_filter
+
+
+def input_fetcher(input_configs: Sequence[InputYamlConfig]) -> Callable:
+    """
+    The fetch function of inputs sharing a source.
+    """
+    input_config = input_configs[0]
+    if input_config.type == InputTypes.LOGS:
+        # Decoding can only be skipped when every pattern of the inputs expects the same format
+        log_formats = {
+            log_filter.log_format
+            for member in input_configs
+            for log_filter in member.log_filters
+        }
+        log_format = log_formats.pop() if len(log_formats) == 1 else None
+        return partial(fetch_logs, log_format=log_format)
+    return fetch_metrics
+
+
+def get_source_key(input_config: InputYamlConfig) -> str:
+    """
+    Inputs sharing a source key query the same data, on the same cadence as it only depends on the input type.
+    They are also filtered by the same step, so only inputs filtered the same way share a source: redistributed,
+    or aggregated on the worker fetching them.
+    """
+    client_config = getattr(input_config, input_config.integration.value.lower())
+    filtering = (
+        "redistributed"
+        if input_config.redistribute_filtering
+        else "aggregated" if input_config.aggregation else "local"
+    )
+    return f"{input_config.integration.value}:{input_config.type.value}:{filtering}:{client_config.model_dump_json()}"
+
+
+def fan_out(filter_logics: List[Callable]) -> Callable:
+    """
+    Runs every filter on each fetched page, so inputs sharing a source are fetched once.
+    Events keep the slaOS key of the input whose filter produced them.
+    """
+
+    def fanned_out_filter(entries):
+        return [
+            event for filter_logic in filter_logics for event in filter_logic(entries)
+        ]
+
+    return fanned_out_filter
+
+
+def skip_entries_before(filter_logic: Callable, start_from: int) -> Callable:
+    def filter_from_start(entries):
+        kept = []
+        for entry in entries:
+            if isinstance(entry, MetricSeries):
+                entry = entry.since(start_from)
+                if len(entry):
+                    kept.append(entry)
+            elif entry.timestamp_ms >= start_from:
+                kept.append(entry)
+        return filter_logic(kept)
+
+    return filter_from_start
+
 
 def parse_config(
     config: RatedIndexerYamlConfig,
 ) -> Tuple[
-    List[
-        Tuple[
-            IntegrationTypes,
-            InputTypes,
-            ClientConfigTypes,
-            FixedPartitionedSource,
-            DataFetcher,
-            FilterLogic,
-            str,
-        ]
-    ],
+    List[DataflowInput],
     OutputTypes,
     Callable[[str], DynamicSink],
 ]:
     inputs = []
     slaos_key_count: defaultdict = defaultdict(int)
+    source_groups: Dict[str, List[Tuple[InputYamlConfig, int]]] = {}
 
     for input_config in config.inputs:
         slaos_key = input_config.slaos_key
         config_index = slaos_key_count[slaos_key]
         slaos_key_count[slaos_key] += 1
 
-        input_source = RatedSource(slaos_key=slaos_key, config_index=config_index)
+        source_groups.setdefault(get_source_key(input_config), []).append(
+            (input_config, config_index)
+        )
+
+    for members in source_groups.values():
+        input_config, config_index = members[0]
+        if len(members) > 1:
+            logger.info(
+                f"Sharing one fetch between {len(members)} inputs of the same source",
+                slaos_keys=[member.slaos_key for member, _ in members],
+            )
+
+        input_source = RatedSource(
+            slaos_key=input_config.slaos_key,
+            config_index=config_index,
+            shared_with=[
+                (member.slaos_key, member_index) for member, member_index in members[1:]
+            ],
+        )
 
         client_config: ClientConfigTypes = getattr(
             input_config, input_config.integration.value.lower()
         )
 
-        fetcher = fetch_logs if input_config.type == InputTypes.LOGS else fetch_metrics
-        filter_manager = FilterManager(
-            input_config.filters, input_config.slaos_key, input_config.type
+        fetcher = input_fetcher([member for member, _ in members])
+
+        # The shared fetch resumes from the earliest member, the others skip what they sent before, as their
+        # partition resolves their offsets
+        member_offsets = (
+            [
+                resume_offset(member.slaos_key, member_index, config)
+                for member, member_index in members
+            ]
+            if len(members) > 1
+            else [input_config.offset.start_from]
         )
+        group_offset = min(member_offsets)
+        filter_logics: List[Callable] = []
+        aggregating_filters: List[ReloadableFilter] = []
+        for (member, member_index), member_offset in zip(members, member_offsets):
+            # Registered so that reloading the configuration can swap the filters of the input
+            reloadable_filter = input_registry.register(
+                (member.slaos_key, member_index), member
+            )
+            if member.aggregation is not None:
+                aggregating_filters.append(reloadable_filter)
+            filter_logic: Callable = reloadable_filter
+            if member_offset > group_offset:
+                filter_logic = skip_entries_before(filter_logic, member_offset)
+            filter_logics.append(filter_logic)
 
-        filter_logic = (
-            filter_manager.parse_and_filter_log
-            if input_config.type == InputTypes.LOGS
-            else filter_manager.parse_and_filter_metrics
-        )
         inputs.append(
-            (
+            DataflowInput(
                 input_config.integration,
                 input_config.type,
                 client_config,
                 input_source,
                 fetcher,
-                filter_logic,
-                input_config.slaos_key,
+                filter_logics[0] if len(filter_logics) == 1 else fan_out(filter_logics),
+                ",".join(member.slaos_key for member, _ in members),
+                input_config.redistribute_filtering,
+                aggregating_filters,
             )
         )
 
     output_config = config.output
+    build_sink = SINKS.get(output_config.type)
 
     if output_config.type == OutputTypes.RATED and output_config.rated:
         rated_config = output_config.rated
 
         def output_sink_builder(prefix: str) -> DynamicSink:
-            return build_http_sink(rated_config, prefix)
+            return build_sink(rated_config, prefix)
 
-    elif output_config.type == OutputTypes.CONSOLE:
+    elif output_config.type in (OutputTypes.CONSOLE, OutputTypes.NULL):
 
         def output_sink_builder(prefix: str) -> DynamicSink:
-            return build_console_sink()
+            return build_sink()
 
     else:
         raise ValueError(f"Invalid output source: {output_config.type}")
 
-    return inputs, output_config.type, output_sink_builder  # type: ignore
+    return inputs, output_config.type, output_sink_builder
 
 
-def build_dataflow(
-    inputs: List[
-        Tuple[
-            IntegrationTypes,
-            InputTypes,
-            ClientConfigTypes,
-            FixedPartitionedSource,
-            DataFetcher,
-            FilterLogic,
-            str,
-        ]
-    ],
-    output_type: OutputTypes,
-    output_sink_builder: Callable[[str], DynamicSink],
-) -> Dataflow:
-    logger.info(f"Building indexer dataflow for {len(inputs)} inputs")
-
-    flow = Dataflow("rated_multi_input_indexer")
-
-    output_streams = []
-
-    for idx, (
+@operator
+def input_stream(
+    step_id: str, flow: Dataflow, idx: int, dataflow_input: DataflowInput
+) -> Stream[List[FilteredEvent]]:
+    """
+    Fetches and filters one input.
+    """
+    (
         integration_type,
         input_type,
         client_config,
@@ -180,43 +485,138 @@ def build_dataflow(
         fetcher,
         filter_logic,
         slaos_key,
-    ) in enumerate(inputs):
-        logger.info(
-            f"Building stream {idx} for {integration_type} {input_type} with prefix '{slaos_key}'"
-        )
+        redistribute_filtering,
+        aggregating_filters,
+    ) = DataflowInput(*dataflow_input)
 
-        client_id = client_manager.add_client(integration_type, client_config)
+    logger.info(
+        f"Building stream {idx} for {integration_type} {input_type} with prefix '{slaos_key}'"
+    )
 
-        def create_fetcher(f, client, integration):
-            def wrapped_fetcher(x):
-                result = f(x, client, integration)
-                return result
+    client_id = client_manager.add_client(integration_type, client_config)
 
-            return wrapped_fetcher
+    metric_labels = (slaos_key, input_type.value)
 
-        def create_filter(f, prefix):
-            def wrapped_filter(x):
-                result = f(x)
-                if result:
-                    result.slaos_key = prefix
-                return result
+    # Fetched by the worker owning the source partition of the input
+    stream: Stream = op.input(
+        f"fetch_{integration_type.value}_{input_type.value}_{idx}",
+        flow,
+        FetchingSource(
+            input_source,
+            measured_fetcher(fetcher, client_id, integration_type, metric_labels),
+            mark_range_ends=bool(aggregating_filters),
+        ),
+    )
 
-            return wrapped_filter
+    if redistribute_filtering:
+        # Fetching stays on the worker owning the input, filtering is spread over all workers
+        logger.info(f"Redistributing filtering of stream {idx} across workers")
+        stream = op.redistribute(f"redistribute_{input_type.value}_{idx}", stream)
 
-        stream: Stream = (
-            op.input(f"input_source_{idx}", flow, input_source)
-            .then(
-                op.flat_map,
-                f"fetch_{integration_type.value}_{input_type.value}_{idx}",
-                create_fetcher(fetcher, client_id, integration_type),
-            )
-            .then(
-                op.filter_map,
-                f"filter_{input_type.value}_{idx}",
-                create_filter(filter_logic, slaos_key),
-            )
+    filter_step = measured_filter(filter_logic, metric_labels)
+    if aggregating_filters:
+        # Aggregating inputs are never redistributed, so the end of each time range follows its pages
+        filter_step = range_end_filter(filter_step, aggregating_filters, metric_labels)
+
+    stream = stream.then(op.filter_map, f"filter_{input_type.value}_{idx}", filter_step)
+
+    return stream
+
+
+def spare_input_partition(spare_input: SpareInput) -> FetchingPartition:
+    """
+    Starts fetching the input a configuration reload added to a spare input. It shares no fetch with other inputs.
+    """
+    reloadable_filter = spare_input.reloadable_filter
+    assert reloadable_filter is not None and spare_input.key is not None
+    input_config = reloadable_filter.input_config
+    slaos_key, config_index = spare_input.key
+    client_id = client_manager.add_client(
+        input_config.integration,
+        getattr(input_config, input_config.integration.value.lower()),
+    )
+    return FetchingPartition(
+        RatedPartition(slaos_key, config_index, config=spare_input.config),
+        measured_fetcher(
+            input_fetcher([input_config]),
+            client_id,
+            input_config.integration,
+            (slaos_key, input_config.type.value),
+        ),
+        mark_range_ends=input_config.aggregation is not None,
+    )
+
+
+@operator
+def spare_input_stream(
+    step_id: str, flow: Dataflow, spare_input: SpareInput
+) -> Stream[List[FilteredEvent]]:
+    """
+    Fetches and filters the input a configuration reload adds to a spare input, idle until then.
+    The input is filtered on the worker fetching it, even with `redistribute_filtering`.
+    """
+    stream: Stream = op.input(
+        f"fetch_spare_{spare_input.index}",
+        flow,
+        SpareSource(spare_input, spare_input_partition),
+    )
+    filter_step: Optional[Callable] = None
+
+    def spare_filter(item):
+        nonlocal filter_step
+        if filter_step is None:
+            # Pages only come once the input was assigned
+            reloadable_filter = spare_input.reloadable_filter
+            assert reloadable_filter is not None
+            input_config = reloadable_filter.input_config
+            labels = (input_config.slaos_key, input_config.type.value)
+            filter_step = measured_filter(reloadable_filter, labels)
+            if input_config.aggregation is not None:
+                filter_step = range_end_filter(filter_step, [reloadable_filter], labels)
+        return filter_step(item)
+
+    return stream.then(op.filter_map, f"filter_spare_{spare_input.index}", spare_filter)
+
+
+@operator
+def input_group(
+    step_id: str, flow: Dataflow, inputs: Sequence[Tuple[int, DataflowInput]]
+) -> Stream[List[FilteredEvent]]:
+    """
+    Fetches and filters a group of inputs, merging their streams.
+    """
+    streams = [
+        input_stream(f"input_{idx}", flow, idx, dataflow_input)
+        for idx, dataflow_input in inputs
+    ]
+    return op.merge("merge_inputs", *streams) if len(streams) > 1 else streams[0]
+
+
+def build_dataflow(
+    inputs: List[DataflowInput],
+    output_type: OutputTypes,
+    output_sink_builder: Callable[[str], DynamicSink],
+    deduplication: Optional[DeduplicationConfig] = None,
+    spare_inputs: int = 0,
+) -> Dataflow:
+    logger.info(f"Building indexer dataflow for {len(inputs)} inputs")
+
+    flow = Dataflow("rated_multi_input_indexer")
+
+    # Bytewax checks the ID of each new step against every step of its scope, so the streams are built in nested
+    # operators, a group of inputs at a time, to keep building a flow of thousands of inputs linear
+    output_streams = [
+        input_group(f"inputs_{group_idx}", flow, group)
+        for group_idx, group in enumerate(batched(enumerate(inputs), INPUTS_PER_GROUP))
+    ]
+    if spare_inputs:
+        logger.info(
+            f"Adding {spare_inputs} spare inputs for the inputs added on reload"
+        )
+        output_streams.extend(
+            spare_input_stream(f"spare_input_{spare_input.index}", flow, spare_input)
+            for spare_input in input_registry.add_spare_inputs(spare_inputs)
         )
-        output_streams.append(stream)
 
     if len(output_streams) > 1:
         logger.info("Merging streams")
@@ -227,7 +627,19 @@ def build_dataflow(
 
     logger.info(f"Adding output sink: {output_type.value}")
 
-    merged_stream.then(op.output, "sink_output", output_sink_builder(""))
+    if deduplication is not None:
+        logger.info("Adding deduplication of already sent events")
+        shards = deduplication.shards
+        sharded_stream = op.flat_map(
+            "shard_events", merged_stream, lambda page: shard_page(page, shards)
+        )
+        sharded_stream.then(
+            op.output,
+            "sink_output",
+            DeduplicatingSink(deduplication, output_sink_builder("")),
+        )
+    else:
+        merged_stream.then(op.output, "sink_output", output_sink_builder(""))
 
     return flow
 
@@ -239,6 +651,8 @@ def dataflow(config: RatedIndexerYamlConfig) -> Dataflow:
         inputs,
         output_type,
         output_sink_builder,
+        config.output.deduplication,
+        spare_input_count(config.reload, get_config_manager()),
     )
 
     return flow
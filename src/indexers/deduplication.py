@@ -0,0 +1,316 @@
+import json
+import os
+import time
+from hashlib import blake2b
+from math import ceil, log
+from typing import Dict, List, Optional, Set, Tuple
+
+import structlog
+from bytewax.outputs import (
+    DynamicSink,
+    FixedPartitionedSink,
+    StatefulSinkPartition,
+    StatelessSinkPartition,
+)
+
+from src.config.models.output import DeduplicationConfig
+from src.indexers.filters.types import FilteredEvent
+from src.indexers.metrics import EVENTS_DEDUPLICATED
+from src.indexers.tracing import traced_page, window_context
+
+logger = structlog.get_logger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+def key_hashes(idempotency_key: str) -> Tuple[int, int]:
+    digest = blake2b(idempotency_key.encode(), digest_size=16).digest()
+    # The second hash is odd, so that it never cycles through a subset of the bit positions
+    return int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+
+
+class BloomFilter:
+    """
+    A fixed-size Bloom filter, with bit positions derived from two hashes of the key (Kirsch-Mitzenmacher).
+    """
+
+    __slots__ = ("size", "hashes", "bits", "count")
+
+    def __init__(
+        self, size: int, hashes: int, bits: Optional[bytearray] = None, count: int = 0
+    ):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bits if bits is not None else bytearray((size + 7) // 8)
+        self.count = count
+
+    @classmethod
+    def for_capacity(cls, capacity: int, false_positive_rate: float) -> "BloomFilter":
+        size = ceil(-capacity * log(false_positive_rate) / log(2) ** 2)
+        hashes = max(1, round(size / capacity * log(2)))
+        return cls(size, hashes)
+
+    def _positions(self, hashes: Tuple[int, int]) -> List[int]:
+        first, second = hashes
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def contains(self, hashes: Tuple[int, int]) -> bool:
+        bits = self.bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(hashes)
+        )
+
+    def add(self, hashes: Tuple[int, int]) -> None:
+        bits = self.bits
+        for position in self._positions(hashes):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+
+class EventDeduplicator:
+    """
+    Remembers the idempotency keys of events already sent, in bounded memory.
+
+    Keys are held in Bloom filters partitioned by event time, so that a replayed event is only looked up in the
+    partition of its timestamp, and partitions older than the retention horizon are dropped as a whole. Events
+    older than the horizon are never reported as seen. A partition receiving more keys than it was sized for is
+    extended with another filter rather than letting its false positive rate grow.
+    """
+
+    def __init__(self, config: DeduplicationConfig, persist_path: Optional[str] = None):
+        self.partition_ms = config.partition_seconds * 1_000
+        self.retained_partitions = ceil(
+            config.retention_seconds / config.partition_seconds
+        )
+        # Keys are spread over the shards, each deduplicator holding the keys of one
+        self.capacity = ceil(config.expected_keys_per_partition / config.shards)
+        self.false_positive_rate = config.false_positive_rate
+        self.shards = config.shards
+        self.persist_path = persist_path
+        self.persist_interval = config.persist_interval_seconds
+        self._partitions: Dict[int, List[BloomFilter]] = {}
+        self._latest_partition: Optional[int] = None
+        self._persisted_at = time.monotonic()
+
+        if self.persist_path and os.path.exists(self.persist_path):
+            self.load(self.persist_path)
+
+    def _is_expired(self, partition: int) -> bool:
+        latest = self._latest_partition
+        return latest is not None and partition <= latest - self.retained_partitions
+
+    def seen(self, event: FilteredEvent) -> bool:
+        """
+        Checks whether the event was already recorded.
+        """
+        partition = event.timestamp_ms // self.partition_ms
+        filters = self._partitions.get(partition)
+        if filters is None or self._is_expired(partition):
+            return False
+        hashes = key_hashes(event.idempotency_key)
+        return any(bloom_filter.contains(hashes) for bloom_filter in filters)
+
+    def record(self, event: FilteredEvent) -> None:
+        """
+        Records the event as sent.
+        """
+        partition = event.timestamp_ms // self.partition_ms
+        if self._is_expired(partition):
+            return
+        if self._latest_partition is None or partition > self._latest_partition:
+            self._latest_partition = partition
+            self._evict(partition)
+
+        filters = self._partitions.get(partition)
+        if filters is None:
+            filters = self._partitions[partition] = [self._new_filter()]
+        elif filters[-1].count >= self.capacity:
+            filters.append(self._new_filter())
+        filters[-1].add(key_hashes(event.idempotency_key))
+
+    def _new_filter(self) -> BloomFilter:
+        return BloomFilter.for_capacity(self.capacity, self.false_positive_rate)
+
+    def _evict(self, latest_partition: int) -> None:
+        horizon = latest_partition - self.retained_partitions
+        for partition in [p for p in self._partitions if p <= horizon]:
+            del self._partitions[partition]
+
+    def persist_if_due(self) -> None:
+        if not self.persist_path:
+            return
+        if time.monotonic() - self._persisted_at < self.persist_interval:
+            return
+        self.persist()
+
+    def persist(self) -> None:
+        if not self.persist_path:
+            return
+        try:
+            self.save(self.persist_path)
+        except OSError:
+            logger.error("Failed to persist deduplication state", exc_info=True)
+        self._persisted_at = time.monotonic()
+
+    def _snapshot_header(self) -> Dict:
+        return {
+            "version": SNAPSHOT_VERSION,
+            "partition_ms": self.partition_ms,
+            "capacity": self.capacity,
+            "false_positive_rate": self.false_positive_rate,
+            "shards": self.shards,
+        }
+
+    def save(self, path: str) -> None:
+        """
+        Writes the filters to `path`: a JSON header line, followed by the bits of every filter.
+        The file is replaced atomically, so a crash while saving leaves the previous snapshot intact.
+        """
+        header = self._snapshot_header()
+        header["latest_partition"] = self._latest_partition
+        header["partitions"] = [
+            [partition, [[f.size, f.hashes, f.count] for f in filters]]
+            for partition, filters in self._partitions.items()
+        ]
+
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as snapshot:
+            snapshot.write(json.dumps(header).encode() + b"\n")
+            for filters in self._partitions.values():
+                for bloom_filter in filters:
+                    snapshot.write(bloom_filter.bits)
+        os.replace(temporary_path, path)
+
+    def load(self, path: str) -> None:
+        with open(path, "rb") as snapshot:
+            header = json.loads(snapshot.readline())
+            expected = self._snapshot_header()
+            if any(header.get(key) != value for key, value in expected.items()):
+                logger.warning(
+                    "Ignoring deduplication state saved with a different configuration",
+                    path=path,
+                )
+                return
+
+            partitions: Dict[int, List[BloomFilter]] = {}
+            for partition, filters in header["partitions"]:
+                partitions[partition] = [
+                    BloomFilter(
+                        size, hashes, bytearray(snapshot.read((size + 7) // 8)), count
+                    )
+                    for size, hashes, count in filters
+                ]
+
+        self._partitions = partitions
+        self._latest_partition = header["latest_partition"]
+        logger.info(
+            "Loaded deduplication state",
+            path=path,
+            partitions=len(partitions),
+        )
+
+
+def shard_of(idempotency_key: str, shards: int) -> int:
+    return key_hashes(idempotency_key)[0] % shards
+
+
+def shard_page(page: List[FilteredEvent], shards: int) -> List[Tuple[str, list]]:
+    """
+    Splits a page by the deduplication shard of its events, so that every event of an idempotency key is
+    handled by the same shard, whichever worker produced it.
+    """
+    by_shard: Dict[int, List[FilteredEvent]] = {}
+    for event in page:
+        by_shard.setdefault(shard_of(event.idempotency_key, shards), []).append(event)
+    span_context = window_context(page)
+    return [
+        (str(shard), traced_page(events, span_context))
+        for shard, events in by_shard.items()
+    ]
+
+
+class _DeduplicatingSinkPartition(StatefulSinkPartition[list, None]):
+    """
+    Drops the events of one shard whose idempotency key was already sent, and writes the others to a partition
+    of the wrapped sink.
+
+    Keys are only recorded once the wrapped partition reports their events as sent through its `on_sent`
+    callback, so the events of a batch that failed are sent again after a restart. Partitions without that
+    callback write synchronously, their events are recorded once written. Keys written but not yet sent are
+    held apart, so their duplicates are dropped in the meantime.
+    """
+
+    def __init__(
+        self, deduplicator: EventDeduplicator, partition: StatelessSinkPartition
+    ):
+        self.deduplicator = deduplicator
+        self.partition = partition
+        self._pending: Set[str] = set()
+        self._reports_sent = hasattr(partition, "on_sent")
+        if self._reports_sent:
+            partition.on_sent = self._record  # type: ignore[attr-defined]
+
+    def write_batch(self, pages: List[list]) -> None:
+        kept_pages = []
+        for page in pages:
+            kept = []
+            for event in page:
+                if event.idempotency_key in self._pending or self.deduplicator.seen(
+                    event
+                ):
+                    EVENTS_DEDUPLICATED.labels(event.slaos_key).inc()
+                else:
+                    self._pending.add(event.idempotency_key)
+                    kept.append(event)
+            if kept:
+                kept_pages.append(traced_page(kept, window_context(page)))
+
+        if kept_pages:
+            self.partition.write_batch(kept_pages)
+            if not self._reports_sent:
+                self._record([event for page in kept_pages for event in page])
+        self.deduplicator.persist_if_due()
+
+    def _record(self, events: List[FilteredEvent]) -> None:
+        for event in events:
+            self.deduplicator.record(event)
+            self._pending.discard(event.idempotency_key)
+
+    def snapshot(self) -> None:
+        return None
+
+    def close(self) -> None:
+        self.partition.close()
+        self.deduplicator.persist()
+
+
+class DeduplicatingSink(FixedPartitionedSink[list, None]):
+    """
+    Wraps a sink with the deduplication of the events already sent.
+
+    Events are routed by the shard of their idempotency key, and bytewax assigns each shard to a single worker of
+    the cluster, so a shard's filters are only ever used, and persisted, by one worker.
+    """
+
+    def __init__(self, config: DeduplicationConfig, sink: DynamicSink):
+        self.config = config
+        self.sink = sink
+
+    def list_parts(self) -> List[str]:
+        return [str(shard) for shard in range(self.config.shards)]
+
+    def part_fn(self, item_key: str) -> int:
+        return int(item_key)
+
+    def build_part(
+        self, step_id: str, for_part: str, resume_state: None
+    ) -> _DeduplicatingSinkPartition:
+        persist_path = self.config.persist_path
+        deduplicator = EventDeduplicator(
+            self.config, f"{persist_path}.{for_part}" if persist_path else None
+        )
+        return _DeduplicatingSinkPartition(
+            deduplicator,
+            self.sink.build(step_id, int(for_part), self.config.shards),
+        )
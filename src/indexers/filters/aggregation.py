@@ -0,0 +1,365 @@
+import json
+from math import ceil, exp, log
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from src.config.models.aggregation import AggregationConfig, AggregationStatistic
+
+LOG_COUNT_KEY = "count"
+
+K = TypeVar("K", bound=Hashable)
+A = TypeVar("A")
+
+
+def percentile_name(rank: float) -> str:
+    return "p" + f"{rank:g}".replace(".", "_")
+
+
+def labels_key(labels: Dict[str, Any]) -> Hashable:
+    items = tuple(sorted(labels.items()))
+    try:
+        hash(items)
+        return items
+    except TypeError:
+        return json.dumps(items, default=str)
+
+
+class QuantileSketch:
+    """
+    Estimates quantiles in bounded memory, following the DDSketch approach: values are counted in buckets whose
+    bounds grow geometrically, so that any estimate is within `relative_accuracy` of an actual value.
+    """
+
+    __slots__ = ("_log_gamma", "_positive", "_negative", "_zeros", "count")
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self._log_gamma = log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self._positive: Dict[int, int] = {}
+        self._negative: Dict[int, int] = {}
+        self._zeros = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if value > 0:
+            index = ceil(log(value) / self._log_gamma)
+            self._positive[index] = self._positive.get(index, 0) + 1
+        elif value < 0:
+            index = ceil(log(-value) / self._log_gamma)
+            self._negative[index] = self._negative.get(index, 0) + 1
+        else:
+            self._zeros += 1
+
+    def quantile(self, rank: float) -> float:
+        """
+        Returns the estimate of the `rank` percentile, between 0 and 100.
+        """
+        target = rank / 100 * (self.count - 1)
+        seen = 0
+
+        for index in sorted(self._negative, reverse=True):
+            seen += self._negative[index]
+            if seen > target:
+                return -self._bucket_value(index)
+        seen += self._zeros
+        if seen > target:
+            return 0.0
+        for index in sorted(self._positive):
+            seen += self._positive[index]
+            if seen > target:
+                return self._bucket_value(index)
+        raise ValueError("Cannot compute the quantile of an empty sketch")
+
+    def _bucket_value(self, index: int) -> float:
+        # Bucket `index` holds the values in (gamma^(index - 1), gamma^index], estimated by their harmonic midpoint
+        gamma = exp(self._log_gamma)
+        return 2 * pow(gamma, index) / (gamma + 1)
+
+
+class Rollup:
+    """
+    Running statistics of the values of one series within a window. A quantile sketch is only kept when
+    percentiles are computed.
+    """
+
+    __slots__ = ("count", "total", "minimum", "maximum", "sketch")
+
+    def __init__(self, keep_sketch: bool):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = float("-inf")
+        self.sketch: Optional[QuantileSketch] = (
+            QuantileSketch() if keep_sketch else None
+        )
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+        if self.sketch is not None:
+            self.sketch.add(value)
+
+    def summarize(
+        self,
+        prefix: str,
+        statistics: List[AggregationStatistic],
+        percentiles: List[float],
+    ) -> Dict[str, float]:
+        summary: Dict[AggregationStatistic, float] = {
+            AggregationStatistic.SUM: self.total,
+            AggregationStatistic.COUNT: self.count,
+            AggregationStatistic.MIN: self.minimum,
+            AggregationStatistic.MAX: self.maximum,
+            AggregationStatistic.AVG: self.total / self.count,
+        }
+        values = {
+            f"{prefix}_{statistic.value}": summary[statistic]
+            for statistic in statistics
+        }
+
+        if self.sketch is not None:
+            for rank in percentiles:
+                values[f"{prefix}_{percentile_name(rank)}"] = self.sketch.quantile(rank)
+        return values
+
+
+class TumblingWindows(Generic[K, A]):
+    """
+    Keyed accumulators over tumbling event-time windows.
+
+    The watermark is moved by the caller once every timestamp before it was seen: the indexer moves it to the end of
+    each time range once all the pages of the range were fetched. Series and log streams therefore do not need to
+    come in timestamp order within a range. Windows ending at or before the watermark, less the allowed lateness,
+    are flushed. Timestamps falling in a window that was already flushed are late, and get no accumulator.
+    """
+
+    def __init__(self, window_ms: int, lateness_ms: int):
+        self.window_ms = window_ms
+        self.lateness_ms = lateness_ms
+        self._windows: Dict[int, Dict[K, A]] = {}
+        self._watermark_ms: Optional[int] = None
+        self._closed_before_ms: Optional[int] = None
+        # Start of the oldest window still open, read by other threads to hold the offset of the input back
+        self.open_since_ms: Optional[int] = None
+
+    def accumulator(
+        self, timestamp_ms: int, key: K, create: Callable[[], A]
+    ) -> Optional[A]:
+        window_start_ms = timestamp_ms - timestamp_ms % self.window_ms
+        if (
+            self._closed_before_ms is not None
+            and window_start_ms < self._closed_before_ms
+        ):
+            return None
+
+        window = self._windows.get(window_start_ms)
+        if window is None:
+            window = self._windows[window_start_ms] = {}
+            if self.open_since_ms is None or window_start_ms < self.open_since_ms:
+                self.open_since_ms = window_start_ms
+        accumulator = window.get(key)
+        if accumulator is None:
+            accumulator = window[key] = create()
+        return accumulator
+
+    def advance(self, watermark_ms: int) -> None:
+        """
+        Moves the watermark to `watermark_ms`, once every timestamp before it was seen. It never moves back.
+        """
+        if self._watermark_ms is None or watermark_ms > self._watermark_ms:
+            self._watermark_ms = watermark_ms
+
+    def flush(self, final: bool = False) -> Iterator[Tuple[int, K, A]]:
+        """
+        Yields the accumulators of the windows closed by the watermark, oldest window first.
+        A final flush closes every window.
+        """
+        if final:
+            if not self._windows:
+                return
+            closed_before_ms = max(self._windows) + self.window_ms
+        elif self._watermark_ms is None:
+            return
+        else:
+            watermark_ms = self._watermark_ms - self.lateness_ms
+            closed_before_ms = watermark_ms - watermark_ms % self.window_ms
+        if self._closed_before_ms is not None:
+            closed_before_ms = max(closed_before_ms, self._closed_before_ms)
+        self._closed_before_ms = closed_before_ms
+
+        for window_start_ms in sorted(self._windows):
+            if window_start_ms >= closed_before_ms:
+                break
+            for key, accumulator in self._windows.pop(window_start_ms).items():
+                yield window_start_ms, key, accumulator
+        self.open_since_ms = min(self._windows) if self._windows else None
+
+
+class MetricRollup(NamedTuple):
+    window_start_ms: int
+    organization_id: str
+    metric_key: str
+    labels: Dict[str, Any]
+    values: Dict[str, float]
+
+
+class MetricAggregator:
+    """
+    Rolls metric samples up into tumbling event-time windows, per organization, metric and label set.
+    """
+
+    def __init__(self, config: AggregationConfig):
+        self.windows: TumblingWindows[Tuple[str, str, Hashable], Tuple[Dict, Rollup]]
+        self.windows = TumblingWindows(
+            config.window_seconds * 1_000, config.allowed_lateness_seconds * 1_000
+        )
+        self.statistics = config.statistics
+        self.percentiles = config.percentiles
+
+    def add(
+        self,
+        organization_id: str,
+        metric_key: str,
+        labels: Dict[str, Any],
+        timestamps_ms: Iterable[int],
+        values: Iterable[Any],
+    ) -> int:
+        """
+        Adds the samples of a series to their windows, returning how many were dropped as late.
+        """
+        series_key = (organization_id, metric_key, labels_key(labels))
+        keep_sketch = bool(self.percentiles)
+
+        def create() -> Tuple[Dict, Rollup]:
+            return labels, Rollup(keep_sketch)
+
+        late = 0
+        for timestamp_ms, value in zip(timestamps_ms, values):
+            if value is None:
+                continue
+            series = self.windows.accumulator(timestamp_ms, series_key, create)
+            if series is None:
+                late += 1
+            else:
+                series[1].add(value)
+        return late
+
+    def flush(self, final: bool = False) -> List[MetricRollup]:
+        return [
+            MetricRollup(
+                window_start_ms,
+                organization_id,
+                metric_key,
+                labels,
+                rollup.summarize(metric_key, self.statistics, self.percentiles),
+            )
+            for window_start_ms, (
+                organization_id,
+                metric_key,
+                _,
+            ), (
+                labels,
+                rollup,
+            ) in self.windows.flush(final)
+        ]
+
+
+class LogRollup:
+    """
+    The number of log events of one organization and group within a window, and the statistics of their fields.
+    """
+
+    __slots__ = ("labels", "count", "fields")
+
+    def __init__(self, labels: Dict[str, Any]):
+        self.labels = labels
+        self.count = 0
+        self.fields: Dict[str, Rollup] = {}
+
+
+class LogRollupResult(NamedTuple):
+    window_start_ms: int
+    organization_id: str
+    labels: Dict[str, Any]
+    values: Dict[str, float]
+
+
+class LogAggregator:
+    """
+    Rolls parsed log events up into tumbling event-time windows, per organization and `group_by` values.
+
+    Each window counts its events, and summarizes the numeric `fields` of their values.
+    """
+
+    def __init__(self, config: AggregationConfig):
+        self.windows: TumblingWindows[Tuple[str, Hashable], LogRollup]
+        self.windows = TumblingWindows(
+            config.window_seconds * 1_000, config.allowed_lateness_seconds * 1_000
+        )
+        self.fields = config.fields
+        self.group_by = config.group_by
+        self.statistics = config.statistics
+        self.percentiles = config.percentiles
+
+    def add(
+        self, organization_id: str, timestamp_ms: int, values: Dict[str, Any]
+    ) -> bool:
+        """
+        Adds the event to its window, returning False when it was dropped as late.
+        """
+        labels = {key: values.get(key) for key in self.group_by}
+        log_rollup = self.windows.accumulator(
+            timestamp_ms,
+            (organization_id, labels_key(labels)),
+            lambda: LogRollup(labels),
+        )
+        if log_rollup is None:
+            return False
+
+        log_rollup.count += 1
+        for field in self.fields:
+            value = values.get(field)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                rollup = log_rollup.fields.get(field)
+                if rollup is None:
+                    rollup = log_rollup.fields[field] = Rollup(bool(self.percentiles))
+                rollup.add(value)
+        return True
+
+    def flush(self, final: bool = False) -> List[LogRollupResult]:
+        results = []
+        for (
+            window_start_ms,
+            (
+                organization_id,
+                _,
+            ),
+            log_rollup,
+        ) in self.windows.flush(final):
+            values: Dict[str, float] = {LOG_COUNT_KEY: log_rollup.count}
+            for field, rollup in log_rollup.fields.items():
+                values.update(
+                    rollup.summarize(field, self.statistics, self.percentiles)
+                )
+            results.append(
+                LogRollupResult(
+                    window_start_ms, organization_id, log_rollup.labels, values
+                )
+            )
+        return results
@@ -1,51 +1,174 @@
+import json
 import re
+from functools import lru_cache
 from hashlib import sha256
-from typing import Optional, Dict, Union
+from typing import Any, Optional, Dict, List, Sequence, Set, Union
+from weakref import WeakValueDictionary
 
 import structlog
 from rated_parser import RatedParser  # type: ignore
 from rated_parser.payloads.log_patterns import RawTextLogPattern, JsonLogPattern, LogFormat as RatedParserLogFormat  # type: ignore
 from rated_parser.payloads.metric_patterns import MetricPattern  # type: ignore
 
-from src.config.models.inputs.input import InputTypes
+from src.config.models.aggregation import AggregationConfig
+from src.config.models.inputs.input import IdempotencyKeyAlgorithm, InputTypes
 from src.config.models.filters import MetricFilterConfig, LogFilterConfig
+from src.indexers.filters.aggregation import (
+    LOG_COUNT_KEY,
+    LogAggregator,
+    MetricAggregator,
+    TumblingWindows,
+)
+from src.indexers.filters.pool import LogParserPool, ParseResult
+from src.indexers.filters.pre_filter import LogPreFilter
+from src.indexers.filters.router import LogPatternRouter
+from src.indexers.filters.template_cache import LogTemplate, LogTemplateCache
+from src.indexers.metrics import (
+    LOG_ENTRIES_REJECTED,
+    METRIC_SAMPLES_REJECTED,
+    cache_collector,
+)
+from src.utils.labels import interned_label_set
 from src.indexers.filters.types import (
     FilteredEvent,
     LogEntry,
     MetricEntry,
-    generate_idempotency_key,
+    MetricIdempotencyKeyGenerator,
+    MetricSeries,
 )
 
 logger = structlog.getLogger(__name__)
 
+SPECIAL_CHARACTERS_PATTERN = re.compile(r"[^\w/]", flags=re.UNICODE)
+
+SANITIZED_KEYS_CACHE_SIZE = 4_096
+HASHED_VALUES_CACHE_SIZE = 65_536
+
+# Parsers by their patterns, so the inputs of identical filters share one. A parser is dropped along with the last
+# manager using it, so the parsers of filters replaced by a configuration reload do not pile up.
+_shared_parsers: "WeakValueDictionary[str, RatedParser]" = WeakValueDictionary()
+
+
+def get_shared_parser(
+    log_patterns: Sequence[Dict], metric_patterns: Sequence[Dict]
+) -> RatedParser:
+    """
+    Returns the parser of these patterns, only building it the first time they are seen.
+    Parsing does not change a parser, so one instance can serve any number of inputs.
+    """
+    key = json.dumps([log_patterns, metric_patterns], sort_keys=True, default=str)
+    parser = _shared_parsers.get(key)
+    if parser is None:
+        parser = RatedParser()
+        for log_pattern in log_patterns:
+            parser.add_log_pattern(log_pattern)
+        for metric_pattern in metric_patterns:
+            parser.add_metric_pattern(metric_pattern)
+        _shared_parsers[key] = parser
+    return parser
+
 
 class FilterManager:
     def __init__(
         self,
-        filter_config: Optional[Union[LogFilterConfig, MetricFilterConfig]],
+        filter_config: Optional[
+            Union[LogFilterConfig, List[LogFilterConfig], MetricFilterConfig]
+        ],
         slaos_key: str,
         input_type: InputTypes,
+        idempotency_key_algorithm: IdempotencyKeyAlgorithm = IdempotencyKeyAlgorithm.BLAKE2B,
+        aggregation: Optional[AggregationConfig] = None,
     ):
-        self.parser = RatedParser()
+        self.parser: RatedParser
         self.input_type = input_type
         self.filter_config = filter_config
         self.slaos_key = slaos_key
+        self.idempotency_key_generator = MetricIdempotencyKeyGenerator(
+            idempotency_key_algorithm
+        )
+        self.parser_pool: Optional[LogParserPool] = None
+        self.pre_filter: Optional[LogPreFilter] = (
+            LogPreFilter(filter_config.pre_filter)
+            if isinstance(filter_config, LogFilterConfig) and filter_config.pre_filter
+            else None
+        )
+        self.router: Optional[LogPatternRouter] = (
+            LogPatternRouter(filter_config) if isinstance(filter_config, list) else None
+        )
+        self.template_cache: Optional[LogTemplateCache] = None
+        if isinstance(filter_config, LogFilterConfig) and filter_config.template_cache:
+            self.template_cache = LogTemplateCache(
+                filter_config.template_cache.max_templates,
+                filter_config.template_cache.similarity_threshold,
+                filter_config.template_cache.min_failures,
+                filter_config.template_cache.retest_every,
+            )
+            cache_collector.add_cache(f"log_templates_{slaos_key}", self.template_cache)
+        self._pre_filter_rejections = LOG_ENTRIES_REJECTED.labels(
+            slaos_key, "pre_filter"
+        )
+        self._template_cache_rejections = LOG_ENTRIES_REJECTED.labels(
+            slaos_key, "template_cache"
+        )
+        self._unrouted = LOG_ENTRIES_REJECTED.labels(slaos_key, "unrouted")
+        self._parse_errors = LOG_ENTRIES_REJECTED.labels(slaos_key, "parse_error")
+        self._missing_organization_ids = LOG_ENTRIES_REJECTED.labels(
+            slaos_key, "missing_organization_id"
+        )
+        self.aggregation = aggregation
+        self.aggregator: Optional[MetricAggregator] = (
+            MetricAggregator(aggregation)
+            if aggregation and input_type == InputTypes.METRICS
+            else None
+        )
+        self.log_aggregator: Optional[LogAggregator] = (
+            LogAggregator(aggregation)
+            if aggregation and input_type == InputTypes.LOGS
+            else None
+        )
+        self._late_samples = METRIC_SAMPLES_REJECTED.labels(slaos_key, "late")
+        self._late_log_entries = LOG_ENTRIES_REJECTED.labels(slaos_key, "late")
+        self._hashed_metric_fields: Set[str] = (
+            {field.key for field in filter_config.fields if field.hash}
+            if isinstance(filter_config, MetricFilterConfig)
+            else set()
+        )
         self._initialize_parser()
 
+    def close(self) -> None:
+        """
+        Releases what the manager holds beyond its own lifetime, once its input is reloaded.
+        """
+        if self.parser_pool is not None:
+            self.parser_pool.close()
+        if self.template_cache is not None:
+            cache_collector.remove_cache(
+                f"log_templates_{self.slaos_key}", self.template_cache
+            )
+
     def _initialize_parser(self):
-        if self._should_skip_initialization():
-            return
+        log_patterns: List[Dict] = []
+        metric_patterns: List[Dict] = []
+        if not self._should_skip_initialization():
+            self._validate_configuration()
+            filter_configs = (
+                self.filter_config
+                if isinstance(self.filter_config, list)
+                else [self.filter_config]
+            )
+            for filter_config in filter_configs:
+                pattern = self._create_pattern(filter_config)
+                self._add_pattern(filter_config, pattern, log_patterns, metric_patterns)
 
-        self._validate_configuration()
-        pattern = self._create_pattern()
-        self._add_pattern_to_parser(pattern)
+        self.parser = get_shared_parser(log_patterns, metric_patterns)
 
     def _should_skip_initialization(self) -> bool:
         return self.input_type == InputTypes.METRICS and not self.filter_config
 
     def _validate_configuration(self):
-        if self.input_type == InputTypes.LOGS and not isinstance(
-            self.filter_config, LogFilterConfig
+        if self.input_type == InputTypes.LOGS and not (
+            isinstance(self.filter_config, LogFilterConfig)
+            or self._is_log_filter_list(self.filter_config)
         ):
             raise ValueError("Log input type requires LogFilterConfig")
 
@@ -56,62 +179,88 @@ class FilterManager:
         ):
             raise ValueError("Metric input type requires MetricFilterConfig")
 
-    def _create_pattern(self) -> Dict:
+    @staticmethod
+    def _is_log_filter_list(filter_config) -> bool:
+        return (
+            isinstance(filter_config, list)
+            and bool(filter_config)
+            and all(isinstance(config, LogFilterConfig) for config in filter_config)
+        )
+
+    def _create_pattern(
+        self, filter_config: Union[LogFilterConfig, MetricFilterConfig]
+    ) -> Dict:
         if self.input_type == InputTypes.LOGS and isinstance(
-            self.filter_config, LogFilterConfig
+            filter_config, LogFilterConfig
         ):
             return {
-                "version": self.filter_config.version,
-                "log_format": self.filter_config.log_format,
-                "log_example": self.filter_config.log_example,
-                "fields": [field.model_dump() for field in self.filter_config.fields],
+                "version": filter_config.version,
+                "log_format": filter_config.log_format,
+                "log_example": filter_config.log_example,
+                "fields": [field.model_dump() for field in filter_config.fields],
             }
         elif self.input_type == InputTypes.METRICS and isinstance(
-            self.filter_config, MetricFilterConfig
+            filter_config, MetricFilterConfig
         ):
             return {
-                "version": self.filter_config.version,
-                "fields": [field.model_dump() for field in self.filter_config.fields],
+                "version": filter_config.version,
+                "fields": [field.model_dump() for field in filter_config.fields],
             }
         else:
             raise ValueError(
                 f"Invalid combination of input type ({self.input_type}) and "
-                f"filter config type ({type(self.filter_config)})"
+                f"filter config type ({type(filter_config)})"
             )
 
-    def _add_pattern_to_parser(self, pattern: Dict):
+    def _add_pattern(
+        self,
+        filter_config: Union[LogFilterConfig, MetricFilterConfig],
+        pattern: Dict,
+        log_patterns: List[Dict],
+        metric_patterns: List[Dict],
+    ):
         if self.input_type == InputTypes.LOGS and isinstance(
-            self.filter_config, LogFilterConfig
+            filter_config, LogFilterConfig
         ):
-            if self.filter_config.log_format == RatedParserLogFormat.RAW_TEXT:
+            if filter_config.log_format == RatedParserLogFormat.RAW_TEXT:
                 pattern_payload = RawTextLogPattern(**pattern)
-            elif self.filter_config.log_format == RatedParserLogFormat.JSON:
+            elif filter_config.log_format == RatedParserLogFormat.JSON:
                 pattern_payload = JsonLogPattern(**pattern)
             else:
-                raise ValueError(
-                    f"Unsupported log format: {self.filter_config.log_format}"
-                )
+                raise ValueError(f"Unsupported log format: {filter_config.log_format}")
+
+            log_pattern = pattern_payload.model_dump()
+            log_patterns.append(log_pattern)
 
-            self.parser.add_log_pattern(pattern_payload.model_dump())
+            if filter_config.parser_pool:
+                self.parser_pool = LogParserPool(
+                    log_pattern,
+                    version=filter_config.version,
+                    processes=filter_config.parser_pool.processes,
+                    batch_size=filter_config.parser_pool.batch_size,
+                )
         elif self.input_type == InputTypes.METRICS and isinstance(
-            self.filter_config, MetricFilterConfig
+            filter_config, MetricFilterConfig
         ):
             pattern_payload = MetricPattern(**pattern)
-            self.parser.add_metric_pattern(pattern_payload.model_dump())
+            metric_patterns.append(pattern_payload.model_dump())
         else:
             raise ValueError(
-                f"Invalid combination of input type ({self.input_type}) and filter config {type(self.filter_config)}"
+                f"Invalid combination of input type ({self.input_type}) and filter config {type(filter_config)}"
             )
 
     @staticmethod
+    @lru_cache(maxsize=SANITIZED_KEYS_CACHE_SIZE)
     def _replace_special_characters(input_string: str) -> str:
         """
         Replace all special characters in the input string with underscores,
         except for forward slashes (/).
+        The set of keys per input is small and repeats for every event, hence the cache.
         """
-        return re.sub(r"[^\w/]", "_", input_string, flags=re.UNICODE)
+        return SPECIAL_CHARACTERS_PATTERN.sub("_", input_string)
 
     @staticmethod
+    @lru_cache(maxsize=HASHED_VALUES_CACHE_SIZE)
     def _basic_hash(value: str) -> str:
         """
         Basic hash function for testing purposes.
@@ -122,70 +271,240 @@ class FilterManager:
         """
         Returns parsed fields dictionary from the log entry if the log entry is successfully parsed and filtered.
         """
+        if self.router is not None:
+            return self._route_and_filter_log(log_entry, self.router)
+
         if not isinstance(self.filter_config, LogFilterConfig):
             raise ValueError("Cannot parse logs without LogFilterConfig")
 
-        try:
-            parsed_log = self.parser.parse_log(
-                log_entry.content, version=self.filter_config.version
-            )
-
-            fields = parsed_log.parsed_fields
-            if not fields or not fields.get("organization_id"):
-                logger.warning(
-                    "Organization ID is missing, please update the filter logic to include `organization_id`",
-                    extra={
-                        "parsed_fields": parsed_log.parsed_fields,
-                        "log_content": log_entry.content,
-                    },
-                )
-                return None
+        if self.pre_filter and not self.pre_filter.matches(log_entry.content):
+            self._pre_filter_rejections.inc()
+            return None
 
-            validated_fields = {
-                self._replace_special_characters(k): v
-                for k, v in parsed_log.parsed_fields.items()
-            }
+        template = self._match_template(log_entry)
+        if template is not None and self._skips_template(template):
+            return None
 
-            return FilteredEvent(
-                slaos_key=self.slaos_key,
-                idempotency_key=log_entry.log_id,
-                event_timestamp=log_entry.event_timestamp,
-                organization_id=parsed_log.parsed_fields["organization_id"],
-                values=validated_fields,
-            )
+        parse_result = self._parse_log_content(
+            log_entry.content, self.filter_config.version
+        )
+        if template is not None and self.template_cache is not None:
+            self.template_cache.record(template, parse_result[1] is None)
+
+        return self._filter_parsed_log(log_entry, parse_result)
+
+    def _parse_log_content(
+        self, content: Union[str, dict], version: int
+    ) -> ParseResult:
+        try:
+            parsed_log = self.parser.parse_log(content, version=version)
+            return parsed_log.parsed_fields, None
 
         except Exception as e:
+            return None, str(e)
+
+    def _route_and_filter_log(
+        self, log_entry: LogEntry, router: LogPatternRouter
+    ) -> Optional[FilteredEvent]:
+        """
+        Parses the log entry with the first of its routed patterns that matches it.
+        """
+        versions = router.route(log_entry)
+        if not versions:
+            self._unrouted.inc()
+            return None
+
+        for version in versions:
+            parse_result = self._parse_log_content(log_entry.content, version)
+            if parse_result[1] is None:
+                break
+
+        return self._filter_parsed_log(log_entry, parse_result)
+
+    def _match_template(self, log_entry: LogEntry) -> Optional[LogTemplate]:
+        if self.template_cache is None or not isinstance(log_entry.content, str):
+            return None
+        return self.template_cache.match(log_entry.content)
+
+    def _skips_template(self, template: LogTemplate) -> bool:
+        assert self.template_cache is not None
+        if self.template_cache.should_skip(template):
+            self._template_cache_rejections.inc()
+            return True
+        return False
+
+    def _filter_parsed_log(
+        self, log_entry: LogEntry, parse_result: ParseResult
+    ) -> Optional[FilteredEvent]:
+        fields, error = parse_result
+
+        if error is not None:
+            self._parse_errors.inc()
             logger.error(
                 "Log parsing error",
-                extra={"log_content": log_entry.content, "error": str(e)},
+                extra={"log_content": log_entry.content, "error": error},
+            )
+            return None
+
+        if not fields or not fields.get("organization_id"):
+            self._missing_organization_ids.inc()
+            logger.warning(
+                "Organization ID is missing, please update the filter logic to include `organization_id`",
+                extra={
+                    "parsed_fields": fields,
+                    "log_content": log_entry.content,
+                },
             )
             return None
 
-    def process_metric_organization_id(self, metrics_entry: MetricEntry) -> str:
+        validated_fields = {
+            self._replace_special_characters(k): v for k, v in fields.items()
+        }
+
+        return FilteredEvent(
+            slaos_key=self.slaos_key,
+            idempotency_key=log_entry.log_id,
+            timestamp_ms=log_entry.timestamp_ms,
+            organization_id=fields["organization_id"],
+            values=validated_fields,
+        )
+
+    def parse_and_filter_log_batch(
+        self, log_entries: List[LogEntry]
+    ) -> List[FilteredEvent]:
+        """
+        Parses and filters a page of log entries, dropping the entries that could not be parsed.
+        When a parser pool is configured, parsing is offloaded to its worker processes.
+        When aggregating, the events are rolled up instead, and nothing is returned: the rollups of their windows are
+        returned by `flush_rollups` once the watermark closes the windows.
+        """
+        events = self._parse_and_filter_log_entries(log_entries)
+        if self.log_aggregator is not None:
+            self._aggregate_log_events(self.log_aggregator, events)
+            return []
+        return events
+
+    def _parse_and_filter_log_entries(
+        self, log_entries: List[LogEntry]
+    ) -> List[FilteredEvent]:
+        if self.router is not None:
+            router = self.router
+            routed_events = (
+                self._route_and_filter_log(entry, router) for entry in log_entries
+            )
+            return [event for event in routed_events if event is not None]
+
+        if not isinstance(self.filter_config, LogFilterConfig):
+            raise ValueError("Cannot parse logs without LogFilterConfig")
+
+        if self.pre_filter:
+            matches = self.pre_filter.matches
+            accepted = [entry for entry in log_entries if matches(entry.content)]
+            if rejected := len(log_entries) - len(accepted):
+                self._pre_filter_rejections.inc(rejected)
+            log_entries = accepted
+
+        templates = [self._match_template(log_entry) for log_entry in log_entries]
+        if self.template_cache is not None:
+            kept = [
+                (log_entry, template)
+                for log_entry, template in zip(log_entries, templates)
+                if template is None or not self._skips_template(template)
+            ]
+            log_entries = [log_entry for log_entry, _ in kept]
+            templates = [template for _, template in kept]
+
+        contents = [log_entry.content for log_entry in log_entries]
+        if self.parser_pool is None:
+            version = self.filter_config.version
+            parse_results = [
+                self._parse_log_content(content, version) for content in contents
+            ]
+        else:
+            parse_results = self.parser_pool.parse_logs(contents)
+
+        events = []
+        template_cache = self.template_cache
+        for log_entry, template, parse_result in zip(
+            log_entries, templates, parse_results
+        ):
+            if template is not None and template_cache is not None:
+                template_cache.record(template, parse_result[1] is None)
+            event = self._filter_parsed_log(log_entry, parse_result)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def _aggregate_log_events(
+        self, log_aggregator: LogAggregator, events: List[FilteredEvent]
+    ) -> None:
+        add = log_aggregator.add
+        late = sum(
+            not add(event.organization_id, event.timestamp_ms, event.values)
+            for event in events
+        )
+        if late:
+            self._late_log_entries.inc(late)
+
+    def _flush_log_rollups(
+        self, log_aggregator: LogAggregator, final: bool = False
+    ) -> List[FilteredEvent]:
+        return [
+            FilteredEvent(
+                slaos_key=self.slaos_key,
+                idempotency_key=self.idempotency_key_generator.generate(
+                    timestamp_ms=rollup.window_start_ms,
+                    organization_id=rollup.organization_id,
+                    metric_key=LOG_COUNT_KEY,
+                    value=log_aggregator.windows.window_ms,
+                    labels=rollup.labels,
+                ),
+                timestamp_ms=rollup.window_start_ms,
+                organization_id=rollup.organization_id,
+                values={**rollup.values, **rollup.labels},
+            )
+            for rollup in log_aggregator.flush(final)
+        ]
+
+    def process_metric_organization_id(
+        self, metrics_entry: Union[MetricEntry, MetricSeries]
+    ) -> str:
         """
         Check if the organization identifier field is present in the filter_config.
         If present and hash is true, hash the organization_id, otherwise return it as is.
         """
         if (
-            self.filter_config
-            and isinstance(self.filter_config, MetricFilterConfig)
-            and metrics_entry.organization_identifier
+            metrics_entry.organization_identifier
+            and metrics_entry.organization_identifier in self._hashed_metric_fields
         ):
-            # Find if the specified field exists in filter config
-            org_id_field = next(
-                (
-                    field
-                    for field in self.filter_config.fields
-                    if field.key == metrics_entry.organization_identifier
-                ),
-                None,
+            return self._basic_hash(str(metrics_entry.organization_id))
+
+        return metrics_entry.organization_id
+
+    def _validate_metric_labels(self, labels: Optional[Dict]) -> Optional[Dict]:
+        """
+        Returns the sanitized fields of the metric labels, or None when the filter pattern finds no fields in them.
+        """
+        if not labels:
+            return {}
+
+        if self.filter_config:
+            if not isinstance(self.filter_config, MetricFilterConfig):
+                raise ValueError("Cannot parse metrics without MetricFilterConfig")
+
+            parsed_metric = self.parser.parse_metric(
+                labels,
+                version=self.filter_config.version,
             )
+            fields = parsed_metric.parsed_fields
 
-            # If field exists and hash is true, hash the organization_id
-            if org_id_field and getattr(org_id_field, "hash", False):
-                return self._basic_hash(str(metrics_entry.organization_id))
+            if not fields:
+                logger.info("No fields found in parsed metric")
+                return None
+        else:
+            fields = labels
 
-        return metrics_entry.organization_id
+        return {self._replace_special_characters(k): v for k, v in fields.items()}
 
     def parse_and_filter_metrics(
         self, metrics_entry: MetricEntry
@@ -194,48 +513,26 @@ class FilterManager:
         Returns parsed fields dictionary from the metrics entry if the metrics entry is successfully parsed and filtered.
         """
         try:
-            base_values = {
-                self._replace_special_characters(
-                    metrics_entry.metric_name
-                ): metrics_entry.value
-            }
-
-            validated_fields = {}
-            if metrics_entry.labels:
-                if self.filter_config:
-                    if not isinstance(self.filter_config, MetricFilterConfig):
-                        raise ValueError(
-                            "Cannot parse metrics without MetricFilterConfig"
-                        )
-
-                    parsed_metric = self.parser.parse_metric(
-                        metrics_entry.labels,
-                        version=self.filter_config.version,
-                    )
-                    fields = parsed_metric.parsed_fields
-
-                    if not fields:
-                        logger.info("No fields found in parsed metric")
-                        return None
-                else:
-                    fields = metrics_entry.labels
-
-                validated_fields = {
-                    self._replace_special_characters(k): v for k, v in fields.items()
-                }
+            metric_key = self._replace_special_characters(metrics_entry.metric_name)
+            validated_fields = self._validate_metric_labels(metrics_entry.labels)
+            if validated_fields is None:
+                return None
 
-            values = {**base_values, **validated_fields}
+            values = {metric_key: metrics_entry.value, **validated_fields}
 
-            idempotency_key = generate_idempotency_key(
-                event_timestamp=metrics_entry.event_timestamp,
+            idempotency_key = self.idempotency_key_generator.generate(
+                timestamp_ms=metrics_entry.timestamp_ms,
                 organization_id=metrics_entry.organization_id,
-                values=values,
+                metric_key=metric_key,
+                value=metrics_entry.value,
+                labels=validated_fields,
+                naive_timestamp=metrics_entry.naive_timestamps,
             )
 
             return FilteredEvent(
                 slaos_key=self.slaos_key,
                 idempotency_key=idempotency_key,
-                event_timestamp=metrics_entry.event_timestamp,
+                timestamp_ms=metrics_entry.timestamp_ms,
                 organization_id=self.process_metric_organization_id(metrics_entry),
                 values=values,
             )
@@ -246,3 +543,175 @@ class FilterManager:
                 extra={"metric_content": metrics_entry, "error": str(e)},
             )
             return None
+
+    def parse_and_filter_metric_series(
+        self, metric_series: MetricSeries
+    ) -> List[FilteredEvent]:
+        """
+        Parses and filters a metric series: its labels, organization and idempotency key digest are processed once,
+        then one event is built per sample, as the later stages and the sink expect.
+        """
+        try:
+            metric_key = self._replace_special_characters(metric_series.metric_name)
+            validated_fields = self._validate_metric_labels(metric_series.labels)
+            if validated_fields is None:
+                return []
+
+            idempotency_keys = self.idempotency_key_generator.generate_series(
+                timestamps_ms=metric_series.timestamps_ms,
+                organization_id=metric_series.organization_id,
+                metric_key=metric_key,
+                values=metric_series.values,
+                labels=validated_fields,
+                naive_timestamps=metric_series.naive_timestamps,
+            )
+            organization_id = self.process_metric_organization_id(metric_series)
+
+            return [
+                FilteredEvent(
+                    slaos_key=self.slaos_key,
+                    idempotency_key=idempotency_key,
+                    timestamp_ms=timestamp_ms,
+                    organization_id=organization_id,
+                    values={metric_key: value, **validated_fields},
+                )
+                for timestamp_ms, value, idempotency_key in zip(
+                    metric_series.timestamps_ms, metric_series.values, idempotency_keys
+                )
+            ]
+
+        except Exception as e:
+            logger.error(
+                "Metric parsing error",
+                extra={"metric_content": metric_series, "error": str(e)},
+            )
+            return []
+
+    def parse_and_filter_metrics_batch(
+        self, metrics_entries: Union[List[MetricEntry], List[MetricSeries]]
+    ) -> List[FilteredEvent]:
+        """
+        Parses and filters a page of metric series or entries, dropping the samples that could not be parsed.
+        When aggregating, the samples are rolled up instead, and nothing is returned: the rollups of their windows are
+        returned by `flush_rollups` once the watermark closes the windows.
+        """
+        if self.aggregator is not None:
+            return self._aggregate_metrics_batch(metrics_entries)
+
+        events: List[FilteredEvent] = []
+        for metrics_entry in metrics_entries:
+            if isinstance(metrics_entry, MetricSeries):
+                events.extend(self.parse_and_filter_metric_series(metrics_entry))
+            else:
+                event = self.parse_and_filter_metrics(metrics_entry)
+                if event is not None:
+                    events.append(event)
+        return events
+
+    def _aggregate_metrics_batch(
+        self, metrics_entries: Union[List[MetricEntry], List[MetricSeries]]
+    ) -> List[FilteredEvent]:
+        for metrics_entry in metrics_entries:
+            try:
+                if isinstance(metrics_entry, MetricSeries):
+                    self._aggregate_metrics(
+                        metrics_entry,
+                        metrics_entry.timestamps_ms,
+                        metrics_entry.values,
+                    )
+                else:
+                    self._aggregate_metrics(
+                        metrics_entry,
+                        (metrics_entry.timestamp_ms,),
+                        (metrics_entry.value,),
+                    )
+            except Exception as e:
+                logger.error(
+                    "Metric parsing error",
+                    extra={"metric_content": metrics_entry, "error": str(e)},
+                )
+
+        return []
+
+    def _aggregate_metrics(
+        self,
+        metrics_entry: Union[MetricEntry, MetricSeries],
+        timestamps_ms: Sequence[int],
+        values: Sequence[Any],
+    ) -> None:
+        assert self.aggregator is not None
+        validated_fields = self._validate_metric_labels(metrics_entry.labels)
+        if validated_fields is None:
+            return
+
+        late = self.aggregator.add(
+            self.process_metric_organization_id(metrics_entry),
+            self._replace_special_characters(metrics_entry.metric_name),
+            validated_fields,
+            timestamps_ms,
+            values,
+        )
+        if late:
+            self._late_samples.inc(late)
+
+    def _flush_rollups(self, final: bool = False) -> List[FilteredEvent]:
+        assert self.aggregator is not None
+        return [
+            FilteredEvent(
+                slaos_key=self.slaos_key,
+                # The window length is part of the key, so rollups of different windows never collide
+                idempotency_key=self.idempotency_key_generator.generate(
+                    timestamp_ms=rollup.window_start_ms,
+                    organization_id=rollup.organization_id,
+                    metric_key=rollup.metric_key,
+                    value=self.aggregator.windows.window_ms,
+                    labels=rollup.labels,
+                ),
+                timestamp_ms=rollup.window_start_ms,
+                organization_id=rollup.organization_id,
+                values={**rollup.values, **rollup.labels},
+            )
+            for rollup in self.aggregator.flush(final)
+        ]
+
+    @property
+    def windows(self) -> Optional[TumblingWindows]:
+        """
+        The windows of the aggregator of the input, when it aggregates.
+        """
+        aggregator = self.aggregator or self.log_aggregator
+        return aggregator.windows if aggregator is not None else None
+
+    def take_over(self, previous: "FilterManager") -> List[FilteredEvent]:
+        """
+        Carries on the windows of the manager this one replaces when they are rolled up the same way. Otherwise,
+        the windows of the previous manager are all flushed, and their rollups returned.
+        """
+        if self.aggregation is None or self.aggregation != previous.aggregation:
+            return previous.flush_rollups(final=True)
+        if self.aggregator is not None and previous.aggregator is not None:
+            self.aggregator.windows = previous.aggregator.windows
+        if self.log_aggregator is not None and previous.log_aggregator is not None:
+            self.log_aggregator.windows = previous.log_aggregator.windows
+        return []
+
+    def flush_rollups(
+        self, final: bool = False, watermark_ms: Optional[int] = None
+    ) -> List[FilteredEvent]:
+        """
+        Moves the watermark of the windows to `watermark_ms` when given, then returns the rollups of the windows it
+        closed, or of every window for a final flush.
+        """
+        windows = self.windows
+        if watermark_ms is not None and windows is not None:
+            windows.advance(watermark_ms)
+        if self.aggregator is not None:
+            return self._flush_rollups(final)
+        if self.log_aggregator is not None:
+            return self._flush_log_rollups(self.log_aggregator, final)
+        return []
+
+
+cache_collector.add_cache("sanitized_keys", FilterManager._replace_special_characters)
+cache_collector.add_cache("hashed_values", FilterManager._basic_hash)
+cache_collector.add_cache("label_sets", interned_label_set)
@@ -0,0 +1,102 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import structlog
+from rated_parser import RatedParser  # type: ignore
+
+logger = structlog.getLogger(__name__)
+
+ParseResult = Tuple[Optional[Dict[str, Any]], Optional[str]]
+
+_worker_parser: Optional[RatedParser] = None
+_worker_version: Optional[int] = None
+
+
+def _initialize_worker(log_pattern: Dict[str, Any], version: int) -> None:
+    """
+    Runs once in every pool process, so the pattern is compiled once per process instead of once per batch.
+    """
+    global _worker_parser, _worker_version
+
+    _worker_parser = RatedParser()
+    _worker_parser.add_log_pattern(log_pattern)
+    _worker_version = version
+
+
+def _parse_log_contents(contents: List[Union[str, dict]]) -> List[ParseResult]:
+    """
+    Parses a batch of log contents, returning either the parsed fields or the parsing error for each of them.
+    """
+    assert _worker_parser is not None, "Parser pool worker was not initialized"
+
+    results: List[ParseResult] = []
+    for content in contents:
+        try:
+            parsed_log = _worker_parser.parse_log(content, version=_worker_version)
+            results.append((parsed_log.parsed_fields, None))
+        except Exception as e:
+            results.append((None, str(e)))
+
+    return results
+
+
+class LogParserPool:
+    """
+    Parses log contents on a pool of worker processes, each holding its own pre-initialized RatedParser.
+    Results are returned in the same order as the contents were submitted.
+    """
+
+    def __init__(
+        self,
+        log_pattern: Dict[str, Any],
+        version: int,
+        processes: int,
+        batch_size: int,
+    ):
+        self.log_pattern = log_pattern
+        self.version = version
+        self.processes = processes
+        self.batch_size = batch_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Workers filtering a redistributed input share the pool
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # Started lazily, so the processes are only spawned by the workers that actually parse logs
+        with self._lock:
+            return self._start_executor()
+
+    def _start_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            logger.info(
+                "Starting log parser pool",
+                processes=self.processes,
+                batch_size=self.batch_size,
+            )
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initialize_worker,
+                initargs=(self.log_pattern, self.version),
+            )
+        return self._executor
+
+    def parse_logs(self, contents: List[Union[str, dict]]) -> List[ParseResult]:
+        batches = [
+            contents[i : i + self.batch_size]
+            for i in range(0, len(contents), self.batch_size)
+        ]
+        return [
+            result
+            for batch_results in self.executor.map(_parse_log_contents, batches)
+            for result in batch_results
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
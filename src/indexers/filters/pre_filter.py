@@ -0,0 +1,53 @@
+import re
+from typing import Any, List, Tuple, Union
+
+from src.config.models.filters import LogPreFilterConfig, PreFilterMatch
+
+
+def has_path(content: Any, path: Tuple[str, ...]) -> bool:
+    """
+    Checks whether the dotted key path, split into its keys, is present in the JSON content.
+    """
+    for key in path:
+        if not isinstance(content, dict) or key not in content:
+            return False
+        content = content[key]
+    return True
+
+
+class LogPreFilter:
+    """
+    Cheap checks run on log contents before the full RatedParser parse, to drop noise early.
+
+    Required substrings are checked on raw text contents, and are compiled into a single alternation when any of
+    them may match. Required keys are dotted paths that must be present in JSON contents.
+    """
+
+    def __init__(self, config: LogPreFilterConfig):
+        self.substrings = config.required_substrings
+        self.substring_match = config.substring_match
+        self.substrings_pattern = (
+            re.compile("|".join(re.escape(substring) for substring in self.substrings))
+            if self.substrings
+            else None
+        )
+        self.key_paths: List[Tuple[str, ...]] = [
+            tuple(key.split(".")) for key in config.required_keys
+        ]
+
+    def matches(self, content: Union[str, dict]) -> bool:
+        if isinstance(content, str):
+            return self._matches_substrings(content)
+        if isinstance(content, dict):
+            return self._matches_keys(content)
+        return True
+
+    def _matches_substrings(self, content: str) -> bool:
+        if self.substrings_pattern is None:
+            return True
+        if self.substring_match == PreFilterMatch.ANY:
+            return self.substrings_pattern.search(content) is not None
+        return all(substring in content for substring in self.substrings)
+
+    def _matches_keys(self, content: dict) -> bool:
+        return all(has_path(content, path) for path in self.key_paths)
@@ -0,0 +1,95 @@
+import re
+from collections import defaultdict
+from typing import DefaultDict, Dict, List, Optional, Pattern, Set, Tuple
+
+from rated_parser.payloads.log_patterns import LogFormat as RatedParserLogFormat  # type: ignore
+
+from src.config.models.filters import LogFilterConfig
+from src.indexers.filters.pre_filter import has_path
+from src.indexers.filters.types import LogEntry
+
+# Position of the pattern in the input configuration, and its version
+RoutedPattern = Tuple[int, int]
+
+
+class LogPatternRouter:
+    """
+    Picks the filter patterns that may apply to a log entry, out of the patterns of an input.
+
+    Routes are indexed by predicate, so finding the candidates of an entry does not scan every pattern: JSON keys
+    are looked up by the top-level keys of the entry, and log streams by name. Substrings are found in a single pass
+    over the entry, by one compiled alternation of all of them, longest first. Only the longest substring starting at
+    each position is reported, so each substring also routes the patterns of the substrings it contains.
+    Patterns without a route are candidates for every entry of their log format.
+    Candidates are returned in configuration order.
+    """
+
+    def __init__(self, patterns: List[LogFilterConfig]):
+        self._json_keys: DefaultDict[str, List[Tuple[Tuple[str, ...], RoutedPattern]]]
+        self._json_keys = defaultdict(list)
+        self._substrings: DefaultDict[str, List[RoutedPattern]] = defaultdict(list)
+        self._log_streams: Dict[bool, DefaultDict[str, List[RoutedPattern]]] = {
+            True: defaultdict(list),
+            False: defaultdict(list),
+        }
+        self._defaults: Dict[bool, List[RoutedPattern]] = {True: [], False: []}
+
+        for position, pattern in enumerate(patterns):
+            routed_pattern = (position, pattern.version)
+            is_json = pattern.log_format == RatedParserLogFormat.JSON
+            route = pattern.route
+
+            if route is None:
+                self._defaults[is_json].append(routed_pattern)
+            elif route.json_key is not None:
+                path = tuple(route.json_key.split("."))
+                self._json_keys[path[0]].append((path, routed_pattern))
+            elif route.substring is not None:
+                self._substrings[route.substring].append(routed_pattern)
+            elif route.log_stream is not None:
+                self._log_streams[is_json][route.log_stream].append(routed_pattern)
+
+        substrings = sorted(self._substrings, key=len, reverse=True)
+        self._substring_pattern: Optional[Pattern[str]] = (
+            re.compile(
+                "(?=("
+                + "|".join(re.escape(substring) for substring in substrings)
+                + "))"
+            )
+            if substrings
+            else None
+        )
+        self._substring_routes: Dict[str, Set[RoutedPattern]] = {
+            substring: {
+                routed_pattern
+                for contained in substrings
+                if contained in substring
+                for routed_pattern in self._substrings[contained]
+            }
+            for substring in substrings
+        }
+
+    def route(self, log_entry: LogEntry) -> List[int]:
+        """
+        Returns the versions of the candidate patterns for the log entry.
+        """
+        content = log_entry.content
+        is_json = isinstance(content, dict)
+        candidates: Set[RoutedPattern] = set(self._defaults[is_json])
+
+        if isinstance(content, dict):
+            for key in content.keys() & self._json_keys.keys():
+                candidates.update(
+                    routed_pattern
+                    for path, routed_pattern in self._json_keys[key]
+                    if has_path(content, path)
+                )
+        elif self._substring_pattern is not None:
+            for substring in set(self._substring_pattern.findall(content)):
+                candidates.update(self._substring_routes[substring])
+
+        log_stream = log_entry.metadata.get("log_stream_name")
+        if log_stream:
+            candidates.update(self._log_streams[is_json].get(log_stream, ()))
+
+        return [version for _, version in sorted(candidates)]
@@ -0,0 +1,143 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+WILDCARD = "<*>"
+
+TemplateGroupKey = Tuple[int, str]
+
+
+class TemplateCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class LogTemplate:
+    """
+    A class of log lines sharing the same constant tokens, along with how the filter pattern fared on them.
+    """
+
+    __slots__ = ("group_key", "tokens", "matches", "failures", "skipped")
+
+    def __init__(self, group_key: TemplateGroupKey, tokens: List[str]):
+        self.group_key = group_key
+        self.tokens = tokens
+        self.matches = 0
+        self.failures = 0
+        self.skipped = 0
+
+    def record(self, matched: bool) -> None:
+        if matched:
+            self.matches += 1
+        else:
+            self.failures += 1
+
+
+class LogTemplateCache:
+    """
+    Mines templates from raw text log lines, following the Drain approach: lines are grouped by token count and
+    first token, then merged into the most similar template of their group, with differing tokens turned into
+    wildcards.
+
+    Templates remember whether the filter pattern ever matched one of their lines, so that templates the pattern
+    never matches can be skipped without parsing. One in `retest_every` lines of a skipped template is parsed
+    anyway, so that a template which grew to cover lines the pattern matches is no longer skipped. The least
+    recently used templates are evicted once the cache holds `max_templates` of them.
+
+    The cache is shared by the workers filtering an input, its templates only change under its lock.
+    """
+
+    def __init__(
+        self,
+        max_templates: int,
+        similarity_threshold: float,
+        min_failures: int,
+        retest_every: int = 100,
+    ):
+        self.max_templates = max_templates
+        self.similarity_threshold = similarity_threshold
+        self.min_failures = min_failures
+        self.retest_every = retest_every
+        self._lock = threading.Lock()
+        self._groups: Dict[TemplateGroupKey, List[LogTemplate]] = {}
+        self._templates: OrderedDict[LogTemplate, None] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def match(self, content: str) -> LogTemplate:
+        """
+        Returns the template of the log line, creating it when no template of its group is similar enough.
+        """
+        tokens = [
+            WILDCARD if any(char.isdigit() for char in token) else token
+            for token in content.split()
+        ]
+        with self._lock:
+            return self._match(tokens)
+
+    def _match(self, tokens: List[str]) -> LogTemplate:
+        group_key = (len(tokens), tokens[0] if tokens else "")
+        group = self._groups.setdefault(group_key, [])
+
+        template = self._most_similar(group, tokens)
+        if template is not None:
+            self._hits += 1
+            if template.tokens != tokens:
+                template.tokens = [
+                    template_token if template_token == token else WILDCARD
+                    for template_token, token in zip(template.tokens, tokens)
+                ]
+            self._templates.move_to_end(template)
+            return template
+
+        self._misses += 1
+        template = LogTemplate(group_key, tokens)
+        group.append(template)
+        self._templates[template] = None
+        if len(self._templates) > self.max_templates:
+            self._evict()
+        return template
+
+    def should_skip(self, template: LogTemplate) -> bool:
+        if template.matches or template.failures < self.min_failures:
+            return False
+        with self._lock:
+            template.skipped += 1
+            return template.skipped % self.retest_every != 0
+
+    def record(self, template: LogTemplate, matched: bool) -> None:
+        with self._lock:
+            template.record(matched)
+
+    def cache_info(self) -> TemplateCacheInfo:
+        return TemplateCacheInfo(
+            self._hits, self._misses, self.max_templates, len(self._templates)
+        )
+
+    def _most_similar(
+        self, group: List[LogTemplate], tokens: List[str]
+    ) -> Optional[LogTemplate]:
+        if not tokens:
+            return group[0] if group else None
+
+        best_template, best_similarity = None, self.similarity_threshold
+        for template in group:
+            same_tokens = sum(
+                template_token == token
+                for template_token, token in zip(template.tokens, tokens)
+            )
+            similarity = same_tokens / len(tokens)
+            if similarity >= best_similarity:
+                best_template, best_similarity = template, similarity
+
+        return best_template
+
+    def _evict(self) -> None:
+        template, _ = self._templates.popitem(last=False)
+        group = self._groups.get(template.group_key, [])
+        if template in group:
+            group.remove(template)
+        if not group:
+            self._groups.pop(template.group_key, None)
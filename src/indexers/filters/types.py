@@ -1,14 +1,60 @@
 import structlog
 import hashlib
 import json
+import struct
+from array import array
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Dict, Any, Union, Optional
+from functools import lru_cache
+from typing import (
+    Callable,
+    Dict,
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    Union,
+    Optional,
+)
 
-from src.utils.time_conversion import from_milliseconds
+from rated_parser.payloads.log_patterns import LogFormat as RatedParserLogFormat  # type: ignore
+
+from src.config.models.inputs.input import IdempotencyKeyAlgorithm
+from src.utils.time_conversion import (
+    from_milliseconds,
+    from_milliseconds_local,
+    to_milliseconds,
+)
+
+try:
+    import orjson  # type: ignore
+
+    json_loads: Callable[[Union[str, bytes]], Any] = orjson.loads
+except (
+    ImportError
+):  # pragma: no cover - orjson is an optional speedup, not a requirement
+    json_loads = json.loads
 
 logger = structlog.get_logger(__name__)
 
+JSON_START_CHARACTERS = ("{", "[")
+
+
+def decode_json_message(message: str) -> Optional[Any]:
+    """
+    Decodes a log message if it looks like a JSON document, returns None otherwise.
+    Sniffing the first non-whitespace character avoids raising and catching a decoding error for every raw text log.
+    """
+    if not message.lstrip().startswith(JSON_START_CHARACTERS):
+        return None
+
+    try:
+        return json_loads(message)
+    except ValueError:
+        return None
+
 
 def generate_idempotency_key(
     event_timestamp: datetime, organization_id: str, values: dict
@@ -22,28 +68,171 @@ def generate_idempotency_key(
     return hashlib.sha256(components.encode()).hexdigest()
 
 
-@dataclass
+def _encode_part(part: Any) -> bytes:
+    encoded = part if isinstance(part, bytes) else str(part).encode()
+    return len(encoded).to_bytes(4, "big") + encoded
+
+
+class MetricIdempotencyKeyGenerator:
+    """
+    Generates metric idempotency keys from a canonical binary encoding of (timestamp, organization, sorted values).
+
+    Everything but the timestamp and the sample value is constant for a series, so it is hashed once into a
+    cached series digest, and only the digest, timestamp and value are hashed for each sample.
+    """
+
+    DIGEST_SIZE = 16
+    SERIES_CACHE_SIZE = 65_536
+
+    def __init__(
+        self,
+        algorithm: IdempotencyKeyAlgorithm = IdempotencyKeyAlgorithm.BLAKE2B,
+    ):
+        self.algorithm = algorithm
+        self._hash: Callable[[bytes], str]
+
+        if algorithm == IdempotencyKeyAlgorithm.BLAKE2B:
+            self._hash = self._blake2b
+        elif algorithm == IdempotencyKeyAlgorithm.XXH3_128:
+            try:
+                import xxhash  # type: ignore
+            except ImportError as e:
+                raise ValueError(
+                    "The `xxh3_128` idempotency key algorithm requires the `xxhash` package to be installed"
+                ) from e
+            self._hash = lambda data: xxhash.xxh3_128_hexdigest(data)
+        elif algorithm != IdempotencyKeyAlgorithm.SHA256_JSON:
+            raise ValueError(f"Unsupported idempotency key algorithm: {algorithm}")
+
+        self._series_digest = lru_cache(maxsize=self.SERIES_CACHE_SIZE)(
+            self._compute_series_digest
+        )
+
+    def _blake2b(self, data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=self.DIGEST_SIZE).hexdigest()
+
+    def _compute_series_digest(
+        self, organization_id: str, metric_key: str, labels: Tuple[Tuple[str, Any], ...]
+    ) -> bytes:
+        encoded = [_encode_part(organization_id), _encode_part(metric_key)]
+        for key, value in sorted(labels):
+            encoded.append(_encode_part(key))
+            encoded.append(_encode_part(json.dumps(value, default=str)))
+        return bytes.fromhex(self._hash(b"".join(encoded)))
+
+    def generate(
+        self,
+        timestamp_ms: int,
+        organization_id: str,
+        metric_key: str,
+        value: Any,
+        labels: Dict[str, Any],
+        naive_timestamp: bool = False,
+    ) -> str:
+        """
+        `naive_timestamp` only applies to `sha256_json` keys, which render the timestamp as the client returned it.
+        """
+        if self.algorithm == IdempotencyKeyAlgorithm.SHA256_JSON:
+            return generate_idempotency_key(
+                event_timestamp=(
+                    from_milliseconds_local(timestamp_ms)
+                    if naive_timestamp
+                    else from_milliseconds(timestamp_ms)
+                ),
+                organization_id=organization_id,
+                values={metric_key: value, **labels},
+            )
+
+        series_digest = self._get_series_digest(organization_id, metric_key, labels)
+        return self._hash(series_digest + self._encode_sample(timestamp_ms, value))
+
+    def generate_series(
+        self,
+        timestamps_ms: Sequence[int],
+        organization_id: str,
+        metric_key: str,
+        values: Sequence[Any],
+        labels: Dict[str, Any],
+        naive_timestamps: bool = False,
+    ) -> List[str]:
+        """
+        Generates the keys of every sample of a series, looking its digest up once rather than once per sample.
+        """
+        if self.algorithm == IdempotencyKeyAlgorithm.SHA256_JSON:
+            return [
+                self.generate(
+                    timestamp_ms,
+                    organization_id,
+                    metric_key,
+                    value,
+                    labels,
+                    naive_timestamps,
+                )
+                for timestamp_ms, value in zip(timestamps_ms, values)
+            ]
+
+        series_digest = self._get_series_digest(organization_id, metric_key, labels)
+        hash_sample, encode_sample = self._hash, self._encode_sample
+        return [
+            hash_sample(series_digest + encode_sample(timestamp_ms, value))
+            for timestamp_ms, value in zip(timestamps_ms, values)
+        ]
+
+    def _get_series_digest(
+        self, organization_id: str, metric_key: str, labels: Dict[str, Any]
+    ) -> bytes:
+        label_items = tuple(labels.items())
+        try:
+            return self._series_digest(organization_id, metric_key, label_items)
+        except TypeError:
+            # Unhashable label values cannot be cached, digest them on every sample instead
+            return self._compute_series_digest(organization_id, metric_key, label_items)
+
+    @staticmethod
+    def _encode_sample(timestamp_ms: int, value: Any) -> bytes:
+        timestamp_us = timestamp_ms * 1_000
+        try:
+            return struct.pack(">qd", timestamp_us, value)
+        except (struct.error, TypeError):
+            return struct.pack(">q", timestamp_us) + _encode_part(value)
+
+
+@dataclass(slots=True)
 class LogEntry:
     log_id: str
     content: Union[str, dict]
     is_json: bool
     metadata: dict
-    event_timestamp: datetime
+    timestamp_ms: int
+
+    @property
+    def event_timestamp(self) -> datetime:
+        return from_milliseconds(self.timestamp_ms)
 
     @classmethod
-    def from_cloudwatch_log(cls, log: Dict[str, Any]) -> "LogEntry":
+    def from_cloudwatch_log(
+        cls,
+        log: Dict[str, Any],
+        log_format: Optional[RatedParserLogFormat] = None,
+    ) -> "LogEntry":
+        """
+        Convert a Cloudwatch log event to a LogEntry.
+        Decoding the message is skipped entirely when the input's filters expect raw text logs.
+        """
         content: Union[str, dict]
-        try:
-            content = json.loads(log["message"])
+        decoded = (
+            None
+            if log_format == RatedParserLogFormat.RAW_TEXT
+            else decode_json_message(log["message"])
+        )
+
+        if decoded is not None:
+            content = decoded
             is_json = True
-        except json.JSONDecodeError:
+        else:
             content = log["message"]
             is_json = False
 
-        event_timestamp = datetime.fromtimestamp(
-            log["timestamp"] / 1000, tz=timezone.utc
-        )
-
         return cls(
             log_id=log["eventId"],
             content=content,
@@ -51,7 +240,7 @@ class LogEntry:
             metadata={
                 "log_stream_name": log.get("logStreamName", ""),
             },
-            event_timestamp=event_timestamp,
+            timestamp_ms=log["timestamp"],
         )
 
     @classmethod
@@ -72,8 +261,8 @@ class LogEntry:
 
         try:
             # The timestamp object returned from Datadog is in timezone.localtime, but they index in UTC
-            event_timestamp = log_attributes.get("timestamp").replace(
-                tzinfo=timezone.utc
+            timestamp_ms = to_milliseconds(
+                log_attributes.get("timestamp").replace(tzinfo=timezone.utc)
             )
         except AttributeError as e:
             msg = f"Failed to parse Datadog log timestamp. Received: {log_attributes.get('timestamp')}"
@@ -89,18 +278,24 @@ class LogEntry:
                 "status": log_attributes.get("status", ""),
                 "tags": log_attributes.get("tags", []),
             },
-            event_timestamp=event_timestamp,
+            timestamp_ms=timestamp_ms,
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class MetricEntry:
     metric_name: str
     value: float
     organization_id: str
-    event_timestamp: datetime
+    timestamp_ms: int
     organization_identifier: Optional[str] = None
     labels: Optional[Dict] = None
+    # Set when the client returned naive local datetimes, see `MetricIdempotencyKeyGenerator.generate`
+    naive_timestamps: bool = False
+
+    @property
+    def event_timestamp(self) -> datetime:
+        return from_milliseconds(self.timestamp_ms)
 
     @classmethod
     def from_cloudwatch_metric(cls, metric: Dict[str, Any]) -> "MetricEntry":
@@ -108,7 +303,7 @@ class MetricEntry:
             metric_name=metric["label"],
             value=metric["value"],
             organization_id=metric["organization_id"],
-            event_timestamp=metric["timestamp"],
+            timestamp_ms=to_milliseconds(metric["timestamp"]),
         )
 
     @classmethod
@@ -117,7 +312,7 @@ class MetricEntry:
             metric_name=metric["metric_name"],
             value=metric["value"],
             organization_id=metric["organization_id"],
-            event_timestamp=from_milliseconds(metric["timestamp"]),
+            timestamp_ms=metric["timestamp"],
         )
 
     @classmethod
@@ -146,18 +341,138 @@ class MetricEntry:
         """
         return cls(
             organization_id=metric["organization_id"],
-            event_timestamp=metric["timestamp"],
+            timestamp_ms=to_milliseconds(metric["timestamp"]),
             value=metric["value"],
             metric_name=metric["slaos_metric_name"],
             organization_identifier=metric["organization_identifier"],
             labels=metric["labels"],
+            naive_timestamps=metric["timestamp"].tzinfo is None,
+        )
+
+
+def _column(items: Iterable[Any], typecode: str) -> Sequence[Any]:
+    """
+    Packs a column into a typed array, or keeps it as a list when some items do not fit the type.
+    """
+    items = list(items)
+    try:
+        return array(typecode, items)
+    except TypeError:
+        return items
+
+
+@dataclass(slots=True)
+class MetricSeries:
+    """
+    The samples of one metric series, stored as columns: the series metadata is held once, and the timestamps
+    and values are packed into arrays rather than spread over one MetricEntry per sample.
+
+    Series only go as far as the filter step, which processes their metadata once and then builds one FilteredEvent
+    per sample. Deduplication, tracing and the sinks work on those events.
+    """
+
+    metric_name: str
+    organization_id: str
+    timestamps_ms: Sequence[int]
+    values: Sequence[Any]
+    organization_identifier: Optional[str] = None
+    labels: Optional[Dict] = None
+    # Set when the client returned naive local datetimes, see `MetricIdempotencyKeyGenerator.generate`
+    naive_timestamps: bool = False
+
+    def __len__(self) -> int:
+        return len(self.timestamps_ms)
+
+    def with_columns(
+        self, timestamps_ms: Sequence[int], values: Sequence[Any]
+    ) -> "MetricSeries":
+        return MetricSeries(
+            metric_name=self.metric_name,
+            organization_id=self.organization_id,
+            timestamps_ms=timestamps_ms,
+            values=values,
+            organization_identifier=self.organization_identifier,
+            labels=self.labels,
+            naive_timestamps=self.naive_timestamps,
         )
 
+    def slice(self, start: int, stop: int) -> "MetricSeries":
+        return self.with_columns(
+            self.timestamps_ms[start:stop], self.values[start:stop]
+        )
 
-@dataclass
+    def since(self, start_from: int) -> "MetricSeries":
+        """
+        Keeps the samples at or after `start_from`, in epoch milliseconds.
+        """
+        kept = [
+            index
+            for index, timestamp_ms in enumerate(self.timestamps_ms)
+            if timestamp_ms >= start_from
+        ]
+        if len(kept) == len(self):
+            return self
+        return self.with_columns(
+            _column((self.timestamps_ms[index] for index in kept), "q"),
+            _column((self.values[index] for index in kept), "d"),
+        )
+
+    def entries(self) -> Iterator[MetricEntry]:
+        for timestamp_ms, value in zip(self.timestamps_ms, self.values):
+            yield MetricEntry(
+                metric_name=self.metric_name,
+                value=value,
+                organization_id=self.organization_id,
+                timestamp_ms=timestamp_ms,
+                organization_identifier=self.organization_identifier,
+                labels=self.labels,
+                naive_timestamps=self.naive_timestamps,
+            )
+
+    @classmethod
+    def from_cloudwatch_series(cls, series: Dict[str, Any]) -> "MetricSeries":
+        return cls(
+            metric_name=series["label"],
+            organization_id=series["organization_id"],
+            timestamps_ms=_column(map(to_milliseconds, series["timestamps"]), "q"),
+            values=_column(series["values"], "d"),
+        )
+
+    @classmethod
+    def from_datadog_series(cls, series: Dict[str, Any]) -> "MetricSeries":
+        return cls(
+            metric_name=series["metric_name"],
+            organization_id=series["organization_id"],
+            timestamps_ms=_column(series["timestamps"], "q"),
+            values=_column(series["values"], "d"),
+        )
+
+    @classmethod
+    def from_prometheus_series(cls, series: Dict[str, Any]) -> "MetricSeries":
+        return cls(
+            metric_name=series["slaos_metric_name"],
+            organization_id=series["organization_id"],
+            timestamps_ms=_column(map(to_milliseconds, series["timestamps"]), "q"),
+            values=_column(series["values"], "d"),
+            organization_identifier=series["organization_identifier"],
+            labels=series["labels"],
+            naive_timestamps=bool(series["timestamps"])
+            and series["timestamps"][0].tzinfo is None,
+        )
+
+
+@dataclass(slots=True)
 class FilteredEvent:
+    """
+    Events carry their timestamp as epoch milliseconds, it is only formatted when serialized by the sink.
+    """
+
     slaos_key: str
     idempotency_key: str
-    event_timestamp: datetime
+    timestamp_ms: int
     organization_id: str
     values: dict
+
+    @property
+    def event_timestamp(self) -> datetime:
+        return from_milliseconds(self.timestamp_ms)
@@ -0,0 +1,192 @@
+import os
+from typing import Any, Dict, Iterator, List, Optional, Protocol
+
+import structlog
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import REGISTRY, Collector
+
+from src.config.models.metrics_endpoint import MetricsEndpointYamlConfig
+
+logger = structlog.get_logger(__name__)
+
+METRICS_NAMESPACE = "rated_indexer"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (1, 5, 10, 50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000)
+
+ENTRIES_FETCHED = Counter(
+    f"{METRICS_NAMESPACE}_entries_fetched",
+    "Number of log entries or metric samples fetched from the upstream API",
+    ["slaos_key", "input_type"],
+)
+FETCH_SECONDS = Histogram(
+    f"{METRICS_NAMESPACE}_fetch_seconds",
+    "Time spent fetching a time range from the upstream API",
+    ["slaos_key", "input_type"],
+    buckets=LATENCY_BUCKETS,
+)
+PAGE_SIZE = Histogram(
+    f"{METRICS_NAMESPACE}_page_size",
+    "Number of log entries or metric samples per fetched page",
+    ["slaos_key", "input_type"],
+    buckets=SIZE_BUCKETS,
+)
+FILTER_SECONDS = Histogram(
+    f"{METRICS_NAMESPACE}_filter_seconds",
+    "Time spent filtering a fetched page",
+    ["slaos_key", "input_type"],
+    buckets=LATENCY_BUCKETS,
+)
+EVENTS_FILTERED = Counter(
+    f"{METRICS_NAMESPACE}_events_filtered",
+    "Number of events produced by the filter step",
+    ["slaos_key", "input_type"],
+)
+EVENTS_SENT = Counter(
+    f"{METRICS_NAMESPACE}_events_sent",
+    "Number of events successfully sent to slaOS",
+    ["slaos_key"],
+)
+SINK_BATCH_SIZE = Histogram(
+    f"{METRICS_NAMESPACE}_sink_batch_size",
+    "Number of events per request sent to slaOS",
+    buckets=SIZE_BUCKETS,
+)
+SINK_REQUEST_SECONDS = Histogram(
+    f"{METRICS_NAMESPACE}_sink_request_seconds",
+    "Time spent sending a batch of events to slaOS",
+    ["slaos_key"],
+    buckets=LATENCY_BUCKETS,
+)
+SINK_ERRORS = Counter(
+    f"{METRICS_NAMESPACE}_sink_errors",
+    "Number of batches slaOS did not accept, once their retries are exhausted",
+    ["slaos_key"],
+)
+API_THROTTLES = Counter(
+    f"{METRICS_NAMESPACE}_api_throttles",
+    "Number of requests rejected by an upstream API rate limit",
+    ["integration"],
+)
+OFFSET_LAG_SECONDS = Gauge(
+    f"{METRICS_NAMESPACE}_offset_lag_seconds",
+    "Time between the current offset of an input and the wall clock",
+    ["slaos_key"],
+)
+CONFIG_RELOADS = Counter(
+    f"{METRICS_NAMESPACE}_config_reloads",
+    "Number of configuration changes picked up while running",
+    ["result"],
+)
+INPUTS_RESTART_REQUIRED = Gauge(
+    f"{METRICS_NAMESPACE}_inputs_restart_required",
+    "Number of inputs whose configuration changes only apply once the indexer restarts",
+)
+
+LOG_ENTRIES_REJECTED = Counter(
+    f"{METRICS_NAMESPACE}_log_entries_rejected",
+    "Number of log entries dropped by the filter step",
+    ["slaos_key", "reason"],
+)
+
+EVENTS_DEDUPLICATED = Counter(
+    f"{METRICS_NAMESPACE}_events_deduplicated",
+    "Number of events dropped before the sink as already sent",
+    ["slaos_key"],
+)
+
+METRIC_SAMPLES_REJECTED = Counter(
+    f"{METRICS_NAMESPACE}_metric_samples_rejected",
+    "Number of metric samples dropped by the filter step",
+    ["slaos_key", "reason"],
+)
+
+
+class SupportsCacheInfo(Protocol):
+    def cache_info(self) -> Any: ...
+
+
+class LruCacheCollector(Collector):
+    """
+    Exposes the statistics of `functools.lru_cache` caches, or of any cache reporting the same `cache_info()`.
+    Statistics are read at scrape time, so the cached calls themselves carry no metrics overhead.
+    Caches added under the same name are reported together.
+    """
+
+    def __init__(self) -> None:
+        self._caches: Dict[str, List[SupportsCacheInfo]] = {}
+
+    def add_cache(self, name: str, cache: SupportsCacheInfo) -> None:
+        self._caches.setdefault(name, []).append(cache)
+
+    def remove_cache(self, name: str, cache: SupportsCacheInfo) -> None:
+        caches = self._caches.get(name, [])
+        if cache in caches:
+            caches.remove(cache)
+
+    def collect(self) -> Iterator[Metric]:
+        hits = CounterMetricFamily(
+            f"{METRICS_NAMESPACE}_cache_hits",
+            "Number of lookups answered by the cache",
+            labels=["cache"],
+        )
+        misses = CounterMetricFamily(
+            f"{METRICS_NAMESPACE}_cache_misses",
+            "Number of lookups that had to be computed",
+            labels=["cache"],
+        )
+        hit_ratio = GaugeMetricFamily(
+            f"{METRICS_NAMESPACE}_cache_hit_ratio",
+            "Share of lookups answered by the cache",
+            labels=["cache"],
+        )
+        size = GaugeMetricFamily(
+            f"{METRICS_NAMESPACE}_cache_size",
+            "Number of entries currently held by the cache",
+            labels=["cache"],
+        )
+        max_size = GaugeMetricFamily(
+            f"{METRICS_NAMESPACE}_cache_max_size",
+            "Maximum number of entries held by the cache",
+            labels=["cache"],
+        )
+
+        for name, caches in self._caches.items():
+            infos = [cache.cache_info() for cache in caches]
+            cache_hits = sum(info.hits for info in infos)
+            lookups = cache_hits + sum(info.misses for info in infos)
+
+            hits.add_metric([name], cache_hits)
+            misses.add_metric([name], lookups - cache_hits)
+            hit_ratio.add_metric([name], cache_hits / lookups if lookups else 0.0)
+            size.add_metric([name], sum(info.currsize for info in infos))
+            max_size.add_metric([name], sum(info.maxsize or 0 for info in infos))
+
+        yield from (hits, misses, hit_ratio, size, max_size)
+
+
+cache_collector = LruCacheCollector()
+REGISTRY.register(cache_collector)
+
+
+def start_metrics_endpoint(config: MetricsEndpointYamlConfig) -> Optional[int]:
+    """
+    Serves the metrics of the default registry, including the retries counted by stamina, on `/metrics`.
+    A process started with `BYTEWAX_PROCESS_ID` serves on the configured port plus its id, so that the processes of
+    one host do not compete for the same port. The indexer runs without the endpoint if its port is in use.
+    Returns the port served on, if any.
+    """
+    port = config.port + int(os.environ.get("BYTEWAX_PROCESS_ID", 0))
+    try:
+        start_http_server(port, addr=config.address)
+    except OSError as e:
+        logger.error(
+            "Could not start the metrics endpoint, running without it",
+            port=port,
+            error=str(e),
+        )
+        return None
+    logger.info("Serving metrics", address=config.address, port=port, path="/metrics")
+    return port
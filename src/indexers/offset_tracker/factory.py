@@ -1,11 +1,19 @@
 from typing import Tuple
-from collections import defaultdict
 
 from src.config import get_config, RatedIndexerYamlConfig
+from src.config.models.offset import OffsetTypes
 from src.indexers.offset_tracker.base import OffsetTracker
-from src.indexers.offset_tracker.postgres import PostgresOffsetTracker
-from src.indexers.offset_tracker.rated import RatedAPIOffsetTracker
-from src.indexers.offset_tracker.redis import RedisOffsetTracker
+from src.utils.registry import LazyRegistry
+
+# The database driver of a backend is only imported when an input keeps its offsets there
+OFFSET_TRACKERS: LazyRegistry[OffsetTypes] = LazyRegistry(
+    "offset tracker type",
+    {
+        OffsetTypes.POSTGRES: "src.indexers.offset_tracker.postgres:PostgresOffsetTracker",
+        OffsetTypes.REDIS: "src.indexers.offset_tracker.redis:RedisOffsetTracker",
+        OffsetTypes.SLAOS: "src.indexers.offset_tracker.rated:RatedAPIOffsetTracker",
+    },
+)
 
 
 def get_offset_tracker(
@@ -17,10 +25,9 @@ def get_offset_tracker(
     This function handles scenarios where multiple configurations may exist for the same slaOS key.
     It performs the following steps:
     1. Loads all input configurations from the ConfigurationManager.
-    2. Groups configurations by their slaOS key.
-    3. Retrieves all configurations matching the provided slaOS key.
-    4. Selects the specific configuration based on the config_index.
-    5. Creates and returns the appropriate OffsetTracker (PostgresOffsetTracker or RedisOffsetTracker)
+    2. Retrieves all configurations matching the provided slaOS key, grouped once per configuration.
+    3. Selects the specific configuration based on the config_index.
+    4. Creates and returns the appropriate OffsetTracker (PostgresOffsetTracker or RedisOffsetTracker)
        along with its start_from value.
 
     If multiple configurations exist for the same prefix, the function appends the config_index
@@ -49,40 +56,20 @@ def get_offset_tracker(
     """
     config = config or get_config()
 
-    grouped_configs = defaultdict(list)
-    for input_config in config.inputs:
-        grouped_configs[input_config.slaos_key].append(input_config)
-
-    matching_configs = grouped_configs.get(slaos_key, [])
-    if not matching_configs:
-        raise ValueError(f"No configuration found for slaOS key '{slaos_key}'")
-
-    if config_index >= len(matching_configs):
-        raise ValueError(
-            f"Config index {config_index} is out of range. Only {len(matching_configs)} configurations found for prefix '{slaos_key}'"
-        )
-
-    input_config = matching_configs[config_index]
+    input_config = config.get_input(slaos_key, config_index)
     offset_config = input_config.offset
 
     final_slaos_key = (
-        f"{slaos_key}_{config_index}" if len(matching_configs) > 1 else slaos_key
+        f"{slaos_key}_{config_index}"
+        if len(config.inputs_by_slaos_key()[slaos_key]) > 1
+        else slaos_key
     )
 
-    if offset_config.type == "postgres":
-        return (
-            PostgresOffsetTracker(offset_config, final_slaos_key),
-            offset_config.start_from,
-        )
-    elif offset_config.type == "redis":
-        return (
-            RedisOffsetTracker(offset_config, final_slaos_key),
-            offset_config.start_from,
-        )
-    elif offset_config.type == "slaos":
-        return (
-            RatedAPIOffsetTracker(offset_config, final_slaos_key),
-            offset_config.start_from,
-        )
-    else:
+    if offset_config.type not in OFFSET_TRACKERS:
         raise ValueError(f"Unknown offset tracker type: {offset_config.type}")
+
+    offset_tracker_class = OFFSET_TRACKERS.get(offset_config.type)
+    return (
+        offset_tracker_class(offset_config, final_slaos_key),
+        offset_config.start_from,
+    )
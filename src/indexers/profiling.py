@@ -0,0 +1,250 @@
+import json
+import os
+import signal
+import sys
+import threading
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from time import perf_counter
+from types import CodeType, FrameType
+from typing import ContextManager, Dict, List, Mapping, Optional, Tuple, cast
+
+import structlog
+
+from src.config.models.profiling import ProfilingYamlConfig
+
+logger = structlog.get_logger(__name__)
+
+PROFILING_ENV_VAR = "PROFILING_ENABLED"
+
+
+class _StageTimer:
+    """
+    Times one call of a stage, and tags the samples of the calling thread with the stage and input meanwhile.
+    """
+
+    __slots__ = ("profiler", "stage", "slaos_key", "thread_id", "outer_tag", "started")
+
+    def __init__(self, profiler: "SamplingProfiler", stage: str, slaos_key: str):
+        self.profiler = profiler
+        self.stage = stage
+        self.slaos_key = slaos_key
+
+    def __enter__(self) -> "_StageTimer":
+        self.thread_id = threading.get_ident()
+        tags = self.profiler.stage_tags
+        self.outer_tag = tags.get(self.thread_id)
+        tags[self.thread_id] = f"{self.stage} {self.slaos_key}"
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = perf_counter() - self.started
+        if self.outer_tag is None:
+            self.profiler.stage_tags.pop(self.thread_id, None)
+        else:
+            self.profiler.stage_tags[self.thread_id] = self.outer_tag
+        self.profiler.record(self.stage, self.slaos_key, elapsed)
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of every thread from a background thread, and periodically writes them to disk:
+    - `profile-<pid>-<time>.folded`: the stacks in the collapsed format of flamegraph.pl, speedscope and inferno.
+      Samples taken during a stage call are rooted under a `<stage> <slaos_key>` frame.
+    - `stages-<pid>-<time>.json`: the calls, total and maximum duration of each stage of each input.
+    Only the stacks are sampled, so the overhead only depends on the sampling interval and the number of threads.
+    """
+
+    def __init__(self) -> None:
+        self.output_dir = "profiles"
+        self.sampling_interval = 0.01
+        self.flush_interval = 60.0
+        self.stage_tags: Dict[int, str] = {}
+        self._stacks: Counter = Counter()
+        self._stages: Dict[Tuple[str, str], List[float]] = {}
+        self._frame_names: Dict[CodeType, str] = {}
+        self._started_at = datetime.now(timezone.utc)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def configure(self, config: ProfilingYamlConfig) -> None:
+        self.output_dir = config.output_dir
+        self.sampling_interval = config.sampling_interval_ms / 1_000
+        self.flush_interval = config.flush_interval_seconds
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        with self._lock:
+            self._started_at = datetime.now(timezone.utc)
+        # A fresh event, a thread stopped just before may still be writing its last profile
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(self._stop,), name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            "Profiling started",
+            output_dir=self.output_dir,
+            sampling_interval_ms=self.sampling_interval * 1_000,
+        )
+
+    def stop(self, wait: bool = False) -> None:
+        """
+        Stops sampling, the profiler thread writes what it collected before exiting.
+        Only waits for it when asked, so that it can be called from a signal handler.
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        self._thread = None
+        logger.info("Profiling stopped", output_dir=self.output_dir)
+        if wait:
+            thread.join()
+
+    def toggle(self) -> None:
+        if self.active:
+            self.stop()
+        else:
+            self.start()
+
+    def stage(self, stage: str, slaos_key: str) -> ContextManager:
+        """
+        Times a call of a stage of an input, only while the profiler is active.
+        """
+        if self._thread is None:
+            return nullcontext()
+        return _StageTimer(self, stage, slaos_key)
+
+    def record(self, stage: str, slaos_key: str, seconds: float) -> None:
+        with self._lock:
+            timings = self._stages.get((stage, slaos_key))
+            if timings is None:
+                self._stages[(stage, slaos_key)] = [1, seconds, seconds]
+            else:
+                timings[0] += 1
+                timings[1] += seconds
+                timings[2] = max(timings[2], seconds)
+
+    def _run(self, stop: threading.Event) -> None:
+        own_thread_id = threading.get_ident()
+        next_flush = perf_counter() + self.flush_interval
+        while not stop.wait(self.sampling_interval):
+            self.sample(own_thread_id)
+            if perf_counter() >= next_flush:
+                self.flush()
+                next_flush = perf_counter() + self.flush_interval
+        self.flush()
+
+    def sample(self, own_thread_id: Optional[int] = None) -> None:
+        frames: Mapping[int, FrameType] = sys._current_frames()
+        tags = self.stage_tags
+        stacks = []
+        for thread_id, frame in frames.items():
+            if thread_id == own_thread_id:
+                continue
+            stack = self._collapse(frame)
+            tag = tags.get(thread_id)
+            stacks.append(f"{tag};{stack}" if tag else stack)
+        with self._lock:
+            self._stacks.update(stacks)
+
+    def _collapse(self, frame: Optional[FrameType]) -> str:
+        names = []
+        frame_names = self._frame_names
+        while frame is not None:
+            code = frame.f_code
+            name = frame_names.get(code)
+            if name is None:
+                name = f"{code.co_qualname} ({code.co_filename}:{code.co_firstlineno})"
+                frame_names[code] = name
+            names.append(name)
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def flush(self) -> None:
+        ended_at = datetime.now(timezone.utc)
+        with self._lock:
+            stacks, self._stacks = self._stacks, Counter()
+            stages, self._stages = self._stages, {}
+            started_at, self._started_at = self._started_at, ended_at
+        if not stacks and not stages:
+            return
+
+        suffix = f"{os.getpid()}-{started_at:%Y%m%dT%H%M%S.%f}"
+        profile_path = os.path.join(self.output_dir, f"profile-{suffix}.folded")
+        stages_path = os.path.join(self.output_dir, f"stages-{suffix}.json")
+        try:
+            with open(profile_path, "w") as profile_file:
+                profile_file.writelines(
+                    f"{stack} {count}\n" for stack, count in stacks.items()
+                )
+            with open(stages_path, "w") as stages_file:
+                json.dump(
+                    {
+                        "started_at": started_at.isoformat(),
+                        "ended_at": ended_at.isoformat(),
+                        "samples": sum(stacks.values()),
+                        "stages": [
+                            {
+                                "stage": stage,
+                                "slaos_key": slaos_key,
+                                "calls": int(calls),
+                                "total_seconds": total,
+                                "max_seconds": longest,
+                            }
+                            for (stage, slaos_key), (calls, total, longest) in sorted(
+                                stages.items()
+                            )
+                        ],
+                    },
+                    stages_file,
+                    indent=2,
+                )
+        except OSError:
+            logger.warning(
+                "Could not write the profile", path=profile_path, exc_info=True
+            )
+            return
+        logger.info("Profile written", path=profile_path, stages_path=stages_path)
+
+
+profiler = SamplingProfiler()
+
+
+def get_profiling_config(
+    config: Optional[ProfilingYamlConfig],
+    env: Mapping[str, str] = cast(Mapping[str, str], os.environ),
+) -> Optional[ProfilingYamlConfig]:
+    """
+    The environment variable starts profiling on startup, with the configured settings or the defaults.
+    """
+    if env.get(PROFILING_ENV_VAR, "").lower() in ("1", "true", "yes"):
+        return (config or ProfilingYamlConfig()).model_copy(update={"enabled": True})
+    return config
+
+
+def start_profiling(config: ProfilingYamlConfig) -> None:
+    """
+    Installs the signal handler toggling the profiler, and starts it right away when enabled.
+    """
+    profiler.configure(config)
+    signal.signal(
+        getattr(signal, config.toggle_signal), lambda signum, frame: profiler.toggle()
+    )
+    logger.info(
+        f"Send {config.toggle_signal} to toggle profiling",
+        pid=os.getpid(),
+        output_dir=config.output_dir,
+    )
+    if config.enabled:
+        profiler.start()
@@ -0,0 +1,373 @@
+"""
+Hot reload of the inputs: the configuration source is polled, and its changes are applied to the running dataflow.
+
+A bytewax dataflow cannot gain or lose steps once running, so only the changes that fit in the existing steps apply:
+- Changed filters, `idempotency_key_algorithm` or `aggregation` settings: the `FilterManager` of the input is swapped.
+- Added inputs: each takes a free `SpareInput`, steps built idle with the dataflow, which start fetching it.
+- Removed inputs: their events are dropped and their offsets stop advancing, until the next restart resumes them.
+Other changes, such as changed clients and offsets, adding and removing `aggregation`, or inputs added once every spare
+input is taken, are logged and only apply on restart.
+Every other input keeps its partition, offsets and client connections.
+"""
+
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+import structlog
+
+from src.config.manager import ConfigurationManager, RatedIndexerYamlConfig
+from src.config.models.inputs.input import InputTypes, InputYamlConfig
+from src.config.models.reload import ReloadYamlConfig
+from src.indexers.filters.manager import FilterManager
+from src.indexers.filters.types import FilteredEvent
+from src.indexers.metrics import CONFIG_RELOADS, INPUTS_RESTART_REQUIRED
+
+logger = structlog.get_logger(__name__)
+
+# An input is identified as its offsets are: by its slaOS key, and its index among the inputs sharing that key
+InputKey = Tuple[str, int]
+
+# Fields only used by the filter step, which can be reloaded in place
+FILTER_FIELDS = {"filters", "idempotency_key_algorithm", "aggregation"}
+
+
+def create_filter_manager(input_config: InputYamlConfig) -> FilterManager:
+    return FilterManager(
+        input_config.filters,
+        input_config.slaos_key,
+        input_config.type,
+        input_config.idempotency_key_algorithm,
+        input_config.aggregation,
+    )
+
+
+def batch_filter(filter_manager: FilterManager, input_type: InputTypes) -> Callable:
+    if input_type == InputTypes.LOGS:
+        return filter_manager.parse_and_filter_log_batch
+    return filter_manager.parse_and_filter_metrics_batch
+
+
+class ReloadableFilter:
+    """
+    The filter step of one input, delegating to its current `FilterManager`.
+
+    A swap waits for the calls in flight on the current manager, and holds the new calls back until the new
+    manager took over, so that no page is filtered by a manager being closed.
+    """
+
+    def __init__(self, input_config: InputYamlConfig) -> None:
+        self.input_config = input_config
+        self.filter_manager = create_filter_manager(input_config)
+        self.filter_logic = batch_filter(self.filter_manager, input_config.type)
+        self.enabled = True
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._swapping = False
+        # Rollups of the windows of a replaced manager, sent along with the next events of the input
+        self._handed_over: List[FilteredEvent] = []
+
+    @contextmanager
+    def _current(self) -> Iterator[Tuple[Callable, FilterManager]]:
+        with self._condition:
+            self._condition.wait_for(lambda: not self._swapping)
+            self._in_flight += 1
+            filter_logic, filter_manager = self.filter_logic, self.filter_manager
+        try:
+            yield filter_logic, filter_manager
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def _take_handed_over(self) -> List[FilteredEvent]:
+        with self._condition:
+            handed_over, self._handed_over = self._handed_over, []
+        return handed_over
+
+    def __call__(self, entries):
+        if not self.enabled:
+            return []
+        with self._current() as (filter_logic, _):
+            events = filter_logic(entries)
+        if self._handed_over:
+            events = self._take_handed_over() + events
+        return events
+
+    def flush(
+        self, final: bool = False, watermark_ms: Optional[int] = None
+    ) -> List[FilteredEvent]:
+        """
+        Returns the rollups of the windows closed by the watermark, see `FilterManager.flush_rollups`.
+        """
+        if not self.enabled:
+            return []
+        with self._current() as (_, filter_manager):
+            events = filter_manager.flush_rollups(final, watermark_ms)
+        if self._handed_over:
+            events = self._take_handed_over() + events
+        return events
+
+    @property
+    def open_since_ms(self) -> Optional[int]:
+        """
+        Start of the oldest window of the input not flushed yet, which its offset must not move past.
+        """
+        windows = self.filter_manager.windows
+        return windows.open_since_ms if windows is not None else None
+
+    def swap(self, input_config: InputYamlConfig) -> None:
+        # The new manager is complete before it replaces the old one, so a page is never filtered half-way
+        filter_manager = create_filter_manager(input_config)
+        with self._condition:
+            self._swapping = True
+            self._condition.wait_for(lambda: not self._in_flight)
+            previous = self.filter_manager
+            self._handed_over.extend(filter_manager.take_over(previous))
+            self.filter_manager = filter_manager
+            self.filter_logic = batch_filter(filter_manager, input_config.type)
+            self.input_config = input_config
+            self._swapping = False
+            self._condition.notify_all()
+        previous.close()
+
+
+class SpareInput:
+    """
+    Input steps of the running dataflow without an input yet. An input added by a configuration reload takes a free
+    one, along with the configuration that added it, and is fetched and filtered by its steps from then on.
+    """
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.key: Optional[InputKey] = None
+        self.reloadable_filter: Optional[ReloadableFilter] = None
+        self.config: Optional[RatedIndexerYamlConfig] = None
+
+    def assign(
+        self,
+        key: InputKey,
+        reloadable_filter: ReloadableFilter,
+        config: RatedIndexerYamlConfig,
+    ) -> None:
+        # The filter is set last: the steps of the spare input only read the others once it is
+        self.key, self.config = key, config
+        self.reloadable_filter = reloadable_filter
+
+
+@dataclass
+class ReloadResult:
+    swapped: List[InputKey] = field(default_factory=list)
+    added: List[InputKey] = field(default_factory=list)
+    removed: List[InputKey] = field(default_factory=list)
+    restart_required: List[InputKey] = field(default_factory=list)
+
+
+def requires_restart(current: InputYamlConfig, new: InputYamlConfig) -> bool:
+    if current.model_dump(exclude=FILTER_FIELDS) != new.model_dump(
+        exclude=FILTER_FIELDS
+    ):
+        return True
+    # Only the fetch step of aggregating inputs marks the end of each time range, which flushes their windows
+    if (current.aggregation is None) != (new.aggregation is None):
+        return True
+    # The fetch step decodes log messages for the formats of the filters it started with
+    current_formats = {log_filter.log_format for log_filter in current.log_filters}
+    return current_formats != {log_filter.log_format for log_filter in new.log_filters}
+
+
+class InputRegistry:
+    """
+    The filters of the inputs of the running dataflow, by input.
+    """
+
+    def __init__(self) -> None:
+        self._filters: Dict[InputKey, ReloadableFilter] = {}
+        self._spare_inputs: List[SpareInput] = []
+        self._lock = threading.Lock()
+
+    def register(
+        self, key: InputKey, input_config: InputYamlConfig
+    ) -> ReloadableFilter:
+        reloadable_filter = ReloadableFilter(input_config)
+        with self._lock:
+            self._filters[key] = reloadable_filter
+        return reloadable_filter
+
+    def add_spare_inputs(self, count: int) -> List[SpareInput]:
+        """
+        Spare inputs for the inputs added by configuration reloads, whose steps the dataflow builds idle.
+        """
+        with self._lock:
+            spare_inputs = [
+                SpareInput(len(self._spare_inputs) + i) for i in range(count)
+            ]
+            self._spare_inputs.extend(spare_inputs)
+        return spare_inputs
+
+    def is_enabled(self, key: InputKey) -> bool:
+        reloadable_filter = self._filters.get(key)
+        return reloadable_filter is None or reloadable_filter.enabled
+
+    def offset_limit(self, key: InputKey) -> Optional[int]:
+        """
+        How far the offset of the input can advance, when it has samples in windows not flushed yet.
+        """
+        reloadable_filter = self._filters.get(key)
+        return reloadable_filter.open_since_ms if reloadable_filter else None
+
+    def apply(self, config: RatedIndexerYamlConfig) -> ReloadResult:
+        """
+        Applies the inputs of a new configuration to the running ones.
+        """
+        new_inputs = {
+            (slaos_key, config_index): input_config
+            for slaos_key, members in config.inputs_by_slaos_key().items()
+            for config_index, input_config in enumerate(members)
+        }
+        result = ReloadResult()
+
+        with self._lock:
+            for key, reloadable_filter in self._filters.items():
+                new_input = new_inputs.get(key)
+                if new_input is None:
+                    if reloadable_filter.enabled:
+                        reloadable_filter.enabled = False
+                        result.removed.append(key)
+                elif not reloadable_filter.enabled or requires_restart(
+                    reloadable_filter.input_config, new_input
+                ):
+                    result.restart_required.append(key)
+                elif reloadable_filter.input_config != new_input:
+                    reloadable_filter.swap(new_input)
+                    result.swapped.append(key)
+
+            # Every process of the dataflow assigns the added inputs to the same spare inputs, in configuration order
+            free_spare_inputs = iter(
+                [spare for spare in self._spare_inputs if spare.key is None]
+            )
+            for key, new_input in new_inputs.items():
+                if key in self._filters:
+                    continue
+                spare_input = next(free_spare_inputs, None)
+                if spare_input is None:
+                    result.restart_required.append(key)
+                    continue
+                reloadable_filter = self._filters[key] = ReloadableFilter(new_input)
+                spare_input.assign(key, reloadable_filter, config)
+                result.added.append(key)
+
+        return result
+
+
+input_registry = InputRegistry()
+
+
+class ConfigWatcher:
+    """
+    Polls the configuration source, and applies its changes to the input registry.
+    """
+
+    def __init__(
+        self,
+        config_manager: ConfigurationManager,
+        registry: InputRegistry,
+        interval: float,
+    ) -> None:
+        self.config_manager = config_manager
+        self.registry = registry
+        self.interval = interval
+        self._fingerprint: Optional[Hashable] = config_manager.fingerprint()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(self._stop,), name="config-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, wait: bool = False) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        self._thread = None
+        if wait:
+            thread.join()
+
+    def _run(self, stop: threading.Event) -> None:
+        while not stop.wait(self.interval):
+            self.check()
+
+    def check(self) -> Optional[ReloadResult]:
+        """
+        Reloads the configuration when its source changed, returning what was applied.
+        """
+        try:
+            fingerprint = self.config_manager.fingerprint()
+            if fingerprint == self._fingerprint:
+                return None
+            # Remembered before loading, so an invalid configuration is only reported once
+            self._fingerprint = fingerprint
+            config = self.config_manager.reload_config()
+        except Exception as e:
+            CONFIG_RELOADS.labels("failed").inc()
+            logger.error(
+                "Configuration reload failed, keeping the current configuration",
+                exc_info=e,
+            )
+            return None
+
+        result = self.registry.apply(config)
+        CONFIG_RELOADS.labels("applied").inc()
+        INPUTS_RESTART_REQUIRED.set(len(result.restart_required))
+        logger.info(
+            "Configuration reloaded",
+            swapped=[f"{slaos_key}:{index}" for slaos_key, index in result.swapped],
+            added=[f"{slaos_key}:{index}" for slaos_key, index in result.added],
+            removed=[f"{slaos_key}:{index}" for slaos_key, index in result.removed],
+        )
+        if result.restart_required:
+            logger.warning(
+                "Some input changes only apply once the indexer restarts",
+                inputs=[
+                    f"{slaos_key}:{index}"
+                    for slaos_key, index in result.restart_required
+                ],
+            )
+        return result
+
+
+def spare_input_count(
+    config: Optional[ReloadYamlConfig], config_manager: ConfigurationManager
+) -> int:
+    """
+    Spare inputs to build the dataflow with, only when the configuration is watched for changes.
+    """
+    if config is None or not config.enabled or not config_manager.reloadable:
+        return 0
+    return config.spare_inputs
+
+
+def start_config_reload(
+    config: ReloadYamlConfig, config_manager: ConfigurationManager
+) -> Optional[ConfigWatcher]:
+    if not config.enabled:
+        return None
+    if not config_manager.reloadable:
+        logger.warning(
+            "Configuration reload is enabled, but its source cannot change while running, so it is not watched",
+            source=type(config_manager).__name__,
+        )
+        return None
+    watcher = ConfigWatcher(config_manager, input_registry, config.interval_seconds)
+    watcher.start()
+    logger.info(
+        "Watching the configuration for changes", interval_seconds=watcher.interval
+    )
+    return watcher
@@ -0,0 +1,12 @@
+from src.config.models.output import OutputTypes
+from src.utils.registry import LazyRegistry
+
+# Sink builders, the HTTP client of the slaOS sink is only imported when it is the configured output
+SINKS: LazyRegistry[OutputTypes] = LazyRegistry(
+    "output type",
+    {
+        OutputTypes.RATED: "src.indexers.sinks.rated:build_http_sink",
+        OutputTypes.CONSOLE: "src.indexers.sinks.console:build_console_sink",
+        OutputTypes.NULL: "src.indexers.sinks.null:build_null_sink",
+    },
+)
@@ -13,7 +13,8 @@ class _ConsoleSinkPartition(StatelessSinkPartition):
 
     def write_batch(self, items: List[Any]) -> None:
         for item in items:
-            print(f"Worker {self.worker_index}: {item}")
+            for event in item if isinstance(item, list) else [item]:
+                print(f"Worker {self.worker_index}: {event}")
 
     def close(self):
         logger.info(f"Worker {self.worker_index} Console sink closed")
@@ -1,7 +1,7 @@
 import json
-from typing import Any, List, Dict, Iterator, Tuple, Optional
+from collections import Counter
+from typing import Any, Callable, List, Dict, Iterator, Sequence, Tuple, Optional
 import time
-from collections import deque
 
 import stamina
 import structlog
@@ -14,6 +14,15 @@ from pydantic import StrictInt, StrictBool, StrictFloat, StrictStr
 
 from src.config.models.output import RatedOutputConfig
 from src.indexers.filters.types import FilteredEvent
+from src.indexers.metrics import (
+    EVENTS_SENT,
+    SINK_BATCH_SIZE,
+    SINK_ERRORS,
+    SINK_REQUEST_SECONDS,
+)
+from src.indexers.profiling import profiler
+from src.indexers.tracing import sink_span, window_context
+from src.utils.time_conversion import format_milliseconds
 
 logger = structlog.get_logger(__name__)
 
@@ -73,7 +82,7 @@ class SlaOsApiBody:
         """
         return cls(
             organization_id=event.organization_id,
-            timestamp=event.event_timestamp.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            timestamp=format_milliseconds(event.timestamp_ms),
             key=key,
             idempotency_key=event.idempotency_key,
             values=cls.parse_and_prefix_values(event.values, slaos_key),
@@ -107,9 +116,13 @@ class _HTTPSinkPartition(StatelessSinkPartition):
         self.max_concurrent_requests = 5
         self.batch_size: StrictInt = 50
         self.batch_timeout_seconds: StrictInt = 10
-        self.batch: Any = deque()
+        self.batch: Any = []
+        # Span contexts of the sampled windows with events in the batch
+        self.batch_span_contexts: List[Any] = []
         self.last_flush_time: StrictFloat = time.time()
         self.flush_in_progress: StrictBool = False
+        # Called with the events of each batch accepted by slaOS
+        self.on_sent: Optional[Callable[[List[FilteredEvent]], None]] = None
         logger.debug(
             f"Worker {self.worker_index} initialized",
             http_endpoint=self.config.ingestion_url,
@@ -130,7 +143,7 @@ class _HTTPSinkPartition(StatelessSinkPartition):
         for item in items:
             event_data = {
                 "organization_id": item.organization_id,
-                "timestamp": item.event_timestamp.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "timestamp": format_milliseconds(item.timestamp_ms),
                 "key": (item.slaos_key if item.slaos_key else "a_valid_source"),
                 "idempotency_key": item.idempotency_key,
             }
@@ -196,12 +209,27 @@ class _HTTPSinkPartition(StatelessSinkPartition):
         """
         self.process_items(iter(items))
 
-    def process_items(self, items_iterator: Iterator[Dict]) -> None:
+    def process_items(self, items_iterator: Iterator[Any]) -> None:
         """
         Process items using an iterator, flushing when necessary.
+        Items may be single events or page-sized lists of events emitted by the filter step.
         """
         for item in items_iterator:
-            self.batch.append(item)
+            if isinstance(item, list):
+                self.batch.extend(item)
+                span_context = window_context(item)
+                if (
+                    span_context is not None
+                    and span_context not in self.batch_span_contexts
+                ):
+                    self.batch_span_contexts.append(span_context)
+            else:
+                self.batch.append(item)
+            while len(self.batch) > self.batch_size:
+                self.send_batch(self.batch[: self.batch_size], self.batch_span_contexts)
+                self.batch = self.batch[self.batch_size :]
+                # Only the last page can still have events left in the batch
+                self.batch_span_contexts = self.batch_span_contexts[-1:]
             if self.should_flush():
                 self.flush_batch()
 
@@ -222,22 +250,58 @@ class _HTTPSinkPartition(StatelessSinkPartition):
         Flush the current batch of events.
         """
         if self.batch:
-            self.send_batch(self.batch)
+            self.send_batch(self.batch, self.batch_span_contexts)
             self.batch = []
+            self.batch_span_contexts = []
             self.last_flush_time = time.time()
 
+    def send_batch(
+        self, items: List[FilteredEvent], span_contexts: Sequence[Any] = ()
+    ) -> None:
+        """
+        Send a batch of events to the HTTP endpoint, counting it as an error once its retries are exhausted.
+        The error is counted for the slaOS key of each event in the batch.
+        """
+        try:
+            self._send_batch(items, span_contexts)
+        except Exception:
+            for slaos_key in {item.slaos_key for item in items}:
+                SINK_ERRORS.labels(slaos_key).inc()
+            raise
+        if self.on_sent is not None:
+            self.on_sent(items)
+
     @stamina.retry(on=Exception, attempts=5)
-    def send_batch(self, items: List[FilteredEvent]) -> None:
+    def _send_batch(
+        self, items: List[FilteredEvent], span_contexts: Sequence[Any] = ()
+    ) -> None:
         """
         Send a batch of events to the HTTP endpoint.
+        The request is traced along with the sampled windows in `span_contexts`.
         """
         slaos_keyes = {item.slaos_key for item in items}
         try:
-            body = self._compose_body(items)
-            headers = self._compose_headers()
-            url, redacted_url = self._compose_url()
-            response = self.client.post(url, json=body, headers=headers)
-            response.raise_for_status()
+            with profiler.stage("sink", ",".join(sorted(slaos_keyes))), sink_span(
+                span_contexts, len(items)
+            ) as span:
+                body = self._compose_body(items)
+                headers = self._compose_headers()
+                url, redacted_url = self._compose_url()
+                started = time.perf_counter()
+                try:
+                    response = self.client.post(url, json=body, headers=headers)
+                finally:
+                    request_seconds = time.perf_counter() - started
+                    for slaos_key in slaos_keyes:
+                        SINK_REQUEST_SECONDS.labels(slaos_key).observe(request_seconds)
+                if span is not None:
+                    span.set_attribute(
+                        "http.response.status_code", response.status_code
+                    )
+                response.raise_for_status()
+            SINK_BATCH_SIZE.observe(len(items))
+            for slaos_key, count in Counter(item.slaos_key for item in items).items():
+                EVENTS_SENT.labels(slaos_key).inc(count)
             logger.info(
                 "Successfully sent batch to slaOS",
                 batch_size=len(items),
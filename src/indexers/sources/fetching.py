@@ -0,0 +1,141 @@
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Deque, Iterator, List, NamedTuple, Optional, Tuple
+
+from bytewax.inputs import FixedPartitionedSource, StatefulSourcePartition
+from pydantic import StrictStr
+
+from src.clients.upstream import (
+    PageStream,
+    acquire_upstream_pool,
+    release_upstream_pool,
+)
+from src.indexers.sources.rated import TimeRange
+
+# How often a partition checks for the pages of its time ranges in flight: the interval doubles while no page
+# arrives, up to the maximum, and drops back once one does
+FETCH_POLL_INTERVAL = timedelta(milliseconds=10)
+MAX_FETCH_POLL_INTERVAL = timedelta(milliseconds=500)
+
+
+class RangeEnd(NamedTuple):
+    """
+    Follows the pages of a time range once all of them were fetched: every timestamp before `end_ms` was seen.
+    The last one, emitted when the source ends, is final.
+    """
+
+    end_ms: int
+    final: bool = False
+
+
+class FetchingPartition(StatefulSourcePartition[Any, Any]):
+    """
+    Fetches the time ranges of a source partition on the upstream pool of its worker, emitting their pages as they
+    arrive. The worker never waits on the upstream API, so the fetches of all its inputs are in flight at once.
+    Pages are emitted in the order of their time ranges, by the worker owning the partition. With `mark_range_ends`,
+    the pages of each time range are followed by its `RangeEnd`.
+    """
+
+    def __init__(
+        self,
+        partition: StatefulSourcePartition[TimeRange, Any],
+        fetcher: Callable[[TimeRange], Iterator[list]],
+        mark_range_ends: bool = False,
+    ) -> None:
+        self.partition = partition
+        self.fetcher = fetcher
+        self.mark_range_ends = mark_range_ends
+        self.upstream_pool = acquire_upstream_pool()
+        self.streams: Deque[Tuple[PageStream, int]] = deque()
+        self.poll_interval = FETCH_POLL_INTERVAL
+        self._exhausted = False
+        self._last_end_ms = 0
+        self._marked_end = False
+
+    def next_batch(self) -> List[Any]:
+        if not self._exhausted and self._partition_due():
+            try:
+                time_ranges = self.partition.next_batch()
+            except StopIteration:
+                self._exhausted = True
+            else:
+                for time_range in time_ranges:
+                    self.streams.append(
+                        (
+                            self.upstream_pool.stream(self.fetcher(time_range)),
+                            time_range.end_time,
+                        )
+                    )
+                if time_ranges:
+                    self.poll_interval = FETCH_POLL_INTERVAL
+
+        pages = self._take_ready()
+        if pages:
+            self.poll_interval = FETCH_POLL_INTERVAL
+        elif self.streams:
+            self.poll_interval = min(self.poll_interval * 2, MAX_FETCH_POLL_INTERVAL)
+        elif self._exhausted:
+            if self.mark_range_ends and not self._marked_end:
+                self._marked_end = True
+                return [RangeEnd(self._last_end_ms, final=True)]
+            raise StopIteration()
+        return pages
+
+    def next_awake(self) -> Optional[datetime]:
+        partition_awake = None if self._exhausted else self.partition.next_awake()
+        if not self.streams:
+            return partition_awake
+        poll_at = datetime.now(timezone.utc) + self.poll_interval
+        return poll_at if partition_awake is None else min(poll_at, partition_awake)
+
+    def snapshot(self) -> Any:
+        return self.partition.snapshot()
+
+    def close(self) -> None:
+        self.partition.close()
+        release_upstream_pool(self.upstream_pool)
+
+    def _partition_due(self) -> bool:
+        partition_awake = self.partition.next_awake()
+        return partition_awake is None or partition_awake <= datetime.now(timezone.utc)
+
+    def _take_ready(self) -> List[Any]:
+        pages: List[Any] = []
+        while self.streams:
+            stream, end_ms = self.streams[0]
+            pages.extend(stream.ready())
+            if not stream.done:
+                break
+            self.streams.popleft()
+            self._last_end_ms = end_ms
+            if self.mark_range_ends:
+                pages.append(RangeEnd(end_ms))
+        return pages
+
+
+class FetchingSource(FixedPartitionedSource[Any, Any]):
+    """
+    Fetches the time ranges of a source, see `FetchingPartition`.
+    """
+
+    def __init__(
+        self,
+        source: FixedPartitionedSource[TimeRange, Any],
+        fetcher: Callable[[TimeRange], Iterator[list]],
+        mark_range_ends: bool = False,
+    ) -> None:
+        self.source = source
+        self.fetcher = fetcher
+        self.mark_range_ends = mark_range_ends
+
+    def list_parts(self) -> List[str]:
+        return self.source.list_parts()
+
+    def build_part(
+        self, step_id: StrictStr, for_part: StrictStr, resume_state: Any
+    ) -> FetchingPartition:
+        return FetchingPartition(
+            self.source.build_part(step_id, for_part, resume_state),
+            self.fetcher,
+            self.mark_range_ends,
+        )
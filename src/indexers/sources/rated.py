@@ -1,13 +1,18 @@
+import time
 from datetime import datetime, timezone, timedelta
 from enum import Enum
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Sequence, Tuple
 
 import structlog
 from bytewax.inputs import StatefulSourcePartition, FixedPartitionedSource
-from pydantic import BaseModel, PositiveInt, StrictStr, StrictInt
+from pydantic import BaseModel, Field, PositiveInt, StrictStr, StrictInt
 
-from src.config import get_config
+from src.config import RatedIndexerYamlConfig, get_config
+from src.indexers.offset_tracker.base import OffsetTracker
+from src.indexers.metrics import OFFSET_LAG_SECONDS
 from src.indexers.offset_tracker.factory import get_offset_tracker
+from src.indexers.reload import InputKey, input_registry
+from src.indexers.tracing import start_window
 from src.utils.time_conversion import from_milliseconds, to_milliseconds
 
 logger = structlog.get_logger(__name__)
@@ -25,22 +30,72 @@ class FetchInterval(int, Enum):
 class TimeRange(BaseModel):
     start_time: PositiveInt
     end_time: PositiveInt
+    # Set when the window is sampled for tracing, see `src.indexers.tracing`
+    span_context: Optional[Any] = Field(default=None, exclude=True, repr=False)
+
+
+def resume_offset(
+    slaos_key: StrictStr,
+    config_index: StrictInt,
+    config: Optional[RatedIndexerYamlConfig] = None,
+) -> PositiveInt:
+    """
+    The offset an input resumes from, as its partition resolves it: the stored offset, or the configured start
+    when later.
+    """
+    offset_tracker, config_start_from = get_offset_tracker(
+        slaos_key, config_index, config
+    )
+    return max(offset_tracker.get_current_offset(), config_start_from)
 
 
 class RatedPartition(StatefulSourcePartition[TimeRange, None]):
+    """
+    Yields the time ranges of an input. Inputs added by a configuration reload are looked up in `config`, the
+    configuration that added them, instead of the one the indexer started with.
+    """
+
     BUFFER_MS = 60_000
 
-    def __init__(self, slaos_key: StrictStr, config_index: StrictInt) -> None:
+    def __init__(
+        self,
+        slaos_key: StrictStr,
+        config_index: StrictInt,
+        shared_with: Sequence[Tuple[StrictStr, StrictInt]] = (),
+        config: Optional[RatedIndexerYamlConfig] = None,
+    ) -> None:
         self._next_awake = datetime.now(timezone.utc)
 
-        self.config = get_config().inputs
+        self.slaos_key = ",".join(
+            [slaos_key] + [shared_slaos_key for shared_slaos_key, _ in shared_with]
+        )
+        self.input_keys: List[InputKey] = [(slaos_key, config_index)] + [
+            (shared_slaos_key, shared_config_index)
+            for shared_slaos_key, shared_config_index in shared_with
+        ]
 
+        config = config or get_config()
         self.offset_tracker, self.config_start_from = get_offset_tracker(
-            slaos_key, config_index
+            slaos_key, config_index, config
         )
-        self.config_type = self.config[config_index].type
-
-        self.current_time = self._get_current_offset()
+        self.config_type = config.get_input(slaos_key, config_index).type
+
+        # Inputs fetched through this partition keep their own offsets, which advance along with it
+        self.shared_offset_trackers: List[Tuple[OffsetTracker, int]] = [
+            get_offset_tracker(shared_slaos_key, shared_config_index, config)
+            for shared_slaos_key, shared_config_index in shared_with
+        ]
+        self.offsets = [self._get_current_offset()] + [
+            self._resolve_offset(offset_tracker, config_start_from)
+            for offset_tracker, config_start_from in self.shared_offset_trackers
+        ]
+
+        self.offset_lags = [OFFSET_LAG_SECONDS.labels(slaos_key)] + [
+            OFFSET_LAG_SECONDS.labels(shared_slaos_key)
+            for shared_slaos_key, _ in shared_with
+        ]
+
+        self.current_time = min(self.offsets)
         self.timestamp = from_milliseconds(self.current_time)
         self.interval = (
             float(FetchInterval.LOGS)
@@ -69,16 +124,43 @@ class RatedPartition(StatefulSourcePartition[TimeRange, None]):
         PositiveInt: The selected starting offset in milliseconds.
 
         """
-        current_offset = self.offset_tracker.get_current_offset()
-        config_start_from_ms = self.config_start_from
+        return self._resolve_offset(self.offset_tracker, self.config_start_from)
+
+    @staticmethod
+    def _resolve_offset(
+        offset_tracker: OffsetTracker, config_start_from: int
+    ) -> PositiveInt:
+        current_offset = offset_tracker.get_current_offset()
+        config_start_from_ms = config_start_from
         current_offset_ms = current_offset
 
         highest_offset = max(current_offset_ms, config_start_from_ms)
         if highest_offset > current_offset_ms:
-            self.offset_tracker.update_offset(highest_offset)
+            offset_tracker.update_offset(highest_offset)
 
         return highest_offset
 
+    def _update_offsets(self, offset: PositiveInt) -> None:
+        """
+        Moves every offset tracked by the partition to the new offset, leaving alone the ones already past it.
+        The offsets of aggregating inputs stop at the start of their oldest window not flushed yet.
+        The offsets of the inputs removed by a configuration reload stay where they were, to resume from on restart.
+        """
+        offset_trackers = [self.offset_tracker] + [
+            offset_tracker for offset_tracker, _ in self.shared_offset_trackers
+        ]
+        for i, offset_tracker in enumerate(offset_trackers):
+            input_offset = offset
+            # Samples of windows not flushed yet are fetched again on restart
+            offset_limit = input_registry.offset_limit(self.input_keys[i])
+            if offset_limit is not None:
+                input_offset = min(input_offset, offset_limit)
+            if input_offset > self.offsets[i] and input_registry.is_enabled(
+                self.input_keys[i]
+            ):
+                offset_tracker.update_offset(input_offset)
+                self.offsets[i] = input_offset
+
     def _get_time_range(self) -> Optional[TimeRange]:
         """
         Fetches the next time range to index from integration.
@@ -111,7 +193,7 @@ class RatedPartition(StatefulSourcePartition[TimeRange, None]):
         start_time = self.current_time
         self.current_time = head
 
-        self.offset_tracker.update_offset(self.current_time)
+        self._update_offsets(self.current_time)
 
         return TimeRange(start_time=start_time, end_time=head)
 
@@ -120,13 +202,22 @@ class RatedPartition(StatefulSourcePartition[TimeRange, None]):
         Returns the next batch of time ranges to process.
         Uses minimal delay until caught up to real-time.
         """
+        started = time.time_ns()
+        if not any(map(input_registry.is_enabled, self.input_keys)):
+            # Every input of the partition was removed by a configuration reload
+            self._next_awake += timedelta(seconds=self.interval)
+            return []
+
         time_range = self._get_time_range()
+        current_time_ms = to_milliseconds(datetime.now(timezone.utc))
+        self._record_lags(current_time_ms)
         if not time_range:
             self._next_awake += timedelta(seconds=self.interval)
             return []
 
+        start_window(self.slaos_key, time_range, started)
+
         # Calculate how far the end of our time range is from current time
-        current_time_ms = to_milliseconds(datetime.now(timezone.utc))
         lag = current_time_ms - time_range.end_time
 
         # If we're behind by more than our standard interval, use minimal delay
@@ -140,6 +231,10 @@ class RatedPartition(StatefulSourcePartition[TimeRange, None]):
 
         return [time_range]
 
+    def _record_lags(self, current_time_ms: int) -> None:
+        for offset_lag, offset in zip(self.offset_lags, self.offsets):
+            offset_lag.set((current_time_ms - offset) / 1000)
+
     def next_awake(self):
         return self._next_awake
 
@@ -151,15 +246,23 @@ class RatedSource(FixedPartitionedSource[TimeRange, None]):
     """
     Yields time ranges. Continuously polls the source for the new head,
     emits a safe range to fetch
+
+    The inputs in `shared_with` are fetched through the same ranges, each keeping its own offset.
     """
 
-    def __init__(self, slaos_key: str, config_index: int):
+    def __init__(
+        self,
+        slaos_key: str,
+        config_index: int,
+        shared_with: Sequence[Tuple[str, int]] = (),
+    ):
         self.slaos_key = slaos_key
         self.config_index = config_index
+        self.shared_with = shared_with
 
     def list_parts(self):
         return ["single-part"]
 
     def build_part(self, step_id: StrictStr, for_key: StrictStr, resume_state: Any):
         assert for_key == "single-part"
-        return RatedPartition(self.slaos_key, self.config_index)
+        return RatedPartition(self.slaos_key, self.config_index, self.shared_with)
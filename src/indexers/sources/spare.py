@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, List, Optional
+
+from bytewax.inputs import FixedPartitionedSource, StatefulSourcePartition
+from pydantic import StrictStr
+
+from src.indexers.reload import SpareInput
+from src.indexers.sources.fetching import FetchingPartition
+
+# How often an idle spare input checks whether a configuration reload gave it an input
+SPARE_INPUT_POLL_INTERVAL = timedelta(seconds=1)
+
+
+class SparePartition(StatefulSourcePartition[Any, None]):
+    """
+    Idles until a configuration reload assigns an input to its spare input, then yields the pages of that input from
+    the partition `build_partition` starts for it.
+    """
+
+    def __init__(
+        self,
+        spare_input: SpareInput,
+        build_partition: Callable[[SpareInput], FetchingPartition],
+    ) -> None:
+        self.spare_input = spare_input
+        self.build_partition = build_partition
+        self.partition: Optional[FetchingPartition] = None
+        self._next_awake = datetime.now(timezone.utc)
+
+    def next_batch(self) -> List[Any]:
+        if self.partition is None:
+            if self.spare_input.reloadable_filter is None:
+                self._next_awake = (
+                    datetime.now(timezone.utc) + SPARE_INPUT_POLL_INTERVAL
+                )
+                return []
+            self.partition = self.build_partition(self.spare_input)
+        return self.partition.next_batch()
+
+    def next_awake(self) -> Optional[datetime]:
+        if self.partition is None:
+            return self._next_awake
+        return self.partition.next_awake()
+
+    def snapshot(self) -> None:
+        # After a restart, the input of a spare input is part of the configuration, and resumes from its offsets
+        return None
+
+    def close(self) -> None:
+        if self.partition is not None:
+            self.partition.close()
+
+
+class SpareSource(FixedPartitionedSource[Any, None]):
+    """
+    The source of a spare input, see `SparePartition`.
+    """
+
+    def __init__(
+        self,
+        spare_input: SpareInput,
+        build_partition: Callable[[SpareInput], FetchingPartition],
+    ) -> None:
+        self.spare_input = spare_input
+        self.build_partition = build_partition
+
+    def list_parts(self) -> List[str]:
+        return ["single-part"]
+
+    def build_part(
+        self, step_id: StrictStr, for_part: StrictStr, resume_state: Any
+    ) -> SparePartition:
+        return SparePartition(self.spare_input, self.build_partition)
@@ -0,0 +1,189 @@
+import os
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Any, ContextManager, Dict, List, Optional, Sequence
+
+import structlog
+from opentelemetry import trace
+from opentelemetry.context import Context
+from opentelemetry.trace import Link, NonRecordingSpan, Span, SpanContext
+
+from src.config.models.tracing import TracingYamlConfig
+
+if TYPE_CHECKING:
+    from opentelemetry.sdk.trace import TracerProvider
+
+logger = structlog.get_logger(__name__)
+
+TRACER_NAME = "rated_indexer"
+
+# A no-op tracer until tracing is configured
+tracer: trace.Tracer = trace.get_tracer(TRACER_NAME)
+
+
+class TracedPage(list):
+    """
+    A page of entries or events, carrying the span context of the time window it was fetched for.
+    Only pages of sampled windows are wrapped, the others flow through the dataflow as plain lists.
+    """
+
+    __slots__ = ("span_context",)
+
+    def __init__(self, items: Sequence[Any], span_context: SpanContext):
+        super().__init__(items)
+        self.span_context = span_context
+
+
+def window_context(item: Any) -> Optional[SpanContext]:
+    """
+    The span context of the sampled window a time range or a page belongs to.
+    """
+    return getattr(item, "span_context", None)
+
+
+def traced_page(items: List[Any], span_context: Optional[SpanContext]) -> List[Any]:
+    if span_context is None or not items:
+        return items
+    return TracedPage(items, span_context)
+
+
+def _parent(span_context: SpanContext) -> Context:
+    return trace.set_span_in_context(NonRecordingSpan(span_context))
+
+
+def start_window(slaos_key: str, time_range: Any, start_time: int) -> None:
+    """
+    Starts the trace of a time window, with a root span covering its scheduling by the source.
+    The steps downstream add their spans to the trace through the span context set on the time range.
+    """
+    span = tracer.start_span(
+        "window",
+        context=Context(),
+        start_time=start_time,
+        attributes={
+            "rated.slaos_key": slaos_key,
+            "rated.window.start_ms": time_range.start_time,
+            "rated.window.end_ms": time_range.end_time,
+        },
+    )
+    span.end()
+    span_context = span.get_span_context()
+    if span_context.trace_flags.sampled:
+        time_range.span_context = span_context
+
+
+def start_fetch(span_context: Optional[SpanContext], slaos_key: str) -> Optional[Span]:
+    if span_context is None:
+        return None
+    return tracer.start_span(
+        "fetch",
+        context=_parent(span_context),
+        attributes={"rated.slaos_key": slaos_key},
+    )
+
+
+def in_span(span: Optional[Span]) -> ContextManager:
+    """
+    Makes the span current, so that upstream calls made meanwhile are recorded under it.
+    """
+    if span is None:
+        return nullcontext()
+    return trace.use_span(span, record_exception=False, set_status_on_exception=False)
+
+
+def filter_span(
+    span_context: Optional[SpanContext], slaos_key: str
+) -> ContextManager[Optional[Span]]:
+    if span_context is None:
+        return nullcontext()
+    return tracer.start_as_current_span(
+        "filter",
+        context=_parent(span_context),
+        attributes={"rated.slaos_key": slaos_key},
+    )
+
+
+def upstream_span(
+    name: str, attributes: Optional[Dict[str, Any]] = None
+) -> ContextManager[Optional[Span]]:
+    """
+    Records an upstream API call, only within the fetch of a sampled window.
+    """
+    if not trace.get_current_span().is_recording():
+        return nullcontext()
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+def sink_span(
+    span_contexts: Sequence[SpanContext], events: int
+) -> ContextManager[Optional[Span]]:
+    """
+    Records a sink request in the trace of the first window it holds events of, linked to the other ones.
+    """
+    if not span_contexts:
+        return nullcontext()
+    return tracer.start_as_current_span(
+        "sink",
+        context=_parent(span_contexts[0]),
+        links=[Link(span_context) for span_context in span_contexts[1:]],
+        attributes={"rated.events": events},
+    )
+
+
+def build_tracer_provider(config: TracingYamlConfig) -> "TracerProvider":
+    # The SDK and the OTLP exporter are only imported when tracing is configured
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": config.service_name}),
+        sampler=ParentBased(TraceIdRatioBased(config.sample_rate)),
+    )
+    if config.otlp:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        provider.add_span_processor(
+            BatchSpanProcessor(
+                OTLPSpanExporter(
+                    endpoint=config.otlp.endpoint,
+                    headers=config.otlp.headers,
+                    timeout=config.otlp.timeout_seconds,
+                )
+            )
+        )
+    if config.file:
+
+        class FileSpanExporter(ConsoleSpanExporter):
+            def shutdown(self) -> None:
+                # Called by the processor once its last spans are exported, when the provider shuts down
+                super().shutdown()
+                self.out.close()
+
+        # One JSON encoded span per line
+        provider.add_span_processor(
+            BatchSpanProcessor(
+                FileSpanExporter(
+                    out=open(config.file.path, "a"),
+                    formatter=lambda span: span.to_json(indent=None)  # type: ignore[arg-type]
+                    + os.linesep,
+                )
+            )
+        )
+    return provider
+
+
+def start_tracing(config: TracingYamlConfig) -> None:
+    global tracer
+
+    provider = build_tracer_provider(config)
+    trace.set_tracer_provider(provider)
+    tracer = provider.get_tracer(TRACER_NAME)
+    logger.info(
+        "Tracing started",
+        sample_rate=config.sample_rate,
+        otlp_endpoint=config.otlp.endpoint if config.otlp else None,
+        file=config.file.path if config.file else None,
+    )
@@ -2,7 +2,12 @@ import structlog
 
 from src.config.models.sentry import initialize_sentry
 from src.config import get_config
+from src.config.manager import get_config_manager
 from src.indexers.dataflow import dataflow
+from src.indexers.metrics import start_metrics_endpoint
+from src.indexers.profiling import get_profiling_config, start_profiling
+from src.indexers.reload import start_config_reload
+from src.indexers.tracing import start_tracing
 
 logger = structlog.get_logger(__name__)
 
@@ -17,7 +22,21 @@ def main():
     if config.sentry:
         initialize_sentry(config.sentry)
 
+    if config.tracing:
+        start_tracing(config.tracing)
+
+    if config.metrics_endpoint:
+        start_metrics_endpoint(config.metrics_endpoint)
+
+    profiling_config = get_profiling_config(config.profiling)
+    if profiling_config:
+        start_profiling(profiling_config)
+
     flow = dataflow(config)
+
+    if config.reload:
+        start_config_reload(config.reload, get_config_manager())
+
     return flow
 
 
@@ -0,0 +1,24 @@
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+LABEL_SETS_CACHE_SIZE = 65_536
+
+
+@lru_cache(maxsize=LABEL_SETS_CACHE_SIZE)
+def interned_label_set(items: Tuple[Tuple[str, Any], ...]) -> Dict[str, Any]:
+    return dict(items)
+
+
+def intern_labels(labels: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the same dict for equal label sets, so every sample of a series references a single label set.
+    Interned label sets are shared between entries and must not be mutated.
+    """
+    if not labels:
+        return labels
+
+    try:
+        return interned_label_set(tuple(labels.items()))
+    except TypeError:
+        # Unhashable label values cannot be interned
+        return labels
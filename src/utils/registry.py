@@ -0,0 +1,38 @@
+from importlib import import_module
+from typing import Any, Dict, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+class LazyRegistry(Generic[K]):
+    """
+    Maps each key to an object given by its `module:attribute` path, only imported when its key is first looked up.
+    Deployments then only pay the import cost of the integrations, sinks and offset backends they configure.
+    """
+
+    def __init__(self, kind: str, paths: Dict[K, str]) -> None:
+        self.kind = kind
+        self._paths = dict(paths)
+        self._loaded: Dict[K, Any] = {}
+
+    def register(self, key: K, path: str) -> None:
+        self._paths[key] = path
+        self._loaded.pop(key, None)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._paths
+
+    def get(self, key: K) -> Any:
+        try:
+            return self._loaded[key]
+        except KeyError:
+            pass
+
+        path = self._paths.get(key)
+        if path is None:
+            raise ValueError(f"Unsupported {self.kind}: {key}")
+
+        module_name, _, attribute = path.partition(":")
+        loaded = getattr(import_module(module_name), attribute)
+        self._loaded[key] = loaded
+        return loaded
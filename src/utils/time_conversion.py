@@ -1,13 +1,20 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
 from pydantic import PositiveInt
 
+FORMATTED_SECONDS_CACHE_SIZE = 4_096
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MILLISECOND = timedelta(milliseconds=1)
+
 
 def to_milliseconds(dt: datetime) -> PositiveInt:
-    # Convert the datetime object to a timestamp (seconds since epoch)
-    timestamp = dt.timestamp()
-    milliseconds = int(timestamp * 1000)
-    return milliseconds
+    # Truncated to the millisecond, in integer arithmetic so that whole milliseconds never fall just below
+    if dt.tzinfo is None:
+        # Naive datetimes are in local time, as for `datetime.timestamp`
+        dt = dt.astimezone()
+    return (dt - EPOCH) // MILLISECOND
 
 
 def from_milliseconds(ms: PositiveInt) -> datetime:
@@ -15,3 +22,22 @@ def from_milliseconds(ms: PositiveInt) -> datetime:
     seconds = ms / 1000.0
     dt = datetime.fromtimestamp(seconds, tz=timezone.utc)
     return dt
+
+
+def from_milliseconds_local(ms: PositiveInt) -> datetime:
+    """
+    The naive local datetime of a timestamp, as returned by the Prometheus SDK.
+    """
+    return datetime.fromtimestamp(ms / 1000.0)
+
+
+@lru_cache(maxsize=FORMATTED_SECONDS_CACHE_SIZE)
+def _format_seconds(seconds: int) -> str:
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%SZ"
+    )
+
+
+def format_milliseconds(ms: int) -> str:
+    # Events are formatted to the second, so consecutive events mostly hit the cache
+    return _format_seconds(ms // 1000)
@@ -0,0 +1,29 @@
+import json
+
+from benchmarks.config import main, run
+from src.indexers.filters import manager as filter_manager
+
+
+def test_inputs_share_one_parser(monkeypatch):
+    monkeypatch.setattr(filter_manager, "_shared_parsers", {})
+
+    result = run(200)
+
+    assert result["inputs"] == 200
+    assert result["parsers"] == 1
+    assert set(result["stages_ms"]) == {
+        "validate",
+        "parse_config",
+        "build_dataflow",
+        "offset_trackers",
+    }
+
+
+def test_results_are_written_as_json(tmp_path):
+    output = tmp_path / "config.json"
+
+    main(["--inputs", "10", "--output", str(output)])
+
+    report = json.loads(output.read_text())
+    assert report["result"]["inputs"] == 10
+    assert report["result"]["total_ms"] > 0
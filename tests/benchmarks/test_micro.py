@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from benchmarks.micro import CASES, compare, main, measure
+
+
+def test_every_case_runs():
+    costs = measure(sorted(CASES), size=20, rounds=1)
+
+    assert set(costs) == set(CASES)
+    assert all(cost > 0 for cost in costs.values())
+
+
+@pytest.mark.parametrize(
+    "calibration_ns, cost, regressed",
+    [
+        (1_000, 120, False),
+        (1_000, 130, True),
+        # The machine is twice as slow, so are the cases
+        (2_000, 240, False),
+        (2_000, 260, True),
+    ],
+)
+def test_costs_are_compared_relative_to_the_calibration(
+    calibration_ns, cost, regressed
+):
+    baseline = {"calibration_ns": 1_000, "cases": {"case": 100}}
+
+    [comparison] = compare({"case": cost}, calibration_ns, baseline)
+
+    assert comparison.regressed(0.25) is regressed
+
+
+def test_cases_without_baseline_do_not_fail():
+    [comparison] = compare({"new": 100}, 1_000, {"calibration_ns": 1_000, "cases": {}})
+
+    assert comparison.change is None
+    assert not comparison.regressed(0.25)
+
+
+def test_baseline_is_recorded_then_checked(tmp_path):
+    baseline = tmp_path / "micro.json"
+    args = ["--case", "sink.compose_body", "--size", "50", "--rounds", "2"]
+
+    assert main(args + ["--baseline", str(baseline), "--update-baseline"]) == 0
+    assert "sink.compose_body" in json.loads(baseline.read_text())["cases"]
+
+    assert main(args + ["--baseline", str(baseline), "--threshold", "100"]) == 0
+
+    recorded = json.loads(baseline.read_text())
+    recorded["cases"]["sink.compose_body"] /= 1_000
+    baseline.write_text(json.dumps(recorded))
+    assert main(args + ["--baseline", str(baseline)]) == 1
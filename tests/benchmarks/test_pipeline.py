@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from benchmarks.pipeline import SCENARIOS, SinkTypes, percentile, run_scenario
+from benchmarks.run import main
+from benchmarks.upstreams import Workload
+
+
+@pytest.mark.parametrize("name", sorted(SCENARIOS))
+def test_scenarios_send_every_entry_to_the_sink(name):
+    workload = Workload(entries=1_200, organizations=3, label_values=2, page_size=500)
+
+    result = run_scenario(name, workload, time_ranges=2)
+
+    # Datadog drops the samples whose value is zero
+    expected = 2 * 1_200 - (2 if name == "datadog_metrics" else 0)
+    assert result.events == expected
+    assert result.events_per_second > 0
+    assert result.peak_rss_mb > 0
+    assert set(result.stages) == {"fetch", "filter", "sink"}
+    assert result.stages["filter"]["p99_ms"] >= result.stages["filter"]["p50_ms"]
+
+
+def test_fake_sink_posts_every_event():
+    result = run_scenario(
+        "prometheus_metrics",
+        Workload(entries=600, organizations=2, label_values=3),
+        time_ranges=1,
+        sink_type=SinkTypes.FAKE,
+    )
+
+    assert result.events == 600
+
+
+def test_results_are_written_as_json(tmp_path):
+    output = tmp_path / "results.json"
+
+    main(
+        [
+            "--scenario",
+            "cloudwatch_json_logs",
+            "--entries",
+            "100",
+            "--time-ranges",
+            "1",
+            "--output",
+            str(output),
+        ]
+    )
+
+    report = json.loads(output.read_text())
+    assert report["results"][0]["scenario"] == "cloudwatch_json_logs"
+    assert report["results"][0]["events"] == 100
+
+
+def test_percentile():
+    values = [float(i) for i in range(1, 101)]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([3.0], 99) == 3.0
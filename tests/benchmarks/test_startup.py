@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from benchmarks.startup import main, run_scenario
+
+
+def test_core_startup_imports_no_integration():
+    result = run_scenario("core")
+
+    # The Prometheus step types are part of the input configuration models
+    assert result["heavy_packages"] == ["rated_exporter_sdk"]
+    assert result["import_ms"] > 0
+    assert result["peak_rss_mb"] > 0
+
+
+@pytest.mark.parametrize(
+    "name, package",
+    [
+        ("cloudwatch", "boto3"),
+        ("datadog", "datadog_api_client"),
+        ("postgres_offsets", "sqlalchemy"),
+        ("rated_sink", "httpx"),
+    ],
+)
+def test_scenario_imports_only_its_integration(name, package):
+    result = run_scenario(name)
+
+    assert set(result["heavy_packages"]) == {"rated_exporter_sdk", package}
+
+
+def test_results_are_written_as_json(tmp_path):
+    output = tmp_path / "startup.json"
+
+    main(["--scenario", "core", "--repeat", "1", "--output", str(output)])
+
+    report = json.loads(output.read_text())
+    assert report["results"][0]["scenario"] == "core"
+    assert report["results"][0]["runs"] == 1
@@ -29,6 +29,13 @@ def test_slaos_client_full_ingest_url(slaos_client_config: RatedOutputConfig):
     )
 
 
+def test_slaos_clients_share_a_connection_pool(slaos_client_config: RatedOutputConfig):
+    first = slaos.SlaosClient(slaos_client_config)
+    second = slaos.SlaosClient(slaos_client_config)
+
+    assert first.client is second.client
+
+
 def test_slaos_client_get_latest_ingest_timestamp_ok(
     httpx_mock: HTTPXMock, slaos_client_config: RatedOutputConfig
 ):
@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pytest
+
+from src.clients.upstream import (
+    MAX_BUFFERED_PAGES,
+    UpstreamPool,
+    acquire_upstream_pool,
+    release_upstream_pool,
+)
+
+
+@pytest.fixture
+def upstream_pool():
+    upstream_pool = UpstreamPool(max_concurrent_calls=4)
+    yield upstream_pool
+    upstream_pool.close()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.005)
+
+
+def test_pages_are_taken_without_waiting_for_the_fetch(upstream_pool):
+    first_page_taken = threading.Event()
+
+    def fetch():
+        yield ["first"]
+        first_page_taken.wait()
+        yield ["second"]
+
+    stream = upstream_pool.stream(fetch())
+
+    wait_for(lambda: stream._pages)
+    assert stream.ready() == [["first"]]
+    assert stream.ready() == []
+    assert not stream.done
+
+    first_page_taken.set()
+    wait_for(lambda: stream._fetched)
+    assert stream.ready() == [["second"]]
+    assert stream.done
+
+
+def test_the_error_of_a_fetch_is_raised_after_its_pages(upstream_pool):
+    def fetch():
+        yield ["first"]
+        raise ValueError("Upstream failure")
+
+    stream = upstream_pool.stream(fetch())
+
+    wait_for(lambda: stream._fetched)
+    assert stream.ready() == [["first"]]
+    with pytest.raises(ValueError, match="Upstream failure"):
+        stream.ready()
+    assert not stream.done
+
+
+def test_fetching_pauses_until_pages_are_taken(upstream_pool):
+    fetched = []
+
+    def fetch():
+        for i in range(MAX_BUFFERED_PAGES * 3):
+            fetched.append(i)
+            yield [i]
+
+    stream = upstream_pool.stream(fetch())
+
+    wait_for(lambda: len(stream._pages) == MAX_BUFFERED_PAGES)
+    time.sleep(0.05)
+    assert len(fetched) == MAX_BUFFERED_PAGES
+
+    assert [page for page in stream] == [[i] for i in range(MAX_BUFFERED_PAGES * 3)]
+    assert stream.done
+
+
+def test_fetches_run_concurrently(upstream_pool):
+    def fetch():
+        time.sleep(0.2)
+        yield ["page"]
+
+    started = time.perf_counter()
+    streams = [upstream_pool.stream(fetch()) for _ in range(4)]
+    pages = [page for stream in streams for page in stream]
+
+    assert pages == [["page"]] * 4
+    assert time.perf_counter() - started < 0.6
+
+
+def test_each_worker_thread_has_its_own_pool():
+    pools = []
+
+    def worker():
+        pools.append(acquire_upstream_pool())
+        release_upstream_pool(pools[0])
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    upstream_pool = acquire_upstream_pool()
+    try:
+        assert acquire_upstream_pool() is upstream_pool
+        release_upstream_pool(upstream_pool)
+        assert pools[0] is not upstream_pool
+    finally:
+        release_upstream_pool(upstream_pool)
+
+
+def test_the_pool_is_shut_down_by_its_last_user():
+    upstream_pool = acquire_upstream_pool()
+    assert acquire_upstream_pool() is upstream_pool
+
+    release_upstream_pool(upstream_pool)
+    assert list(upstream_pool.stream(iter([["page"]]))) == [["page"]]
+
+    release_upstream_pool(upstream_pool)
+    with pytest.raises(RuntimeError):
+        list(upstream_pool.stream(iter([["page"]])))
+    new_pool = acquire_upstream_pool()
+    assert new_pool is not upstream_pool
+    release_upstream_pool(new_pool)
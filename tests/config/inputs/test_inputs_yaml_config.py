@@ -1,7 +1,7 @@
 import pytest
 from pydantic import ValidationError
 
-from src.config.models.inputs.input import InputTypes
+from src.config.models.inputs.input import InputTypes, InputYamlConfig
 from src.config.manager import RatedIndexerYamlConfig
 
 
@@ -34,3 +34,154 @@ def test_filters_none_for_metrics_no_error(valid_config_dict):
         RatedIndexerYamlConfig(**valid_config_dict)
     except ValidationError:
         pytest.fail("Validation error raised unexpectedly")
+
+
+def test_redistribute_filtering_defaults_to_false(valid_config_dict):
+    config = RatedIndexerYamlConfig(**valid_config_dict)
+    assert config.inputs[0].redistribute_filtering is False
+
+    valid_config_dict["inputs"][0]["redistribute_filtering"] = True
+    config = RatedIndexerYamlConfig(**valid_config_dict)
+    assert config.inputs[0].redistribute_filtering is True
+
+
+def log_filter_pattern(version, route=None):
+    return {
+        "version": version,
+        "log_format": "json_dict",
+        "log_example": {"org": "org_1", "event": "login"},
+        "fields": [
+            {"key": "organization_id", "field_type": "string", "path": "org"},
+            {"key": "event", "field_type": "string", "path": "event"},
+        ],
+        "route": route,
+    }
+
+
+def cloudwatch_logs_input(filters):
+    return {
+        "integration": "cloudwatch",
+        "slaos_key": "my-slaos-key",
+        "type": "logs",
+        "filters": filters,
+        "cloudwatch": {
+            "region": "us-east-1",
+            "aws_access_key_id": "fake_access_key",
+            "aws_secret_access_key": "fake_secret_key",
+            "logs_config": {"log_group_name": "my-log-group"},
+        },
+        "offset": {
+            "type": "postgres",
+            "start_from": 123456789,
+            "start_from_type": "bigint",
+            "postgres": {
+                "table_name": "offset_tracking",
+                "host": "localhost",
+                "port": 5432,
+                "database": "test",
+                "user": "test",
+                "password": "test",
+            },
+        },
+    }
+
+
+def test_multiple_filter_patterns():
+    config = InputYamlConfig(
+        **cloudwatch_logs_input(
+            [
+                log_filter_pattern(1, {"json_key": "event"}),
+                log_filter_pattern(2, {"log_stream": "auth"}),
+                log_filter_pattern(3),
+            ]
+        )
+    )
+
+    assert [log_filter.version for log_filter in config.log_filters] == [1, 2, 3]
+    assert config.log_filters[0].route.json_key == "event"
+
+
+@pytest.mark.parametrize(
+    "filters, error",
+    [
+        ([], "cannot be empty"),
+        ([log_filter_pattern(1), log_filter_pattern(1)], "must be unique"),
+        (
+            [log_filter_pattern(1, {"json_key": "event", "substring": "login"})],
+            "exactly one",
+        ),
+        (
+            [log_filter_pattern(1, {"substring": "login"})],
+            "substring routes are only supported for RAW_TEXT logs",
+        ),
+        (
+            [{**log_filter_pattern(1), "parser_pool": {"processes": 2}}],
+            "single filter pattern",
+        ),
+    ],
+)
+def test_multiple_filter_patterns_validation(filters, error):
+    with pytest.raises(ValidationError, match=error):
+        InputYamlConfig(**cloudwatch_logs_input(filters))
+
+
+def test_multiple_filter_patterns_require_logs():
+    input_config = cloudwatch_logs_input([log_filter_pattern(1)])
+    input_config["type"] = "metrics"
+
+    with pytest.raises(ValidationError, match="only supported for logs"):
+        InputYamlConfig(**input_config)
+
+
+def test_metrics_aggregation():
+    input_config = cloudwatch_logs_input(None)
+    input_config["type"] = "metrics"
+    input_config["aggregation"] = {"window_seconds": 60, "percentiles": [95, 99]}
+
+    config = InputYamlConfig(**input_config)
+
+    assert config.aggregation.window_seconds == 60
+    assert config.aggregation.percentiles == [95, 99]
+
+
+@pytest.mark.parametrize(
+    "overrides, error",
+    [
+        ({"redistribute_filtering": True}, "cannot be combined"),
+        ({"type": "metrics", "redistribute_filtering": True}, "cannot be combined"),
+        (
+            {
+                "type": "metrics",
+                "aggregation": {"window_seconds": 60, "group_by": ["region"]},
+            },
+            "only supported for logs",
+        ),
+        (
+            {"type": "metrics", "aggregation": {"window_seconds": 0}},
+            "greater than 0",
+        ),
+    ],
+)
+def test_metrics_aggregation_validation(overrides, error):
+    input_config = cloudwatch_logs_input([log_filter_pattern(1)])
+    input_config["aggregation"] = {"window_seconds": 60}
+    input_config.update(overrides)
+    if input_config["type"] == "metrics":
+        input_config["filters"] = None
+
+    with pytest.raises(ValidationError, match=error):
+        InputYamlConfig(**input_config)
+
+
+def test_logs_aggregation():
+    input_config = cloudwatch_logs_input([log_filter_pattern(1)])
+    input_config["aggregation"] = {
+        "window_seconds": 60,
+        "fields": ["latency"],
+        "group_by": ["event"],
+    }
+
+    config = InputYamlConfig(**input_config)
+
+    assert config.aggregation.fields == ["latency"]
+    assert config.aggregation.group_by == ["event"]
@@ -142,3 +142,72 @@ class TestFiltersConfig:
         assert field.key == "json_field"
         assert field.field_type == RatedParserFieldType.STRING
         assert field.path == "timestamp.eventTime"
+
+    def test_filters_yaml_config_parser_pool(self):
+        config = LogFilterConfig(
+            version=1,
+            log_format="raw_text",
+            log_example="request from org_1",
+            fields=[
+                {
+                    "key": "organization_id",
+                    "value": "org_1",
+                    "field_type": "string",
+                },
+            ],
+            parser_pool={"processes": 4},
+        )
+        assert config.parser_pool is not None
+        assert config.parser_pool.processes == 4
+        assert config.parser_pool.batch_size == 500
+
+    def test_filters_yaml_config_parser_pool_invalid_processes(self):
+        with pytest.raises(ValidationError):
+            LogFilterConfig(
+                version=1,
+                log_format="raw_text",
+                log_example="request from org_1",
+                fields=[
+                    {
+                        "key": "organization_id",
+                        "value": "org_1",
+                        "field_type": "string",
+                    },
+                ],
+                parser_pool={"processes": 0},
+            )
+
+    def test_filters_yaml_config_template_cache(self):
+        config = LogFilterConfig(
+            version=1,
+            log_format="raw_text",
+            log_example="request from org_1",
+            fields=[
+                {
+                    "key": "organization_id",
+                    "value": "org_1",
+                    "field_type": "string",
+                },
+            ],
+            template_cache={"max_templates": 500},
+        )
+        assert config.template_cache is not None
+        assert config.template_cache.max_templates == 500
+        assert config.template_cache.similarity_threshold == 0.5
+        assert config.template_cache.min_failures == 3
+
+    def test_filters_yaml_config_template_cache_requires_raw_text(self):
+        with pytest.raises(ValidationError, match="template_cache"):
+            LogFilterConfig(
+                version=1,
+                log_format="json_dict",
+                log_example={"org": "org_1"},
+                fields=[
+                    {
+                        "key": "organization_id",
+                        "field_type": "string",
+                        "path": "org",
+                    },
+                ],
+                template_cache={},
+            )
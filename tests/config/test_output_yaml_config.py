@@ -1,7 +1,11 @@
 import pytest
 from pydantic import ValidationError
 
-from src.config.models.output import RatedOutputConfig
+from src.config.models.output import (
+    OutputTypes,
+    OutputYamlConfig,
+    RatedOutputConfig,
+)
 
 
 def test_ingestion_url_valid():
@@ -50,3 +54,13 @@ def test_ingestion_url_http():
         ingestion_url="http://example.com/v2/ingest",
     )
     assert config.ingestion_url == "http://example.com/v2/ingest"
+
+
+def test_null_output_needs_no_configuration():
+    config = OutputYamlConfig(type="null")
+    assert config.type == OutputTypes.NULL
+
+
+def test_output_configuration_is_required():
+    with pytest.raises(ValidationError, match="is not found"):
+        OutputYamlConfig(type="rated")
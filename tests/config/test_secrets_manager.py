@@ -2,9 +2,11 @@ import json
 import pytest
 from unittest.mock import patch
 
+from botocore.exceptions import ClientError  # type: ignore
+
 from src.config.models.inputs.input import IntegrationTypes
 from src.config.manager import RatedIndexerYamlConfig
-from src.config.models.secrets import SecretProvider
+from src.config.models.secrets import AwsSecretsManagerConfig, SecretProvider
 from src.config.secrets.aws_secrets_manager import AwsSecretManager
 
 
@@ -82,6 +84,24 @@ def mock_aws_secrets_manager():
         mock_client.return_value.get_secret_value.side_effect = lambda SecretId: {
             "SecretString": mock_secrets[SecretId]
         }
+        mock_client.return_value.batch_get_secret_value.side_effect = (
+            lambda SecretIdList: {
+                "SecretValues": [
+                    {"Name": secret_id, "SecretString": mock_secrets[secret_id]}
+                    for secret_id in SecretIdList
+                    if secret_id in mock_secrets
+                ],
+                "Errors": [
+                    {
+                        "SecretId": secret_id,
+                        "ErrorCode": "ResourceNotFoundException",
+                        "Message": "Secrets Manager can't find the specified secret.",
+                    }
+                    for secret_id in SecretIdList
+                    if secret_id not in mock_secrets
+                ],
+            }
+        )
         yield mock_client
 
 
@@ -161,3 +181,96 @@ def test_secret_manager_resolve_nonexistent_key_in_dictionary_raises_error(
         match="Key 'nonexistent_key' not found in secret dict_secret for app_key. Available keys: key1, key2",
     ):
         secret_manager.resolve_secrets(config)
+
+
+def test_secret_referenced_many_times_is_fetched_once(
+    valid_config_with_secrets, mock_aws_secrets_manager
+):
+    datadog = valid_config_with_secrets["inputs"][0]["datadog"]
+    datadog["api_key"] = "secret|key1:dict_secret"
+    datadog["app_key"] = "secret|key2:dict_secret"
+    valid_config_with_secrets["inputs"].append(
+        {**valid_config_with_secrets["inputs"][0], "slaos_key": "secret:app_key"}
+    )
+
+    config = RatedIndexerYamlConfig(**valid_config_with_secrets)
+    secret_manager = AwsSecretManager(config.secrets.aws)
+    secret_manager.resolve_secrets(config)
+
+    assert config.inputs[1].datadog.api_key == "value1"
+    assert config.inputs[1].datadog.app_key == "value2"
+    assert config.inputs[1].slaos_key == "resolved_datadog_app_key"
+
+    client = mock_aws_secrets_manager.return_value
+    client.batch_get_secret_value.assert_called_once()
+    assert sorted(client.batch_get_secret_value.call_args.kwargs["SecretIdList"]) == [
+        "app_key",
+        "dict_secret",
+        "ingestion_key_key_in_secrets_manager",
+        "slaos_key_secret",
+    ]
+    client.get_secret_value.assert_not_called()
+
+
+AWS_CONFIG = AwsSecretsManagerConfig(
+    region="us-west-2",
+    aws_access_key_id="fake_access_key",
+    aws_secret_access_key="fake_secret_key",
+)
+
+
+def test_secrets_are_fetched_in_batches_of_20(mock_aws_secrets_manager):
+    client = mock_aws_secrets_manager.return_value
+    client.batch_get_secret_value.side_effect = lambda SecretIdList: {
+        "SecretValues": [
+            {
+                "ARN": f"arn:aws:secretsmanager:us-west-2:123456789012:secret:{secret_id}",
+                "Name": secret_id,
+                "SecretString": f"resolved_{secret_id}",
+            }
+            for secret_id in SecretIdList
+        ]
+    }
+    config = {"keys": [f"secret:secret_{i}" for i in range(45)]}
+
+    AwsSecretManager(AWS_CONFIG).resolve_secrets(config)
+
+    assert config["keys"] == [f"resolved_secret_{i}" for i in range(45)]
+    batch_sizes = sorted(
+        len(call.kwargs["SecretIdList"])
+        for call in client.batch_get_secret_value.call_args_list
+    )
+    assert batch_sizes == [5, 20, 20]
+    client.get_secret_value.assert_not_called()
+
+
+def test_batch_retrieval_denied_falls_back_to_single_fetches(
+    mock_aws_secrets_manager,
+):
+    client = mock_aws_secrets_manager.return_value
+    client.batch_get_secret_value.side_effect = ClientError(
+        {"Error": {"Code": "AccessDeniedException", "Message": "Not authorized"}},
+        "BatchGetSecretValue",
+    )
+    config = {"first": "secret|key1:dict_secret", "second": "secret|key2:dict_secret"}
+
+    AwsSecretManager(AWS_CONFIG).resolve_secrets(config)
+
+    assert config == {"first": "value1", "second": "value2"}
+    client.get_secret_value.assert_called_once_with(SecretId="dict_secret")
+
+
+def test_missing_secret_keeps_its_error(mock_aws_secrets_manager):
+    client = mock_aws_secrets_manager.return_value
+    client.get_secret_value.side_effect = ClientError(
+        {"Error": {"Code": "ResourceNotFoundException", "Message": "Not found"}},
+        "GetSecretValue",
+    )
+    secret_manager = AwsSecretManager(AWS_CONFIG)
+
+    with pytest.raises(ValueError, match="Error resolving secret for api_key"):
+        secret_manager.resolve_secrets({"api_key": "secret:missing_secret"})
+    with pytest.raises(ValueError, match="Error resolving secret for app_key"):
+        secret_manager.resolve_secrets({"app_key": "secret:missing_secret"})
+
+    client.get_secret_value.assert_called_once_with(SecretId="missing_secret")
@@ -130,3 +130,27 @@ def test_prometheus_config_step_validation(
             else:
                 with pytest.raises(ValidationError):
                     RatedIndexerYamlConfig(**config_dict)
+
+
+def test_inputs_are_grouped_by_slaos_key_once(test_config):
+    test_config["inputs"] = [
+        {**test_config["inputs"][0], "slaos_key": slaos_key}
+        for slaos_key in ["first", "second", "first"]
+    ]
+    config = RatedIndexerYamlConfig(**test_config)
+
+    grouped = config.inputs_by_slaos_key()
+
+    assert config.inputs_by_slaos_key() is grouped
+    assert grouped == {
+        "first": [config.inputs[0], config.inputs[2]],
+        "second": [config.inputs[1]],
+    }
+    assert config.get_input("first", 1) is config.inputs[2]
+    with pytest.raises(ValueError, match="Config index 2 is out of range"):
+        config.get_input("first", 2)
+    with pytest.raises(ValueError, match="No configuration found for slaOS key"):
+        config.get_input("third")
+
+    config.inputs = config.inputs[:1]
+    assert config.inputs_by_slaos_key() == {"first": [config.inputs[0]]}
@@ -49,7 +49,7 @@ class TestPrometheusDataflow:
                 input_config.prometheus,
                 mock_input,
                 fetch_metrics,
-                filter_manager.parse_and_filter_metrics,
+                filter_manager.parse_and_filter_metrics_batch,
                 "prometheus_test",
             )
         ]
@@ -135,7 +135,7 @@ class TestPrometheusDataflow:
                     input_config.prometheus,
                     mock_input,
                     fetch_metrics,
-                    filter_manager.parse_and_filter_metrics,
+                    filter_manager.parse_and_filter_metrics_batch,
                     "prometheus_test",
                 )
             ]
@@ -3,6 +3,7 @@ from datetime import datetime, timezone
 import pytest
 
 from src.indexers.filters.types import MetricEntry
+from src.utils.time_conversion import to_milliseconds
 
 
 @pytest.fixture
@@ -12,7 +13,9 @@ def test_metrics():
             metric_name="cpu_usage",
             value=75.5,
             organization_id="org_1",
-            event_timestamp=datetime(2024, 10, 31, 12, 0, 0, tzinfo=timezone.utc),
+            timestamp_ms=to_milliseconds(
+                datetime(2024, 10, 31, 12, 0, 0, tzinfo=timezone.utc)
+            ),
             labels={
                 "environment": "prod",
                 "service": "api",
@@ -25,7 +28,9 @@ def test_metrics():
             metric_name="memory_usage_mb",
             value=1024.0,
             organization_id="org_2",
-            event_timestamp=datetime(2024, 10, 31, 12, 1, 0, tzinfo=timezone.utc),
+            timestamp_ms=to_milliseconds(
+                datetime(2024, 10, 31, 12, 1, 0, tzinfo=timezone.utc)
+            ),
             labels={
                 "environment": "staging",
                 "service": "web",
@@ -38,7 +43,9 @@ def test_metrics():
             metric_name="request_latency_ms",
             value=250.3,
             organization_id="org_1",
-            event_timestamp=datetime(2024, 10, 31, 12, 2, 0, tzinfo=timezone.utc),
+            timestamp_ms=to_milliseconds(
+                datetime(2024, 10, 31, 12, 2, 0, tzinfo=timezone.utc)
+            ),
             labels={
                 "environment": "dev",
                 "service": "worker",
@@ -51,7 +58,9 @@ def test_metrics():
             metric_name="error_count",
             value=0.0,
             organization_id="org_3",
-            event_timestamp=datetime(2024, 10, 31, 12, 3, 0, tzinfo=timezone.utc),
+            timestamp_ms=to_milliseconds(
+                datetime(2024, 10, 31, 12, 3, 0, tzinfo=timezone.utc)
+            ),
             labels={
                 "environment": "prod",
                 "service": "api",
@@ -64,7 +73,9 @@ def test_metrics():
             metric_name="disk_usage_percent",
             value=85.5,
             organization_id="org_2",
-            event_timestamp=datetime(2024, 10, 31, 12, 4, 0, tzinfo=timezone.utc),
+            timestamp_ms=to_milliseconds(
+                datetime(2024, 10, 31, 12, 4, 0, tzinfo=timezone.utc)
+            ),
             labels={
                 "environment": "staging",
                 "service": "worker",
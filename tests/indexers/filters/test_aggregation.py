@@ -0,0 +1,240 @@
+import pytest
+
+from src.config.models.aggregation import AggregationStatistic, AggregationConfig
+from src.indexers.filters.aggregation import (
+    LogAggregator,
+    MetricAggregator,
+    QuantileSketch,
+    percentile_name,
+)
+
+WINDOW_START = 1_730_376_000_000  # 2024-10-31 12:00:00 UTC, aligned to the minute
+
+
+def test_rollups_are_flushed_once_the_watermark_passes_the_window():
+    aggregator = MetricAggregator(AggregationConfig(window_seconds=60))
+
+    late = aggregator.add(
+        "org_1",
+        "cpu",
+        {"region": "us-east"},
+        [WINDOW_START, WINDOW_START + 20_000, WINDOW_START + 40_000],
+        [1.0, 4.0, 7.0],
+    )
+
+    assert late == 0
+    assert aggregator.flush() == [], "No watermark yet"
+
+    aggregator.windows.advance(WINDOW_START + 59_999)
+    assert aggregator.flush() == [], "The window is still open"
+
+    aggregator.windows.advance(WINDOW_START + 60_000)
+    rollups = aggregator.flush()
+
+    assert len(rollups) == 1
+    assert rollups[0].window_start_ms == WINDOW_START
+    assert rollups[0].labels == {"region": "us-east"}
+    assert rollups[0].values == {
+        "cpu_sum": 12.0,
+        "cpu_count": 3,
+        "cpu_min": 1.0,
+        "cpu_max": 7.0,
+        "cpu_avg": 4.0,
+    }
+
+
+def test_series_do_not_need_to_come_in_timestamp_order():
+    aggregator = MetricAggregator(AggregationConfig(window_seconds=60))
+
+    # Each series covers the whole time range, one after the other
+    for host in ["a", "b", "c"]:
+        late = aggregator.add(
+            "org_1",
+            "cpu",
+            {"host": host},
+            [WINDOW_START + i * 30_000 for i in range(6)],
+            [1.0] * 6,
+        )
+        assert late == 0
+        assert aggregator.flush() == [], "The watermark only moves when advanced"
+
+    assert aggregator.windows.open_since_ms == WINDOW_START
+    aggregator.windows.advance(WINDOW_START + 180_000)
+    rollups = aggregator.flush()
+
+    assert sum(rollup.values["cpu_count"] for rollup in rollups) == 18
+    assert aggregator.windows.open_since_ms is None
+
+    aggregator.windows.advance(WINDOW_START)
+    assert (
+        aggregator.add("org_1", "cpu", {}, [WINDOW_START + 60_000], [1.0]) == 1
+    ), "The watermark never moves back"
+
+
+def test_final_flush_closes_every_window():
+    aggregator = MetricAggregator(AggregationConfig(window_seconds=60))
+    aggregator.add(
+        "org_1", "cpu", {}, [WINDOW_START, WINDOW_START + 60_000], [1.0, 2.0]
+    )
+
+    rollups = aggregator.flush(final=True)
+
+    assert [rollup.window_start_ms for rollup in rollups] == [
+        WINDOW_START,
+        WINDOW_START + 60_000,
+    ]
+    assert aggregator.add("org_1", "cpu", {}, [WINDOW_START + 90_000], [3.0]) == 1
+
+
+def test_rollups_are_keyed_by_organization_metric_and_labels():
+    aggregator = MetricAggregator(AggregationConfig(window_seconds=60))
+
+    for organization_id, metric_key, labels in [
+        ("org_1", "cpu", {"region": "us-east"}),
+        ("org_1", "cpu", {"region": "us-west"}),
+        ("org_1", "memory", {"region": "us-east"}),
+        ("org_2", "cpu", {"region": "us-east"}),
+        ("org_1", "cpu", {"region": "us-east"}),
+    ]:
+        aggregator.add(organization_id, metric_key, labels, [WINDOW_START], [1.0])
+    aggregator.windows.advance(WINDOW_START + 60_000)
+
+    rollups = aggregator.flush()
+
+    assert len(rollups) == 4
+    assert rollups[0].values["cpu_count"] == 2
+
+
+def test_allowed_lateness_delays_flushing_and_late_samples_are_dropped():
+    aggregator = MetricAggregator(
+        AggregationConfig(window_seconds=60, allowed_lateness_seconds=30)
+    )
+
+    aggregator.add("org_1", "cpu", {}, [WINDOW_START, WINDOW_START + 80_000], [1, 2])
+    aggregator.windows.advance(WINDOW_START + 80_000)
+    assert aggregator.flush() == []
+
+    aggregator.add("org_1", "cpu", {}, [WINDOW_START + 30_000], [3])
+    aggregator.add("org_1", "cpu", {}, [WINDOW_START + 90_000], [4])
+    aggregator.windows.advance(WINDOW_START + 90_000)
+    rollups = aggregator.flush()
+
+    assert [rollup.values["cpu_count"] for rollup in rollups] == [2]
+
+    late = aggregator.add("org_1", "cpu", {}, [WINDOW_START + 59_000], [5])
+    assert late == 1
+
+
+def test_percentiles_and_selected_statistics():
+    aggregator = MetricAggregator(
+        AggregationConfig(
+            window_seconds=60,
+            statistics=[AggregationStatistic.COUNT],
+            percentiles=[50, 99.9],
+        )
+    )
+
+    aggregator.add(
+        "org_1",
+        "latency",
+        {"tags": ["a", "b"]},
+        [WINDOW_START + i for i in range(5)],
+        [5.0, 1.0, 3.0, None, 2.0],
+    )
+    aggregator.windows.advance(WINDOW_START + 60_000)
+
+    assert aggregator.flush()[0].values == {
+        "latency_count": 4,
+        "latency_p50": pytest.approx(2.0, rel=0.01),
+        "latency_p99_9": pytest.approx(3.0, rel=0.01),
+    }
+
+
+@pytest.mark.parametrize("rank", [1, 25, 50, 90, 99, 99.9])
+def test_quantile_sketch_relative_accuracy(rank):
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    values = [(i % 1_000) * 0.37 - 50 for i in range(10_000)]
+    for value in values:
+        sketch.add(value)
+
+    exact = sorted(values)[int(rank / 100 * (len(values) - 1))]
+
+    assert sketch.quantile(rank) == pytest.approx(exact, rel=0.01, abs=1e-9)
+
+
+def test_quantile_sketch_memory_is_bounded():
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for i in range(100_000):
+        sketch.add(1 + i / 100)
+
+    assert len(sketch._positive) < 500
+
+
+def test_log_rollups_per_organization_and_group():
+    aggregator = LogAggregator(
+        AggregationConfig(
+            window_seconds=60,
+            fields=["duration_ms"],
+            group_by=["status"],
+            statistics=[AggregationStatistic.SUM, AggregationStatistic.MAX],
+        )
+    )
+
+    for organization_id, status, duration_ms in [
+        ("org_1", 200, 10),
+        ("org_1", 200, 30),
+        ("org_1", 500, 5),
+        ("org_2", 200, "n/a"),
+    ]:
+        assert aggregator.add(
+            organization_id,
+            WINDOW_START,
+            {"status": status, "duration_ms": duration_ms, "path": "/"},
+        )
+    aggregator.windows.advance(WINDOW_START + 60_000)
+
+    rollups = aggregator.flush()
+
+    assert [
+        (rollup.organization_id, rollup.labels, rollup.values) for rollup in rollups
+    ] == [
+        (
+            "org_1",
+            {"status": 200},
+            {"count": 2, "duration_ms_sum": 40.0, "duration_ms_max": 30},
+        ),
+        (
+            "org_1",
+            {"status": 500},
+            {"count": 1, "duration_ms_sum": 5.0, "duration_ms_max": 5},
+        ),
+        ("org_2", {"status": 200}, {"count": 1}),
+    ]
+    assert not aggregator.add("org_1", WINDOW_START + 1_000, {"status": 200})
+
+
+def test_log_windows_are_flushed_by_the_watermark():
+    aggregator = LogAggregator(AggregationConfig(window_seconds=60))
+    aggregator.add("org_1", WINDOW_START, {})
+    aggregator.add("org_1", WINDOW_START + 60_000, {})
+
+    aggregator.windows.advance(WINDOW_START + 90_000)
+    assert [rollup.window_start_ms for rollup in aggregator.flush()] == [WINDOW_START]
+    assert aggregator.windows.open_since_ms == WINDOW_START + 60_000
+
+    aggregator.windows.advance(WINDOW_START + 120_000)
+    rollups = aggregator.flush()
+
+    assert [(rollup.window_start_ms, rollup.values["count"]) for rollup in rollups] == [
+        (WINDOW_START + 60_000, 1)
+    ]
+
+
+def test_percentile_name():
+    assert percentile_name(95) == "p95"
+    assert percentile_name(99.9) == "p99_9"
+
+
+def test_aggregation_config_requires_an_output():
+    with pytest.raises(ValueError, match="at least one"):
+        AggregationConfig(window_seconds=60, statistics=[])
@@ -1,9 +1,27 @@
+import threading
+import time
+from array import array
+from hashlib import sha256
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+
 from rated_parser.payloads import LogFormat, MetricFieldDefinition  # type: ignore
-from rated_parser.payloads.log_patterns import JsonFieldDefinition, FieldType  # type: ignore
+from rated_parser.payloads.log_patterns import JsonFieldDefinition, RawTextFieldDefinition, FieldType  # type: ignore
 
-from src.config.models.filters import LogFilterConfig, MetricFilterConfig
+from src.config.models.filters import (
+    LogFilterConfig,
+    LogPreFilterConfig,
+    LogRouteConfig,
+    LogTemplateCacheConfig,
+    MetricFilterConfig,
+    ParserPoolConfig,
+)
+from src.config.models.aggregation import AggregationStatistic, AggregationConfig
 from src.config.models.inputs.input import InputTypes
 from src.indexers.filters.manager import FilterManager
+from src.indexers.filters.pool import LogParserPool
+from src.indexers.filters.types import LogEntry, MetricSeries
 
 
 def test_replace_special_characters():
@@ -89,3 +107,521 @@ def test_parsing_metrics_no_filter(test_metrics):
     ]
 
     assert len(parsed_metrics) == 5
+
+
+def test_parsing_metrics_batch(test_metrics):
+    filter_manager = FilterManager(
+        filter_config=None,
+        slaos_key="metrics_test",
+        input_type=InputTypes.METRICS,
+    )
+    parsed_metrics = filter_manager.parse_and_filter_metrics_batch(test_metrics)
+
+    assert len(parsed_metrics) == 5
+    assert all(metric.slaos_key == "metrics_test" for metric in parsed_metrics)
+    assert parsed_metrics == [
+        filter_manager.parse_and_filter_metrics(metric) for metric in test_metrics
+    ]
+
+
+def test_parsing_metric_series_matches_entries(test_metrics):
+    filter_manager = FilterManager(
+        filter_config=None,
+        slaos_key="metrics_test",
+        input_type=InputTypes.METRICS,
+    )
+    metric = test_metrics[0]
+    series = MetricSeries(
+        metric_name=metric.metric_name,
+        organization_id=metric.organization_id,
+        timestamps_ms=array("q", [metric.timestamp_ms, metric.timestamp_ms + 60_000]),
+        values=array("d", [metric.value, 80.0]),
+        labels=metric.labels,
+    )
+
+    with patch.object(
+        filter_manager,
+        "_replace_special_characters",
+        wraps=filter_manager._replace_special_characters,
+    ) as mock_sanitize:
+        parsed_metrics = filter_manager.parse_and_filter_metrics_batch([series])
+
+    assert parsed_metrics == [
+        filter_manager.parse_and_filter_metrics(entry) for entry in series.entries()
+    ]
+    assert mock_sanitize.call_count == 1 + len(metric.labels), "Once per series"
+
+
+def test_parsing_metrics_batch_with_aggregation():
+    filter_manager = FilterManager(
+        filter_config=None,
+        slaos_key="aggregated_metrics",
+        input_type=InputTypes.METRICS,
+        aggregation=AggregationConfig(
+            window_seconds=60, statistics=[AggregationStatistic.SUM]
+        ),
+    )
+    window_start = 1_730_376_000_000
+
+    def series(timestamps_ms, values):
+        return MetricSeries(
+            metric_name="cpu usage",
+            organization_id="org_1",
+            timestamps_ms=array("q", timestamps_ms),
+            values=array("d", values),
+            labels={"region": "us-east"},
+        )
+
+    assert (
+        filter_manager.parse_and_filter_metrics_batch(
+            [series([window_start, window_start + 30_000], [1.0, 2.0])]
+        )
+        == []
+    )
+
+    assert (
+        filter_manager.parse_and_filter_metrics_batch(
+            [series([window_start + 60_000], [3.0])]
+        )
+        == []
+    ), "Rollups are only flushed once the time range was fetched"
+    rollups = filter_manager.flush_rollups(watermark_ms=window_start + 60_000)
+    filter_manager.parse_and_filter_metrics_batch(
+        [series([window_start + 59_000], [4.0])]
+    )
+
+    assert len(rollups) == 1
+    assert rollups[0].slaos_key == "aggregated_metrics"
+    assert rollups[0].timestamp_ms == window_start
+    assert rollups[0].values == {"cpu_usage_sum": 3.0, "region": "us-east"}
+    assert (
+        REGISTRY.get_sample_value(
+            "rated_indexer_metric_samples_rejected_total",
+            {"slaos_key": "aggregated_metrics", "reason": "late"},
+        )
+        == 1
+    )
+
+
+def test_parsing_logs_batch_drops_unparsed_entries():
+    filters = LogFilterConfig(
+        version=1,
+        log_format=LogFormat.JSON,
+        log_example={"user_id": "jsmith123", "service": "user-auth"},
+        fields=[
+            JsonFieldDefinition(
+                key="service", field_type=FieldType.STRING, path="service"
+            ),
+            JsonFieldDefinition(
+                key="organization_id", field_type=FieldType.STRING, path="user_id"
+            ),
+        ],
+    )
+    filter_manager = FilterManager(
+        filter_config=filters, slaos_key="test", input_type=InputTypes.LOGS
+    )
+    log_entries = [
+        LogEntry.from_cloudwatch_log(
+            {
+                "eventId": f"log_{i}",
+                "timestamp": 1723041096000 + i,
+                "message": message,
+            }
+        )
+        for i, message in enumerate(
+            [
+                '{"user_id": "org_1", "service": "api"}',
+                '{"service": "api"}',
+                '{"user_id": "org_2", "service": "web"}',
+            ]
+        )
+    ]
+
+    parsed_logs = filter_manager.parse_and_filter_log_batch(log_entries)
+
+    assert [log.idempotency_key for log in parsed_logs] == ["log_0", "log_2"]
+    assert [log.organization_id for log in parsed_logs] == ["org_1", "org_2"]
+
+
+def test_parsing_logs_batch_with_aggregation():
+    filters = LogFilterConfig(
+        version=1,
+        log_format=LogFormat.JSON,
+        log_example={"user_id": "jsmith123", "latency": 12},
+        fields=[
+            JsonFieldDefinition(
+                key="organization_id", field_type=FieldType.STRING, path="user_id"
+            ),
+            JsonFieldDefinition(
+                key="latency", field_type=FieldType.INTEGER, path="latency"
+            ),
+        ],
+    )
+    filter_manager = FilterManager(
+        filter_config=filters,
+        slaos_key="log_rollups",
+        input_type=InputTypes.LOGS,
+        aggregation=AggregationConfig(
+            window_seconds=60,
+            fields=["latency"],
+            statistics=[AggregationStatistic.AVG],
+        ),
+    )
+    window_start = 1_730_376_000_000
+
+    def log_entries(*logs):
+        return [
+            LogEntry.from_cloudwatch_log(
+                {
+                    "eventId": f"log_{timestamp_ms}",
+                    "timestamp": timestamp_ms,
+                    "message": f'{{"user_id": "org_1", "latency": {latency}}}',
+                }
+            )
+            for timestamp_ms, latency in logs
+        ]
+
+    assert (
+        filter_manager.parse_and_filter_log_batch(
+            log_entries((window_start, 10), (window_start + 1_000, 20))
+        )
+        == []
+    )
+    assert (
+        filter_manager.parse_and_filter_log_batch(
+            log_entries((window_start + 60_000, 30))
+        )
+        == []
+    ), "Rollups are only flushed once the time range was fetched"
+    rollups = filter_manager.flush_rollups(watermark_ms=window_start + 60_000)
+    filter_manager.parse_and_filter_log_batch(log_entries((window_start + 2_000, 40)))
+
+    assert len(rollups) == 1
+    assert rollups[0].timestamp_ms == window_start
+    assert rollups[0].organization_id == "org_1"
+    assert rollups[0].values == {"count": 2, "latency_avg": 15.0}
+    assert (
+        REGISTRY.get_sample_value(
+            "rated_indexer_log_entries_rejected_total",
+            {"slaos_key": "log_rollups", "reason": "late"},
+        )
+        == 1
+    )
+
+
+def test_parsing_raw_text_logs_with_parser_pool():
+    def raw_text_filters(parser_pool=None):
+        return LogFilterConfig(
+            version=1,
+            log_format=LogFormat.RAW_TEXT,
+            log_example="request from org_1 finished with status 200",
+            fields=[
+                RawTextFieldDefinition(
+                    key="organization_id", field_type=FieldType.STRING, value="org_1"
+                ),
+                RawTextFieldDefinition(
+                    key="status", field_type=FieldType.INTEGER, value="200"
+                ),
+            ],
+            parser_pool=parser_pool,
+        )
+
+    log_entries = [
+        LogEntry.from_cloudwatch_log(
+            {"eventId": f"log_{i}", "timestamp": 1723041096000 + i, "message": message}
+        )
+        for i, message in enumerate(
+            [
+                "request from org_a finished with status 500",
+                "unrelated noise",
+                "request from org_b finished with status 201",
+                "request from org_c finished with status 404",
+            ]
+        )
+    ]
+
+    in_process_manager = FilterManager(
+        filter_config=raw_text_filters(), slaos_key="test", input_type=InputTypes.LOGS
+    )
+    pooled_manager = FilterManager(
+        filter_config=raw_text_filters(ParserPoolConfig(processes=2, batch_size=1)),
+        slaos_key="test",
+        input_type=InputTypes.LOGS,
+    )
+    assert pooled_manager.parser_pool is not None
+
+    try:
+        pooled_logs = pooled_manager.parse_and_filter_log_batch(log_entries)
+    finally:
+        pooled_manager.parser_pool.close()
+
+    assert [log.idempotency_key for log in pooled_logs] == ["log_0", "log_2", "log_3"]
+    assert [log.values["status"] for log in pooled_logs] == [500, 201, 404]
+    assert pooled_logs == in_process_manager.parse_and_filter_log_batch(log_entries)
+
+
+@patch("src.indexers.filters.pool.ProcessPoolExecutor")
+def test_parser_pool_is_started_once_by_concurrent_workers(mock_executor):
+    def slow_start(**kwargs):
+        time.sleep(0.05)
+        return object()
+
+    mock_executor.side_effect = slow_start
+    pool = LogParserPool({}, version=1, processes=2, batch_size=1)
+    executors = []
+    workers = [
+        threading.Thread(target=lambda: executors.append(pool.executor))
+        for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert mock_executor.call_count == 1
+    assert all(executor is executors[0] for executor in executors)
+
+
+def test_process_metric_organization_id_hashing(test_metrics):
+    filters = MetricFilterConfig(
+        version=1,
+        fields=[
+            MetricFieldDefinition(key="customer", hash=True),
+            MetricFieldDefinition(key="region"),
+        ],
+    )
+    filter_manager = FilterManager(
+        filter_config=filters,
+        slaos_key="metrics_test",
+        input_type=InputTypes.METRICS,
+    )
+    metric = test_metrics[0]
+
+    metric.organization_identifier = "customer"
+    hashed_organization_id = filter_manager.process_metric_organization_id(metric)
+    assert hashed_organization_id == sha256(b"org_1").hexdigest()
+
+    metric.organization_identifier = "region"
+    assert filter_manager.process_metric_organization_id(metric) == "org_1"
+
+    metric.organization_identifier = None
+    assert filter_manager.process_metric_organization_id(metric) == "org_1"
+
+
+def test_sanitized_keys_are_cached(test_metrics):
+    filter_manager = FilterManager(
+        filter_config=None,
+        slaos_key="metrics_test",
+        input_type=InputTypes.METRICS,
+    )
+    FilterManager._replace_special_characters.cache_clear()
+
+    for _ in range(3):
+        filter_manager.parse_and_filter_metrics_batch(test_metrics)
+
+    cache_info = FilterManager._replace_special_characters.cache_info()
+    assert cache_info.misses == 10, "5 metric names and 5 label keys"
+    assert cache_info.hits == 3 * 5 * 6 - 10
+
+
+def test_pre_filter_rejects_logs_before_parsing():
+    filters = LogFilterConfig(
+        version=1,
+        log_format=LogFormat.RAW_TEXT,
+        log_example="request from org_1 finished with status 200",
+        fields=[
+            RawTextFieldDefinition(
+                key="organization_id", field_type=FieldType.STRING, value="org_1"
+            ),
+            RawTextFieldDefinition(
+                key="status", field_type=FieldType.INTEGER, value="200"
+            ),
+        ],
+        pre_filter=LogPreFilterConfig(required_substrings=["request from"]),
+    )
+    filter_manager = FilterManager(
+        filter_config=filters, slaos_key="pre_filter_test", input_type=InputTypes.LOGS
+    )
+    log_entries = [
+        LogEntry.from_cloudwatch_log(
+            {"eventId": f"log_{i}", "timestamp": 1723041096000 + i, "message": message}
+        )
+        for i, message in enumerate(
+            [
+                "request from org_1 finished with status 200",
+                "healthcheck ok",
+                "request from org_2 was cancelled",
+                "healthcheck ok",
+            ]
+        )
+    ]
+
+    def rejected(reason):
+        return REGISTRY.get_sample_value(
+            "rated_indexer_log_entries_rejected_total",
+            {"slaos_key": "pre_filter_test", "reason": reason},
+        )
+
+    with patch.object(
+        filter_manager.parser, "parse_log", wraps=filter_manager.parser.parse_log
+    ) as mock_parse_log:
+        parsed_logs = filter_manager.parse_and_filter_log_batch(log_entries)
+
+    assert [log.idempotency_key for log in parsed_logs] == ["log_0"]
+    assert mock_parse_log.call_count == 2
+    assert rejected("pre_filter") == 2
+    assert rejected("parse_error") == 1
+
+    assert filter_manager.parse_and_filter_log(log_entries[1]) is None
+    assert rejected("pre_filter") == 3
+
+
+def test_template_cache_skips_logs_the_pattern_never_matches():
+    filters = LogFilterConfig(
+        version=1,
+        log_format=LogFormat.RAW_TEXT,
+        log_example="request from org_1 finished with status 200",
+        fields=[
+            RawTextFieldDefinition(
+                key="organization_id", field_type=FieldType.STRING, value="org_1"
+            ),
+            RawTextFieldDefinition(
+                key="status", field_type=FieldType.INTEGER, value="200"
+            ),
+        ],
+        template_cache=LogTemplateCacheConfig(min_failures=2),
+    )
+    filter_manager = FilterManager(
+        filter_config=filters,
+        slaos_key="template_cache_test",
+        input_type=InputTypes.LOGS,
+    )
+    messages = [
+        "request from org_1 finished with status 200",
+        "cache refreshed in 12 ms by worker-1",
+        "cache refreshed in 15 ms by worker-2",
+        "request from org_2 finished with status 500",
+        "cache refreshed in 9 ms by worker-3",
+        "cache refreshed in 11 ms by worker-1",
+    ]
+    log_entries = [
+        LogEntry.from_cloudwatch_log(
+            {"eventId": f"log_{i}", "timestamp": 1723041096000 + i, "message": message}
+        )
+        for i, message in enumerate(messages)
+    ]
+
+    template_cache = filter_manager.template_cache
+    assert template_cache is not None
+    with patch.object(
+        filter_manager.parser, "parse_log", wraps=filter_manager.parser.parse_log
+    ) as mock_parse_log:
+        first_page = filter_manager.parse_and_filter_log_batch(log_entries[:3])
+        second_page = filter_manager.parse_and_filter_log_batch(log_entries[3:5])
+        skipped = filter_manager.parse_and_filter_log(log_entries[5])
+        with patch.object(
+            template_cache, "record", wraps=template_cache.record
+        ) as mock_record:
+            single = filter_manager.parse_and_filter_log(log_entries[0])
+
+    assert [log.organization_id for log in first_page + second_page] == [
+        "org_1",
+        "org_2",
+    ]
+    assert skipped is None
+    assert single is not None
+    assert mock_parse_log.call_count == 5
+    assert mock_record.call_count == 1, "Single entries record under the cache lock"
+    assert (
+        REGISTRY.get_sample_value(
+            "rated_indexer_log_entries_rejected_total",
+            {"slaos_key": "template_cache_test", "reason": "template_cache"},
+        )
+        == 2
+    )
+    assert (
+        REGISTRY.get_sample_value(
+            "rated_indexer_cache_hit_ratio",
+            {"cache": "log_templates_template_cache_test"},
+        )
+        == 5 / 7
+    )
+
+
+def test_parsing_logs_with_routed_patterns():
+    def pattern(version, route, event_field):
+        return LogFilterConfig(
+            version=version,
+            log_format=LogFormat.JSON,
+            log_example={"org": "org_1", event_field: "value"},
+            fields=[
+                JsonFieldDefinition(
+                    key="organization_id", field_type=FieldType.STRING, path="org"
+                ),
+                JsonFieldDefinition(
+                    key=event_field, field_type=FieldType.STRING, path=event_field
+                ),
+            ],
+            route=route,
+        )
+
+    filter_manager = FilterManager(
+        filter_config=[
+            pattern(1, LogRouteConfig(json_key="payment_id"), "payment_id"),
+            pattern(2, LogRouteConfig(json_key="login_method"), "login_method"),
+        ],
+        slaos_key="routing_test",
+        input_type=InputTypes.LOGS,
+    )
+    log_entries = [
+        LogEntry.from_cloudwatch_log(
+            {"eventId": f"log_{i}", "timestamp": 1723041096000 + i, "message": message}
+        )
+        for i, message in enumerate(
+            [
+                '{"org": "org_1", "payment_id": "pay_1"}',
+                '{"org": "org_2", "login_method": "sso"}',
+                '{"org": "org_3", "healthcheck": "ok"}',
+            ]
+        )
+    ]
+
+    parsed_logs = filter_manager.parse_and_filter_log_batch(log_entries)
+
+    assert [log.values for log in parsed_logs] == [
+        {"organization_id": "org_1", "payment_id": "pay_1"},
+        {"organization_id": "org_2", "login_method": "sso"},
+    ]
+    assert (
+        REGISTRY.get_sample_value(
+            "rated_indexer_log_entries_rejected_total",
+            {"slaos_key": "routing_test", "reason": "unrouted"},
+        )
+        == 1
+    )
+
+
+def test_identical_filters_share_a_parser():
+    def metric_filters(*keys):
+        return MetricFilterConfig(
+            version=1, fields=[MetricFieldDefinition(key=key) for key in keys]
+        )
+
+    first, second, other = (
+        FilterManager(
+            filter_config=filters,
+            slaos_key=f"customer_{i}",
+            input_type=InputTypes.METRICS,
+        )
+        for i, filters in enumerate(
+            [
+                metric_filters("organization_id"),
+                metric_filters("organization_id"),
+                metric_filters("organization_id", "region"),
+            ]
+        )
+    )
+
+    assert first.parser is second.parser
+    assert other.parser is not first.parser
+    assert first.slaos_key != second.slaos_key
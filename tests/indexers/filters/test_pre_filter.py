@@ -0,0 +1,71 @@
+import pytest
+from pydantic import ValidationError
+
+from src.config.models.filters import LogPreFilterConfig
+from src.indexers.filters.pre_filter import LogPreFilter
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ("GET /api status 200 org_1", True),
+        ("ERROR timeout on org_1", True),
+        ("healthcheck ok", False),
+        ({"status": 200}, True),
+    ],
+)
+def test_pre_filter_any_substring(content, expected):
+    pre_filter = LogPreFilter(
+        LogPreFilterConfig(required_substrings=["status", "ERROR"])
+    )
+
+    assert pre_filter.matches(content) is expected
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ("request org_1 status 200", True),
+        ("request org_1 finished", False),
+        ("status 200", False),
+    ],
+)
+def test_pre_filter_all_substrings(content, expected):
+    pre_filter = LogPreFilter(
+        LogPreFilterConfig(
+            required_substrings=["org_", "status"], substring_match="all"
+        )
+    )
+
+    assert pre_filter.matches(content) is expected
+
+
+def test_pre_filter_escapes_substrings():
+    pre_filter = LogPreFilter(LogPreFilterConfig(required_substrings=["[org.1]"]))
+
+    assert pre_filter.matches("request [org.1] done")
+    assert not pre_filter.matches("request [orgX1] done")
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ({"user": {"org": "org_1"}, "service": "api"}, True),
+        ({"user": {"name": "jsmith"}, "service": "api"}, False),
+        ({"user": "org_1", "service": "api"}, False),
+        ({"user": {"org": "org_1"}}, False),
+        ("raw text user.org service", True),
+    ],
+)
+def test_pre_filter_required_keys(content, expected):
+    pre_filter = LogPreFilter(LogPreFilterConfig(required_keys=["user.org", "service"]))
+
+    assert pre_filter.matches(content) is expected
+
+
+def test_pre_filter_config_requires_a_check():
+    with pytest.raises(ValidationError):
+        LogPreFilterConfig()
+
+    with pytest.raises(ValidationError):
+        LogPreFilterConfig(required_substrings=[""])
@@ -0,0 +1,88 @@
+import pytest
+
+from src.config.models.filters import LogFilterConfig
+from src.indexers.filters.router import LogPatternRouter
+from src.indexers.filters.types import LogEntry
+
+
+def json_pattern(version, route=None):
+    return LogFilterConfig(
+        version=version,
+        log_format="json_dict",
+        log_example={"org": "org_1"},
+        fields=[{"key": "organization_id", "field_type": "string", "path": "org"}],
+        route=route,
+    )
+
+
+def raw_text_pattern(version, route=None):
+    return LogFilterConfig(
+        version=version,
+        log_format="raw_text",
+        log_example="org_1",
+        fields=[{"key": "organization_id", "field_type": "string", "value": "org_1"}],
+        route=route,
+    )
+
+
+def log_entry(content, log_stream=""):
+    return LogEntry(
+        log_id="log_1",
+        content=content,
+        is_json=isinstance(content, dict),
+        metadata={"log_stream_name": log_stream},
+        timestamp_ms=1730332800000,
+    )
+
+
+@pytest.fixture
+def router():
+    return LogPatternRouter(
+        [
+            json_pattern(1, {"json_key": "payment.amount"}),
+            json_pattern(2, {"json_key": "login"}),
+            raw_text_pattern(3, {"substring": "timeout"}),
+            raw_text_pattern(4, {"substring": "timeout after"}),
+            raw_text_pattern(5, {"log_stream": "auth"}),
+            json_pattern(6),
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "entry, expected",
+    [
+        (log_entry({"payment": {"amount": 10}, "org": "org_1"}), [1, 6]),
+        (log_entry({"payment": {"currency": "eur"}}), [6]),
+        (log_entry({"login": True, "payment": {"amount": 10}}), [1, 2, 6]),
+        (log_entry("request timeout after 30s"), [3, 4]),
+        (log_entry("request timeout"), [3]),
+        (log_entry("request timeout", log_stream="auth"), [3, 5]),
+        (log_entry("request finished"), []),
+        (log_entry({"org": "org_1"}, log_stream="auth"), [6]),
+    ],
+)
+def test_router_candidates(router, entry, expected):
+    assert router.route(entry) == expected
+
+
+def test_router_finds_every_substring_contained_in_an_entry():
+    substrings = ["error", "error code", "code", "rror c", "de 5", "503", "timeout"]
+    router = LogPatternRouter(
+        [
+            raw_text_pattern(version, {"substring": substring})
+            for version, substring in enumerate(substrings, start=1)
+        ]
+    )
+
+    for content in [
+        "error code 503",
+        "an error occurred, see code 42",
+        "timeout: error code 503 then timeout",
+        "nothing to see",
+    ]:
+        assert router.route(log_entry(content)) == [
+            version
+            for version, substring in enumerate(substrings, start=1)
+            if substring in content
+        ], content
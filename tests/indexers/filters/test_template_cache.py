@@ -0,0 +1,111 @@
+import threading
+
+from src.indexers.filters.template_cache import WILDCARD, LogTemplateCache
+
+
+def test_template_cache_groups_lines_by_template():
+    cache = LogTemplateCache(max_templates=10, similarity_threshold=0.5, min_failures=1)
+
+    first = cache.match("request from alice finished with status 200")
+    second = cache.match("request from bob finished with status 404")
+    other = cache.match("healthcheck ok")
+
+    assert first is second
+    assert first is not other
+    assert first.tokens == [
+        "request",
+        "from",
+        WILDCARD,
+        "finished",
+        "with",
+        "status",
+        WILDCARD,
+    ]
+    assert cache.cache_info() == (1, 2, 10, 2)
+
+
+def test_template_cache_keeps_dissimilar_lines_apart():
+    cache = LogTemplateCache(max_templates=10, similarity_threshold=0.8, min_failures=1)
+
+    assert cache.match("user alice logged in") is not cache.match("user bob signed out")
+
+
+def test_template_cache_skips_templates_that_never_match():
+    cache = LogTemplateCache(max_templates=10, similarity_threshold=0.5, min_failures=2)
+    failing = cache.match("debug cache refreshed in 12ms")
+    matching = cache.match("request from alice finished")
+
+    failing.record(False)
+    assert not cache.should_skip(failing)
+    failing.record(False)
+    assert cache.should_skip(failing)
+
+    matching.record(False)
+    matching.record(True)
+    matching.record(False)
+    assert not cache.should_skip(matching)
+
+
+def test_template_cache_evicts_least_recently_used_templates():
+    cache = LogTemplateCache(max_templates=2, similarity_threshold=0.5, min_failures=1)
+
+    first = cache.match("first template")
+    second = cache.match("second template line")
+    cache.match("first template")
+    cache.match("third template line here")
+
+    assert cache.cache_info().currsize == 2
+    assert cache.match("first template") is first
+    assert cache.match("second template line") is not second
+
+
+def test_template_cache_retests_a_sample_of_skipped_lines():
+    cache = LogTemplateCache(
+        max_templates=10, similarity_threshold=0.5, min_failures=1, retest_every=3
+    )
+    template = cache.match("debug cache refreshed in 12ms")
+    cache.record(template, False)
+
+    assert [cache.should_skip(template) for _ in range(6)] == [
+        True,
+        True,
+        False,
+        True,
+        True,
+        False,
+    ]
+
+    cache.record(template, True)
+    assert not cache.should_skip(template)
+
+
+def test_template_cache_is_shared_by_threads():
+    cache = LogTemplateCache(max_templates=8, similarity_threshold=0.9, min_failures=1)
+
+    def word(number):
+        return "".join(chr(ord("a") + int(digit)) for digit in str(number))
+
+    def match_lines(worker):
+        for i in range(2_000):
+            template = cache.match(f"worker {word(worker)} {word(i % 50)} {word(i)}")
+            cache.record(template, False)
+            cache.should_skip(template)
+
+    threads = [threading.Thread(target=match_lines, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.cache_info().currsize == 8
+    assert sum(map(len, cache._groups.values())) == 8
+
+
+def test_template_cache_evicts_templates_of_a_dropped_group():
+    cache = LogTemplateCache(max_templates=1, similarity_threshold=0.5, min_failures=1)
+    orphan = cache.match("orphan template")
+    del cache._groups[orphan.group_key]
+
+    cache.match("another template line")
+
+    assert cache.cache_info().currsize == 1
@@ -0,0 +1,287 @@
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from rated_parser.payloads.log_patterns import LogFormat  # type: ignore
+
+from src.config.models.inputs.input import IdempotencyKeyAlgorithm
+from src.indexers.filters.types import (
+    LogEntry,
+    MetricIdempotencyKeyGenerator,
+    MetricSeries,
+    decode_json_message,
+    generate_idempotency_key,
+)
+from src.utils.time_conversion import from_milliseconds, to_milliseconds
+
+
+def cloudwatch_log(message: str) -> dict:
+    return {
+        "eventId": "mock_log",
+        "timestamp": 1723041096000,
+        "message": message,
+        "logStreamName": "mock_stream",
+    }
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        ('{"organization_id": "org_1"}', {"organization_id": "org_1"}),
+        ('  \n{"organization_id": "org_1"}', {"organization_id": "org_1"}),
+        ('[{"organization_id": "org_1"}]', [{"organization_id": "org_1"}]),
+        ("request from org_1 finished", None),
+        ("{not json", None),
+        ("42", None),
+        ("", None),
+    ],
+)
+def test_decode_json_message(message, expected):
+    assert decode_json_message(message) == expected
+
+
+def test_from_cloudwatch_log_json():
+    entry = LogEntry.from_cloudwatch_log(cloudwatch_log('{"status": 200}'))
+
+    assert entry.is_json
+    assert entry.content == {"status": 200}
+    assert entry.metadata == {"log_stream_name": "mock_stream"}
+
+
+def test_from_cloudwatch_log_raw_text():
+    entry = LogEntry.from_cloudwatch_log(cloudwatch_log("status 200"))
+
+    assert not entry.is_json
+    assert entry.content == "status 200"
+
+
+def test_from_cloudwatch_log_raw_text_format_skips_decoding():
+    with patch("src.indexers.filters.types.json_loads") as mock_json_loads:
+        entry = LogEntry.from_cloudwatch_log(
+            cloudwatch_log('{"status": 200}'), LogFormat.RAW_TEXT
+        )
+
+    mock_json_loads.assert_not_called()
+    assert not entry.is_json
+    assert entry.content == '{"status": 200}'
+
+
+def test_from_cloudwatch_log_stdlib_decoder_fallback():
+    with patch("src.indexers.filters.types.json_loads", json.loads):
+        entry = LogEntry.from_cloudwatch_log(cloudwatch_log('{"status": 200}'))
+        raw_entry = LogEntry.from_cloudwatch_log(cloudwatch_log("{status 200"))
+
+    assert entry.content == {"status": 200}
+    assert not raw_entry.is_json
+
+
+TIMESTAMP = to_milliseconds(datetime(2024, 10, 31, 12, 0, 0, tzinfo=timezone.utc))
+
+
+def test_metric_idempotency_key_is_stable_and_label_order_independent():
+    generator = MetricIdempotencyKeyGenerator(IdempotencyKeyAlgorithm.BLAKE2B)
+
+    key = generator.generate(
+        TIMESTAMP, "org_1", "cpu_usage", 75.5, {"region": "us-east", "env": "prod"}
+    )
+
+    assert len(key) == 32
+    assert key == MetricIdempotencyKeyGenerator().generate(
+        TIMESTAMP, "org_1", "cpu_usage", 75.5, {"env": "prod", "region": "us-east"}
+    )
+
+
+@pytest.mark.parametrize(
+    "timestamp, organization_id, metric_key, value, labels",
+    [
+        (TIMESTAMP + 1_000, "org_1", "cpu_usage", 75.5, {}),
+        (TIMESTAMP, "org_2", "cpu_usage", 75.5, {}),
+        (TIMESTAMP, "org_1", "memory_usage", 75.5, {}),
+        (TIMESTAMP, "org_1", "cpu_usage", 75.6, {}),
+        (TIMESTAMP, "org_1", "cpu_usage", 75.5, {"region": "us-east"}),
+    ],
+)
+def test_metric_idempotency_key_changes_with_each_component(
+    timestamp, organization_id, metric_key, value, labels
+):
+    generator = MetricIdempotencyKeyGenerator()
+    base_key = generator.generate(TIMESTAMP, "org_1", "cpu_usage", 75.5, {})
+
+    assert base_key != generator.generate(
+        timestamp, organization_id, metric_key, value, labels
+    )
+
+
+def test_metric_idempotency_key_caches_series_digests():
+    generator = MetricIdempotencyKeyGenerator()
+    labels = {"region": "us-east"}
+
+    for i in range(10):
+        generator.generate(TIMESTAMP + i * 1_000, "org_1", "cpu", i, labels)
+
+    cache_info = generator._series_digest.cache_info()
+    assert cache_info.misses == 1
+    assert cache_info.hits == 9
+
+
+def test_metric_idempotency_key_unhashable_labels():
+    generator = MetricIdempotencyKeyGenerator()
+
+    key = generator.generate(TIMESTAMP, "org_1", "cpu", 1.0, {"tags": ["a", "b"]})
+
+    assert key == generator.generate(
+        TIMESTAMP, "org_1", "cpu", 1.0, {"tags": ["a", "b"]}
+    )
+
+
+def test_metric_idempotency_key_legacy_algorithm():
+    generator = MetricIdempotencyKeyGenerator(IdempotencyKeyAlgorithm.SHA256_JSON)
+
+    assert generator.generate(
+        TIMESTAMP, "org_1", "cpu_usage", 75.5, {"region": "us-east"}
+    ) == generate_idempotency_key(
+        event_timestamp=from_milliseconds(TIMESTAMP),
+        organization_id="org_1",
+        values={"cpu_usage": 75.5, "region": "us-east"},
+    )
+
+
+@pytest.fixture
+def local_timezone(monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_legacy_keys_of_prometheus_samples_match_previous_releases(local_timezone):
+    # The Prometheus SDK returns naive local datetimes, which previous releases hashed as such
+    sdk_timestamps = [
+        datetime.fromtimestamp(1723041096.123),
+        datetime.fromtimestamp(1723041111.7),
+    ]
+    series = MetricSeries.from_prometheus_series(
+        {
+            "organization_identifier": "customer",
+            "organization_id": "org_1",
+            "timestamps": sdk_timestamps,
+            "values": [1.0, 2.0],
+            "slaos_metric_name": "cpu",
+            "labels": {"region": "us-east"},
+        }
+    )
+    generator = MetricIdempotencyKeyGenerator(IdempotencyKeyAlgorithm.SHA256_JSON)
+
+    assert generator.generate_series(
+        series.timestamps_ms,
+        "org_1",
+        "cpu",
+        series.values,
+        series.labels,
+        series.naive_timestamps,
+    ) == [
+        generate_idempotency_key(
+            event_timestamp=timestamp,
+            organization_id="org_1",
+            values={"cpu": value, "region": "us-east"},
+        )
+        for timestamp, value in zip(sdk_timestamps, [1.0, 2.0])
+    ]
+
+
+def test_metric_idempotency_key_xxh3_requires_xxhash():
+    with patch.dict(sys.modules, {"xxhash": None}):
+        with pytest.raises(ValueError, match="xxhash"):
+            MetricIdempotencyKeyGenerator(IdempotencyKeyAlgorithm.XXH3_128)
+
+
+def test_metric_idempotency_key_xxh3():
+    pytest.importorskip("xxhash")
+    generator = MetricIdempotencyKeyGenerator(IdempotencyKeyAlgorithm.XXH3_128)
+
+    key = generator.generate(TIMESTAMP, "org_1", "cpu_usage", 75.5, {})
+
+    assert len(key) == 32
+    assert key == generator.generate(TIMESTAMP, "org_1", "cpu_usage", 75.5, {})
+
+
+def test_entries_carry_epoch_milliseconds():
+    entry = LogEntry.from_cloudwatch_log(cloudwatch_log("status 200"))
+
+    assert entry.timestamp_ms == 1723041096000
+    assert entry.event_timestamp == datetime(
+        2024, 8, 7, 14, 31, 36, tzinfo=timezone.utc
+    )
+    assert not hasattr(entry, "__dict__")
+
+
+@pytest.mark.parametrize(
+    "algorithm",
+    [IdempotencyKeyAlgorithm.BLAKE2B, IdempotencyKeyAlgorithm.SHA256_JSON],
+)
+def test_metric_idempotency_keys_of_a_series(algorithm):
+    generator = MetricIdempotencyKeyGenerator(algorithm)
+    timestamps = [TIMESTAMP, TIMESTAMP + 1_000, TIMESTAMP + 2_000]
+    values = [1.0, 2.0, None]
+    labels = {"region": "us-east"}
+
+    keys = generator.generate_series(timestamps, "org_1", "cpu", values, labels)
+
+    assert keys == [
+        generator.generate(timestamp, "org_1", "cpu", value, labels)
+        for timestamp, value in zip(timestamps, values)
+    ]
+
+
+def test_metric_series_from_prometheus_series():
+    series = MetricSeries.from_prometheus_series(
+        {
+            "organization_identifier": "customer",
+            "organization_id": "org_1",
+            "timestamps": [
+                datetime(2024, 10, 31, 12, 0, 0, tzinfo=timezone.utc),
+                datetime(2024, 10, 31, 12, 1, 0, tzinfo=timezone.utc),
+            ],
+            "values": [1, 2.5],
+            "slaos_metric_name": "cpu",
+            "labels": {"region": "us-east"},
+        }
+    )
+
+    assert series.timestamps_ms.typecode == "q"
+    assert list(series.timestamps_ms) == [TIMESTAMP, TIMESTAMP + 60_000]
+    assert series.values.typecode == "d"
+    assert [entry.value for entry in series.entries()] == [1.0, 2.5]
+    assert all(entry.labels is series.labels for entry in series.entries())
+
+
+def test_metric_series_keeps_values_not_fitting_an_array():
+    series = MetricSeries.from_datadog_series(
+        {
+            "metric_name": "cpu",
+            "organization_id": "org_1",
+            "timestamps": [TIMESTAMP, TIMESTAMP + 1_000],
+            "values": [1.0, None],
+        }
+    )
+
+    assert series.values == [1.0, None]
+
+
+def test_metric_series_since():
+    series = MetricSeries.from_datadog_series(
+        {
+            "metric_name": "cpu",
+            "organization_id": "org_1",
+            "timestamps": [TIMESTAMP, TIMESTAMP + 1_000, TIMESTAMP + 2_000],
+            "values": [1.0, 2.0, 3.0],
+        }
+    )
+
+    assert series.since(TIMESTAMP) is series
+    assert list(series.since(TIMESTAMP + 1_000).values) == [2.0, 3.0]
+    assert len(series.since(TIMESTAMP + 3_000)) == 0
@@ -1,5 +1,4 @@
 from contextlib import redirect_stdout, redirect_stderr
-from datetime import datetime, timezone
 from io import StringIO
 
 import pytest
@@ -24,27 +23,21 @@ def test_events():
             "slaos_key": "",
             "organization_id": "organization_id_one",
             "idempotency_key": "mock_log_one",
-            "event_timestamp": datetime.fromtimestamp(
-                1723041096000 / 1000, tz=timezone.utc
-            ),
+            "timestamp_ms": 1723041096000,
             "values": {"example_key": "example_value_one"},
         },
         {
             "slaos_key": "",
             "organization_id": "organization_id_two",
             "idempotency_key": "mock_log_two",
-            "event_timestamp": datetime.fromtimestamp(
-                1723041096100 / 1000, tz=timezone.utc
-            ),
+            "timestamp_ms": 1723041096100,
             "values": {"example_key": "example_value_two"},
         },
         {
             "slaos_key": "",
             "organization_id": "organization_id_three",
             "idempotency_key": "mock_log_three",
-            "event_timestamp": datetime.fromtimestamp(
-                1723041096200 / 1000, tz=timezone.utc
-            ),
+            "timestamp_ms": 1723041096200,
             "values": {"example_key": "example_value_three"},
         },
     ]
@@ -1,9 +1,13 @@
 import json
+from dataclasses import replace
 
+import httpx
 import pytest
+import stamina
 from bytewax.dataflow import Dataflow
 from bytewax.testing import run_main, TestingSource
 from bytewax import operators as op
+from prometheus_client import REGISTRY
 from pytest_httpx import HTTPXMock
 
 from src.config.models.output import RatedOutputConfig
@@ -55,7 +59,7 @@ def test_http_sink_batch_size(
             slaos_key="",
             organization_id=f"{event.organization_id}_{i}",
             idempotency_key=f"{event.idempotency_key}_{i}",
-            event_timestamp=event.event_timestamp + timedelta(seconds=i),
+            timestamp_ms=event.timestamp_ms + i * 1000,
             values={"example_key": f"example_value_{i}"},
         )
         events.append(new_event)
@@ -87,7 +91,7 @@ def test_http_sink_mixed_scenario(
             slaos_key="",
             organization_id=f"{event.organization_id}_{i}",
             idempotency_key=f"{event.idempotency_key}_{i}",
-            event_timestamp=event.event_timestamp + timedelta(seconds=i),
+            timestamp_ms=event.timestamp_ms + i * 1000,
             values={"example_key": f"example_value_{i}"},
         )
         events.append(new_event)
@@ -111,6 +115,105 @@ def test_http_sink_mixed_scenario(
     assert not stderr.getvalue(), f"Unexpected error output: {stderr.getvalue()}"
 
 
+def test_http_sink_accepts_event_pages(
+    http_sink, httpx_mock: HTTPXMock, test_events, capture_output
+):
+    sent_before = (
+        REGISTRY.get_sample_value(
+            "rated_indexer_events_sent_total", {"slaos_key": "page_test"}
+        )
+        or 0
+    )
+    pages = [
+        [
+            FilteredEvent(
+                slaos_key="page_test",
+                organization_id=f"organization_id_{page}_{i}",
+                idempotency_key=f"mock_log_{page}_{i}",
+                timestamp_ms=test_events[0].timestamp_ms + i * 1000,
+                values={"example_key": f"example_value_{i}"},
+            )
+            for i in range(60)
+        ]
+        for page in range(2)
+    ]
+
+    flow = Dataflow(flow_id="test_http_sink_pages")
+    input_source: TestingSource = TestingSource(pages)
+    op.input("read", flow=flow, source=input_source).then(op.output, "out", http_sink)
+
+    stdout, stderr = capture_output
+    run_main(flow)
+
+    requests = httpx_mock.get_requests()
+    assert [len(json.loads(request.content)) for request in requests] == [50, 50, 20]
+    assert (
+        REGISTRY.get_sample_value(
+            "rated_indexer_events_sent_total", {"slaos_key": "page_test"}
+        )
+        == sent_before + 120
+    )
+
+    assert not stderr.getvalue(), f"Unexpected error output: {stderr.getvalue()}"
+
+
+def test_http_sink_counts_an_error_once_retries_are_exhausted(
+    httpx_mock: HTTPXMock, test_events
+):
+    config = RatedOutputConfig(
+        ingestion_id="your_ingestion_id",
+        ingestion_key="your_ingestion_key",
+        ingestion_url="https://your_ingestion_url.com/v1/ingest",
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{config.ingestion_url}/{config.ingestion_id}/{config.ingestion_key}",
+        status_code=500,
+    )
+    # The dataflow builds its sink without a slaOS key: metrics are labelled by the keys of the events
+    partition = build_http_sink(config, "").build("out", 0, 1)
+    events = [
+        replace(event, slaos_key=slaos_key)
+        for event, slaos_key in zip(
+            test_events, ["error_test", "error_test", "other_error_test"]
+        )
+    ]
+    errors_before = {
+        slaos_key: REGISTRY.get_sample_value(
+            "rated_indexer_sink_errors_total", {"slaos_key": slaos_key}
+        )
+        or 0
+        for slaos_key in ["error_test", "other_error_test"]
+    }
+    sent: list = []
+    partition.on_sent = sent.extend
+
+    stamina.set_testing(True, attempts=3)
+    try:
+        with pytest.raises(httpx.HTTPStatusError):
+            partition.send_batch(events)
+    finally:
+        stamina.set_testing(False)
+
+    assert len(httpx_mock.get_requests()) == 3
+    assert sent == [], "Events of a failed batch are not reported as sent"
+    for slaos_key in ["error_test", "other_error_test"]:
+        labels = {"slaos_key": slaos_key}
+        assert (
+            REGISTRY.get_sample_value("rated_indexer_sink_errors_total", labels)
+            == errors_before[slaos_key] + 1
+        )
+        assert (
+            REGISTRY.get_sample_value(
+                "rated_indexer_sink_request_seconds_count", labels
+            )
+            == 3
+        )
+    assert not REGISTRY.get_sample_value(
+        "rated_indexer_sink_errors_total", {"slaos_key": ""}
+    )
+
+
 def test_http_sink_time_based_under_timeout(
     http_sink, httpx_mock: HTTPXMock, test_events, capture_output, mocked_time
 ):
@@ -120,7 +223,7 @@ def test_http_sink_time_based_under_timeout(
             slaos_key="",
             organization_id=f"{event.organization_id}_new_{i}",
             idempotency_key=f"{event.idempotency_key}_new_{i}",
-            event_timestamp=event.event_timestamp + timedelta(seconds=8),
+            timestamp_ms=event.timestamp_ms + 8 * 1000,
             values={"example_key": f"new_value_{i}"},
         )
         for i, event in enumerate(test_events[:3])
@@ -167,7 +270,7 @@ def test_http_sink_time_based_over_timeout(
             slaos_key="",
             organization_id=f"{event.organization_id}_new_{i}",
             idempotency_key=f"{event.idempotency_key}_new_{i}",
-            event_timestamp=event.event_timestamp + timedelta(seconds=11),
+            timestamp_ms=event.timestamp_ms + 11 * 1000,
             values={"example_key": f"new_value_{i}"},
         )
         for i, event in enumerate(test_events)
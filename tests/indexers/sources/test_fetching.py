@@ -0,0 +1,130 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bytewax.testing import TestingSource
+
+from src.indexers.sources.fetching import (
+    FETCH_POLL_INTERVAL,
+    MAX_FETCH_POLL_INTERVAL,
+    FetchingSource,
+)
+from src.indexers.sources.rated import TimeRange
+
+
+def poll_pages(partition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    pages: list = []
+    while time.monotonic() < deadline:
+        try:
+            pages.extend(partition.next_batch())
+        except StopIteration:
+            return pages
+        time.sleep(0.005)
+    raise AssertionError("Timed out")
+
+
+def build_partition(time_ranges, fetcher):
+    source = FetchingSource(TestingSource(time_ranges), fetcher)
+    [part] = source.list_parts()
+    return source.build_part("fetch", part, None)
+
+
+def test_fetching_partition_emits_pages_in_the_order_of_their_time_ranges():
+    def fetcher(time_range):
+        # The first time range is the slowest to fetch
+        time.sleep(0.1 if time_range.start_time == 1 else 0)
+        yield [f"{time_range.start_time}_a"]
+        yield [f"{time_range.start_time}_b"]
+
+    partition = build_partition(
+        [TimeRange(start_time=i, end_time=i + 1) for i in range(1, 4)], fetcher
+    )
+    try:
+        pages = poll_pages(partition)
+    finally:
+        partition.close()
+
+    assert pages == [[f"{i}_{page}"] for i in range(1, 4) for page in "ab"]
+
+
+def test_fetching_partition_backs_off_while_no_page_arrives():
+    page_fetched = threading.Event()
+
+    def fetcher(time_range):
+        page_fetched.wait()
+        yield ["page"]
+
+    partition = build_partition([TimeRange(start_time=1, end_time=2)], fetcher)
+    try:
+        assert partition.next_batch() == []
+        intervals = [partition.poll_interval]
+        for _ in range(10):
+            assert partition.next_batch() == []
+            intervals.append(partition.poll_interval)
+        assert intervals[:3] == [
+            FETCH_POLL_INTERVAL * 2,
+            FETCH_POLL_INTERVAL * 4,
+            FETCH_POLL_INTERVAL * 8,
+        ]
+        assert intervals[-1] == MAX_FETCH_POLL_INTERVAL
+        assert (
+            partition.next_awake()
+            <= datetime.now(timezone.utc) + MAX_FETCH_POLL_INTERVAL
+        )
+    finally:
+        page_fetched.set()
+
+    try:
+        assert poll_pages(partition) == [["page"]]
+        assert partition.poll_interval == FETCH_POLL_INTERVAL, "A page resets it"
+    finally:
+        partition.close()
+
+
+def test_fetching_partition_waits_for_its_source_to_be_due():
+    class ScheduledPartition:
+        def __init__(self):
+            self.awake = datetime.now(timezone.utc) + timedelta(hours=1)
+            self.calls = 0
+
+        def next_batch(self):
+            self.calls += 1
+            return [TimeRange(start_time=1, end_time=2)]
+
+        def next_awake(self):
+            return self.awake
+
+        def snapshot(self):
+            return None
+
+        def close(self):
+            pass
+
+    scheduled = ScheduledPartition()
+    partition = build_partition([], lambda time_range: iter([["page"]]))
+    partition.partition = scheduled
+    try:
+        assert partition.next_batch() == []
+        assert scheduled.calls == 0
+        assert partition.next_awake() == scheduled.awake
+
+        scheduled.awake = datetime.now(timezone.utc)
+        assert partition.next_batch() in ([], [["page"]])
+        assert scheduled.calls == 1
+    finally:
+        partition.close()
+
+
+def test_fetching_partition_raises_the_error_of_a_fetch():
+    def fetcher(time_range):
+        raise ValueError("Upstream failure")
+        yield
+
+    partition = build_partition([TimeRange(start_time=1, end_time=2)], fetcher)
+    try:
+        with pytest.raises(ValueError, match="Upstream failure"):
+            poll_pages(partition)
+    finally:
+        partition.close()
@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from src.indexers.reload import SpareInput
+from src.indexers.sources.spare import SpareSource
+
+
+def test_spare_partition_idles_until_an_input_is_assigned():
+    spare_input = SpareInput(0)
+    inner = MagicMock()
+    inner.next_batch.return_value = [["page"]]
+    build_partition = MagicMock(return_value=inner)
+    source = SpareSource(spare_input, build_partition)
+    [part] = source.list_parts()
+    partition = source.build_part("fetch_spare_0", part, None)
+
+    assert partition.next_batch() == []
+    assert partition.next_awake() > datetime.now(timezone.utc)
+    build_partition.assert_not_called()
+
+    spare_input.assign(("added", 0), MagicMock(), MagicMock())
+
+    assert partition.next_batch() == [["page"]]
+    build_partition.assert_called_once_with(spare_input)
+    assert partition.next_awake() is inner.next_awake.return_value
+    assert partition.snapshot() is None
+
+    partition.close()
+    inner.close.assert_called_once()
@@ -1,9 +1,12 @@
 import json
+import time
+from array import array
 from datetime import timedelta, datetime, timezone
 from unittest.mock import patch, MagicMock
 
 import pytest
-from bytewax.testing import run_main, TestingSource
+from bytewax.testing import run_main, TestingSink, TestingSource
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram
 from pytest_httpx import HTTPXMock
 from rated_parser.payloads.log_patterns import JsonFieldDefinition, LogFormat, FieldType  # type: ignore
 from testcontainers.redis import RedisContainer  # type: ignore
@@ -15,20 +18,41 @@ from src.config.models.offset import (
     StartFromTypes,
 )
 from src.config.models.inputs.cloudwatch import CloudwatchConfig
+from src.config.models.inputs.prometheus import PrometheusConfig
 from src.config.models.inputs.datadog import (
     DatadogConfig,
     DatadogMetricsConfig,
 )
-from src.indexers.filters.types import LogEntry, MetricEntry
+from src.indexers.filters.types import (
+    FilteredEvent,
+    LogEntry,
+    MetricEntry,
+    MetricSeries,
+)
+from src.config.models.aggregation import AggregationConfig
 from src.config.models.filters import LogFilterConfig
 from src.indexers.filters.manager import FilterManager
 from src.config.models.output import RatedOutputConfig
 from src.config.models.inputs.input import IntegrationTypes, InputTypes, InputYamlConfig
-from src.config.models.output import OutputTypes
+from src.config.models.output import DeduplicationConfig, OutputTypes
 from src.indexers.sinks.rated import build_http_sink
+from src.config.models.profiling import ProfilingYamlConfig
+from src.indexers.profiling import profiler
 from src.indexers.sources.rated import TimeRange, FetchInterval, RatedPartition
 from src.config.manager import RatedIndexerYamlConfig
-from src.indexers.dataflow import build_dataflow
+from src.indexers.dataflow import (
+    INPUTS_PER_GROUP,
+    DataflowInput,
+    batched_series,
+    build_dataflow,
+    fetch_logs,
+    fetch_metrics,
+    measure_pages,
+    parse_config,
+    spare_input_partition,
+)
+from src.indexers.reload import InputRegistry
+from src.indexers.sources.spare import SpareSource
 
 
 @pytest.fixture
@@ -101,7 +125,7 @@ def test_logs_dataflow(
         },
     ]
     sample_log_entries = [LogEntry.from_cloudwatch_log(log) for log in sample_logs]
-    mock_fetch_cloudwatch_logs.return_value = iter(sample_log_entries)
+    mock_fetch_cloudwatch_logs.return_value = iter([sample_log_entries])
 
     output_config = RatedOutputConfig(
         ingestion_id="your_ingestion_id",
@@ -146,7 +170,7 @@ def test_logs_dataflow(
             valid_config.inputs[0].cloudwatch,
             mock_input,
             mock_fetch_cloudwatch_logs,
-            filter_manager.parse_and_filter_log,
+            filter_manager.parse_and_filter_log_batch,
             "slaos_key",
         )
     ]
@@ -232,7 +256,7 @@ def test_metrics_dataflow(
     sample_metric_entries = [
         MetricEntry.from_datadog_metric(metric) for metric in sample_metrics
     ]
-    mock_fetch_metrics.return_value = iter(sample_metric_entries)
+    mock_fetch_metrics.return_value = iter([sample_metric_entries])
 
     output_config = RatedOutputConfig(
         ingestion_id="your_ingestion_id",
@@ -249,7 +273,7 @@ def test_metrics_dataflow(
             config.inputs[0].datadog,
             mock_input,
             mock_fetch_metrics,
-            filter_manager.parse_and_filter_metrics,
+            filter_manager.parse_and_filter_metrics_batch,
             "datadog_slaos_key",
         )
     ]
@@ -370,7 +394,7 @@ def test_multiple_inputs_dataflow(
         },
     ]
     sample_log_entries = [LogEntry.from_cloudwatch_log(log) for log in sample_logs]
-    mock_fetch_logs.return_value = iter(sample_log_entries)
+    mock_fetch_logs.return_value = iter([sample_log_entries])
 
     output_config = RatedOutputConfig(
         ingestion_id="your_ingestion_id",
@@ -392,7 +416,7 @@ def test_multiple_inputs_dataflow(
             cloudwatch_config.cloudwatch,
             mock_input_logs1,
             mock_fetch_logs,
-            filter_manager.parse_and_filter_log,
+            filter_manager.parse_and_filter_log_batch,
             "cloudwatch_slaos_key",
         ),
         (
@@ -401,7 +425,7 @@ def test_multiple_inputs_dataflow(
             cloudwatch_config.cloudwatch,
             mock_input_logs2,
             mock_fetch_logs,
-            filter_manager.parse_and_filter_log,
+            filter_manager.parse_and_filter_log_batch,
             "cloudwatch_slaos_key",
         ),
     ]
@@ -577,7 +601,7 @@ def test_metrics_logs_inputs_dataflow(
     sample_metric_entries = [
         MetricEntry.from_datadog_metric(metric) for metric in sample_metrics
     ]
-    mock_fetch_metrics.return_value = iter(sample_metric_entries)
+    mock_fetch_metrics.return_value = iter([sample_metric_entries])
 
     # Mock CloudWatch logs (using JSON directly)
     sample_logs = [
@@ -593,7 +617,7 @@ def test_metrics_logs_inputs_dataflow(
         },
     ]
     sample_log_entries = [LogEntry.from_cloudwatch_log(log) for log in sample_logs]
-    mock_fetch_logs.return_value = iter(sample_log_entries)
+    mock_fetch_logs.return_value = iter([sample_log_entries])
 
     output_config = RatedOutputConfig(
         ingestion_id="your_ingestion_id",
@@ -618,7 +642,7 @@ def test_metrics_logs_inputs_dataflow(
             datadog_config.datadog,
             mock_input_metrics,
             mock_fetch_metrics,
-            filter_manager_metrics.parse_and_filter_metrics,
+            filter_manager_metrics.parse_and_filter_metrics_batch,
             "datadog_slaos_key",
         ),
         (
@@ -627,7 +651,7 @@ def test_metrics_logs_inputs_dataflow(
             cloudwatch_config.cloudwatch,
             mock_input_logs,
             mock_fetch_logs,
-            filter_manager_logs.parse_and_filter_log,
+            filter_manager_logs.parse_and_filter_log_batch,
             "cloudwatch_slaos_key",
         ),
     ]
@@ -710,3 +734,737 @@ def test_metrics_interval(
     # Verify next_awake timing
     expected_wake = new_time + timedelta(seconds=float(FetchInterval.METRICS))
     assert abs(partition.next_awake().timestamp() - expected_wake.timestamp()) < 1
+
+
+@patch("src.indexers.dataflow.FETCH_BATCH_SIZE", 2)
+@patch("src.indexers.dataflow.get_client_instance")
+def test_fetch_logs_yields_pages(mock_get_client_instance):
+    mock_get_client_instance.return_value.query_logs.return_value = iter(
+        {
+            "eventId": f"log_{i}",
+            "timestamp": 1723041096000 + i,
+            "message": f'{{"organization_id": "org_{i}"}}',
+        }
+        for i in range(5)
+    )
+
+    pages = list(
+        fetch_logs(
+            TimeRange(start_time=1, end_time=2),
+            "client_id",
+            IntegrationTypes.CLOUDWATCH,
+        )
+    )
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert all(isinstance(entry, LogEntry) for page in pages for entry in page)
+    assert [entry.log_id for entry in pages[-1]] == ["log_4"]
+
+
+@patch("src.indexers.dataflow.FETCH_BATCH_SIZE", 2)
+@patch("src.indexers.dataflow.get_client_instance")
+def test_fetch_metrics_yields_series_pages(mock_get_client_instance):
+    mock_get_client_instance.return_value.query_metric_series.return_value = iter(
+        [
+            {
+                "metric_name": "cpu",
+                "organization_id": "org_1",
+                "timestamps": [1723041096000, 1723041097000, 1723041098000],
+                "values": [1.0, 2.0, 3.0],
+            },
+            {
+                "metric_name": "cpu",
+                "organization_id": "org_2",
+                "timestamps": [1723041096000, 1723041097000],
+                "values": [4.0, 5.0],
+            },
+        ]
+    )
+
+    pages = list(
+        fetch_metrics(
+            TimeRange(start_time=1, end_time=2),
+            "client_id",
+            IntegrationTypes.DATADOG,
+        )
+    )
+
+    assert [[len(series) for series in page] for page in pages] == [[2], [1, 1], [1]]
+    assert all(isinstance(series, MetricSeries) for page in pages for series in page)
+    assert [
+        (series.organization_id, list(series.values))
+        for page in pages
+        for series in page
+    ] == [("org_1", [1.0, 2.0]), ("org_1", [3.0]), ("org_2", [4.0]), ("org_2", [5.0])]
+
+
+def test_deduplicated_dataflow():
+    sample_logs = [
+        {
+            "eventId": f"log_{i % 2}",
+            "timestamp": 1723041096000,
+            "message": f'{{"example_key": "value", "data": {{"organization_id": "org_{i}"}}}}',
+        }
+        for i in range(3)
+    ]
+    mock_fetch_logs = MagicMock(
+        side_effect=lambda *args: iter(
+            [[LogEntry.from_cloudwatch_log(log) for log in sample_logs]]
+        )
+    )
+    filter_config = LogFilterConfig(
+        version=1,
+        log_format=LogFormat.JSON,
+        log_example={"example_key": "value", "data": {"organization_id": "org"}},
+        fields=[
+            JsonFieldDefinition(
+                key="organization_id",
+                field_type=FieldType.STRING,
+                path="data.organization_id",
+            ),
+        ],
+    )
+    filter_manager = FilterManager(filter_config, "slaos_key", InputTypes.LOGS)
+    output: list = []
+
+    inputs = [
+        DataflowInput(
+            IntegrationTypes.CLOUDWATCH,
+            InputTypes.LOGS,
+            CloudwatchConfig(
+                aws_access_key_id="fake_access_key",
+                aws_secret_access_key="fake_secret_key",
+                region="us-west-2",
+            ),
+            TestingSource(
+                [
+                    TimeRange(start_time=1, end_time=2),
+                    TimeRange(start_time=1, end_time=2),
+                ]
+            ),
+            mock_fetch_logs,
+            filter_manager.parse_and_filter_log_batch,
+            "slaos_key",
+        )
+    ]
+
+    flow = build_dataflow(
+        inputs,
+        OutputTypes.CONSOLE,
+        lambda prefix: TestingSink(output),
+        DeduplicationConfig(),
+    )
+
+    run_main(flow)
+
+    assert mock_fetch_logs.call_count == 2
+    assert sorted(event.idempotency_key for page in output for event in page) == [
+        "log_0",
+        "log_1",
+    ], "The page fetched again is entirely dropped"
+
+
+def test_fetches_of_the_inputs_of_a_worker_overlap():
+    def slow_fetch_logs(time_range, integration_id, integration_type):
+        time.sleep(0.2)
+        yield [
+            LogEntry.from_cloudwatch_log(
+                {
+                    "eventId": f"{integration_id}_{time_range.start_time}",
+                    "timestamp": 1723041096000,
+                    "message": "{}",
+                }
+            )
+        ]
+
+    output: list = []
+    inputs = [
+        DataflowInput(
+            IntegrationTypes.CLOUDWATCH,
+            InputTypes.LOGS,
+            CloudwatchConfig(
+                aws_access_key_id="fake_access_key",
+                aws_secret_access_key="fake_secret_key",
+                region="us-west-2",
+            ),
+            TestingSource(
+                [
+                    TimeRange(start_time=1, end_time=2),
+                    TimeRange(start_time=2, end_time=3),
+                ]
+            ),
+            slow_fetch_logs,
+            lambda entries: entries,
+            f"slaos_key_{i}",
+        )
+        for i in range(8)
+    ]
+    flow = build_dataflow(
+        inputs, OutputTypes.CONSOLE, lambda prefix: TestingSink(output)
+    )
+
+    started = time.perf_counter()
+    run_main(flow)
+    elapsed = time.perf_counter() - started
+
+    # Fetched one after the other, the 16 time ranges would take 3.2 seconds
+    assert elapsed < 1.6
+    log_ids = [entry.log_id for page in output for entry in page]
+    assert len(log_ids) == 16
+    for integration_id in {log_id.rsplit("_", 1)[0] for log_id in log_ids}:
+        assert [log_id for log_id in log_ids if log_id.startswith(integration_id)] == [
+            f"{integration_id}_1",
+            f"{integration_id}_2",
+        ], "The pages of an input keep the order of its time ranges"
+
+
+def test_measure_pages():
+    registry = CollectorRegistry()
+    fetched = Counter("fetched", "", registry=registry)
+    fetch_seconds = Histogram("fetch_seconds", "", registry=registry)
+    page_size = Histogram("page_size", "", registry=registry)
+    series = MetricSeries("cpu", "org_1", [1, 2, 3], [1.0, 2.0, 3.0])
+
+    pages = list(
+        measure_pages(
+            iter([[series, series], [series]]), fetched, fetch_seconds, page_size
+        )
+    )
+
+    assert len(pages) == 2
+    assert registry.get_sample_value("fetched_total") == 9
+    assert registry.get_sample_value("page_size_sum") == 9
+    assert registry.get_sample_value("page_size_count") == 2
+    assert registry.get_sample_value("fetch_seconds_count") == 1
+
+
+def test_measure_pages_times_the_fetch_stage_while_profiling(tmp_path):
+    registry = CollectorRegistry()
+    fetched = Counter("fetched", "", registry=registry)
+    fetch_seconds = Histogram("fetch_seconds", "", registry=registry)
+    page_size = Histogram("page_size", "", registry=registry)
+    profiler.configure(ProfilingYamlConfig(output_dir=str(tmp_path)))
+
+    profiler.start()
+    try:
+        list(
+            measure_pages(
+                iter([[1, 2], [3]]), fetched, fetch_seconds, page_size, "input_1"
+            )
+        )
+        stages = dict(profiler._stages)
+    finally:
+        profiler.stop(wait=True)
+
+    # One call per page, and the last one finding the time range exhausted
+    assert stages[("fetch", "input_1")][0] == 3
+
+
+def test_redistributed_filtering_dataflow():
+    sample_logs = [
+        {
+            "eventId": f"log_{i}",
+            "timestamp": 1723041096000 + i,
+            "message": f'{{"example_key": "value_{i}", "data": {{"organization_id": "org_{i}"}}}}',
+        }
+        for i in range(3)
+    ]
+    mock_fetch_logs = MagicMock(
+        return_value=iter([[LogEntry.from_cloudwatch_log(log) for log in sample_logs]])
+    )
+    filter_config = LogFilterConfig(
+        version=1,
+        log_format=LogFormat.JSON,
+        log_example={"example_key": "value", "data": {"organization_id": "org"}},
+        fields=[
+            JsonFieldDefinition(
+                key="example_key", field_type=FieldType.STRING, path="example_key"
+            ),
+            JsonFieldDefinition(
+                key="organization_id",
+                field_type=FieldType.STRING,
+                path="data.organization_id",
+            ),
+        ],
+    )
+    filter_manager = FilterManager(filter_config, "slaos_key", InputTypes.LOGS)
+    output: list = []
+
+    inputs = [
+        DataflowInput(
+            IntegrationTypes.CLOUDWATCH,
+            InputTypes.LOGS,
+            CloudwatchConfig(
+                aws_access_key_id="fake_access_key",
+                aws_secret_access_key="fake_secret_key",
+                region="us-west-2",
+            ),
+            TestingSource([TimeRange(start_time=1, end_time=2)]),
+            mock_fetch_logs,
+            filter_manager.parse_and_filter_log_batch,
+            "slaos_key",
+            redistribute_filtering=True,
+        )
+    ]
+
+    flow = build_dataflow(
+        inputs,
+        OutputTypes.CONSOLE,
+        lambda prefix: TestingSink(output),
+    )
+
+    run_main(flow)
+
+    mock_fetch_logs.assert_called_once()
+    assert len(output) == 1, "Events should reach the sink as a single page"
+    assert [event.organization_id for event in output[0]] == [
+        "org_0",
+        "org_1",
+        "org_2",
+    ]
+
+
+def shared_source_config(start_froms, log_group_names):
+    def cloudwatch_logs_input(slaos_key, start_from, log_group_name):
+        return {
+            "integration": "cloudwatch",
+            "slaos_key": slaos_key,
+            "type": "logs",
+            "filters": {
+                "version": 1,
+                "log_format": "json_dict",
+                "log_example": {"user_id": "org_1", "event": "login"},
+                "fields": [
+                    {
+                        "key": "organization_id",
+                        "field_type": "string",
+                        "path": "user_id",
+                    },
+                    {"key": "event", "field_type": "string", "path": "event"},
+                ],
+            },
+            "cloudwatch": {
+                "region": "us-east-1",
+                "aws_access_key_id": "fake_access_key",
+                "aws_secret_access_key": "fake_secret_key",
+                "logs_config": {"log_group_name": log_group_name},
+            },
+            "offset": {
+                "type": "redis",
+                "start_from": start_from,
+                "start_from_type": "bigint",
+                "redis": {"host": "localhost", "port": 6379, "db": 0},
+            },
+        }
+
+    return RatedIndexerYamlConfig(
+        inputs=[
+            cloudwatch_logs_input(f"input_{i}", start_from, log_group_name)
+            for i, (start_from, log_group_name) in enumerate(
+                zip(start_froms, log_group_names)
+            )
+        ],
+        output={"type": "console", "console": {"verbose": True}},
+        secrets={"use_secrets_manager": False},
+    )
+
+
+@pytest.fixture
+def stored_offsets():
+    """
+    Offsets stored for the inputs by slaos key, the configured start of an input is used when it has none.
+    """
+    offsets: dict = {}
+
+    def get_offset_tracker(slaos_key, config_index, config):
+        start_from = config.get_input(slaos_key, config_index).offset.start_from
+        offset_tracker = MagicMock()
+        offset_tracker.get_current_offset.return_value = offsets.get(
+            slaos_key, start_from
+        )
+        return offset_tracker, start_from
+
+    with patch(
+        "src.indexers.sources.rated.get_offset_tracker", side_effect=get_offset_tracker
+    ):
+        yield offsets
+
+
+def shared_log_entries():
+    return [
+        LogEntry.from_cloudwatch_log(
+            {
+                "eventId": f"log_{i}",
+                "timestamp": 1694390400000 + i * 1000,
+                "message": f'{{"user_id": "org_{i}", "event": "login"}}',
+            }
+        )
+        for i in range(2)
+    ]
+
+
+def test_parse_config_shares_fetch_between_inputs_of_the_same_source(stored_offsets):
+    config = shared_source_config(
+        start_froms=[1694390400000, 1694390401000, 1694390400000],
+        log_group_names=["shared-group", "shared-group", "other-group"],
+    )
+
+    inputs, _, _ = parse_config(config)
+
+    assert len(inputs) == 2
+    shared_input, other_input = (DataflowInput(*i) for i in inputs)
+    assert shared_input.slaos_key == "input_0,input_1"
+    assert shared_input.input_source.shared_with == [("input_1", 0)]
+    assert other_input.slaos_key == "input_2"
+    assert other_input.input_source.shared_with == []
+
+    events = shared_input.filter_logic(shared_log_entries())
+
+    # The second input starts one second later, so it skips the first log
+    assert [(event.slaos_key, event.idempotency_key) for event in events] == [
+        ("input_0", "log_0"),
+        ("input_0", "log_1"),
+        ("input_1", "log_1"),
+    ]
+
+
+def test_inputs_sharing_a_fetch_skip_what_they_sent_before_a_restart(stored_offsets):
+    config = shared_source_config(
+        start_froms=[1694390400000, 1694390400000],
+        log_group_names=["shared-group", "shared-group"],
+    )
+    # The first input was already past the first log when the indexer stopped
+    stored_offsets["input_0"] = 1694390401000
+
+    [shared_input] = [DataflowInput(*i) for i in parse_config(config)[0]]
+    events = shared_input.filter_logic(shared_log_entries())
+
+    assert [(event.slaos_key, event.idempotency_key) for event in events] == [
+        ("input_0", "log_1"),
+        ("input_1", "log_0"),
+        ("input_1", "log_1"),
+    ]
+
+
+def test_aggregated_inputs_do_not_share_the_fetch_of_other_inputs():
+    config = shared_source_config(
+        start_froms=[1694390400000, 1694390400000],
+        log_group_names=["shared-group", "shared-group"],
+    )
+    config.inputs[0].aggregation = AggregationConfig(window_seconds=60)
+
+    inputs = [DataflowInput(*i) for i in parse_config(config)[0]]
+
+    assert [(i.slaos_key, len(i.aggregating_filters)) for i in inputs] == [
+        ("input_0", 1),
+        ("input_1", 0),
+    ]
+
+
+def aggregated_metrics_config(slaos_key):
+    return RatedIndexerYamlConfig(
+        inputs=[
+            {
+                "integration": "prometheus",
+                "slaos_key": slaos_key,
+                "type": "metrics",
+                "prometheus": {"base_url": "http://prometheus:9090", "queries": []},
+                "filters": {"version": 1, "fields": [{"key": "organization_id"}]},
+                "aggregation": {"window_seconds": 60},
+                "offset": {
+                    "type": "redis",
+                    "start_from": 1694390400000,
+                    "start_from_type": "bigint",
+                    "redis": {"host": "localhost", "port": 6379, "db": 0},
+                },
+            }
+        ],
+        output={"type": "console", "console": {"verbose": True}},
+        secrets={"use_secrets_manager": False},
+    )
+
+
+def test_last_windows_are_flushed_at_the_end_of_the_input():
+    config = aggregated_metrics_config("aggregated")
+    metric_entries = [
+        MetricEntry(
+            metric_name="requests",
+            value=1.0,
+            timestamp_ms=1694390400000 + i * 1000,
+            organization_id="org_1",
+            labels={"organization_id": "org_1"},
+        )
+        for i in range(2)
+    ]
+    aggregated_input = DataflowInput(*parse_config(config)[0][0])._replace(
+        input_source=TestingSource([TimeRange(start_time=1, end_time=2)]),
+        fetcher=lambda *args: iter([metric_entries]),
+    )
+    output: list = []
+
+    flow = build_dataflow(
+        [aggregated_input], OutputTypes.CONSOLE, lambda prefix: TestingSink(output)
+    )
+    run_main(flow)
+
+    assert [
+        (event.timestamp_ms, event.values["requests_count"])
+        for page in output
+        for event in page
+    ] == [(1694390400000, 2)]
+
+
+def test_series_spread_over_several_pages_are_rolled_up_in_full():
+    config = aggregated_metrics_config("aggregated_series")
+    start = 1694390400000
+    time_ranges = [
+        TimeRange(start_time=start, end_time=start + 120_000),
+        TimeRange(start_time=start + 120_000, end_time=start + 240_000),
+    ]
+
+    def fetch_series(time_range, *args):
+        # Like Prometheus, each series covers the whole time range before the next one starts
+        series = [
+            MetricSeries(
+                metric_name="requests",
+                organization_id="org_1",
+                timestamps_ms=array(
+                    "q", range(time_range.start_time, time_range.end_time, 10_000)
+                ),
+                values=array("d", [1.0] * 12),
+                labels={"organization_id": "org_1", "host": host},
+            )
+            for host in ["a", "b", "c", "d"]
+        ]
+        return batched_series(series, 5)
+
+    aggregated_input = DataflowInput(*parse_config(config)[0][0])._replace(
+        input_source=TestingSource(time_ranges), fetcher=fetch_series
+    )
+    output: list = []
+
+    flow = build_dataflow(
+        [aggregated_input], OutputTypes.CONSOLE, lambda prefix: TestingSink(output)
+    )
+    run_main(flow)
+
+    counts = {
+        (event.timestamp_ms, event.values["host"]): event.values["requests_count"]
+        for page in output
+        for event in page
+    }
+    assert counts == {
+        (start + i * 60_000, host): 6 for i in range(4) for host in ["a", "b", "c", "d"]
+    }
+    assert not REGISTRY.get_sample_value(
+        "rated_indexer_metric_samples_rejected_total",
+        {"slaos_key": "aggregated_series", "reason": "late"},
+    )
+
+
+def test_log_streams_out_of_order_are_rolled_up_in_full():
+    config = shared_source_config(
+        start_froms=[1694390400000], log_group_names=["shared-group"]
+    )
+    config.inputs[0].slaos_key = "aggregated_streams"
+    config.inputs[0].aggregation = AggregationConfig(window_seconds=60)
+    start = 1694390400000
+    time_ranges = [
+        TimeRange(start_time=start, end_time=start + 120_000),
+        TimeRange(start_time=start + 120_000, end_time=start + 240_000),
+    ]
+
+    def fetch_logs(time_range, *args):
+        # Like CloudWatch log streams and Datadog shards, each stream covers the whole time range in its own pages
+        return (
+            [
+                LogEntry.from_cloudwatch_log(
+                    {
+                        "eventId": f"{stream}_{timestamp_ms}",
+                        "timestamp": timestamp_ms,
+                        "message": f'{{"user_id": "org_1", "event": "{stream}"}}',
+                    }
+                )
+                for timestamp_ms in range(
+                    time_range.start_time, time_range.end_time, 20_000
+                )
+            ]
+            for stream in ["stream_1", "stream_2", "stream_3"]
+        )
+
+    aggregated_input = DataflowInput(*parse_config(config)[0][0])._replace(
+        input_source=TestingSource(time_ranges), fetcher=fetch_logs
+    )
+    output: list = []
+
+    flow = build_dataflow(
+        [aggregated_input], OutputTypes.CONSOLE, lambda prefix: TestingSink(output)
+    )
+    run_main(flow)
+
+    assert [
+        (event.timestamp_ms, event.values["count"]) for page in output for event in page
+    ] == [(start + i * 60_000, 9) for i in range(4)]
+    assert not REGISTRY.get_sample_value(
+        "rated_indexer_log_entries_rejected_total",
+        {"slaos_key": "aggregated_streams", "reason": "late"},
+    )
+
+
+@patch("src.indexers.dataflow.fetch_metrics")
+def test_spare_input_fetches_the_input_added_by_a_reload(
+    mock_fetch_metrics, mock_get_offset_tracker, monkeypatch
+):
+    registry = InputRegistry()
+    monkeypatch.setattr("src.indexers.sources.rated.input_registry", registry)
+    [spare_input] = registry.add_spare_inputs(1)
+    partition = SpareSource(spare_input, spare_input_partition).build_part(
+        "fetch_spare_0", "single-part", None
+    )
+    assert partition.next_batch() == [], "Idle until an input is added"
+
+    config = aggregated_metrics_config("added")
+    config.inputs[0].aggregation = None
+    assert registry.apply(config).added == [("added", 0)]
+    mock_fetch_metrics.side_effect = lambda time_range, *args: iter(
+        [
+            [
+                MetricEntry(
+                    metric_name="requests",
+                    value=1.0,
+                    timestamp_ms=time_range.start_time,
+                    organization_id="org_1",
+                    labels={"organization_id": "org_1"},
+                )
+            ]
+        ]
+    )
+
+    pages: list = []
+    deadline = time.monotonic() + 2
+    try:
+        while not pages and time.monotonic() < deadline:
+            pages.extend(partition.next_batch())
+            time.sleep(0.01)
+    finally:
+        partition.close()
+
+    assert pages, "The added input is fetched without a restart"
+    mock_get_offset_tracker.assert_any_call("added", 0, config)
+    assert spare_input.reloadable_filter is not None
+    [event] = spare_input.reloadable_filter(pages[0])
+    assert event.slaos_key == "added"
+
+
+def test_last_log_windows_are_flushed_at_the_end_of_the_input():
+    config = shared_source_config(
+        start_froms=[1694390400000], log_group_names=["shared-group"]
+    )
+    config.inputs[0].aggregation = AggregationConfig(window_seconds=60)
+    log_entries = [
+        LogEntry.from_cloudwatch_log(
+            {
+                "eventId": f"log_{i}",
+                "timestamp": 1694390400000 + i * 1000,
+                "message": f'{{"user_id": "org_1", "event": "login_{i}"}}',
+            }
+        )
+        for i in range(2)
+    ]
+    aggregated_input = DataflowInput(*parse_config(config)[0][0])._replace(
+        input_source=TestingSource([TimeRange(start_time=1, end_time=2)]),
+        fetcher=lambda *args: iter([log_entries]),
+    )
+    output: list = []
+
+    flow = build_dataflow(
+        [aggregated_input], OutputTypes.CONSOLE, lambda prefix: TestingSink(output)
+    )
+    run_main(flow)
+
+    assert [
+        (event.timestamp_ms, event.values["count"]) for page in output for event in page
+    ] == [(1694390400000, 2)]
+
+
+@patch("src.indexers.sources.rated.get_offset_tracker")
+@patch("src.indexers.sources.rated.get_config")
+def test_shared_partition_tracks_offsets_per_input(
+    mock_get_config, mock_get_offset_tracker, mock_time
+):
+    start = int(datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc).timestamp() * 1000)
+    trackers = {}
+    for slaos_key, offset in [("lead", start + 30_000), ("shared", start)]:
+        trackers[slaos_key] = MagicMock()
+        trackers[slaos_key].get_current_offset.return_value = offset
+    mock_get_offset_tracker.side_effect = lambda slaos_key, config_index, config: (
+        trackers[slaos_key],
+        start,
+    )
+    mock_get_config.return_value.get_input.return_value = MagicMock(type="logs")
+
+    partition = RatedPartition("lead", 0, shared_with=[("shared", 0)])
+
+    assert partition.current_time == start
+    first_range = partition.next_batch()[0]
+    assert first_range.start_time == start
+    trackers["shared"].update_offset.assert_called_once_with(first_range.end_time)
+    trackers["lead"].update_offset.assert_not_called()
+
+    mock_time.now.return_value += timedelta(seconds=60)
+    second_range = partition.next_batch()[0]
+    trackers["lead"].update_offset.assert_called_once_with(second_range.end_time)
+    trackers["shared"].update_offset.assert_called_with(second_range.end_time)
+
+    now_ms = int(mock_time.now.return_value.timestamp() * 1000)
+    for slaos_key in ["lead", "shared"]:
+        assert REGISTRY.get_sample_value(
+            "rated_indexer_offset_lag_seconds", {"slaos_key": slaos_key}
+        ) == pytest.approx((now_ms - second_range.end_time) / 1000)
+
+
+def test_dataflow_of_many_inputs_is_built_in_groups():
+    def fetch_entries(time_range, client_id, integration_type):
+        yield [
+            LogEntry.from_cloudwatch_log(
+                {"eventId": "log_0", "timestamp": 1723041096000, "message": "{}"}
+            )
+        ]
+
+    def filter_logic(slaos_key):
+        return lambda entries: [
+            FilteredEvent(
+                slaos_key=slaos_key,
+                idempotency_key=entry.log_id,
+                timestamp_ms=entry.timestamp_ms,
+                organization_id="org_1",
+                values={},
+            )
+            for entry in entries
+        ]
+
+    input_count = INPUTS_PER_GROUP * 2 + 1
+    inputs = [
+        DataflowInput(
+            IntegrationTypes.PROMETHEUS,
+            InputTypes.LOGS,
+            PrometheusConfig(base_url="http://prometheus:9090", queries=[]),
+            TestingSource([TimeRange(start_time=1, end_time=2)]),
+            fetch_entries,
+            filter_logic(f"input_{idx}"),
+            f"input_{idx}",
+        )
+        for idx in range(input_count)
+    ]
+    output: list = []
+
+    flow = build_dataflow(
+        inputs, OutputTypes.CONSOLE, lambda prefix: TestingSink(output)
+    )
+
+    # One step per group of inputs, then the merge and the sink
+    assert len(flow.substeps) == 3 + 2
+    run_main(flow)
+    assert sorted(event.slaos_key for page in output for event in page) == sorted(
+        f"input_{idx}" for idx in range(input_count)
+    )
@@ -0,0 +1,209 @@
+import pytest
+from bytewax.outputs import StatelessSinkPartition
+from bytewax.testing import TestingSink
+from prometheus_client import REGISTRY
+
+from src.config.models.output import DeduplicationConfig
+from src.indexers.deduplication import (
+    BloomFilter,
+    DeduplicatingSink,
+    EventDeduplicator,
+    _DeduplicatingSinkPartition,
+    key_hashes,
+    shard_of,
+    shard_page,
+)
+from src.indexers.filters.types import FilteredEvent
+
+HOUR_MS = 3_600_000
+START = 1_730_376_000_000
+
+
+def event(idempotency_key: str, timestamp_ms: int = START) -> FilteredEvent:
+    return FilteredEvent(
+        slaos_key="dedup_test",
+        idempotency_key=idempotency_key,
+        timestamp_ms=timestamp_ms,
+        organization_id="org_1",
+        values={"status": 200},
+    )
+
+
+class BatchingPartition(StatelessSinkPartition):
+    """
+    Holds the events written until they are sent, like the HTTP sink.
+    """
+
+    def __init__(self):
+        self.on_sent = None
+        self.batch = []
+        self.sent = []
+
+    def write_batch(self, items):
+        for page in items:
+            self.batch.extend(page)
+
+    def send(self):
+        batch, self.batch = self.batch, []
+        self.sent.extend(batch)
+        self.on_sent(batch)
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom_filter = BloomFilter.for_capacity(10_000, 0.01)
+    for i in range(10_000):
+        bloom_filter.add(key_hashes(f"key_{i}"))
+
+    assert all(bloom_filter.contains(key_hashes(f"key_{i}")) for i in range(10_000))
+    false_positives = sum(
+        bloom_filter.contains(key_hashes(f"other_{i}")) for i in range(10_000)
+    )
+    assert false_positives < 200
+
+
+def test_recorded_events_are_seen():
+    deduplicator = EventDeduplicator(DeduplicationConfig())
+
+    deduplicator.record(event("a"))
+
+    assert deduplicator.seen(event("a"))
+    assert not deduplicator.seen(event("b"))
+    assert not deduplicator.seen(event("a", START + HOUR_MS))
+
+
+def test_partitions_older_than_the_retention_are_dropped():
+    deduplicator = EventDeduplicator(
+        DeduplicationConfig(retention_seconds=7_200, partition_seconds=3_600)
+    )
+
+    deduplicator.record(event("a", START))
+    deduplicator.record(event("b", START + 2 * HOUR_MS))
+
+    assert len(deduplicator._partitions) == 1
+    assert not deduplicator.seen(event("a", START))
+    assert deduplicator.seen(event("b", START + 2 * HOUR_MS))
+
+
+def test_filters_are_sized_for_the_keys_of_one_shard():
+    deduplicator = EventDeduplicator(
+        DeduplicationConfig(expected_keys_per_partition=100_000, shards=8)
+    )
+    deduplicator.record(event("a"))
+
+    [bloom_filter] = deduplicator._partitions[START // HOUR_MS]
+    assert deduplicator.capacity == 12_500
+    assert bloom_filter.size == BloomFilter.for_capacity(12_500, 1e-6).size
+
+
+def test_full_partitions_are_extended():
+    deduplicator = EventDeduplicator(
+        DeduplicationConfig(expected_keys_per_partition=10, shards=1)
+    )
+
+    for i in range(25):
+        deduplicator.record(event(f"key_{i}"))
+
+    filters = deduplicator._partitions[START // HOUR_MS]
+    assert [bloom_filter.count for bloom_filter in filters] == [10, 10, 5]
+    assert all(deduplicator.seen(event(f"key_{i}")) for i in range(25))
+
+
+def test_state_is_persisted_and_restored(tmp_path):
+    path = str(tmp_path / "dedup.state")
+    config = DeduplicationConfig()
+    deduplicator = EventDeduplicator(config, path)
+    deduplicator.record(event("a"))
+    deduplicator.record(event("b", START + HOUR_MS))
+
+    deduplicator.persist()
+    restored = EventDeduplicator(config, path)
+
+    assert restored.seen(event("a"))
+    assert restored.seen(event("b", START + HOUR_MS))
+    assert not restored.seen(event("c"))
+
+
+def test_state_saved_with_another_configuration_is_ignored(tmp_path):
+    path = str(tmp_path / "dedup.state")
+    deduplicator = EventDeduplicator(DeduplicationConfig(), path)
+    deduplicator.record(event("a"))
+    deduplicator.persist()
+
+    restored = EventDeduplicator(DeduplicationConfig(false_positive_rate=0.01), path)
+
+    assert not restored.seen(event("a"))
+
+
+def test_pages_are_split_by_the_shard_of_their_keys():
+    page = [event(f"key_{i}") for i in range(20)]
+
+    sharded = shard_page(page, 4)
+
+    assert sorted(
+        event.idempotency_key for _, events in sharded for event in events
+    ) == sorted(event.idempotency_key for event in page)
+    for shard, events in sharded:
+        assert {shard_of(event.idempotency_key, 4) for event in events} == {int(shard)}
+
+
+def test_keys_are_only_recorded_once_sent():
+    deduplicator = EventDeduplicator(DeduplicationConfig())
+    partition = BatchingPartition()
+    sink_partition = _DeduplicatingSinkPartition(deduplicator, partition)
+
+    sink_partition.write_batch([[event("a"), event("b")]])
+    assert not deduplicator.seen(event("a")), "Not recorded before it is sent"
+
+    sink_partition.write_batch([[event("a"), event("c")]])
+    assert partition.batch == [event("a"), event("b"), event("c")]
+
+    partition.send()
+    assert deduplicator.seen(event("a"))
+    assert not sink_partition._pending
+
+    sink_partition.write_batch([[event("b"), event("d")]])
+    assert partition.batch == [event("d")]
+    assert (
+        REGISTRY.get_sample_value(
+            "rated_indexer_events_deduplicated_total", {"slaos_key": "dedup_test"}
+        )
+        >= 2
+    )
+
+
+def test_events_of_synchronous_sinks_are_recorded_once_written():
+    output: list = []
+    sink = DeduplicatingSink(DeduplicationConfig(), TestingSink(output))
+    sink_partition = sink.build_part("sink_output", "0", None)
+
+    sink_partition.write_batch([[event("a"), event("b")]])
+    sink_partition.write_batch([[event("a")], [event("b"), event("c")]])
+
+    assert output == [[event("a"), event("b")], [event("c")]]
+    assert sink_partition.deduplicator.seen(event("a"))
+
+
+def test_each_shard_persists_its_own_state(tmp_path):
+    path = str(tmp_path / "dedup.state")
+    sink = DeduplicatingSink(
+        DeduplicationConfig(persist_path=path, shards=2), TestingSink([])
+    )
+    first = sink.build_part("sink_output", "0", None)
+    second = sink.build_part("sink_output", "1", None)
+
+    first.write_batch([[event("a")]])
+    first.close()
+    second.close()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "dedup.state.0",
+        "dedup.state.1",
+    ]
+    restored = sink.build_part("sink_output", "0", None)
+    assert restored.deduplicator.seen(event("a"))
+    assert not sink.build_part("sink_output", "1", None).deduplicator.seen(event("a"))
+
+
+def test_partition_cannot_exceed_retention():
+    with pytest.raises(ValueError, match="cannot exceed"):
+        DeduplicationConfig(retention_seconds=60, partition_seconds=3_600)
@@ -0,0 +1,118 @@
+import socket
+import urllib.request
+from functools import lru_cache
+
+from prometheus_client import CollectorRegistry
+
+from src.config.models.metrics_endpoint import MetricsEndpointYamlConfig
+from src.indexers.metrics import LruCacheCollector, start_metrics_endpoint
+
+
+def test_lru_cache_collector():
+    @lru_cache(maxsize=8)
+    def double(value: int) -> int:
+        return value * 2
+
+    registry = CollectorRegistry()
+    collector = LruCacheCollector()
+    collector.add_cache("double", double)
+    registry.register(collector)
+
+    for value in [1, 2, 1, 1]:
+        double(value)
+
+    labels = {"cache": "double"}
+    assert registry.get_sample_value("rated_indexer_cache_hits_total", labels) == 2
+    assert registry.get_sample_value("rated_indexer_cache_misses_total", labels) == 2
+    assert registry.get_sample_value("rated_indexer_cache_hit_ratio", labels) == 0.5
+    assert registry.get_sample_value("rated_indexer_cache_size", labels) == 2
+    assert registry.get_sample_value("rated_indexer_cache_max_size", labels) == 8
+
+
+def test_lru_cache_collector_no_lookups():
+    @lru_cache(maxsize=None)
+    def identity(value: int) -> int:
+        return value
+
+    registry = CollectorRegistry()
+    collector = LruCacheCollector()
+    collector.add_cache("identity", identity)
+    registry.register(collector)
+
+    labels = {"cache": "identity"}
+    assert registry.get_sample_value("rated_indexer_cache_hit_ratio", labels) == 0
+    assert registry.get_sample_value("rated_indexer_cache_max_size", labels) == 0
+
+
+def test_lru_cache_collector_sums_caches_with_the_same_name():
+    @lru_cache(maxsize=4)
+    def double(value: int) -> int:
+        return value * 2
+
+    @lru_cache(maxsize=4)
+    def triple(value: int) -> int:
+        return value * 3
+
+    registry = CollectorRegistry()
+    collector = LruCacheCollector()
+    collector.add_cache("numbers", double)
+    collector.add_cache("numbers", triple)
+    registry.register(collector)
+
+    for value in [1, 1, 1]:
+        double(value)
+    triple(1)
+
+    labels = {"cache": "numbers"}
+    assert registry.get_sample_value("rated_indexer_cache_hits_total", labels) == 2
+    assert registry.get_sample_value("rated_indexer_cache_misses_total", labels) == 2
+    assert registry.get_sample_value("rated_indexer_cache_size", labels) == 2
+    assert registry.get_sample_value("rated_indexer_cache_max_size", labels) == 8
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_metrics_endpoint(monkeypatch):
+    monkeypatch.delenv("BYTEWAX_PROCESS_ID", raising=False)
+    port = free_port()
+    assert (
+        start_metrics_endpoint(
+            MetricsEndpointYamlConfig(port=port, address="127.0.0.1")
+        )
+        == port
+    )
+
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+        body = response.read().decode()
+
+    assert "rated_indexer_entries_fetched_total" in body
+
+
+def test_metrics_endpoint_port_in_use(monkeypatch):
+    monkeypatch.delenv("BYTEWAX_PROCESS_ID", raising=False)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+        config = MetricsEndpointYamlConfig(
+            port=sock.getsockname()[1], address="127.0.0.1"
+        )
+
+        assert start_metrics_endpoint(config) is None, "The indexer runs on without it"
+
+
+def test_metrics_endpoint_is_offset_by_the_process_id(monkeypatch):
+    port = free_port()
+    monkeypatch.setenv("BYTEWAX_PROCESS_ID", "1")
+
+    assert (
+        start_metrics_endpoint(
+            MetricsEndpointYamlConfig(port=port - 1, address="127.0.0.1")
+        )
+        == port
+    )
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+        assert response.status == 200
@@ -0,0 +1,152 @@
+import json
+import os
+import signal
+import threading
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from src.config.models.profiling import ProfilingYamlConfig
+from src.indexers.profiling import (
+    SamplingProfiler,
+    get_profiling_config,
+    profiler,
+    start_profiling,
+)
+
+
+@pytest.fixture
+def sampling_profiler(tmp_path):
+    sampling_profiler = SamplingProfiler()
+    sampling_profiler.configure(
+        ProfilingYamlConfig(output_dir=str(tmp_path), sampling_interval_ms=1)
+    )
+    yield sampling_profiler
+    sampling_profiler.stop(wait=True)
+
+
+def busy_loop(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def read_profiles(output_dir):
+    folded = {}
+    stages = []
+    for name in sorted(os.listdir(output_dir)):
+        path = os.path.join(output_dir, name)
+        if name.endswith(".folded"):
+            with open(path) as profile_file:
+                for line in profile_file:
+                    stack, count = line.rsplit(" ", 1)
+                    folded[stack] = folded.get(stack, 0) + int(count)
+        elif name.endswith(".json"):
+            with open(path) as stages_file:
+                stages.extend(json.load(stages_file)["stages"])
+    return folded, stages
+
+
+def test_stage_is_not_timed_while_inactive(sampling_profiler, tmp_path):
+    with sampling_profiler.stage("filter", "input_1"):
+        pass
+
+    sampling_profiler.flush()
+
+    assert sampling_profiler.stage_tags == {}
+    assert os.listdir(tmp_path) == []
+
+
+def test_profile_is_written_in_collapsed_format(sampling_profiler, tmp_path):
+    sampling_profiler.start()
+    with sampling_profiler.stage("filter", "input_1"):
+        busy_loop(0.1)
+    sampling_profiler.stop(wait=True)
+
+    folded, stages = read_profiles(tmp_path)
+
+    filter_stacks = [stack for stack in folded if stack.startswith("filter input_1;")]
+    assert filter_stacks
+    assert any("busy_loop" in stack for stack in filter_stacks)
+    assert stages == [
+        {
+            "stage": "filter",
+            "slaos_key": "input_1",
+            "calls": 1,
+            "total_seconds": pytest.approx(0.1, abs=0.05),
+            "max_seconds": pytest.approx(0.1, abs=0.05),
+        }
+    ]
+
+
+def test_stage_timings_are_aggregated_per_input(sampling_profiler):
+    sampling_profiler.record("fetch", "input_1", 0.5)
+    sampling_profiler.record("fetch", "input_1", 1.5)
+    sampling_profiler.record("fetch", "input_2", 0.2)
+
+    assert sampling_profiler._stages == {
+        ("fetch", "input_1"): [2, 2.0, 1.5],
+        ("fetch", "input_2"): [1, 0.2, 0.2],
+    }
+
+
+def test_nested_stages_restore_the_outer_tag(sampling_profiler):
+    sampling_profiler.start()
+    thread_id = threading.get_ident()
+
+    with sampling_profiler.stage("fetch", "input_1"):
+        with sampling_profiler.stage("filter", "input_1"):
+            assert sampling_profiler.stage_tags[thread_id] == "filter input_1"
+        assert sampling_profiler.stage_tags[thread_id] == "fetch input_1"
+
+    assert thread_id not in sampling_profiler.stage_tags
+
+
+def test_profiles_are_flushed_periodically(tmp_path):
+    sampling_profiler = SamplingProfiler()
+    sampling_profiler.configure(
+        ProfilingYamlConfig(
+            output_dir=str(tmp_path),
+            sampling_interval_ms=1,
+            flush_interval_seconds=0.05,
+        )
+    )
+
+    sampling_profiler.start()
+    busy_loop(0.3)
+    sampling_profiler.stop(wait=True)
+
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".folded")]) > 1
+
+
+def test_signal_toggles_profiling(tmp_path):
+    previous_handler = signal.getsignal(signal.SIGUSR2)
+    try:
+        start_profiling(ProfilingYamlConfig(output_dir=str(tmp_path)))
+        assert not profiler.active
+
+        os.kill(os.getpid(), signal.SIGUSR2)
+        assert profiler.active
+
+        os.kill(os.getpid(), signal.SIGUSR2)
+        assert not profiler.active
+    finally:
+        profiler.stop(wait=True)
+        signal.signal(signal.SIGUSR2, previous_handler)
+
+
+def test_profiling_enabled_by_environment():
+    assert get_profiling_config(None, {}) is None
+    assert get_profiling_config(None, {"PROFILING_ENABLED": "true"}).enabled
+
+    config = ProfilingYamlConfig(output_dir="/tmp/profiles")
+    enabled = get_profiling_config(config, {"PROFILING_ENABLED": "1"})
+    assert enabled.enabled
+    assert enabled.output_dir == "/tmp/profiles"
+    assert get_profiling_config(config, {"PROFILING_ENABLED": "0"}) is config
+
+
+def test_unknown_toggle_signal():
+    with pytest.raises(ValidationError, match="Unknown signal"):
+        ProfilingYamlConfig(toggle_signal="SIGNOPE")
@@ -0,0 +1,391 @@
+import base64
+import gc
+import os
+import threading
+from copy import deepcopy
+from hashlib import sha256
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import yaml
+
+from src.config.manager import (
+    Base64EncodedConfig,
+    FileConfigurationManager,
+    RatedIndexerYamlConfig,
+)
+from src.config.models.reload import ReloadYamlConfig
+from src.indexers.filters import manager
+from src.indexers.filters.types import MetricEntry
+from src.indexers.reload import (
+    ConfigWatcher,
+    InputRegistry,
+    spare_input_count,
+    start_config_reload,
+)
+from src.indexers.sources.rated import RatedPartition
+
+START_FROM = int(datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def prometheus_input(slaos_key: str, *filter_keys: str) -> dict:
+    return {
+        "integration": "prometheus",
+        "slaos_key": slaos_key,
+        "type": "metrics",
+        "prometheus": {"base_url": "http://prometheus:9090", "queries": []},
+        "filters": {
+            "version": 1,
+            "fields": [{"key": key} for key in filter_keys],
+        },
+        "offset": {
+            "type": "slaos",
+            "override_start_from": True,
+            "start_from": START_FROM,
+            "start_from_type": "bigint",
+            "slaos": {
+                "ingestion_id": "ingestion_id",
+                "ingestion_key": "ingestion_key",
+                "ingestion_url": "https://api.rated.co/v1/ingest",
+                "datastream_filter": {"key": slaos_key},
+            },
+        },
+    }
+
+
+def build_config(*inputs: dict) -> dict:
+    return {
+        "inputs": list(inputs),
+        "output": {"type": "null"},
+        "secrets": {"use_secrets_manager": False},
+    }
+
+
+def register_inputs(registry: InputRegistry, raw_config: dict) -> dict:
+    config = RatedIndexerYamlConfig(**raw_config)
+    return {
+        (slaos_key, index): registry.register((slaos_key, index), input_config)
+        for slaos_key, members in config.inputs_by_slaos_key().items()
+        for index, input_config in enumerate(members)
+    }
+
+
+METRIC = MetricEntry(
+    metric_name="requests",
+    value=1.0,
+    timestamp_ms=START_FROM,
+    organization_id="org_1",
+    labels={"organization_id": "org_1", "region": "eu"},
+)
+
+
+def test_changed_filters_are_swapped():
+    registry = InputRegistry()
+    raw_config = build_config(
+        prometheus_input("first", "organization_id", "region"),
+        prometheus_input("second", "organization_id", "region"),
+    )
+    filters = register_inputs(registry, raw_config)
+    first = filters[("first", 0)]
+    assert first([METRIC])[0].values["region"] == "eu"
+
+    changed = deepcopy(raw_config)
+    changed["inputs"][0]["filters"]["fields"][1]["hash"] = True
+    result = registry.apply(RatedIndexerYamlConfig(**changed))
+
+    assert result.swapped == [("first", 0)]
+    assert result.removed == result.restart_required == []
+    assert first([METRIC])[0].values["region"] == sha256(b"eu").hexdigest()
+    assert filters[("second", 0)]([METRIC])[0].values["region"] == "eu"
+
+
+def test_removed_inputs_are_paused():
+    registry = InputRegistry()
+    raw_config = build_config(
+        prometheus_input("first", "organization_id"),
+        prometheus_input("second", "organization_id"),
+    )
+    filters = register_inputs(registry, raw_config)
+
+    result = registry.apply(
+        RatedIndexerYamlConfig(**build_config(raw_config["inputs"][1]))
+    )
+
+    assert result.removed == [("first", 0)]
+    assert not registry.is_enabled(("first", 0))
+    assert registry.is_enabled(("second", 0))
+    assert filters[("first", 0)]([METRIC]) == []
+
+    # Adding it back needs a restart, which resumes it from its paused offset
+    result = registry.apply(RatedIndexerYamlConfig(**raw_config))
+    assert result.restart_required == [("first", 0)]
+    assert not registry.is_enabled(("first", 0))
+
+
+def test_changes_beyond_filters_require_a_restart():
+    registry = InputRegistry()
+    raw_config = build_config(prometheus_input("first", "organization_id"))
+    filters = register_inputs(registry, raw_config)
+
+    changed = deepcopy(raw_config)
+    changed["inputs"][0]["prometheus"]["base_url"] = "http://other-prometheus:9090"
+    changed["inputs"].append(prometheus_input("added", "organization_id"))
+    result = registry.apply(RatedIndexerYamlConfig(**changed))
+
+    assert result.restart_required == [("first", 0), ("added", 0)]
+    assert result.swapped == result.removed == []
+    assert filters[("first", 0)]([METRIC])
+
+
+def test_added_inputs_take_the_free_spare_inputs():
+    registry = InputRegistry()
+    [spare_input] = registry.add_spare_inputs(1)
+    raw_config = build_config(prometheus_input("first", "organization_id"))
+    register_inputs(registry, raw_config)
+
+    changed = deepcopy(raw_config)
+    changed["inputs"].append(prometheus_input("added", "organization_id"))
+    changed["inputs"].append(prometheus_input("too_many", "organization_id"))
+    config = RatedIndexerYamlConfig(**changed)
+    result = registry.apply(config)
+
+    assert result.added == [("added", 0)]
+    assert result.restart_required == [("too_many", 0)]
+    assert spare_input.key == ("added", 0)
+    assert spare_input.config is config
+    assert spare_input.reloadable_filter is not None
+    assert spare_input.reloadable_filter([METRIC])[0].slaos_key == "added"
+
+    # Its filters are swapped by later reloads like those of any other input
+    changed["inputs"][1]["filters"]["fields"].append({"key": "region"})
+    result = registry.apply(RatedIndexerYamlConfig(**changed))
+    assert result.swapped == [("added", 0)]
+    assert result.added == []
+    assert spare_input.reloadable_filter([METRIC])[0].values["region"] == "eu"
+
+
+def aggregated_config(window_seconds: int) -> dict:
+    aggregated = prometheus_input("aggregated", "organization_id", "region")
+    aggregated["aggregation"] = {"window_seconds": window_seconds}
+    return build_config(aggregated)
+
+
+def test_swapped_filters_carry_on_the_open_windows():
+    registry = InputRegistry()
+    raw_config = aggregated_config(60)
+    reloadable_filter = register_inputs(registry, raw_config)[("aggregated", 0)]
+    assert reloadable_filter([METRIC]) == []
+
+    changed = deepcopy(raw_config)
+    changed["inputs"][0]["filters"]["fields"][1]["hash"] = True
+    registry.apply(RatedIndexerYamlConfig(**changed))
+
+    assert reloadable_filter.open_since_ms == START_FROM
+    rollups = reloadable_filter.flush(final=True)
+    assert [rollup.values["requests_count"] for rollup in rollups] == [1]
+
+
+def test_windows_rolled_up_differently_are_flushed_on_swap():
+    registry = InputRegistry()
+    raw_config = aggregated_config(60)
+    reloadable_filter = register_inputs(registry, raw_config)[("aggregated", 0)]
+    reloadable_filter([METRIC])
+
+    registry.apply(RatedIndexerYamlConfig(**aggregated_config(300)))
+
+    assert reloadable_filter.open_since_ms is None
+    rollups = reloadable_filter.flush()
+    assert [rollup.timestamp_ms for rollup in rollups] == [START_FROM]
+    assert reloadable_filter.flush() == []
+
+
+def test_swap_waits_for_the_calls_in_flight():
+    registry = InputRegistry()
+    raw_config = build_config(prometheus_input("first", "organization_id"))
+    reloadable_filter = register_inputs(registry, raw_config)[("first", 0)]
+    previous = reloadable_filter.filter_manager
+    previous.close = MagicMock()
+    filtering = threading.Event()
+    release = threading.Event()
+
+    def slow_filter(entries):
+        filtering.set()
+        release.wait()
+        return []
+
+    reloadable_filter.filter_logic = slow_filter
+    caller = threading.Thread(target=reloadable_filter, args=([METRIC],))
+    caller.start()
+    filtering.wait()
+
+    changed = deepcopy(raw_config)
+    changed["inputs"][0]["filters"]["fields"].append({"key": "region"})
+    swapper = threading.Thread(
+        target=registry.apply, args=(RatedIndexerYamlConfig(**changed),)
+    )
+    swapper.start()
+    swapper.join(timeout=0.1)
+
+    assert swapper.is_alive(), "The swap waits for the page being filtered"
+    previous.close.assert_not_called()
+
+    release.set()
+    caller.join()
+    swapper.join()
+    previous.close.assert_called_once()
+    assert reloadable_filter.filter_manager is not previous
+
+
+def test_parsers_of_replaced_filters_are_dropped():
+    registry = InputRegistry()
+    raw_config = build_config(prometheus_input("pruned", "organization_id"))
+    reloadable_filter = register_inputs(registry, raw_config)[("pruned", 0)]
+
+    for extra_key in ["pruned_region", "pruned_zone", "pruned_host"]:
+        changed = deepcopy(raw_config)
+        changed["inputs"][0]["filters"]["fields"].append({"key": extra_key})
+        registry.apply(RatedIndexerYamlConfig(**changed))
+    gc.collect()
+
+    pruned_parsers = [
+        parser for key, parser in manager._shared_parsers.items() if "pruned_" in key
+    ]
+    assert pruned_parsers == [reloadable_filter.filter_manager.parser]
+
+
+def write_config(path, raw_config, mtime_ns):
+    path.write_text(yaml.safe_dump(raw_config))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_watcher_applies_file_changes(tmp_path):
+    path = tmp_path / "rated-config.yaml"
+    raw_config = build_config(prometheus_input("first", "organization_id"))
+    write_config(path, raw_config, 1_000_000_000)
+    registry = InputRegistry()
+    register_inputs(registry, raw_config)
+    watcher = ConfigWatcher(FileConfigurationManager(path), registry, interval=60)
+
+    assert watcher.check() is None
+
+    changed = deepcopy(raw_config)
+    changed["inputs"][0]["filters"]["fields"].append({"key": "region", "hash": True})
+    write_config(path, changed, 2_000_000_000)
+    result = watcher.check()
+    assert result is not None
+    assert result.swapped == [("first", 0)]
+    assert watcher.check() is None
+
+
+def test_watcher_keeps_the_configuration_when_the_new_one_is_invalid(tmp_path):
+    path = tmp_path / "rated-config.yaml"
+    raw_config = build_config(prometheus_input("first", "organization_id"))
+    write_config(path, raw_config, 1_000_000_000)
+    registry = InputRegistry()
+    filters = register_inputs(registry, raw_config)
+    watcher = ConfigWatcher(FileConfigurationManager(path), registry, interval=60)
+
+    invalid = deepcopy(raw_config)
+    invalid["inputs"][0]["type"] = "traces"
+    write_config(path, invalid, 2_000_000_000)
+
+    assert watcher.check() is None
+    assert registry.is_enabled(("first", 0))
+    assert filters[("first", 0)]([METRIC])
+
+
+def test_reload_disabled_starts_no_watcher(tmp_path):
+    path = tmp_path / "rated-config.yaml"
+    write_config(path, build_config(), 1_000_000_000)
+
+    assert (
+        start_config_reload(ReloadYamlConfig(), FileConfigurationManager(path)) is None
+    )
+
+
+def test_reload_of_a_configuration_that_cannot_change_is_disabled():
+    config_manager = Base64EncodedConfig(
+        base64.b64encode(yaml.safe_dump(build_config()).encode()).decode()
+    )
+    reload_config = ReloadYamlConfig(enabled=True)
+
+    assert start_config_reload(reload_config, config_manager) is None
+    assert spare_input_count(reload_config, config_manager) == 0
+
+
+def test_spare_inputs_are_only_built_when_reloading(tmp_path):
+    config_manager = FileConfigurationManager(tmp_path / "rated-config.yaml")
+
+    assert spare_input_count(None, config_manager) == 0
+    assert spare_input_count(ReloadYamlConfig(), config_manager) == 0
+    assert (
+        spare_input_count(
+            ReloadYamlConfig(enabled=True, spare_inputs=2), config_manager
+        )
+        == 2
+    )
+
+
+@patch("src.indexers.sources.rated.get_offset_tracker")
+@patch("src.indexers.sources.rated.get_config")
+def test_partition_of_removed_inputs_stops_advancing(
+    mock_get_config, mock_get_offset_tracker, monkeypatch
+):
+    registry = InputRegistry()
+    monkeypatch.setattr("src.indexers.sources.rated.input_registry", registry)
+    offset_tracker = MagicMock()
+    offset_tracker.get_current_offset.return_value = START_FROM
+    mock_get_offset_tracker.return_value = (offset_tracker, START_FROM)
+    register_inputs(
+        registry, build_config(prometheus_input("paused", "organization_id"))
+    )
+    partition = RatedPartition("paused", 0)
+
+    assert partition.next_batch()
+    offset_tracker.update_offset.assert_called_once()
+
+    registry.apply(RatedIndexerYamlConfig(**build_config()))
+    offset_tracker.update_offset.reset_mock()
+
+    assert partition.next_batch() == []
+    offset_tracker.update_offset.assert_not_called()
+
+
+@patch("src.indexers.sources.rated.get_offset_tracker")
+@patch("src.indexers.sources.rated.get_config")
+def test_offset_stops_at_windows_not_flushed_yet(
+    mock_get_config, mock_get_offset_tracker, monkeypatch
+):
+    registry = InputRegistry()
+    monkeypatch.setattr("src.indexers.sources.rated.input_registry", registry)
+    offset_tracker = MagicMock()
+    offset_tracker.get_current_offset.return_value = START_FROM - 60_000
+    mock_get_offset_tracker.return_value = (offset_tracker, START_FROM - 60_000)
+    aggregated = prometheus_input("aggregated", "organization_id")
+    aggregated["aggregation"] = {"window_seconds": 60}
+    filters = register_inputs(registry, build_config(aggregated))
+    reloadable_filter = filters[("aggregated", 0)]
+    reloadable_filter([METRIC])
+    partition = RatedPartition("aggregated", 0)
+
+    assert partition.next_batch()
+    offset_tracker.update_offset.assert_called_once_with(START_FROM)
+
+    assert reloadable_filter.flush(final=True)
+    offset_tracker.update_offset.reset_mock()
+
+    time_range = partition.next_batch()[0]
+    offset_tracker.update_offset.assert_called_once_with(time_range.end_time)
+
+
+def test_adding_aggregation_requires_a_restart():
+    registry = InputRegistry()
+    raw_config = build_config(prometheus_input("first", "organization_id"))
+    register_inputs(registry, raw_config)
+
+    changed = deepcopy(raw_config)
+    changed["inputs"][0]["aggregation"] = {"window_seconds": 60}
+    result = registry.apply(RatedIndexerYamlConfig(**changed))
+
+    assert result.restart_required == [("first", 0)]
+    assert result.swapped == []
@@ -0,0 +1,180 @@
+import json
+import pickle
+from unittest.mock import patch
+
+import pytest
+from bytewax.testing import TestingSource, run_main
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.sdk.trace.sampling import ALWAYS_OFF, ALWAYS_ON
+from pydantic import ValidationError
+from pytest_httpx import HTTPXMock
+
+from src.config.models.inputs.cloudwatch import CloudwatchConfig
+from src.config.models.inputs.input import IntegrationTypes, InputTypes
+from src.config.models.output import OutputTypes, RatedOutputConfig
+from src.config.models.tracing import TracingYamlConfig
+from src.indexers import tracing
+from src.indexers.dataflow import DataflowInput, build_dataflow
+from src.indexers.filters.types import FilteredEvent
+from src.indexers.sinks.rated import build_http_sink
+from src.indexers.sources.rated import TimeRange
+from src.indexers.tracing import (
+    TracedPage,
+    build_tracer_provider,
+    start_window,
+    upstream_span,
+)
+
+INGESTION_URL = "https://ingestion.test/v1/ingest"
+
+
+def use_tracer(monkeypatch, sampler) -> InMemorySpanExporter:
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(sampler=sampler)
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "tracer", provider.get_tracer("test"))
+    return exporter
+
+
+@pytest.fixture
+def span_exporter(monkeypatch):
+    return use_tracer(monkeypatch, ALWAYS_ON)
+
+
+def fetch_pages(time_range, client_id, integration_type):
+    for page in range(2):
+        with upstream_span("upstream.query"):
+            entries = [f"{time_range.start_time}_{page}_{i}" for i in range(30)]
+        yield entries
+
+
+def filter_entries(entries):
+    return [
+        FilteredEvent(
+            slaos_key="slaos_key",
+            idempotency_key=entry,
+            timestamp_ms=1_723_041_096_000,
+            organization_id="org_1",
+            values={"entry": entry},
+        )
+        for entry in entries
+    ]
+
+
+def test_window_is_traced_through_the_pipeline(span_exporter, httpx_mock: HTTPXMock):
+    httpx_mock.add_response(method="POST", status_code=200)
+    time_range = TimeRange(start_time=1, end_time=2)
+    start_window("slaos_key", time_range, 0)
+    window = time_range.span_context
+    assert window is not None
+
+    inputs = [
+        DataflowInput(
+            IntegrationTypes.CLOUDWATCH,
+            InputTypes.LOGS,
+            CloudwatchConfig(
+                aws_access_key_id="fake_access_key",
+                aws_secret_access_key="fake_secret_key",
+                region="us-west-2",
+            ),
+            TestingSource([time_range]),
+            fetch_pages,
+            filter_entries,
+            "slaos_key",
+        )
+    ]
+    output_config = RatedOutputConfig(
+        ingestion_id="ingestion_id",
+        ingestion_key="ingestion_key",
+        ingestion_url=INGESTION_URL,
+    )
+    flow = build_dataflow(
+        inputs,
+        OutputTypes.RATED,
+        lambda prefix: build_http_sink(output_config, slaos_key=prefix),
+    )
+
+    run_main(flow)
+
+    spans = span_exporter.get_finished_spans()
+    assert {span.context.trace_id for span in spans} == {window.trace_id}
+    names = [span.name for span in spans]
+    assert names.count("upstream.query") == 2
+    assert names.count("filter") == 2
+    # 60 events sent in batches of 50
+    assert names.count("sink") == 2
+
+    by_name = {span.name: span for span in spans}
+    assert by_name["fetch"].parent.span_id == window.span_id
+    assert by_name["upstream.query"].parent.span_id == by_name["fetch"].context.span_id
+    assert by_name["fetch"].attributes["rated.entries"] == 60
+    assert by_name["filter"].attributes["rated.events"] == 30
+    assert by_name["sink"].attributes["http.response.status_code"] == 200
+
+    assert len(httpx_mock.get_requests()) == 2
+
+
+def test_unsampled_window_records_nothing(monkeypatch):
+    span_exporter = use_tracer(monkeypatch, ALWAYS_OFF)
+    time_range = TimeRange(start_time=1, end_time=2)
+
+    start_window("slaos_key", time_range, 0)
+
+    assert time_range.span_context is None
+    assert span_exporter.get_finished_spans() == ()
+
+
+def test_upstream_span_outside_of_a_window(span_exporter):
+    with upstream_span("upstream.query") as span:
+        assert span is None
+
+    assert span_exporter.get_finished_spans() == ()
+
+
+def test_traced_page_is_picklable(span_exporter):
+    time_range = TimeRange(start_time=1, end_time=2)
+    start_window("slaos_key", time_range, 0)
+
+    page = pickle.loads(pickle.dumps(TracedPage([1, 2], time_range.span_context)))
+
+    assert page == [1, 2]
+    assert page.span_context == time_range.span_context
+
+
+def test_time_range_serialization_leaves_out_the_span_context(span_exporter):
+    time_range = TimeRange(start_time=1, end_time=2)
+    start_window("slaos_key", time_range, 0)
+
+    assert time_range.model_dump() == {"start_time": 1, "end_time": 2}
+
+
+def test_file_exporter_writes_one_span_per_line(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    opened = []
+
+    def tracked_open(*args, **kwargs):
+        opened.append(open(*args, **kwargs))
+        return opened[-1]
+
+    with patch("src.indexers.tracing.open", tracked_open, create=True):
+        provider = build_tracer_provider(
+            TracingYamlConfig(sample_rate=1, file={"path": str(path)})
+        )
+
+    with provider.get_tracer("test").start_as_current_span("window"):
+        pass
+    provider.shutdown()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["name"] == "window"
+    assert [file.closed for file in opened] == [True]
+
+
+def test_tracing_requires_an_exporter():
+    with pytest.raises(ValidationError, match="requires an `otlp` or a `file`"):
+        TracingYamlConfig(sample_rate=0.5)
@@ -0,0 +1,17 @@
+from src.utils.labels import intern_labels
+
+
+def test_intern_labels_shares_equal_label_sets():
+    labels = intern_labels({"instance": "web-01", "job": "api"})
+
+    assert labels == {"instance": "web-01", "job": "api"}
+    assert intern_labels({"instance": "web-01", "job": "api"}) is labels
+    assert intern_labels({"instance": "web-02", "job": "api"}) is not labels
+
+
+def test_intern_labels_passes_through_empty_and_unhashable_labels():
+    unhashable = {"tags": ["a", "b"]}
+
+    assert intern_labels(None) is None
+    assert intern_labels({}) == {}
+    assert intern_labels(unhashable) is unhashable
@@ -0,0 +1,27 @@
+import pytest
+
+from src.utils.registry import LazyRegistry
+
+
+def test_registry_imports_on_first_lookup():
+    registry = LazyRegistry("codec", {"json": "json:dumps"})
+
+    assert "json" in registry
+    assert registry.get("json")({"a": 1}) == '{"a": 1}'
+    assert registry.get("json") is registry.get("json")
+
+
+def test_registry_unknown_key():
+    registry = LazyRegistry("codec", {"json": "json:dumps"})
+
+    with pytest.raises(ValueError, match="Unsupported codec: yaml"):
+        registry.get("yaml")
+
+
+def test_registry_register_replaces_a_loaded_entry():
+    registry = LazyRegistry("codec", {"json": "json:dumps"})
+    registry.get("json")
+
+    registry.register("json", "json:loads")
+
+    assert registry.get("json")('{"a": 1}') == {"a": 1}
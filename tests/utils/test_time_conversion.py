@@ -0,0 +1,28 @@
+from datetime import datetime, timezone
+
+from src.utils.time_conversion import (
+    format_milliseconds,
+    from_milliseconds,
+    to_milliseconds,
+)
+
+
+def test_milliseconds_round_trip():
+    for ms in [1694390400000, 1694390400123, 1723041096100]:
+        assert to_milliseconds(from_milliseconds(ms)) == ms
+
+
+def test_to_milliseconds_truncates():
+    timestamp = datetime(2024, 10, 31, 12, 0, 5, 250_999, tzinfo=timezone.utc)
+
+    assert to_milliseconds(timestamp) == 1730376005250
+    assert to_milliseconds(timestamp.astimezone().replace(tzinfo=None)) == 1730376005250
+
+
+def test_format_milliseconds():
+    timestamp = datetime(2024, 10, 31, 12, 0, 5, 250_000, tzinfo=timezone.utc)
+
+    assert format_milliseconds(to_milliseconds(timestamp)) == "2024-10-31T12:00:05Z"
+    assert format_milliseconds(to_milliseconds(timestamp)) == timestamp.strftime(
+        "%Y-%m-%dT%H:%M:%SZ"
+    )